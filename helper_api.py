@@ -1,11 +1,21 @@
 # helper_api.py - 改修版（重複削除・config.yml対応）
-from typing import List, Dict, Any, Optional, Union, Tuple, Literal, Callable
+from typing import List, Dict, Any, Optional, Union, Tuple, Literal, Callable, Hashable, Iterator, AsyncIterator
 from pathlib import Path
 from dataclasses import dataclass
-from functools import wraps
-from datetime import datetime
+from functools import lru_cache, wraps
+from contextlib import contextmanager
+from datetime import date, datetime
+from enum import Enum
 from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import copy
+import contextvars
+import dataclasses
 import hashlib
+import inspect
+import itertools
 
 # === 必要な標準ライブラリ ===
 import logging
@@ -14,10 +24,16 @@ import yaml
 import os
 import time
 import json
+import pickle
 import re
+import sqlite3
+import sys
+import threading
+import weakref
+import zlib
 
 import tiktoken
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI, APIConnectionError, APIStatusError
 
 # -----------------------------------------------------
 # OpenAI API型定義
@@ -35,6 +51,10 @@ from openai.types.chat import (
     ChatCompletionMessageParam,
 )
 
+from helper_ratelimit import RateLimitScheduler
+from helper_usage import UsageLedger
+from helper_logging import setup_logging, correlation_scope, get_correlation_id, LogSampler
+
 # Role型の定義
 RoleType = Literal["user", "assistant", "system", "developer"]
 
@@ -42,11 +62,169 @@ RoleType = Literal["user", "assistant", "system", "developer"]
 # ==================================================
 # 設定管理
 # ==================================================
+class ConfigError(ValueError):
+    """config.yml の内容が不正（型・値の範囲・選択肢）"""
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, dict):
+        return ConfigSnapshot(value)
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _thaw(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_thaw(item) for item in value]
+    return value
+
+
+class ConfigSnapshot(dict):
+    """読み取り専用の設定スナップショット
+
+    入れ子の辞書も ConfigSnapshot、リストはタプルに凍結する（dict のサブクラスなので
+    isinstance(value, dict)・json.dumps・.get() は従来どおり使える）。識別子として使えるキーは
+    インスタンスの __dict__ に展開してあり、snapshot.api.timeout のような参照は通常の属性
+    アクセスだけで済む（ロックも関数呼び出しもない）。"gpt-4o-mini" のようなキーは [] で引く。
+    index=True で作ったスナップショット（ConfigManager が公開するもの）はドット区切りの
+    全パスの表も持ち、lookup("api.rate_limit.max_concurrency") が辞書1回の参照になる。
+    """
+
+    def __init__(self, data: Optional[Dict[str, Any]] = None, index: bool = False):
+        dict.__init__(self, {key: _freeze(value) for key, value in (data or {}).items()})
+        attributes = self.__dict__
+        for key, value in dict.items(self):
+            if isinstance(key, str) and key.isidentifier() and not key.startswith("_") \
+                    and key not in _SNAPSHOT_RESERVED:
+                attributes[key] = value
+        if index:
+            paths: Dict[str, Any] = {}
+            self._index(self, "", paths)
+            attributes["_paths"] = paths
+
+    @staticmethod
+    def _index(node: "ConfigSnapshot", prefix: str, paths: Dict[str, Any]) -> None:
+        for key, value in dict.items(node):
+            path = f"{prefix}{key}"
+            paths[path] = value
+            if isinstance(value, ConfigSnapshot):
+                ConfigSnapshot._index(value, f"{path}.", paths)
+
+    def __getattr__(self, name: str) -> Any:
+        # 通常の属性参照で見つからなかったときだけ呼ばれる
+        raise AttributeError(f"設定 '{name}' はありません（キー: {', '.join(map(str, self.keys()))}）")
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("ConfigSnapshot は変更できません（ConfigManager.set を使ってください）")
+
+    __setitem__ = __delitem__ = __setattr__ = __delattr__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __reduce__(self):
+        return ConfigSnapshot, (self.to_dict(),)
+
+    def lookup(self, key: str, default: Any = None) -> Any:
+        """ドット区切りのキーで値を引く（値が None・キーがなければ default）"""
+        paths = self.__dict__.get("_paths")
+        if paths is not None:
+            value = paths.get(key)
+        else:
+            value = self
+            for part in key.split("."):
+                value = value.get(part) if isinstance(value, dict) else None
+        return default if value is None else value
+
+    def changed(self, other: "ConfigSnapshot") -> List[str]:
+        """other と値が異なる末端のキー（ドット区切り）の一覧"""
+        mine = self.__dict__.get("_paths") or {}
+        theirs = other.__dict__.get("_paths") or {}
+        return sorted(
+            path for path in mine.keys() | theirs.keys()
+            if not isinstance(mine.get(path), dict) and not isinstance(theirs.get(path), dict)
+            and mine.get(path) != theirs.get(path)
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """通常の dict / list に戻したコピー（YAML 保存用など）"""
+        return _thaw(self)
+
+
+_SNAPSHOT_RESERVED = frozenset(dir(ConfigSnapshot))
+
+
+def _deep_merge(base: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any]:
+    """override の値で base を上書きした新しい辞書（辞書同士は再帰的に。None は未指定扱い）"""
+    merged = dict(base)
+    for key, value in override.items():
+        if value is None and key in merged:
+            continue
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _deep_merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def _set_path(data: Dict[str, Any], key: str, value: Any) -> None:
+    keys = key.split('.')
+    for k in keys[:-1]:
+        if not isinstance(data.get(k), dict):
+            data[k] = {}
+        data = data[k]
+    data[keys[-1]] = value
+
+
 class ConfigManager:
-    """設定ファイルの管理"""
+    """設定ファイルの管理
+
+    config.yml を既定値とマージ・検証してから読み取り専用の ConfigSnapshot にし、
+    まるごと差し替えて公開する。読む側は config.get("api.timeout") か
+    config.snapshot.api.timeout で、どちらもロックを取らない（スナップショットを1回
+    参照するだけなので、差し替えの途中の状態は見えない）。
+    hot_reload.enabled なら config.yml の変更を監視し（watchdog、未導入ならポーリング）、
+    書き込みが落ち着いてから（hot_reload.debounce 秒）再読み込みして subscribe した関数に通知する。
+    不正な内容に書き換えられた場合はエラーをログに出し、直前の設定を使い続ける。
+    """
 
     _instance = None
 
+    # 読み込み時に検査する数値項目（ドット区切りのキー → (型, 下限)）。None は「呼び出し側の既定値」として許す
+    _NUMERIC_RULES = {
+        "api.timeout"                        : (float, 0),
+        "api.max_retries"                    : (int, 0),
+        "api.message_limit"                  : (int, 1),
+        "api.rate_limit.requests_per_minute" : (float, 0),
+        "api.rate_limit.tokens_per_minute"   : (float, 0),
+        "api.rate_limit.max_concurrency"     : (int, 1),
+        "api.rate_limit.batch_share"         : (float, 0),
+        "api.rate_limit.default_output_tokens": (int, 1),
+        "cache.ttl"                          : (float, 0),
+        "cache.max_size"                     : (int, 1),
+        "cache.max_bytes"                    : (int, 1),
+        "cache.cleanup_interval"             : (float, 0),
+        "llm_cache.ttl"                      : (float, None),
+        "usage_ledger.rollup_interval"       : (float, 0),
+        "usage_ledger.retention_days"        : (int, 1),
+        "hot_reload.debounce"                : (float, 0),
+        "hot_reload.poll_interval"           : (float, 0),
+        "logging.max_bytes"                  : (int, 0),
+        "logging.backup_count"               : (int, 0),
+        "logging.queue_size"                 : (int, 1),
+        "logging.timer_sample_rate"          : (float, 0),
+        "logging.slow_call_seconds"          : (float, 0),
+    }
+    # 選択肢が決まっている項目
+    _CHOICE_RULES = {
+        "cache.policy"   : ("lru", "tinylfu"),
+        "cache.backend"  : ("memory", "redis"),
+        "llm_cache.store": ("disk", "memory", "redis"),
+        "logging.level"  : ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"),
+        "logging.drop_policy": ("drop_oldest", "drop_new"),
+    }
+
     def __new__(cls, config_path: str = "config.yml"):
         """シングルトンパターンで設定を管理"""
         if cls._instance is None:
@@ -58,12 +236,34 @@ class ConfigManager:
             return
         self._initialized = True
         self.config_path = Path(config_path)
-        self._config = self._load_config()
-        self._cache = {}
+        self._lock = threading.RLock()
+        self._overrides: Dict[str, Any] = {}
+        self._subscribers: List[Callable[[ConfigSnapshot, ConfigSnapshot], None]] = []
+        self._watcher = None
+        self._reload_timer: Optional[threading.Timer] = None
+        self.log_pipeline = None
+        self._snapshot = self._load_config()
         self.logger = self._setup_logger()
+        self.subscribe(self._apply_logging_level)
+        if self.get("hot_reload.enabled", True):
+            self.watch()
+
+    @property
+    def snapshot(self) -> ConfigSnapshot:
+        """現在の設定（読み取り専用。属性アクセスで読む: config.snapshot.api.timeout）"""
+        return self._snapshot
+
+    @property
+    def _config(self) -> ConfigSnapshot:
+        # 旧来の参照（設定内容の表示など）向け
+        return self._snapshot
 
     def _setup_logger(self) -> logging.Logger:
-        """ロガーの設定"""
+        """ロガーの設定
+
+        ロガーにはキューに入れるだけのハンドラーを付け、コンソール・ファイルへの書き込みは
+        リスナースレッドで行う（helper_logging.setup_logging。ファイルは JSON 1行1レコード）。
+        """
         logger = logging.getLogger('openai_helper')
 
         # 既に設定済みの場合はスキップ
@@ -74,44 +274,88 @@ class ConfigManager:
         level = getattr(logging, log_config.get("level", "INFO"))
         logger.setLevel(level)
 
-        # フォーマッターの設定
-        formatter = logging.Formatter(
-            log_config.get("format", "%(asctime)s - %(name)s - %(levelname)s - %(message)s")
-        )
-
-        # コンソールハンドラー
-        console_handler = logging.StreamHandler()
-        console_handler.setFormatter(formatter)
-        logger.addHandler(console_handler)
-
-        # ファイルハンドラー（設定されている場合）
-        log_file = log_config.get("file")
-        if log_file:
-            file_handler = logging.handlers.RotatingFileHandler(
-                log_file,
-                maxBytes=log_config.get("max_bytes", 10485760),
-                backupCount=log_config.get("backup_count", 5)
-            )
-            file_handler.setFormatter(formatter)
-            logger.addHandler(file_handler)
-
+        self.log_pipeline = setup_logging(logger, log_config)
         return logger
 
-    def _load_config(self) -> Dict[str, Any]:
-        """設定ファイルの読み込み"""
+    def _read_file(self) -> Tuple[Dict[str, Any], str]:
+        """config.yml を読み、(内容, ハッシュ) を返す"""
+        raw = self.config_path.read_bytes()
+        data = yaml.safe_load(raw) or {}
+        if not isinstance(data, dict):
+            raise ConfigError(f"{self.config_path} の最上位がマッピングではありません")
+        return data, hashlib.sha256(raw).hexdigest()
+
+    def _load_config(self) -> ConfigSnapshot:
+        """設定ファイルの読み込み（読めない・不正な場合は既定値）"""
+        self._file_data: Optional[Dict[str, Any]] = None
+        self._file_digest: Optional[str] = None
         if self.config_path.exists():
             try:
-                with open(self.config_path, 'r', encoding='utf-8') as f:
-                    config = yaml.safe_load(f)
-                    # 環境変数での設定オーバーライド
-                    self._apply_env_overrides(config)
-                    return config
+                data, digest = self._read_file()
+                snapshot = self._compile(data, self._overrides)
+                self._file_data, self._file_digest = data, digest
+                return snapshot
             except Exception as e:
                 print(f"設定ファイルの読み込みに失敗: {e}")
-                return self._get_default_config()
         else:
             print(f"設定ファイルが見つかりません: {self.config_path}")
-            return self._get_default_config()
+        return self._compile({}, self._overrides)
+
+    def _compile(self, data: Dict[str, Any], overrides: Dict[str, Any]) -> ConfigSnapshot:
+        """既定値とのマージ → 環境変数 → set() の値 → 検証 → スナップショット"""
+        merged = _deep_merge(copy.deepcopy(self._get_default_config()), copy.deepcopy(data))
+        # 環境変数での設定オーバーライド
+        self._apply_env_overrides(merged)
+        for key, value in overrides.items():
+            _set_path(merged, key, copy.deepcopy(value))
+        self._validate(merged)
+        return ConfigSnapshot(merged, index=True)
+
+    def _validate(self, data: Dict[str, Any]) -> None:
+        """型・範囲・選択肢の検査（問題をまとめて ConfigError にする）"""
+        def value_at(key: str) -> Any:
+            value = data
+            for part in key.split('.'):
+                value = value.get(part) if isinstance(value, dict) else None
+            return value
+
+        errors = []
+        # 既定値にあるセクションは属性で引かれるので、マッピングのままであること
+        for section, default in self._get_default_config().items():
+            if isinstance(default, dict) and not isinstance(data.get(section), dict):
+                errors.append(f"{section}: マッピングが必要です（{data.get(section)!r}）")
+        for key, (kind, minimum) in self._NUMERIC_RULES.items():
+            value = value_at(key)
+            if value is None:
+                continue
+            allowed = (int, float) if kind is float else (int,)
+            if isinstance(value, bool) or not isinstance(value, allowed):
+                errors.append(f"{key}: 数値（{kind.__name__}）が必要です（{value!r}）")
+            elif minimum is not None and value < minimum:
+                errors.append(f"{key}: {minimum} 以上が必要です（{value!r}）")
+        for key, choices in self._CHOICE_RULES.items():
+            value = value_at(key)
+            if value is not None and value not in choices:
+                errors.append(f"{key}: {' / '.join(choices)} のいずれかが必要です（{value!r}）")
+
+        pricing = data.get("model_pricing") or {}
+        if not isinstance(pricing, dict):
+            errors.append("model_pricing: マッピングが必要です")
+        else:
+            for model, prices in pricing.items():
+                if not isinstance(prices, dict) or not isinstance(prices.get("input"), (int, float)):
+                    errors.append(f"model_pricing.{model}: 数値の input が必要です")
+                    continue
+                for field_name in ("cached_input", "output"):
+                    if field_name in prices and not isinstance(prices[field_name], (int, float)):
+                        errors.append(f"model_pricing.{model}.{field_name}: 数値が必要です")
+
+        available = value_at("models.available")
+        if available is not None and not isinstance(available, list):
+            errors.append("models.available: リストが必要です")
+
+        if errors:
+            raise ConfigError("設定の検証に失敗:\n  " + "\n  ".join(errors))
 
     def _apply_env_overrides(self, config: Dict[str, Any]) -> None:
         """環境変数による設定オーバーライド"""
@@ -138,7 +382,15 @@ class ConfigManager:
                 "timeout"       : 30,
                 "max_retries"   : 3,
                 "openai_api_key": None,
-                "message_limit" : 50
+                "base_url"      : None,
+                "message_limit" : 50,
+                "rate_limit"    : {
+                    "requests_per_minute"  : 500,
+                    "tokens_per_minute"    : 200000,
+                    "max_concurrency"      : 8,
+                    "batch_share"          : 0.75,
+                    "default_output_tokens": 1024
+                }
             },
             "ui"              : {
                 "page_title"      : "OpenAI API Demo",
@@ -147,16 +399,43 @@ class ConfigManager:
                 "text_area_height": 75
             },
             "cache"           : {
-                "enabled" : True,
-                "ttl"     : 3600,
-                "max_size": 100
+                "enabled"         : True,
+                "ttl"             : 3600,
+                "max_size"        : 100,
+                "max_bytes"       : 67108864,
+                "policy"          : "lru",
+                "cleanup_interval": 60,
+                "backend"         : "memory"
+            },
+            "llm_cache"       : {
+                "enabled": True,
+                "store"  : "disk",
+                "ttl"    : 86400,
+                "path"   : "llm_cache.db"
+            },
+            "usage_ledger"    : {
+                "enabled"        : True,
+                "directory"      : "usage_ledger",
+                "rollup_interval": 60,
+                "retention_days" : 30
+            },
+            "hot_reload"      : {
+                "enabled"      : True,
+                "debounce"     : 0.5,
+                "poll_interval": 1.0
             },
             "logging"         : {
                 "level"       : "INFO",
                 "format"      : "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-                "file"        : None,
-                "max_bytes"   : 10485760,
-                "backup_count": 5
+                "file"             : None,
+                "max_bytes"        : 10485760,
+                "backup_count"     : 5,
+                "json"             : True,
+                "console_json"     : False,
+                "queue_size"       : 10000,
+                "drop_policy"      : "drop_oldest",
+                "timer_sample_rate": 0.1,
+                "slow_call_seconds": 5.0
             },
             "error_messages"  : {
                 "ja": {
@@ -180,45 +459,143 @@ class ConfigManager:
         }
 
     def get(self, key: str, default: Any = None) -> Any:
-        """設定値の取得（キャッシュ付き）"""
-        if key in self._cache:
-            return self._cache[key]
-
-        keys = key.split('.')
-        value = self._config
-        for k in keys:
-            if isinstance(value, dict):
-                value = value.get(k)
-            else:
-                value = default
-                break
-
-        result = value if value is not None else default
-        self._cache[key] = result
-        return result
+        """設定値の取得（ドット区切り。ロックなしで現在のスナップショットから引く）"""
+        return self._snapshot.lookup(key, default)
 
     def set(self, key: str, value: Any) -> None:
-        """設定値の更新"""
-        keys = key.split('.')
-        config = self._config
-        for k in keys[:-1]:
-            config = config.setdefault(k, {})
-        config[keys[-1]] = value
+        """設定値の更新（新しいスナップショットを作って差し替える）
 
-        # キャッシュクリア
-        self._cache.pop(key, None)
+        set した値はファイルの再読み込み後も優先される。検証に通らない値なら ConfigError。
+        """
+        with self._lock:
+            overrides = dict(self._overrides)
+            overrides[key] = value
+            snapshot = self._compile(self._file_data or {}, overrides)
+            self._overrides = overrides
+            self._publish(snapshot)
+
+    def reload(self, force: bool = True) -> bool:
+        """設定の再読み込み。差し替えたら True
+
+        force=False（ファイル監視から）ならファイルの内容が変わっていないときは何もしない。
+        読み込み・検証に失敗したときはエラーをログに出して今のスナップショットを使い続ける。
+        """
+        with self._lock:
+            try:
+                data, digest = self._read_file()
+                if not force and digest == self._file_digest:
+                    return False
+                snapshot = self._compile(data, self._overrides)
+            except (OSError, yaml.YAMLError, ConfigError) as e:
+                self.logger.error(f"設定の再読み込みに失敗（現在の設定を継続）: {e}")
+                return False
+            self._file_data, self._file_digest = data, digest
+            changed = snapshot.changed(self._snapshot)
+            self._publish(snapshot)
+        if changed:
+            self.logger.info(f"設定を再読み込みしました: {', '.join(changed[:10])}"
+                             + (f" ほか {len(changed) - 10} 件" if len(changed) > 10 else ""))
+        return True
 
-    def reload(self):
-        """設定の再読み込み"""
-        self._config = self._load_config()
-        self._cache.clear()
+    def _publish(self, snapshot: ConfigSnapshot) -> None:
+        previous, self._snapshot = self._snapshot, snapshot
+        for callback in list(self._subscribers):
+            try:
+                callback(snapshot, previous)
+            except Exception as e:
+                self.logger.error(f"設定変更の通知先でエラー: {e}")
+
+    def subscribe(self, callback: Callable[[ConfigSnapshot, ConfigSnapshot], None]) -> Callable[[], None]:
+        """設定が差し替わるたびに callback(新しいスナップショット, 直前のスナップショット) を呼ぶ
+
+        戻り値は登録解除用の関数。変わったキーは new.changed(old) で分かる。
+        """
+        with self._lock:
+            self._subscribers.append(callback)
+
+        def unsubscribe() -> None:
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+
+        return unsubscribe
+
+    def _apply_logging_level(self, snapshot: ConfigSnapshot, previous: ConfigSnapshot) -> None:
+        level = snapshot.lookup("logging.level")
+        if level and level != previous.lookup("logging.level"):
+            self.logger.setLevel(getattr(logging, level))
+
+    # ---------- ファイル監視 ----------
+    def watch(self) -> bool:
+        """config.yml の変更監視を開始（watchdog があれば OS の通知、なければ mtime のポーリング）"""
+        with self._lock:
+            if self._watcher is not None:
+                return True
+            target = str(self.config_path.resolve())
+            try:
+                from watchdog.observers import Observer
+                from watchdog.events import FileSystemEventHandler
+            except ImportError:
+                self._watcher = _ConfigPoller(self.config_path, self.get("hot_reload.poll_interval", 1.0),
+                                              self._schedule_reload)
+                self._watcher.start()
+                return True
+
+            manager = self
+
+            class _Handler(FileSystemEventHandler):
+                # 自分で読むときの opened / closed_no_write では反応しない
+                EVENT_TYPES = ("created", "modified", "moved", "deleted", "closed")
+
+                def on_any_event(self, event):
+                    if event.is_directory or event.event_type not in self.EVENT_TYPES:
+                        return
+                    paths = (event.src_path, getattr(event, "dest_path", ""))
+                    if any(path and os.path.abspath(path) == target for path in paths):
+                        manager._schedule_reload()
+
+            observer = Observer()
+            # エディタは一時ファイルからの rename で保存することが多いので、ディレクトリごと監視する
+            observer.schedule(_Handler(), os.path.dirname(target), recursive=False)
+            observer.daemon = True
+            try:
+                observer.start()
+            except OSError as e:
+                self.logger.warning(f"設定ファイルの監視を開始できません: {e}")
+                return False
+            self._watcher = observer
+            return True
+
+    def unwatch(self) -> None:
+        """変更監視を停止"""
+        with self._lock:
+            watcher, self._watcher = self._watcher, None
+            if self._reload_timer is not None:
+                self._reload_timer.cancel()
+                self._reload_timer = None
+        if watcher is not None:
+            watcher.stop()
+
+    def _schedule_reload(self) -> None:
+        """変更通知ごとにタイマーを延長し、debounce 秒静かになってから再読み込みする"""
+        with self._lock:
+            if self._reload_timer is not None:
+                self._reload_timer.cancel()
+            self._reload_timer = threading.Timer(self.get("hot_reload.debounce", 0.5), self.reload,
+                                                 kwargs={"force": False})
+            self._reload_timer.daemon = True
+            self._reload_timer.start()
 
     def save(self, filepath: str = None) -> bool:
-        """設定をファイルに保存"""
+        """設定をファイルに保存（ファイルの内容に set した値を反映したもの。既定値・環境変数は含めない）"""
         try:
             save_path = Path(filepath) if filepath else self.config_path
+            with self._lock:
+                data = copy.deepcopy(self._file_data) if self._file_data is not None else self._snapshot.to_dict()
+                for key, value in self._overrides.items():
+                    _set_path(data, key, copy.deepcopy(value))
             with open(save_path, 'w', encoding='utf-8') as f:
-                yaml.safe_dump(self._config, f, default_flow_style=False, allow_unicode=True)
+                yaml.safe_dump(data, f, default_flow_style=False, allow_unicode=True)
             return True
         except Exception as e:
             if hasattr(self, 'logger'):
@@ -226,6 +603,35 @@ class ConfigManager:
             return False
 
 
+class _ConfigPoller(threading.Thread):
+    """watchdog がない環境での設定ファイル監視（mtime とサイズを一定間隔で確認）"""
+
+    def __init__(self, path: Path, interval: float, on_change: Callable[[], None]):
+        super().__init__(name="config-poller", daemon=True)
+        self.path = path
+        self.interval = interval
+        self.on_change = on_change
+        self._stopped = threading.Event()
+
+    def _signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = self.path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def run(self) -> None:
+        last = self._signature()
+        while not self._stopped.wait(self.interval):
+            current = self._signature()
+            if current != last:
+                last = current
+                self.on_change()
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+
 # グローバル設定インスタンス
 config = ConfigManager("config.yml")
 logger = config.logger
@@ -234,53 +640,616 @@ logger = config.logger
 # ==================================================
 # メモリベースキャッシュ
 # ==================================================
-class MemoryCache:
-    """メモリベースキャッシュ"""
+class _CacheEntry:
+    """キャッシュの1エントリ（値・有効期限・推定バイト数）"""
 
-    def __init__(self):
-        self._storage = {}
-        self._enabled = config.get("cache.enabled", True)
-        self._ttl = config.get("cache.ttl", 3600)
-        self._max_size = config.get("cache.max_size", 100)
-
-    def get(self, key: str) -> Any:
-        """キャッシュから値を取得"""
-        if not self._enabled or key not in self._storage:
-            return None
+    __slots__ = ("value", "expires_at", "size")
 
-        cached_data = self._storage[key]
-        if time.time() - cached_data['timestamp'] > self._ttl:
-            del self._storage[key]
-            return None
+    def __init__(self, value: Any, expires_at: Optional[float], size: int):
+        self.value = value
+        self.expires_at = expires_at
+        self.size = size
 
-        return cached_data['result']
 
-    def set(self, key: str, value: Any) -> None:
-        """キャッシュに値を設定"""
+class _FrequencySketch:
+    """TinyLFU の頻度推定用 Count-Min Sketch（4ビット相当のカウンタを4行）
+
+    最近のアクセス頻度を近似するため、追加回数が sample_size に達したら全カウンタを半減させる。
+    """
+
+    _SEEDS = (0x9E3779B1, 0x85EBCA77, 0xC2B2AE3D, 0x27D4EB2F)
+    _MAX_COUNT = 15
+
+    def __init__(self, capacity: int):
+        width = 1
+        while width < max(16, capacity * 4):
+            width <<= 1
+        self._mask = width - 1
+        self._rows = [bytearray(width) for _ in self._SEEDS]
+        self._sample_size = max(10, capacity * 10)
+        self._additions = 0
+
+    def _indexes(self, key: Hashable):
+        h = hash(key) & 0xFFFFFFFF
+        for seed in self._SEEDS:
+            yield ((h * seed) >> 16) & self._mask
+
+    def increment(self, key: Hashable) -> None:
+        for row, index in zip(self._rows, self._indexes(key)):
+            if row[index] < self._MAX_COUNT:
+                row[index] += 1
+        self._additions += 1
+        if self._additions >= self._sample_size:
+            self._reset()
+
+    def frequency(self, key: Hashable) -> int:
+        return min(row[index] for row, index in zip(self._rows, self._indexes(key)))
+
+    def _reset(self) -> None:
+        self._rows = [bytearray(count >> 1 for count in row) for row in self._rows]
+        self._additions //= 2
+
+
+class MemoryCache:
+    """メモリベースキャッシュ（O(1) の LRU、任意で TinyLFU 入場判定）
+
+    - 件数（max_size）と推定バイト数（max_bytes）の両方を上限とし、超えた分は最も古く使われた
+      エントリから追い出す（OrderedDict の先頭を取り出すだけなので1件あたり O(1)）
+    - policy="tinylfu" では、追い出し対象より参照頻度の低い新規キーはキャッシュに入れない
+      （一度しか使われないキーがよく使われるエントリを押し出すのを防ぐ）
+    - 有効期限はエントリごと（set の ttl、省略時は既定の TTL）。参照時に期限切れなら破棄し、
+      cleanup_interval 秒ごとに期限切れをまとめて掃除する
+    - 全操作をロックで保護するのでスレッド間で共有できる
+    """
+
+    # 他のプロセスと共有しない（cache_result がプロセス内だけのキーを置いてよい）
+    shared = False
+
+    POLICIES = ("lru", "tinylfu")
+
+    def __init__(self, max_size: Optional[int] = None, max_bytes: Optional[int] = None,
+                 ttl: Optional[float] = None, policy: Optional[str] = None,
+                 cleanup_interval: Optional[float] = None, enabled: Optional[bool] = None):
+        self._storage: "OrderedDict[Hashable, _CacheEntry]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._enabled = config.get("cache.enabled", True) if enabled is None else enabled
+        self._ttl = config.get("cache.ttl", 3600) if ttl is None else ttl
+        self._max_size = config.get("cache.max_size", 100) if max_size is None else max_size
+        self._max_bytes = config.get("cache.max_bytes", 64 * 1024 * 1024) if max_bytes is None else max_bytes
+        self._cleanup_interval = (config.get("cache.cleanup_interval", 60)
+                                  if cleanup_interval is None else cleanup_interval)
+        self._policy = (policy or config.get("cache.policy", "lru")).lower()
+        if self._policy not in self.POLICIES:
+            raise ValueError(f"未対応のキャッシュポリシー: {self._policy}（{', '.join(self.POLICIES)}）")
+        self._sketch = _FrequencySketch(self._max_size) if self._policy == "tinylfu" else None
+        self._bytes = 0
+        self._last_cleanup = time.monotonic()
+        self._counters = dict.fromkeys(("hits", "misses", "sets", "evictions", "expirations", "rejections"), 0)
+
+    # ---------- 参照・更新 ----------
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """キャッシュから値を取得（なければ default）"""
         if not self._enabled:
-            return
+            return default
+
+        with self._lock:
+            now = time.monotonic()
+            self._maybe_cleanup(now)
+            if self._sketch is not None:
+                self._sketch.increment(key)
+
+            entry = self._storage.get(key)
+            if entry is None:
+                self._counters["misses"] += 1
+                return default
+            if entry.expires_at is not None and entry.expires_at <= now:
+                self._remove(key)
+                self._counters["expirations"] += 1
+                self._counters["misses"] += 1
+                return default
+
+            self._storage.move_to_end(key)
+            self._counters["hits"] += 1
+            return entry.value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> bool:
+        """キャッシュに値を設定（上限超過や入場判定で入れなかった場合は False）
+
+        ttl は秒。省略時は既定の TTL、0 以下なら期限なし。
+        """
+        if not self._enabled:
+            return False
 
-        self._storage[key] = {
-            'result'   : value,
-            'timestamp': time.time()
-        }
+        size = self.estimate_size(key) + self.estimate_size(value)
+        ttl = self._ttl if ttl is None else ttl
+        with self._lock:
+            now = time.monotonic()
+            self._maybe_cleanup(now)
+            if size > self._max_bytes or self._max_size <= 0:
+                self._counters["rejections"] += 1
+                return False
+
+            if key in self._storage:
+                self._remove(key)
+            elif self._sketch is not None and not self._admit(key, size):
+                self._counters["rejections"] += 1
+                return False
+
+            self._storage[key] = _CacheEntry(value, now + ttl if ttl and ttl > 0 else None, size)
+            self._bytes += size
+            self._counters["sets"] += 1
+            self._evict()
+            return True
 
-        # サイズ制限チェック
-        if len(self._storage) > self._max_size:
-            oldest_key = min(self._storage, key=lambda k: self._storage[k]['timestamp'])
-            del self._storage[oldest_key]
+    def delete(self, key: Hashable) -> bool:
+        """キーを削除（存在した場合は True）"""
+        with self._lock:
+            if key not in self._storage:
+                return False
+            self._remove(key)
+            return True
 
     def clear(self) -> None:
         """キャッシュクリア"""
-        self._storage.clear()
+        with self._lock:
+            self._storage.clear()
+            self._bytes = 0
 
     def size(self) -> int:
-        """キャッシュサイズ"""
+        """キャッシュサイズ（件数）"""
+        return len(self._storage)
+
+    def __len__(self) -> int:
         return len(self._storage)
 
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._storage.get(key)
+            return entry is not None and (entry.expires_at is None or entry.expires_at > time.monotonic())
+
+    # ---------- 追い出し・期限切れ ----------
+    def _remove(self, key: Hashable) -> None:
+        self._bytes -= self._storage.pop(key).size
+
+    def _over_budget(self, extra_bytes: int = 0, extra_entries: int = 0) -> bool:
+        return (len(self._storage) + extra_entries > self._max_size
+                or self._bytes + extra_bytes > self._max_bytes)
+
+    def _evict(self) -> None:
+        """上限内に収まるまで最も古く使われたエントリから追い出す"""
+        while self._storage and self._over_budget():
+            _, entry = self._storage.popitem(last=False)
+            self._bytes -= entry.size
+            self._counters["evictions"] += 1
+
+    def _admit(self, key: Hashable, size: int) -> bool:
+        """TinyLFU: 新規キーを入れると追い出しが起きる場合、追い出される側より頻度が高いときだけ入れる"""
+        if not self._over_budget(size, 1):
+            return True
+        victim = next(iter(self._storage), None)
+        return victim is None or self._sketch.frequency(key) > self._sketch.frequency(victim)
+
+    def _maybe_cleanup(self, now: float) -> None:
+        if self._cleanup_interval and now - self._last_cleanup >= self._cleanup_interval:
+            self.purge_expired(now)
+
+    def purge_expired(self, now: Optional[float] = None) -> int:
+        """期限切れのエントリをまとめて削除し、件数を返す"""
+        with self._lock:
+            now = time.monotonic() if now is None else now
+            expired = [key for key, entry in self._storage.items()
+                       if entry.expires_at is not None and entry.expires_at <= now]
+            for key in expired:
+                self._remove(key)
+            self._counters["expirations"] += len(expired)
+            self._last_cleanup = now
+            return len(expired)
+
+    # ---------- 統計 ----------
+    @staticmethod
+    def estimate_size(value: Any) -> int:
+        """値の推定バイト数（pickle できればその長さ、できなければ sys.getsizeof）"""
+        if isinstance(value, (bytes, bytearray)):
+            return len(value)
+        if isinstance(value, str):
+            return len(value.encode("utf-8"))
+        try:
+            return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        except Exception:
+            return sys.getsizeof(value)
+
+    def stats(self) -> Dict[str, Any]:
+        """ヒット・ミス・追い出し・バイト数などの統計"""
+        with self._lock:
+            lookups = self._counters["hits"] + self._counters["misses"]
+            return {
+                **self._counters,
+                "hit_rate" : self._counters["hits"] / lookups if lookups else 0.0,
+                "entries"  : len(self._storage),
+                "bytes"    : self._bytes,
+                "max_size" : self._max_size,
+                "max_bytes": self._max_bytes,
+                "ttl"      : self._ttl,
+                "policy"   : self._policy,
+                "enabled"  : self._enabled,
+            }
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._counters = dict.fromkeys(self._counters, 0)
+
+
+# ==================================================
+# 共有キャッシュ（L1: プロセス内 / L2: Redis）
+# ==================================================
+class RedisCacheTier:
+    """Redis 上の L2 キャッシュ（値は pickle、大きいものは zlib 圧縮した1バイトヘッダ付きバイナリ）
+
+    Redis に接続できない間は retry_interval 秒ごとにしか再接続を試みず、
+    その間はキャッシュなし（L1 のみ）として振る舞う。
+    """
+
+    _RAW, _ZLIB = b"\x00", b"\x01"
+
+    def __init__(self, url: Optional[str] = None, compress_min_bytes: Optional[int] = None,
+                 socket_timeout: Optional[float] = None, retry_interval: Optional[float] = None):
+        import redis
+
+        self.url = url or config.get("cache.redis.url") or os.getenv("REDIS_URL", "redis://localhost:6379/0")
+        self.compress_min_bytes = (config.get("cache.redis.compress_min_bytes", 1024)
+                                   if compress_min_bytes is None else compress_min_bytes)
+        self.retry_interval = config.get("cache.redis.retry_interval", 30) if retry_interval is None else retry_interval
+        timeout = config.get("cache.redis.socket_timeout", 0.5) if socket_timeout is None else socket_timeout
+        # from_url は接続しない（最初のコマンドで接続する）
+        self.client = redis.Redis.from_url(self.url, socket_timeout=timeout, socket_connect_timeout=timeout)
+        self._errors = (redis.exceptions.RedisError, OSError)
+        self._down_until = 0.0
+        self.counters = dict.fromkeys(("hits", "misses", "sets", "errors", "bytes_written"), 0)
+
+    # ---------- シリアライズ ----------
+    def dumps(self, value: Any) -> bytes:
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(payload) >= self.compress_min_bytes:
+            compressed = zlib.compress(payload, 1)
+            if len(compressed) < len(payload):
+                return self._ZLIB + compressed
+        return self._RAW + payload
+
+    def loads(self, data: bytes) -> Any:
+        header, payload = data[:1], data[1:]
+        if header == self._ZLIB:
+            payload = zlib.decompress(payload)
+        return pickle.loads(payload)
+
+    # ---------- 呼び出し ----------
+    @property
+    def available(self) -> bool:
+        return time.monotonic() >= self._down_until
+
+    def call(self, operation: Callable[[], Any], default: Any = None) -> Any:
+        """Redis 操作を実行（停止中・エラー時は default）"""
+        if not self.available:
+            return default
+        try:
+            return operation()
+        except self._errors as e:
+            self.counters["errors"] += 1
+            self._down_until = time.monotonic() + self.retry_interval
+            logger.warning(f"Redis キャッシュに接続できません（{self.retry_interval}秒間 L1 のみで動作）: {e}")
+            return default
+
+    def get(self, key: str) -> Tuple[Optional[Any], Optional[float]]:
+        """(値, 残り秒数) を返す（なければ (None, None)）"""
+        def fetch():
+            pipe = self.client.pipeline(transaction=False)
+            pipe.get(key)
+            pipe.pttl(key)
+            return pipe.execute()
+
+        data, pttl = self.call(fetch, (None, None))
+        if data is None:
+            self.counters["misses"] += 1
+            return None, None
+        try:
+            value = self.loads(data)
+        except Exception as e:
+            # 互換性のない形式（クラス定義の変更など）は無かったことにする
+            logger.warning(f"Redis キャッシュの値を復元できません（{key}）: {e}")
+            self.call(lambda: self.client.delete(key))
+            self.counters["misses"] += 1
+            return None, None
+        self.counters["hits"] += 1
+        return value, (pttl / 1000 if pttl and pttl > 0 else None)
+
+    def set(self, key: str, value: Any, ttl: Optional[float]) -> bool:
+        try:
+            data = self.dumps(value)
+        except Exception as e:
+            logger.debug(f"Redis キャッシュに保存できない値（{key}）: {e}")
+            return False
+        px = int(ttl * 1000) if ttl and ttl > 0 else None
+        if not self.call(lambda: self.client.set(key, data, px=px), False):
+            return False
+        self.counters["sets"] += 1
+        self.counters["bytes_written"] += len(data)
+        return True
+
+    def delete(self, key: str) -> bool:
+        return bool(self.call(lambda: self.client.delete(key), 0))
+
+    def incr(self, key: str) -> Optional[int]:
+        return self.call(lambda: self.client.incr(key))
+
+    def mget(self, keys: List[str]) -> List[Optional[bytes]]:
+        return self.call(lambda: self.client.mget(keys), [None] * len(keys))
+
+
+class TieredCache:
+    """L1（MemoryCache）＋ L2（Redis）の2段キャッシュ。MemoryCache と同じ操作で使える
+
+    キーは "{prefix}:{cache.version}.{epoch}:{名前空間}:{名前空間の版}:{キー}"。
+    clear() は epoch を、invalidate_namespace() は名前空間の版を Redis 上で1つ進めるだけで、
+    全プロセスの古いエントリがまとめて参照されなくなる（実体は TTL で消える）。
+    版は version_check_interval 秒ごとに Redis から読み直し、L1 の寿命は l1_ttl 秒までに
+    抑えるので、他プロセスでの削除・無効化もその程度の遅れで反映される。
+    """
+
+    # 全プロセスで共有する（プロセス内だけのキーは l1 にだけ置く）
+    shared = True
+
+    def __init__(self, l1: Optional[MemoryCache] = None, l2: Optional[RedisCacheTier] = None,
+                 prefix: Optional[str] = None, l1_ttl: Optional[float] = None,
+                 version_check_interval: Optional[float] = None):
+        self.l1 = l1 or MemoryCache()
+        self.l2 = l2 or RedisCacheTier()
+        self.prefix = prefix or config.get("cache.redis.prefix", "openai_mcp")
+        self.schema_version = config.get("cache.version", 1)
+        self.l1_ttl = config.get("cache.redis.l1_ttl", 30) if l1_ttl is None else l1_ttl
+        self.version_check_interval = (config.get("cache.redis.version_check_interval", 2)
+                                       if version_check_interval is None else version_check_interval)
+        self._versions: Dict[str, Tuple[int, int, float]] = {}
+        self._lock = threading.Lock()
+
+    # ---------- キー・版 ----------
+    @staticmethod
+    def _split(key: Hashable) -> Tuple[str, tuple]:
+        if isinstance(key, tuple) and key:
+            return str(key[0]), key[1:]
+        return "default", (key,)
+
+    def _version_keys(self, namespace: str) -> Tuple[str, str]:
+        return f"{self.prefix}:epoch", f"{self.prefix}:ns:{namespace}"
+
+    def _versions_for(self, namespace: str) -> Tuple[int, int]:
+        now = time.monotonic()
+        with self._lock:
+            cached = self._versions.get(namespace)
+        if cached and now - cached[2] < self.version_check_interval:
+            return cached[0], cached[1]
+        epoch, version = self.l2.mget(list(self._version_keys(namespace)))
+        if epoch is None and version is None and cached and not self.l2.available:
+            return cached[0], cached[1]  # Redis 停止中は最後に読めた版を使う
+        result = (int(epoch or 0), int(version or 0), now)
+        with self._lock:
+            self._versions[namespace] = result
+        return result[0], result[1]
+
+    def full_key(self, key: Hashable) -> str:
+        namespace, rest = self._split(key)
+        epoch, version = self._versions_for(namespace)
+        suffix = ":".join(str(part) for part in rest)
+        return f"{self.prefix}:{self.schema_version}.{epoch}:{namespace}:{version}:{suffix}"
+
+    # ---------- 参照・更新 ----------
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        full_key = self.full_key(key)
+        value = self.l1.get(full_key, _MISSING)
+        if value is not _MISSING:
+            return value
+        value, remaining = self.l2.get(full_key)
+        if value is None:
+            return default
+        self.l1.set(full_key, value, ttl=min(remaining or self.l1_ttl, self.l1_ttl))
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> bool:
+        full_key = self.full_key(key)
+        ttl = self.l1._ttl if ttl is None else ttl
+        stored = self.l1.set(full_key, value, ttl=min(ttl, self.l1_ttl) if ttl and ttl > 0 else self.l1_ttl)
+        return self.l2.set(full_key, value, ttl) or stored
+
+    def delete(self, key: Hashable) -> bool:
+        full_key = self.full_key(key)
+        deleted = self.l1.delete(full_key)
+        return self.l2.delete(full_key) or deleted
+
+    def invalidate_namespace(self, namespace: str) -> None:
+        """名前空間（cache_result では関数ごと）の全エントリを全プロセスで無効化"""
+        self.l2.incr(self._version_keys(namespace)[1])
+        with self._lock:
+            self._versions.pop(namespace, None)
+
+    def clear(self) -> None:
+        """全プロセス共通のキャッシュをまとめて無効化"""
+        self.l1.clear()
+        self.l2.incr(self._version_keys("")[0])
+        with self._lock:
+            self._versions.clear()
+
+    # ---------- 統計 ----------
+    def size(self) -> int:
+        return self.l1.size()
+
+    def __len__(self) -> int:
+        return self.l1.size()
+
+    def stats(self) -> Dict[str, Any]:
+        """L1 の統計に L2（Redis）の統計を加えたもの"""
+        stats = self.l1.stats()
+        l2 = dict(self.l2.counters)
+        lookups = l2["hits"] + l2["misses"]
+        l2["hit_rate"] = l2["hits"] / lookups if lookups else 0.0
+        l2["available"] = self.l2.available
+        stats.update(backend="redis", l2=l2)
+        return stats
+
 
-# グローバルキャッシュインスタンス
-cache = MemoryCache()
+class DiskCache:
+    """SQLite ファイルに保存するキャッシュ（プロセスの再起動や複数プロセスをまたいで残る）
+
+    MemoryCache と同じ get / set / delete / clear / stats を持つ。値は pickle で保存し、
+    期限切れの行は読み出し時と cleanup_interval ごとの掃除で消す。タプルのキー（cache_result の
+    (名前空間, 世代, ハッシュ)）は ":" でつないだ文字列にして保存する。
+    """
+
+    # 同じファイルを開く全プロセスで共有する
+    shared = True
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS cache (
+            key        TEXT PRIMARY KEY,
+            value      BLOB NOT NULL,
+            expires_at REAL,
+            created_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_cache_expires ON cache(expires_at);
+    """
+
+    def __init__(self, path: str, ttl: Optional[float] = None, cleanup_interval: Optional[float] = None):
+        self.path = str(path)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._ttl = config.get("cache.ttl", 3600) if ttl is None else ttl
+        self.cleanup_interval = config.get("cache.cleanup_interval", 60) if cleanup_interval is None else cleanup_interval
+        self._last_cleanup = time.monotonic()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.sets = 0
+        with self._connect() as conn:
+            conn.executescript(self.SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _db_key(key: Hashable) -> str:
+        if isinstance(key, tuple):
+            return ":".join(str(part) for part in key)
+        return str(key)
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        key = self._db_key(key)
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is not None and row[1] is not None and row[1] <= now:
+                conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                row = None
+        if row is not None:
+            try:
+                value = pickle.loads(row[0])
+            except Exception as e:
+                logger.warning(f"ディスクキャッシュの値を読めないため破棄します: {e}")
+                self.delete(key)
+            else:
+                self._count("hits")
+                return value
+        self._count("misses")
+        return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> bool:
+        key = self._db_key(key)
+        ttl = self._ttl if ttl is None else ttl
+        now = time.time()
+        try:
+            data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            logger.warning(f"ディスクキャッシュに保存できない値です: {e}")
+            return False
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at, created_at) VALUES (?, ?, ?, ?)",
+                (key, sqlite3.Binary(data), now + ttl if ttl and ttl > 0 else None, now),
+            )
+        self._count("sets")
+        if time.monotonic() - self._last_cleanup >= self.cleanup_interval:
+            self.purge_expired()
+        return True
+
+    def delete(self, key: Hashable) -> bool:
+        key = self._db_key(key)
+        with self._connect() as conn:
+            return conn.execute("DELETE FROM cache WHERE key = ?", (key,)).rowcount > 0
+
+    def clear(self) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM cache")
+
+    def purge_expired(self) -> int:
+        """期限切れの行をまとめて削除し、削除件数を返す"""
+        self._last_cleanup = time.monotonic()
+        with self._connect() as conn:
+            return conn.execute("DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at <= ?",
+                                (time.time(),)).rowcount
+
+    def size(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def __len__(self) -> int:
+        return self.size()
+
+    def __contains__(self, key: Hashable) -> bool:
+        key = self._db_key(key)
+        with self._connect() as conn:
+            row = conn.execute("SELECT expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+        return row is not None and (row[0] is None or row[0] > time.time())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._connect() as conn:
+            entries, total_bytes = conn.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(value)), 0) FROM cache").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "backend" : "disk",
+            "path"    : self.path,
+            "entries" : entries,
+            "bytes"   : total_bytes,
+            "hits"    : self.hits,
+            "misses"  : self.misses,
+            "sets"    : self.sets,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+# キャッシュ未登録を表す番兵（None もキャッシュできるようにするため）
+_MISSING = object()
+
+
+def create_cache_backend(backend: Optional[str] = None):
+    """config.yml の cache.backend に応じたキャッシュを生成（"memory" または "redis"）"""
+    backend = (backend or config.get("cache.backend", "memory")).lower()
+    if backend == "memory":
+        return MemoryCache()
+    if backend == "redis":
+        try:
+            return TieredCache()
+        except ImportError as e:
+            logger.warning(f"redis パッケージがないためメモリキャッシュを使用します: {e}")
+            return MemoryCache()
+    raise ValueError(f"未対応のキャッシュバックエンド: {backend}（memory / redis）")
+
+
+# グローバルキャッシュインスタンス（cache.backend: redis なら L1＋Redis の2段）
+cache = create_cache_backend()
 
 
 # ==================================================
@@ -356,43 +1325,495 @@ def error_handler(func):
     return wrapper
 
 
+_timer_sampler = LogSampler()
+
+
 def timer(func):
-    """実行時間計測デコレータ（API用）"""
+    """実行時間計測デコレータ（API用）
+
+    呼び出しごとに相関 ID のスコープを開く（中の API 呼び出し・再試行のログが同じ ID になる）。
+    ログは logging.timer_sample_rate の割合に間引き、logging.slow_call_seconds 以上かかった
+    呼び出しは必ず出す。
+    """
+    name = func.__qualname__
 
     @wraps(func)
     def wrapper(*args, **kwargs):
-        start_time = time.time()
-        result = func(*args, **kwargs)
-        end_time = time.time()
-        execution_time = end_time - start_time
-        logger.info(f"{func.__name__} took {execution_time:.2f} seconds")
+        with correlation_scope():
+            start_time = time.perf_counter()
+            result = func(*args, **kwargs)
+            execution_time = time.perf_counter() - start_time
+            log_config = config.snapshot.logging
+            rate = log_config.timer_sample_rate
+            if execution_time >= log_config.slow_call_seconds or _timer_sampler.should_log(name, rate):
+                logger.info(f"{func.__name__} took {execution_time:.2f} seconds",
+                            extra={"event": "timer", "function": name, "duration": round(execution_time, 4),
+                                   "sample_rate": rate})
         return result
 
     return wrapper
 
 
-def cache_result(ttl: int = None):
-    """結果をキャッシュするデコレータ（メモリベース）"""
+# ==================================================
+# メモ化デコレータ（構造ハッシュ・単一実行・期限切れ後の再検証）
+# ==================================================
+# 構造を持たないオブジェクト（self など）に振るインスタンス固有の番号。
+# id() は GC 後に別のオブジェクトへ再利用されるため、弱参照できるものは番号で区別する。
+# この番号はプロセス内でしか意味を持たない（別プロセスの別オブジェクトにも同じ番号が振られる）ので、
+# 番号を含むキーは共有ストア（Redis・SQLite）には保存しない（_Memoizer.store_for）
+_object_tokens: "weakref.WeakKeyDictionary[Any, int]" = weakref.WeakKeyDictionary()
+_object_token_counter = itertools.count(1)
+_object_token_lock = threading.Lock()
+# make_cache_key の計算中にプロセス内の番号を使ったか（スレッドごと）
+_key_state = threading.local()
+
+# stale-while-revalidate の裏での再計算用（初回使用時に生成）
+_refresh_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _object_token(obj: Any) -> bytes:
+    cls = type(obj)
+    _key_state.process_local = True
+    try:
+        with _object_token_lock:
+            token = _object_tokens.get(obj)
+            if token is None:
+                token = _object_tokens[obj] = next(_object_token_counter)
+    except TypeError:
+        # 弱参照・ハッシュできないオブジェクトは id で代用（生存中は一意）
+        token = f"id{id(obj)}"
+    return f"o{cls.__module__}.{cls.__qualname__}#{token};".encode()
+
+
+def _feed_structure(digest, obj: Any, depth: int = 0) -> None:
+    """オブジェクトの構造をハッシュに流し込む（dict・set は順序に依存しない）"""
+    if depth > 64:
+        digest.update(_object_token(obj))
+    elif obj is None or isinstance(obj, (bool, int, float, complex)):
+        digest.update(f"{type(obj).__name__}:{obj!r};".encode())
+    elif isinstance(obj, str):
+        data = obj.encode("utf-8", "surrogatepass")
+        digest.update(b"s%d:" % len(data))
+        digest.update(data)
+    elif isinstance(obj, (bytes, bytearray, memoryview)):
+        data = bytes(obj)
+        digest.update(b"b%d:" % len(data))
+        digest.update(data)
+    elif isinstance(obj, (list, tuple)):
+        digest.update(b"%s%d:" % (b"l" if isinstance(obj, list) else b"t", len(obj)))
+        for item in obj:
+            _feed_structure(digest, item, depth + 1)
+    elif isinstance(obj, dict):
+        digest.update(b"d%d:" % len(obj))
+        items = sorted(((_structure_digest(key, depth + 1), value) for key, value in obj.items()),
+                       key=lambda item: item[0])
+        for key_digest, value in items:
+            digest.update(key_digest)
+            _feed_structure(digest, value, depth + 1)
+    elif isinstance(obj, (set, frozenset)):
+        digest.update(b"S%d:" % len(obj))
+        for item_digest in sorted(_structure_digest(item, depth + 1) for item in obj):
+            digest.update(item_digest)
+    elif isinstance(obj, Enum):
+        digest.update(f"e{type(obj).__qualname__}:".encode())
+        _feed_structure(digest, obj.value, depth + 1)
+    elif isinstance(obj, (datetime, date)):
+        digest.update(f"{type(obj).__name__}:{obj.isoformat()};".encode())
+    elif isinstance(obj, Path):
+        digest.update(f"p:{obj};".encode())
+    elif callable(getattr(obj, "__cache_key__", None)) and not isinstance(obj, type):
+        # オブジェクト自身が結果を左右する状態（接続先・設定など）をキーとして返す
+        cls = type(obj)
+        digest.update(f"k{cls.__module__}.{cls.__qualname__}:".encode())
+        _feed_structure(digest, obj.__cache_key__(), depth + 1)
+    elif hasattr(obj, "model_dump") and not isinstance(obj, type):
+        digest.update(f"m{type(obj).__qualname__}:".encode())
+        _feed_structure(digest, obj.model_dump(), depth + 1)
+    elif dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        digest.update(f"c{type(obj).__qualname__}:".encode())
+        _feed_structure(digest, {f.name: getattr(obj, f.name) for f in dataclasses.fields(obj)}, depth + 1)
+    elif hasattr(obj, "tobytes") and hasattr(obj, "dtype") and hasattr(obj, "shape"):
+        # NumPy 配列など（文字列化すると大きな配列は省略表示になり衝突する）
+        digest.update(f"a{obj.dtype}{tuple(obj.shape)}:".encode())
+        digest.update(obj.tobytes())
+    else:
+        digest.update(_object_token(obj))
+
+
+def _structure_digest(obj: Any, depth: int = 0) -> bytes:
+    digest = hashlib.blake2b(digest_size=16)
+    _feed_structure(digest, obj, depth)
+    return digest.digest()
+
+
+@lru_cache(maxsize=1024)
+def _signature(func: Callable) -> inspect.Signature:
+    return inspect.signature(func)
+
+
+def make_cache_key(func: Callable, args: tuple = (), kwargs: Optional[Dict[str, Any]] = None) -> str:
+    """関数と引数から安定したキャッシュキーを作る
+
+    引数はシグネチャで束縛してから構造的にハッシュするので、位置引数・キーワード引数の
+    渡し方や dict のキー順序が違っても同じキーになる。self などの一般オブジェクトは
+    __cache_key__() を持てばその戻り値で、持たなければインスタンスごとの番号で区別する
+    （str() のアドレス表記に依存しない）。
+    """
+    return _make_cache_key(func, args, kwargs)[0]
 
-    def decorator(func):
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            if not config.get("cache.enabled", True):
-                return func(*args, **kwargs)
 
-            # キャッシュキーの生成
-            cache_key = f"{func.__name__}_{hashlib.md5(str(args).encode() + str(kwargs).encode()).hexdigest()}"
+def _make_cache_key(func: Callable, args: tuple = (), kwargs: Optional[Dict[str, Any]] = None) -> Tuple[str, bool]:
+    """(キー, プロセス内でしか通用しないキーか) を返す"""
+    kwargs = kwargs or {}
+    try:
+        bound = _signature(func).bind(*args, **kwargs)
+        bound.apply_defaults()
+        arguments = dict(bound.arguments)
+    except (TypeError, ValueError):
+        arguments = {"args": args, "kwargs": kwargs}
+    return _structure_key(arguments)
 
-            # キャッシュから取得
-            cached_result = cache.get(cache_key)
-            if cached_result is not None:
-                return cached_result
 
-            # 関数実行とキャッシュ保存
-            result = func(*args, **kwargs)
-            cache.set(cache_key, result)
-            return result
+def _structure_key(obj: Any) -> Tuple[str, bool]:
+    digest = hashlib.blake2b(digest_size=16)
+    _key_state.process_local = False
+    _feed_structure(digest, obj)
+    return digest.hexdigest(), _key_state.process_local
+
+
+class _Memo:
+    """キャッシュに保存する値（None も結果として区別できるよう包む）"""
+
+    __slots__ = ("value", "fresh_until")
+
+    def __init__(self, value: Any, fresh_until: float):
+        self.value = value
+        self.fresh_until = fresh_until
+
+
+class _Flight:
+    """同じキーを計算中の呼び出し（後続の呼び出しはこの完了を待つ）"""
+
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+
+
+class _Memoizer:
+    """cache_result の実体（関数ごとに1つ）"""
+
+    def __init__(self, func: Callable, ttl: Optional[float], stale_ttl: float, backend: Optional[Any],
+                 key_func: Optional[Callable] = None):
+        self.func = func
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.backend = backend
+        self.key_func = key_func
+        self.namespace = f"{func.__module__}.{func.__qualname__}"
+        self.generation = 0
+        # プロセス内だけのキー（共有ストアに置かないもの）の世代。invalidate_all で常に進める
+        self.local_generation = 0
+        self._warned_local = False
+        self._lock = threading.Lock()
+        self._inflight: Dict[Tuple[str, int, str], _Flight] = {}
+        self._async_inflight: Dict[Tuple[str, int, str], "asyncio.Future"] = {}
+        self._tasks: set = set()
+        self.counters = dict.fromkeys(("hits", "misses", "stale_hits", "waits", "refreshes", "refresh_errors"), 0)
+
+    # ---------- キー・保存 ----------
+    @property
+    def store(self):
+        return self.backend if self.backend is not None else cache
+
+    @property
+    def fresh_ttl(self) -> float:
+        return self.ttl if self.ttl is not None else config.get("cache.ttl", 3600)
+
+    def key(self, args: tuple, kwargs: Dict[str, Any]) -> tuple:
+        if self.key_func is not None:
+            digest, process_local = _structure_key(self.key_func(*args, **kwargs))
+        else:
+            digest, process_local = _make_cache_key(self.func, args, kwargs)
+        if process_local:
+            return (self.namespace, "local", self.local_generation, digest)
+        return (self.namespace, self.generation, digest)
+
+    def store_for(self, key: tuple):
+        """キーを保存する先（プロセス内だけのキーは共有ストアではなくその L1 に。L1 がなければ保存しない）"""
+        store = self.store
+        if key[1] != "local" or not getattr(store, "shared", False):
+            return store
+        if not self._warned_local:
+            self._warned_local = True
+            logger.debug(f"{self.namespace}: 引数に __cache_key__ のないオブジェクトがあるため、"
+                         f"結果はこのプロセス内にだけ保存します（key= か __cache_key__ で共有可能）")
+        return getattr(store, "l1", None)
+
+    def lookup(self, key) -> Tuple[Optional[_Memo], bool]:
+        """(保存値, 新鮮か) を返す"""
+        store = self.store_for(key)
+        memo = store.get(key) if store is not None else None
+        if memo is None:
+            return None, False
+        return memo, time.time() < memo.fresh_until
+
+    def save(self, key, value: Any) -> None:
+        store = self.store_for(key)
+        if store is None:
+            return
+        ttl = self.fresh_ttl
+        # 別プロセスと共有する場合があるので鮮度は壁時計で持つ
+        store.set(key, _Memo(value, time.time() + ttl), ttl=ttl + self.stale_ttl)
+
+    def count(self, name: str) -> None:
+        with self._lock:
+            self.counters[name] += 1
+
+    # ---------- 同期関数 ----------
+    def call(self, args: tuple, kwargs: Dict[str, Any]) -> Any:
+        key = self.key(args, kwargs)
+        memo, fresh = self.lookup(key)
+        if memo is not None:
+            if fresh:
+                self.count("hits")
+            else:
+                self.count("stale_hits")
+                self.refresh_in_background(key, args, kwargs)
+            return memo.value
+        return self.compute(key, args, kwargs)
+
+    def compute(self, key, args: tuple, kwargs: Dict[str, Any]) -> Any:
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+                self.counters["misses"] += 1
+            else:
+                self.counters["waits"] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            # 待っている間に別のリーダーが保存し終えていればそれを使う
+            memo, fresh = self.lookup(key)
+            flight.value = memo.value if fresh else self.func(*args, **kwargs)
+            if not fresh:
+                self.save_if_current(key, flight, flight.value)
+            return flight.value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            self.finish(key, flight)
+
+    def refresh_in_background(self, key, args: tuple, kwargs: Dict[str, Any]) -> None:
+        global _refresh_executor
+        with self._lock:
+            if key in self._inflight:
+                return
+            flight = self._inflight[key] = _Flight()
+            self.counters["refreshes"] += 1
+            if _refresh_executor is None:
+                _refresh_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="cache-refresh")
+        _refresh_executor.submit(self._refresh, key, flight, args, kwargs)
+
+    def _refresh(self, key, flight: _Flight, args: tuple, kwargs: Dict[str, Any]) -> None:
+        try:
+            flight.value = self.func(*args, **kwargs)
+            self.save_if_current(key, flight, flight.value)
+        except Exception as e:
+            # 古い値を返し続ける（期限が完全に切れたら次の呼び出しで再計算される）
+            flight.error = e
+            self.count("refresh_errors")
+            logger.warning(f"{self.namespace} の再計算に失敗: {e}")
+        finally:
+            self.finish(key, flight)
+
+    def save_if_current(self, key, flight: _Flight, value: Any) -> None:
+        """計算中に無効化されていなければ保存"""
+        with self._lock:
+            current = self._inflight.get(key) is flight
+        if current:
+            self.save(key, value)
+
+    def finish(self, key, flight: _Flight) -> None:
+        with self._lock:
+            if self._inflight.get(key) is flight:
+                del self._inflight[key]
+        flight.done.set()
+
+    # ---------- 非同期関数 ----------
+    async def acall(self, args: tuple, kwargs: Dict[str, Any]) -> Any:
+        key = self.key(args, kwargs)
+        memo, fresh = self.lookup(key)
+        if memo is not None:
+            if fresh:
+                self.count("hits")
+            else:
+                self.count("stale_hits")
+                self.arefresh_in_background(key, args, kwargs)
+            return memo.value
+        return await self.acompute(key, args, kwargs)
+
+    async def acompute(self, key, args: tuple, kwargs: Dict[str, Any]) -> Any:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            future = self._async_inflight.get(key)
+            if future is not None and future.get_loop() is loop:
+                self.counters["waits"] += 1
+                leader = False
+            else:
+                # 別のイベントループで計算中のものは待てないので、このループで計算する
+                future = loop.create_future()
+                self._async_inflight[key] = future
+                self.counters["misses"] += 1
+                leader = True
+
+        if not leader:
+            return await asyncio.shield(future)
+
+        try:
+            memo, fresh = self.lookup(key)
+            value = memo.value if fresh else await self.func(*args, **kwargs)
+            if not fresh:
+                self.asave_if_current(key, future, value)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # 待つ呼び出しがなくても「未取得の例外」警告を出さない
+            raise
+        finally:
+            self.afinish(key, future)
+
+    def arefresh_in_background(self, key, args: tuple, kwargs: Dict[str, Any]) -> None:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if key in self._async_inflight:
+                return
+            future = self._async_inflight[key] = loop.create_future()
+            self.counters["refreshes"] += 1
+        task = loop.create_task(self._arefresh(key, future, args, kwargs))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _arefresh(self, key, future: "asyncio.Future", args: tuple, kwargs: Dict[str, Any]) -> None:
+        try:
+            value = await self.func(*args, **kwargs)
+            self.asave_if_current(key, future, value)
+            future.set_result(value)
+        except Exception as e:
+            self.count("refresh_errors")
+            logger.warning(f"{self.namespace} の再計算に失敗: {e}")
+            future.set_exception(e)
+            future.exception()
+        finally:
+            if not future.done():
+                future.cancel()
+            self.afinish(key, future)
+
+    def asave_if_current(self, key, future: "asyncio.Future", value: Any) -> None:
+        with self._lock:
+            current = self._async_inflight.get(key) is future
+        if current:
+            self.save(key, value)
+
+    def afinish(self, key, future: "asyncio.Future") -> None:
+        with self._lock:
+            if self._async_inflight.get(key) is future:
+                del self._async_inflight[key]
+
+    # ---------- 無効化・統計 ----------
+    def invalidate(self, args: tuple, kwargs: Dict[str, Any]) -> bool:
+        key = self.key(args, kwargs)
+        with self._lock:
+            # 計算中の結果は保存させない（完了を待っている呼び出しにはそのまま返る）
+            self._inflight.pop(key, None)
+            self._async_inflight.pop(key, None)
+        store = self.store_for(key)
+        return store.delete(key) if store is not None else False
+
+    def invalidate_all(self) -> None:
+        """以前のキーをすべて参照不能にする（古いエントリは追い出し・TTL に任せる）
+
+        共有キャッシュ（TieredCache）では名前空間の版を Redis 上で進めて全プロセスに反映し、
+        それ以外ではこのプロセス内の世代を進める。
+        """
+        store = self.store
+        with self._lock:
+            self.local_generation += 1
+            if not hasattr(store, "invalidate_namespace"):
+                self.generation += 1
+            self._inflight.clear()
+            self._async_inflight.clear()
+        if hasattr(store, "invalidate_namespace"):
+            store.invalidate_namespace(self.namespace)
+
+    def info(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.counters["hits"] + self.counters["stale_hits"] + self.counters["misses"]
+            return {
+                **self.counters,
+                "hit_rate"  : (self.counters["hits"] + self.counters["stale_hits"]) / lookups if lookups else 0.0,
+                "in_flight" : len(self._inflight) + len(self._async_inflight),
+                "ttl"       : self.fresh_ttl,
+                "stale_ttl" : self.stale_ttl,
+                "generation": self.generation,
+            }
+
 
+def cache_result(ttl: Optional[float] = None, stale_ttl: float = 0.0, backend: Optional[Any] = None,
+                 key: Optional[Callable] = None):
+    """結果をキャッシュするデコレータ（同期・非同期関数の両方に対応）
+
+    - キーは関数名と引数の構造的ハッシュ（make_cache_key）
+    - ttl 秒（省略時は config の cache.ttl）は新鮮な値としてそのまま返す
+    - stale_ttl > 0 なら、期限切れ後さらに stale_ttl 秒は古い値を即座に返しつつ
+      裏で1回だけ再計算する（stale-while-revalidate）
+    - 同じキーの計算中に来た呼び出しは計算を重複させず、その結果を待つ
+    - 例外はキャッシュしない（待っていた呼び出しにも同じ例外を送出する）
+    - backend 省略時はグローバルの cache（MemoryCache）に保存する
+    - key を渡すと key(*args, **kwargs) の戻り値を引数の代わりにハッシュする
+    - 共有ストア（cache.backend: redis の TieredCache、DiskCache）には、キーがプロセス内の
+      番号（__cache_key__ を持たない self など）を含む結果は保存しない（L1 にだけ置く）。
+      別のプロセスの別のオブジェクトと同じキーになってしまうため。共有したい場合は
+      key= を渡すか、そのクラスに __cache_key__()（結果を左右する状態を返す）を定義する
+
+    デコレートした関数には invalidate(*args, **kwargs)・invalidate_all()・
+    cache_key(*args, **kwargs)・cache_info() が付く。
+    """
+
+    def decorator(func):
+        memoizer = _Memoizer(func, ttl, stale_ttl, backend, key)
+
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def wrapper(*args, **kwargs):
+                if not config.snapshot.cache.enabled:
+                    return await func(*args, **kwargs)
+                return await memoizer.acall(args, kwargs)
+        else:
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not config.snapshot.cache.enabled:
+                    return func(*args, **kwargs)
+                return memoizer.call(args, kwargs)
+
+        wrapper.invalidate = lambda *args, **kwargs: memoizer.invalidate(args, kwargs)
+        wrapper.invalidate_all = memoizer.invalidate_all
+        wrapper.cache_key = lambda *args, **kwargs: memoizer.key(args, kwargs)
+        wrapper.cache_info = memoizer.info
         return wrapper
 
     return decorator
@@ -485,6 +1906,12 @@ class MessageManager:
         """メッセージ履歴のクリア"""
         self._messages = get_default_messages()
 
+    def count_tokens(self, model: str = None) -> int:
+        """履歴全体のトークン数（前回から追加されたメッセージだけを数える）"""
+        if not hasattr(self, "_token_counter"):
+            self._token_counter = MessageTokenCounter(model)
+        return self._token_counter.sync(self._messages, model)
+
     def export_messages(self) -> Dict[str, Any]:
         """メッセージ履歴のエクスポート"""
         return {
@@ -501,75 +1928,209 @@ class MessageManager:
 # ==================================================
 # トークン管理
 # ==================================================
+@lru_cache(maxsize=256)
+def _resolve_encoding_name(model: str) -> str:
+    encodings = TokenManager.MODEL_ENCODINGS
+    if model in encodings:
+        return encodings[model]
+    prefixes = [prefix for prefix in encodings if model.startswith(prefix)]
+    if prefixes:
+        return encodings[max(prefixes, key=len)]
+    try:
+        return tiktoken.encoding_for_model(model).name
+    except Exception:
+        return TokenManager.DEFAULT_ENCODING
+
+
+@lru_cache(maxsize=None)
+def _load_encoding(encoding_name: str):
+    return tiktoken.get_encoding(encoding_name)
+
+
 class TokenManager:
-    """トークン数の管理（新モデル対応）"""
+    """トークン数の管理（新モデル対応）
+
+    エンコーダはエンコーディング名ごとに1回だけ取得して使い回し、テキストごとの
+    トークン数は内容のハッシュをキーにした LRU に保持する（同じ履歴を再実行のたびに
+    数え直さない）。
+    """
 
-    # モデル別のエンコーディング対応表
+    # モデル別のエンコーディング対応表（日付付きのスナップショット名は前方一致で解決）
     MODEL_ENCODINGS = {
-        "gpt-4o"                   : "cl100k_base",
-        "gpt-4o-mini"              : "cl100k_base",
-        "gpt-4o-audio-preview"     : "cl100k_base",
-        "gpt-4o-mini-audio-preview": "cl100k_base",
-        "gpt-4.1"                  : "cl100k_base",
-        "gpt-4.1-mini"             : "cl100k_base",
-        "o1"                       : "cl100k_base",
-        "o1-mini"                  : "cl100k_base",
-        "o3"                       : "cl100k_base",
-        "o3-mini"                  : "cl100k_base",
-        "o4"                       : "cl100k_base",
-        "o4-mini"                  : "cl100k_base",
+        "gpt-5"                    : "o200k_base",
+        "gpt-4.1"                  : "o200k_base",
+        "gpt-4o"                   : "o200k_base",
+        "gpt-4o-mini"              : "o200k_base",
+        "gpt-4o-audio-preview"     : "o200k_base",
+        "gpt-4o-mini-audio-preview": "o200k_base",
+        "gpt-4.1-mini"             : "o200k_base",
+        "gpt-oss"                  : "o200k_base",
+        "o1"                       : "o200k_base",
+        "o1-mini"                  : "o200k_base",
+        "o3"                       : "o200k_base",
+        "o3-mini"                  : "o200k_base",
+        "o4"                       : "o200k_base",
+        "o4-mini"                  : "o200k_base",
+        "gpt-4"                    : "cl100k_base",
+        "gpt-3.5-turbo"            : "cl100k_base",
+        "text-embedding-3"         : "cl100k_base",
+        "text-embedding-ada-002"   : "cl100k_base",
     }
+    DEFAULT_ENCODING = "o200k_base"
+
+    # チャット形式のメッセージ1件あたりの追加トークン（役割・区切り）と、応答の開始分
+    TOKENS_PER_MESSAGE = 3
+    TOKENS_PER_NAME = 1
+    TOKENS_PER_REPLY = 3
+
+    _count_cache = MemoryCache(max_size=4096, max_bytes=1 << 20, ttl=0, cleanup_interval=0,
+                               policy="lru", enabled=True)
 
     @classmethod
-    def count_tokens(cls, text: str, model: str = None) -> int:
-        """テキストのトークン数をカウント"""
+    def encoding_name(cls, model: str = None) -> str:
+        """モデル名からエンコーディング名を解決（完全一致 → 最長の前方一致 → tiktoken の対応表）"""
         if model is None:
-            model = config.get("models.default", "gpt-4o-mini")
+            model = config.snapshot.models.default
+        return _resolve_encoding_name(model)
+
+    @classmethod
+    def get_encoding(cls, model: str = None):
+        """エンコーダを取得（エンコーディング名ごとにキャッシュ）"""
+        return _load_encoding(cls.encoding_name(model))
+
+    @classmethod
+    def count_tokens(cls, text: str, model: str = None) -> int:
+        """テキストのトークン数をカウント（同じ内容は LRU から返す）"""
+        if not text:
+            return 0
+        encoding_name = cls.encoding_name(model)
+        key = (encoding_name, hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest())
+        count = cls._count_cache.get(key)
+        if count is not None:
+            return count
 
         try:
-            encoding_name = cls.MODEL_ENCODINGS.get(model, "cl100k_base")
-            enc = tiktoken.get_encoding(encoding_name)
-            return len(enc.encode(text))
+            count = len(_load_encoding(encoding_name).encode(text, disallowed_special=()))
         except Exception as e:
             logger.error(f"トークンカウントエラー: {e}")
-            # 簡易的な推定（1文字 = 0.5トークン）
+            # 簡易的な推定（1文字 = 0.5トークン）、キャッシュはしない
             return len(text) // 2
+        cls._count_cache.set(key, count)
+        return count
+
+    @classmethod
+    def message_text(cls, message: Dict[str, Any]) -> str:
+        """メッセージ本文のテキスト部分（content が部品のリストなら text を連結）"""
+        content = message.get("content") if isinstance(message, dict) else getattr(message, "content", None)
+        if isinstance(content, str):
+            return content
+        parts = []
+        for part in content or []:
+            text = part.get("text") if isinstance(part, dict) else getattr(part, "text", None)
+            if text:
+                parts.append(text)
+        return "\n".join(parts)
+
+    @classmethod
+    def count_message(cls, message: Dict[str, Any], model: str = None) -> int:
+        """メッセージ1件のトークン数（本文＋役割・区切りの追加分）"""
+        get = message.get if isinstance(message, dict) else lambda name: getattr(message, name, None)
+        tokens = cls.TOKENS_PER_MESSAGE + cls.count_tokens(get("role") or "", model)
+        tokens += cls.count_tokens(cls.message_text(message), model)
+        if get("name"):
+            tokens += cls.TOKENS_PER_NAME + cls.count_tokens(get("name"), model)
+        return tokens
+
+    @classmethod
+    def count_messages(cls, messages: List[Dict[str, Any]], model: str = None) -> int:
+        """メッセージリスト全体のトークン数（応答の開始分を含む。画像などテキスト以外は数えない）"""
+        if not messages:
+            return 0
+        return sum(cls.count_message(message, model) for message in messages) + cls.TOKENS_PER_REPLY
 
     @classmethod
     def truncate_text(cls, text: str, max_tokens: int, model: str = None) -> str:
-        """テキストを指定トークン数に切り詰め"""
-        if model is None:
-            model = config.get("models.default", "gpt-4o-mini")
+        """テキストを指定トークン数に切り詰め（文字の途中では切らない）
+
+        長文でも全体はエンコードせず、先頭から倍々に広げた範囲だけをエンコードして
+        切り位置の候補を求め、文字位置の二分探索で max_tokens に収まる最長の先頭部分を返す
+        （トークン列の途中で decode すると日本語の文字が壊れるため）。
+        """
+        if max_tokens <= 0 or not text:
+            return ""
 
         try:
-            encoding_name = cls.MODEL_ENCODINGS.get(model, "cl100k_base")
-            enc = tiktoken.get_encoding(encoding_name)
-            tokens = enc.encode(text)
+            enc = cls.get_encoding(model)
+            window = max(256, max_tokens * 4)
+            while True:
+                tokens = enc.encode(text[:window], disallowed_special=())
+                if len(tokens) > max_tokens or window >= len(text):
+                    break
+                window *= 2
             if len(tokens) <= max_tokens:
                 return text
-            return enc.decode(tokens[:max_tokens])
+
+            def fits(length: int) -> bool:
+                return len(enc.encode(text[:length], disallowed_special=())) <= max_tokens
+
+            # max_tokens 番目のトークンが始まる文字位置が最有力候補（通常は前後1回ずつの確認で済む）。
+            # 境界の前後で BPE の結合が変わることがあるので、候補から倍々に広げて
+            # fits(low) が真・fits(high) が偽となる区間を作り、文字位置で二分探索する
+            _, offsets = enc.decode_with_offsets(tokens[:max_tokens + 1])
+            candidate = min(offsets[max_tokens], window)
+            step = 1
+            if fits(candidate):
+                low = candidate
+                while low + step < window and fits(low + step):
+                    low, step = low + step, step * 2
+                high = min(low + step, window)
+            else:
+                high = candidate
+                while high - step > 0 and not fits(high - step):
+                    high, step = high - step, step * 2
+                low = max(0, high - step)
+            while high - low > 1:
+                middle = (low + high) // 2
+                if fits(middle):
+                    low = middle
+                else:
+                    high = middle
+            return text[:low]
         except Exception as e:
             logger.error(f"テキスト切り詰めエラー: {e}")
             estimated_chars = max_tokens * 2
             return text[:estimated_chars]
 
     @classmethod
-    def estimate_cost(cls, input_tokens: int, output_tokens: int, model: str = None) -> float:
-        """API使用コストの推定（config.ymlから料金取得）"""
+    def estimate_cost(cls, input_tokens: int, output_tokens: int, model: str = None,
+                      cached_tokens: int = 0) -> float:
+        """API使用コストの推定（config.ymlから料金取得）
+
+        cached_tokens は input_tokens のうちプロンプトキャッシュに当たった分で、料金表に
+        cached_input があればその単価で計算する。API が返す日付付きのモデル名
+        （gpt-4o-mini-2024-07-18 など）は、前方一致する最も長い料金表のキーで引く。
+        """
         if model is None:
-            model = config.get("models.default", "gpt-4o-mini")
+            model = config.snapshot.models.default
 
-        pricing = config.get("model_pricing", {})
+        pricing = config.snapshot.model_pricing
         model_pricing = pricing.get(model)
+        if not model_pricing:
+            prefixes = [name for name in pricing if model.startswith(f"{name}-")]
+            if prefixes:
+                model_pricing = pricing[max(prefixes, key=len)]
 
         if not model_pricing:
             # フォールバック
             model_pricing = {"input": 0.00015, "output": 0.0006}
 
-        input_cost = (input_tokens / 1000) * model_pricing["input"]
-        output_cost = (output_tokens / 1000) * model_pricing["output"]
+        cached_tokens = min(cached_tokens or 0, input_tokens)
+        cached_rate = model_pricing.get("cached_input", model_pricing["input"])
+        input_cost = ((input_tokens - cached_tokens) / 1000) * model_pricing["input"]
+        cached_cost = (cached_tokens / 1000) * cached_rate
+        output_cost = (output_tokens / 1000) * model_pricing.get("output", 0.0)
 
-        return input_cost + output_cost
+        return input_cost + cached_cost + output_cost
 
     @classmethod
     def get_model_limits(cls, model: str) -> Dict[str, int]:
@@ -591,6 +2152,44 @@ class TokenManager:
         return limits.get(model, {"max_tokens": 128000, "max_output": 4096})
 
 
+
+class MessageTokenCounter:
+    """追記されていくメッセージ履歴のトークン数を差分で数える
+
+    前回の同期から末尾に追加されただけ（既存メッセージが同じオブジェクトのまま）なら追加分だけを
+    数える。削除・切り詰め・モデル変更のときは数え直すが、同じ本文の件数は LRU から返る。
+    メッセージをその場で書き換えた場合は reset() すること。
+    """
+
+    def __init__(self, model: str = None):
+        self.model = model
+        self.total = 0
+        self._message_ids: List[int] = []
+
+    def reset(self):
+        self.total = 0
+        self._message_ids = []
+
+    def add(self, message: Dict[str, Any]) -> int:
+        """メッセージ1件を加算し、そのトークン数を返す"""
+        count = TokenManager.count_message(message, self.model)
+        self._message_ids.append(id(message))
+        self.total += count
+        return count
+
+    def sync(self, messages: List[Dict[str, Any]], model: str = None) -> int:
+        """履歴と同期し、全体のトークン数（応答の開始分を含む）を返す"""
+        if model is not None and model != self.model:
+            self.model = model
+            self.reset()
+        known = len(self._message_ids)
+        if len(messages) < known or any(id(messages[i]) != self._message_ids[i] for i in range(known)):
+            self.reset()
+            known = 0
+        for message in messages[known:]:
+            self.add(message)
+        return self.total + TokenManager.TOKENS_PER_REPLY if messages else 0
+
 # ==================================================
 # レスポンス処理
 # ==================================================
@@ -617,6 +2216,13 @@ class ResponseProcessor:
 
         return texts
 
+    @staticmethod
+    def stream_text(stream) -> Iterator[str]:
+        """ストリーミング応答からテキストの断片だけを届いた順に返す（st.write_stream にそのまま渡せる）"""
+        for delta in stream:
+            if delta.type == "text" and delta.text:
+                yield delta.text
+
     @staticmethod
     def _serialize_usage(usage_obj) -> Dict[str, Any]:
         """ResponseUsageオブジェクトを辞書に変換"""
@@ -645,6 +2251,19 @@ class ResponseProcessor:
 
         return usage_dict
 
+    @staticmethod
+    def cache_info(response: Response) -> Dict[str, Any]:
+        """応答キャッシュの記録（hit、節約したトークン数 saved_tokens・時間 saved_latency など。キャッシュ未使用なら空）"""
+        return getattr(response, "_cache_info", None) or {}
+
+    @staticmethod
+    def cache_note(response: Response) -> str:
+        """キャッシュから返した応答なら節約分の短い説明（画面表示用。それ以外は空文字）"""
+        info = ResponseProcessor.cache_info(response)
+        if not info.get("hit"):
+            return ""
+        return f"（キャッシュ済みの応答を使用: 約{info['saved_latency']:.1f}秒・{info['saved_tokens']}トークン節約）"
+
     @staticmethod
     def format_response(response: Response) -> Dict[str, Any]:
         """レスポンスを整形（JSON serializable）"""
@@ -658,6 +2277,7 @@ class ResponseProcessor:
             "created_at": getattr(response, "created_at", None),
             "text"      : ResponseProcessor.extract_text(response),
             "usage"     : usage_dict,
+            "cache"     : ResponseProcessor.cache_info(response),
         }
 
     @staticmethod
@@ -680,13 +2300,421 @@ class ResponseProcessor:
         return str(filepath)
 
 
+# ==================================================
+# ストリーミング応答の組み立て
+# ==================================================
+@dataclass
+class StreamDelta:
+    """ストリーミング応答の差分1件
+
+    type:
+      "text"           - 出力テキストの断片（text）
+      "refusal"        - 拒否メッセージの断片（text）
+      "tool_call"      - 関数呼び出しの開始または引数の断片（call_id, name, arguments）
+      "tool_call_done" - 関数呼び出しの引数が確定（arguments は全体）
+      "usage"          - 完了時（出力上限で打ち切られた場合を含む）の使用量（usage、response は完成した Response）
+    """
+    type: str
+    text: str = ""
+    output_index: Optional[int] = None
+    call_id: Optional[str] = None
+    name: Optional[str] = None
+    arguments: str = ""
+    usage: Optional[Dict[str, Any]] = None
+    response: Optional[Any] = None
+
+
+class StreamAccumulator:
+    """Responses API のストリームイベントを StreamDelta に変換しながら、本文・関数呼び出し・使用量を組み立てる"""
+
+    def __init__(self):
+        self._text_parts: List[str] = []
+        self.tool_calls: Dict[str, Dict[str, Any]] = {}   # item_id -> {"call_id", "name", "arguments"}
+        self.usage: Dict[str, Any] = {}
+        self.response = None
+
+    @property
+    def text(self) -> str:
+        return "".join(self._text_parts)
+
+    def feed(self, event: Any) -> List[StreamDelta]:
+        """イベント1件を取り込み、呼び出し側に渡す差分を返す（該当しないイベントは空リスト）"""
+        kind = getattr(event, "type", "")
+        index = getattr(event, "output_index", None)
+
+        if kind == "response.output_text.delta":
+            self._text_parts.append(event.delta)
+            return [StreamDelta("text", text=event.delta, output_index=index)]
+
+        if kind == "response.refusal.delta":
+            return [StreamDelta("refusal", text=event.delta, output_index=index)]
+
+        if kind == "response.output_item.added" and getattr(event.item, "type", None) == "function_call":
+            item = event.item
+            call = {"call_id": item.call_id, "name": item.name, "arguments": item.arguments or ""}
+            self.tool_calls[item.id] = call
+            return [StreamDelta("tool_call", output_index=index, **call)]
+
+        if kind == "response.function_call_arguments.delta":
+            call = self.tool_calls.setdefault(event.item_id, {"call_id": None, "name": None, "arguments": ""})
+            call["arguments"] += event.delta
+            return [StreamDelta("tool_call", output_index=index, call_id=call["call_id"],
+                                name=call["name"], arguments=event.delta)]
+
+        if kind == "response.function_call_arguments.done":
+            call = self.tool_calls.setdefault(event.item_id, {"call_id": None, "name": None, "arguments": ""})
+            call["arguments"] = event.arguments
+            return [StreamDelta("tool_call_done", output_index=index, **call)]
+
+        if kind in ("response.completed", "response.incomplete"):
+            self.response = event.response
+            self.usage = ResponseProcessor._serialize_usage(getattr(event.response, "usage", None))
+            return [StreamDelta("usage", usage=self.usage, response=event.response)]
+
+        if kind in ("response.failed", "error"):
+            error = getattr(getattr(event, "response", None), "error", None)
+            message = getattr(error, "message", None) or getattr(event, "message", kind)
+            raise RuntimeError(f"Streaming response {kind}: {message}")
+
+        return []
+
+
 # ==================================================
 # APIクライアント
 # ==================================================
+_rate_limiter: Optional[RateLimitScheduler] = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimitScheduler:
+    """プロセス内で共有するレート制御（セッションごとの OpenAIClient が同じ RPM/TPM 枠を使う）"""
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = RateLimitScheduler.from_config(config.get("api.rate_limit", {}))
+        return _rate_limiter
+
+
+class LLMResponseCache:
+    """Responses API の応答キャッシュ
+
+    モデル・入力・パラメータを正規化した JSON の SHA-256 をキーにして、完了した応答を
+    保存する（store は config の llm_cache.store: "disk" / "memory" / "redis"）。同じプロンプトが
+    再度来たら API を呼ばずに保存した応答を返す。ヒット時は元の応答にかかった時間と
+    トークン数を「節約分」として応答（ResponseProcessor.cache_info で参照）と統計に記録する。
+    """
+
+    # 応答の内容に影響しないのでキーに含めないパラメータ
+    IGNORED_PARAMS = frozenset({"stream", "timeout", "extra_headers", "extra_query", "metadata", "user"})
+
+    def __init__(self, store: Optional[Any] = None, ttl: Optional[float] = None):
+        self.store = store if store is not None else self._create_store(config.get("llm_cache.store", "disk"))
+        self.ttl = config.get("llm_cache.ttl", 86400) if ttl is None else ttl
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.saved_tokens = 0
+        self.saved_seconds = 0.0
+
+    @staticmethod
+    def _create_store(kind: str):
+        if kind == "disk":
+            return DiskCache(config.get("llm_cache.path", "llm_cache.db"))
+        return create_cache_backend(kind)
+
+    def make_key(self, params: Dict[str, Any]) -> str:
+        """パラメータの正規化 JSON（キー順序に依存しない）からキーを作る。プロセスをまたいでも同じ値になる"""
+        payload = {key: value for key, value in params.items() if key not in self.IGNORED_PARAMS}
+        text = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"),
+                          default=safe_json_serializer)
+        return "llm_response:" + hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Response]:
+        entry = self.store.get(key)
+        response = None
+        if entry is not None:
+            try:
+                # SDK が応答を読むときと同じく検証なしで組み立てる（入れ子のモデルも復元される）
+                response = Response.construct(**entry["response"])
+            except Exception as e:
+                logger.warning(f"キャッシュ済みの応答を復元できないため破棄します: {e}")
+                self.store.delete(key)
+
+        with self._lock:
+            if response is None:
+                self.misses += 1
+                return None
+            saved_tokens = _usage_tokens(response) or 0
+            self.hits += 1
+            self.saved_tokens += saved_tokens
+            self.saved_seconds += entry["elapsed"]
+
+        response._cache_info = {
+            "hit"          : True,
+            "key"          : key,
+            "saved_tokens" : saved_tokens,
+            "saved_latency": entry["elapsed"],
+            "cached_at"    : entry["created_at"],
+        }
+        return response
+
+    def put(self, key: str, response: Response, elapsed: float, ttl: Optional[float] = None) -> bool:
+        """完了した応答だけを保存する（途中で打ち切られた応答や失敗は保存しない）"""
+        response._cache_info = {"hit": False, "key": key, "latency": elapsed}
+        if getattr(response, "status", None) not in (None, "completed"):
+            return False
+        entry = {"response": response.model_dump(mode="json"), "elapsed": elapsed, "created_at": time.time()}
+        return self.store.set(key, entry, ttl=self.ttl if ttl is None else ttl)
+
+    def clear(self) -> None:
+        self.store.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits"         : self.hits,
+                "misses"       : self.misses,
+                "hit_rate"     : self.hits / lookups if lookups else 0.0,
+                "saved_tokens" : self.saved_tokens,
+                "saved_seconds": round(self.saved_seconds, 3),
+                "store"        : self.store.stats(),
+            }
+
+
+_response_cache: Optional[LLMResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> LLMResponseCache:
+    """プロセス内で共有する応答キャッシュ"""
+    global _response_cache
+    with _response_cache_lock:
+        if _response_cache is None:
+            _response_cache = LLMResponseCache()
+        return _response_cache
+
+
+def _is_retryable(error: Exception) -> bool:
+    """再試行すれば通る見込みのあるエラーか（接続断・タイムアウト・429・5xx など）"""
+    if isinstance(error, APIConnectionError):
+        return True
+    if isinstance(error, APIStatusError):
+        if getattr(error, "code", None) == "insufficient_quota":
+            return False
+        return error.status_code in (408, 409, 429) or error.status_code >= 500
+    return False
+
+
+def _error_headers(error: Exception):
+    response = getattr(error, "response", None)
+    return getattr(response, "headers", None)
+
+
+def _usage_tokens(result: Any) -> Optional[int]:
+    return getattr(getattr(result, "usage", None), "total_tokens", None)
+
+
+def _usage_breakdown(usage: Any) -> Tuple[int, int, int]:
+    """使用量（Responses / Chat Completions / Embeddings、オブジェクトでも辞書でも可）を
+    (入力トークン, うちキャッシュ済み入力トークン, 出力トークン) に揃える"""
+    def field(obj, name):
+        return obj.get(name) if isinstance(obj, dict) else getattr(obj, name, None)
+
+    if usage is None:
+        return 0, 0, 0
+    input_tokens = field(usage, "input_tokens")
+    if input_tokens is not None:
+        details = field(usage, "input_tokens_details")
+        output_tokens = field(usage, "output_tokens")
+    else:
+        input_tokens = field(usage, "prompt_tokens")
+        details = field(usage, "prompt_tokens_details")
+        output_tokens = field(usage, "completion_tokens")
+    cached_tokens = field(details, "cached_tokens") if details is not None else 0
+    return int(input_tokens or 0), int(cached_tokens or 0), int(output_tokens or 0)
+
+
+# ==================================================
+# 使用量台帳
+# ==================================================
+# 台帳に記録する呼び出し元を決めるときに読み飛ばすモジュール（API 層・スレッド・イベントループの内部）
+_CALLER_SKIP_PREFIXES = ("helper_api", "helper_st", "helper_ratelimit", "helper_usage", "threading",
+                         "concurrent.", "asyncio.", "contextlib", "functools", "streamlit.")
+
+# create_responses のワーカースレッドなど、スタックから呼び出し元を辿れない処理で使う呼び出し元
+_usage_caller: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("usage_caller", default=None)
+
+_usage_ledger: Optional[UsageLedger] = None
+_usage_ledger_lock = threading.Lock()
+
+
+def _caller_name() -> str:
+    """API を呼んだページ・モジュール名（streamlit run で起動したスクリプトはファイル名）"""
+    caller = _usage_caller.get()
+    if caller is not None:
+        return caller
+    frame = sys._getframe(1)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module == "__main__":
+            return Path(frame.f_code.co_filename).stem
+        if module and not module.startswith(_CALLER_SKIP_PREFIXES):
+            return module
+        frame = frame.f_back
+    return "unknown"
+
+
+def get_usage_ledger() -> Optional[UsageLedger]:
+    """プロセス内で共有する使用量台帳（config の usage_ledger.enabled が false なら None）"""
+    global _usage_ledger
+    if not config.snapshot.usage_ledger.enabled:
+        return None
+    with _usage_ledger_lock:
+        if _usage_ledger is None:
+            _usage_ledger = UsageLedger(
+                config.get("usage_ledger.directory", "usage_ledger"),
+                pricing=TokenManager.estimate_cost,
+                rollup_interval=config.get("usage_ledger.rollup_interval", 60),
+                retention_days=config.get("usage_ledger.retention_days", 30),
+            )
+        return _usage_ledger
+
+
+class ResponseStream:
+    """create_response(stream=True) の戻り値。SDK のイベントを StreamDelta にして返すイテレータ
+
+    読み終わる（または close する）までレート制御の枠を持ち続け、完了時の使用量で精算する。
+    最初のテキストが届くまでの時間（ttft）と全体の時間（elapsed）を記録する。
+    """
+
+    def __init__(self, stream, scheduler: RateLimitScheduler, ticket, headers, model: str = None,
+                 recorder: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self._stream = stream
+        self._scheduler = scheduler
+        self._ticket = ticket
+        self._headers = headers
+        self._recorder = recorder
+        self.model = model
+        # 読み終わるのは呼び出しのスコープの外なので、完了時のログ用に相関 ID を控えておく
+        self.correlation_id = get_correlation_id()
+        self.accumulator = StreamAccumulator()
+        self.started = time.perf_counter()
+        self.first_token_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    @property
+    def text(self) -> str:
+        return self.accumulator.text
+
+    @property
+    def usage(self) -> Dict[str, Any]:
+        return self.accumulator.usage
+
+    @property
+    def ttft(self) -> Optional[float]:
+        """最初のテキスト断片までの秒数"""
+        return None if self.first_token_at is None else self.first_token_at - self.started
+
+    @property
+    def elapsed(self) -> Optional[float]:
+        return None if self.finished_at is None else self.finished_at - self.started
+
+    def _deltas(self, event) -> List[StreamDelta]:
+        deltas = self.accumulator.feed(event)
+        if self.first_token_at is None and any(delta.type == "text" for delta in deltas):
+            self.first_token_at = time.perf_counter()
+        return deltas
+
+    def __iter__(self) -> Iterator[StreamDelta]:
+        try:
+            for event in self._stream:
+                yield from self._deltas(event)
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        if self._ticket is None:
+            return
+        ticket, self._ticket = self._ticket, None
+        self.finished_at = time.perf_counter()
+        try:
+            self._stream.close()
+        finally:
+            self._scheduler.release(ticket, used_tokens=self.usage.get("total_tokens"), headers=self._headers)
+            if self._recorder is not None:
+                self._recorder(self.usage)
+            ttft = f"{self.ttft:.2f}" if self.ttft is not None else "-"
+            logger.info(f"create_response stream: first token {ttft} s, total {self.elapsed:.2f} s",
+                        extra={"event": "stream", "correlation_id": self.correlation_id,
+                               "ttft": self.ttft, "duration": self.elapsed})
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class AsyncResponseStream(ResponseStream):
+    """acreate_response(stream=True) の戻り値（async for で読む）"""
+
+    def __iter__(self):
+        raise TypeError("AsyncResponseStream は async for で読んでください")
+
+    # 同期版の close() は AsyncStream.close() を await できず HTTP レスポンスが閉じられないため使わせない
+    def __enter__(self):
+        raise TypeError("AsyncResponseStream は async with で使ってください")
+
+    def close(self) -> None:
+        raise TypeError("AsyncResponseStream は await aclose() で閉じてください")
+
+    async def __aiter__(self) -> AsyncIterator[StreamDelta]:
+        try:
+            async for event in self._stream:
+                for delta in self._deltas(event):
+                    yield delta
+        finally:
+            await self.aclose()
+
+    async def aclose(self) -> None:
+        if self._ticket is None:
+            return
+        ticket, self._ticket = self._ticket, None
+        self.finished_at = time.perf_counter()
+        try:
+            await self._stream.close()
+        finally:
+            self._scheduler.release(ticket, used_tokens=self.usage.get("total_tokens"), headers=self._headers)
+            if self._recorder is not None:
+                self._recorder(self.usage)
+            ttft = f"{self.ttft:.2f}" if self.ttft is not None else "-"
+            logger.info(f"acreate_response stream: first token {ttft} s, total {self.elapsed:.2f} s",
+                        extra={"event": "stream", "correlation_id": self.correlation_id,
+                               "ttft": self.ttft, "duration": self.elapsed})
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+
 class OpenAIClient:
-    """OpenAI API クライアント"""
+    """OpenAI API クライアント
+
+    すべての呼び出しは共有の RateLimitScheduler で RPM／TPM と同時実行数の枠を取ってから送る。
+    429・5xx・接続エラーはレート制限ヘッダーに従って待ってから api.max_retries 回まで再試行する
+    （SDK 自身の再試行は枠の外で走ってしまうので無効にしている）。
+    priority は "interactive"（画面からの呼び出し、既定）か "batch"（まとめて流す処理）。
+    base_url（config の api.base_url / 環境変数 OPENAI_BASE_URL）を変えればローカルの
+    模擬サーバーに向けられる。
+    成功した呼び出し（キャッシュヒット・ストリーミングを含む）は使用量台帳
+    （get_usage_ledger）に、呼び出し元のページ名・トークン数・レイテンシとともに記録する。
+    """
 
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, base_url: str = None,
+                 scheduler: Optional[RateLimitScheduler] = None,
+                 response_cache: Optional[LLMResponseCache] = None,
+                 usage_ledger: Optional[UsageLedger] = None):
         if api_key is None:
             api_key = config.get("api.openai_api_key") or os.getenv("OPENAI_API_KEY")
 
@@ -697,8 +2725,184 @@ class OpenAIClient:
                                    "APIキーが設定されていません")
             raise ValueError(error_msg)
 
-        self.client = OpenAI(api_key=api_key)
+        self._client_options = {
+            "api_key"    : api_key,
+            "base_url"   : base_url or config.get("api.base_url") or os.getenv("OPENAI_BASE_URL"),
+            "timeout"    : config.get("api.timeout", 30),
+            "max_retries": 0,
+        }
+        self.max_retries = config.get("api.max_retries", 3)
+        self.scheduler = scheduler or get_rate_limiter()
+        self.response_cache = response_cache
+        self.usage_ledger = usage_ledger
+        self.client = OpenAI(**self._client_options)
+        self._async_client = None
+
+    @property
+    def async_client(self) -> AsyncOpenAI:
+        """非同期クライアント（初回参照時に生成。同じイベントループの中で使い続けること）"""
+        if self._async_client is None:
+            self._async_client = AsyncOpenAI(**self._client_options)
+        return self._async_client
+
+    # ---------- パラメータ・見積もり ----------
+    @staticmethod
+    def _response_params(messages, input, model, kwargs) -> Dict[str, Any]:
+        if model is None:
+            model = config.snapshot.models.default
+
+        # 新旧両方の引数名をサポート
+        if input is None:
+            input = messages
+        if input is None:
+            raise ValueError("messages or input must be provided")
 
+        params = {
+            "model": model,
+            "input": input,
+        }
+        params.update(kwargs)
+        return params
+
+    @staticmethod
+    def _chat_params(messages, model, kwargs) -> Dict[str, Any]:
+        if model is None:
+            model = config.snapshot.models.default
+
+        params = {
+            "model"   : model,
+            "messages": messages,
+        }
+        params.update(kwargs)
+        return params
+
+    @staticmethod
+    def estimate_tokens(params: Dict[str, Any]) -> int:
+        """1回の呼び出しで消費しそうなトークン数（入力＋出力上限。TPM の枠取り用）"""
+        model = params.get("model")
+        payload = params.get("input", params.get("messages"))
+        try:
+            if isinstance(payload, str):
+                prompt = TokenManager.count_tokens(payload, model)
+            else:
+                prompt = TokenManager.count_messages(payload, model)
+        except Exception:
+            prompt = len(str(payload)) // 2
+        output = (params.get("max_output_tokens") or params.get("max_completion_tokens")
+                  or params.get("max_tokens") or config.snapshot.api.rate_limit.default_output_tokens)
+        return prompt + int(output)
+
+    # ---------- 送信（枠取り・再試行） ----------
+    def _request(self, endpoint, params: Dict[str, Any], priority: str, estimate: Optional[int] = None,
+                 stream_class: Optional[type] = None):
+        estimate = self.estimate_tokens(params) if estimate is None else estimate
+        caller = _caller_name()
+        began = time.perf_counter()
+        with correlation_scope():
+            for attempt in itertools.count():
+                ticket = self.scheduler.acquire(estimate, priority)
+                used = headers = None
+                sent = time.perf_counter()
+                try:
+                    raw = endpoint.with_raw_response.create(**params)
+                    headers = raw.headers
+                    result = raw.parse()
+                    if stream_class is not None:
+                        # ストリームは読み終わるまで枠を返さない（使用量は完了イベントで分かる）
+                        recorder = self._usage_recorder(endpoint, params.get("model"), caller, began, sent)
+                        stream = stream_class(result, self.scheduler, ticket, headers, params.get("model"),
+                                              recorder)
+                        ticket = None
+                        return stream
+                    used = _usage_tokens(result)
+                    self._record_usage(endpoint, params.get("model"), getattr(result, "usage", None),
+                                       time.perf_counter() - sent, caller, wait=sent - began)
+                    return result
+                except Exception as e:
+                    headers = _error_headers(e)
+                    if attempt >= self.max_retries or not _is_retryable(e):
+                        raise
+                    delay = self.scheduler.backoff(attempt, headers,
+                                                   throttled=getattr(e, "status_code", None) == 429)
+                    logger.warning(f"OpenAI API retry {attempt + 1}/{self.max_retries} in {delay:.2f}s: {e}")
+                finally:
+                    if ticket is not None:
+                        self.scheduler.release(ticket, used_tokens=used, headers=headers)
+                time.sleep(delay)
+
+    async def _arequest(self, endpoint, params: Dict[str, Any], priority: str, estimate: Optional[int] = None,
+                        stream_class: Optional[type] = None):
+        estimate = self.estimate_tokens(params) if estimate is None else estimate
+        caller = _caller_name()
+        began = time.perf_counter()
+        with correlation_scope():
+            for attempt in itertools.count():
+                ticket = await self.scheduler.aacquire(estimate, priority)
+                used = headers = None
+                sent = time.perf_counter()
+                try:
+                    raw = await endpoint.with_raw_response.create(**params)
+                    headers = raw.headers
+                    result = raw.parse()
+                    if stream_class is not None:
+                        # ストリームは読み終わるまで枠を返さない（使用量は完了イベントで分かる）
+                        recorder = self._usage_recorder(endpoint, params.get("model"), caller, began, sent)
+                        stream = stream_class(result, self.scheduler, ticket, headers, params.get("model"),
+                                              recorder)
+                        ticket = None
+                        return stream
+                    used = _usage_tokens(result)
+                    self._record_usage(endpoint, params.get("model"), getattr(result, "usage", None),
+                                       time.perf_counter() - sent, caller, wait=sent - began)
+                    return result
+                except Exception as e:
+                    headers = _error_headers(e)
+                    if attempt >= self.max_retries or not _is_retryable(e):
+                        logger.error(f"OpenAI API error: {e}")
+                        raise
+                    delay = self.scheduler.backoff(attempt, headers,
+                                                   throttled=getattr(e, "status_code", None) == 429)
+                    logger.warning(f"OpenAI API retry {attempt + 1}/{self.max_retries} in {delay:.2f}s: {e}")
+                finally:
+                    if ticket is not None:
+                        self.scheduler.release(ticket, used_tokens=used, headers=headers)
+                await asyncio.sleep(delay)
+
+    # ---------- 使用量の記録 ----------
+    def _record_usage(self, endpoint, model: str, usage: Any, latency: float, caller: str,
+                      wait: float = 0.0, cache_hit: bool = False) -> None:
+        """使用量台帳に1件記録する（台帳の失敗で API 呼び出し自体は失敗させない）"""
+        input_tokens, cached_tokens, output_tokens = _usage_breakdown(usage)
+        name = endpoint if isinstance(endpoint, str) else type(endpoint).__name__.lower().replace("async", "", 1)
+        try:
+            if self.usage_ledger is None:
+                self.usage_ledger = get_usage_ledger()
+                if self.usage_ledger is None:
+                    return
+            self.usage_ledger.record(model, input_tokens=input_tokens, cached_tokens=cached_tokens,
+                                     output_tokens=output_tokens, latency=latency, caller=caller,
+                                     cache_hit=cache_hit, endpoint=name, wait=wait)
+        except Exception as e:
+            logger.warning(f"使用量台帳への記録に失敗: {e}")
+
+    def _usage_recorder(self, endpoint, model: str, caller: str, began: float,
+                        sent: float) -> Callable[[Dict[str, Any]], None]:
+        """ストリームが閉じられたときに完了イベントの使用量を記録する関数"""
+        def record(usage: Dict[str, Any]) -> None:
+            self._record_usage(endpoint, model, usage, time.perf_counter() - sent, caller, wait=sent - began)
+
+        return record
+
+    def _cached_response(self, response_cache: LLMResponseCache, key: str, model: str) -> Optional[Response]:
+        """応答キャッシュを引き、ヒットしたら料金0・節約分ありとして台帳に記録する"""
+        started = time.perf_counter()
+        response = response_cache.get(key)
+        if response is not None:
+            self._record_usage("responses", model, getattr(response, "usage", None),
+                               time.perf_counter() - started, _caller_name(), cache_hit=True)
+        return response
+
+    # ---------- 同期API ----------
     @error_handler
     @timer
     def create_response(
@@ -707,44 +2911,153 @@ class OpenAIClient:
             *,
             input: List[EasyInputMessageParam] = None,
             model: str = None,
+            priority: str = "interactive",
+            stream: bool = False,
+            cache: Optional[bool] = None,
+            cache_ttl: Optional[float] = None,
             **kwargs,
-    ) -> Response:
+    ) -> Union[Response, ResponseStream]:
         """Responses API呼び出し
 
         `messages` 引数（旧仕様）と `input` 引数（新仕様）の両方に対応する。
         いずれも指定されていない場合はエラーを返す。
+        stream=True なら StreamDelta を届いた順に返す ResponseStream を返す。
+        同じモデル・入力・パラメータの応答は応答キャッシュから返す（config の llm_cache.enabled、
+        呼び出しごとに cache=False で無効化、cache_ttl で有効期限を指定。ストリーミングは対象外）。
         """
-        if model is None:
-            model = config.get("models.default", "gpt-4o-mini")
+        params = self._response_params(messages, input, model, kwargs)
+        if stream:
+            params["stream"] = True
+            return self._request(self.client.responses, params, priority, stream_class=ResponseStream)
+
+        response_cache = self._response_cache(cache)
+        if response_cache is None:
+            return self._request(self.client.responses, params, priority)
+        key = response_cache.make_key(params)
+        response = self._cached_response(response_cache, key, params["model"])
+        if response is None:
+            started = time.perf_counter()
+            response = self._request(self.client.responses, params, priority)
+            response_cache.put(key, response, time.perf_counter() - started, ttl=cache_ttl)
+        return response
+
+    def _response_cache(self, cache: Optional[bool]) -> Optional[LLMResponseCache]:
+        if cache is None:
+            cache = config.snapshot.llm_cache.enabled
+        if not cache:
+            return None
+        if self.response_cache is None:
+            self.response_cache = get_response_cache()
+        return self.response_cache
 
-        # 新旧両方の引数名をサポート
-        if input is None:
-            input = messages
-        if input is None:
-            raise ValueError("messages or input must be provided")
+    def stream_text(self, *, fallback: Optional[str] = None, **kwargs) -> Iterator[str]:
+        """create_response(stream=True) のテキスト断片を返すジェネレータ（st.write_stream 用）
 
-        params = {
-            "model": model,
-            "input": input,
-        }
-        params.update(kwargs)
-
-        return self.client.responses.create(**params)
+        呼び出しに失敗した場合、fallback があればログに残してそれを返す（途中まで届いていれば続きとして付ける）。
+        """
+        streamed = False
+        try:
+            with self.create_response(stream=True, **kwargs) as stream:
+                for text in ResponseProcessor.stream_text(stream):
+                    streamed = True
+                    yield text
+        except Exception as e:
+            if fallback is None:
+                raise
+            logger.error(f"Streaming response error: {e}")
+            yield ("\n\n" + fallback) if streamed else fallback
+            return
+        if not streamed and fallback is not None:
+            yield fallback
 
     @error_handler
     @timer
-    def create_chat_completion(self, messages: List[ChatCompletionMessageParam], model: str = None, **kwargs):
+    def create_chat_completion(self, messages: List[ChatCompletionMessageParam], model: str = None,
+                               priority: str = "interactive", **kwargs):
         """Chat Completions API呼び出し"""
-        if model is None:
-            model = config.get("models.default", "gpt-4o-mini")
+        params = self._chat_params(messages, model, kwargs)
+        return self._request(self.client.chat.completions, params, priority)
 
-        params = {
-            "model"   : model,
-            "messages": messages,
-        }
-        params.update(kwargs)
+    @error_handler
+    def create_embedding(self, input: Union[str, List[str]], model: str = "text-embedding-3-small",
+                         priority: str = "interactive", **kwargs):
+        """Embeddings API呼び出し"""
+        params = {"model": model, "input": input, **kwargs}
+        texts = input if isinstance(input, list) else [input]
+        estimate = sum(TokenManager.count_tokens(str(text), model) for text in texts)
+        return self._request(self.client.embeddings, params, priority, estimate)
+
+    def create_responses(self, requests: List[Dict[str, Any]], priority: str = "batch",
+                         return_exceptions: bool = True) -> List[Any]:
+        """複数の Responses API 呼び出しを並行に実行し、入力順に結果を返す
+
+        各要素は create_response のキーワード引数（input, model, ...）。並行数とペースは
+        スケジューラが決めるので、ここではスレッドを max_concurrency 本まで使うだけ。
+        return_exceptions=True なら失敗した要素の位置に例外オブジェクトを入れて返す。
+        """
+        caller = _caller_name()
 
-        return self.client.chat.completions.create(**params)
+        def run(request: Dict[str, Any]):
+            token = _usage_caller.set(caller)
+            try:
+                return self.create_response(priority=priority, **request)
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                return e
+            finally:
+                _usage_caller.reset(token)
+
+        if not requests:
+            return []
+        with ThreadPoolExecutor(max_workers=min(len(requests), self.scheduler.max_concurrency),
+                                thread_name_prefix="openai-batch") as executor:
+            return list(executor.map(run, requests))
+
+    # ---------- 非同期API ----------
+    async def acreate_response(
+            self,
+            messages: List[EasyInputMessageParam] = None,
+            *,
+            input: List[EasyInputMessageParam] = None,
+            model: str = None,
+            priority: str = "interactive",
+            stream: bool = False,
+            cache: Optional[bool] = None,
+            cache_ttl: Optional[float] = None,
+            **kwargs,
+    ) -> Union[Response, AsyncResponseStream]:
+        """Responses API呼び出し（非同期。stream=True なら async for で読む AsyncResponseStream を返す）"""
+        params = self._response_params(messages, input, model, kwargs)
+        if stream:
+            params["stream"] = True
+            return await self._arequest(self.async_client.responses, params, priority,
+                                        stream_class=AsyncResponseStream)
+
+        response_cache = self._response_cache(cache)
+        if response_cache is None:
+            return await self._arequest(self.async_client.responses, params, priority)
+        key = response_cache.make_key(params)
+        response = self._cached_response(response_cache, key, params["model"])
+        if response is None:
+            started = time.perf_counter()
+            response = await self._arequest(self.async_client.responses, params, priority)
+            response_cache.put(key, response, time.perf_counter() - started, ttl=cache_ttl)
+        return response
+
+    async def acreate_chat_completion(self, messages: List[ChatCompletionMessageParam], model: str = None,
+                                      priority: str = "interactive", **kwargs):
+        """Chat Completions API呼び出し（非同期）"""
+        params = self._chat_params(messages, model, kwargs)
+        return await self._arequest(self.async_client.chat.completions, params, priority)
+
+    async def acreate_embedding(self, input: Union[str, List[str]], model: str = "text-embedding-3-small",
+                                priority: str = "interactive", **kwargs):
+        """Embeddings API呼び出し（非同期）"""
+        params = {"model": model, "input": input, **kwargs}
+        texts = input if isinstance(input, list) else [input]
+        estimate = sum(TokenManager.count_tokens(str(text), model) for text in texts)
+        return await self._arequest(self.async_client.embeddings, params, priority, estimate)
 
 
 # ==================================================
@@ -805,16 +3118,32 @@ __all__ = [
 
     # クラス
     'ConfigManager',
+    'ConfigSnapshot',
+    'ConfigError',
     'MessageManager',
     'TokenManager',
+    'MessageTokenCounter',
     'ResponseProcessor',
+    'StreamDelta',
+    'StreamAccumulator',
+    'ResponseStream',
+    'AsyncResponseStream',
     'OpenAIClient',
     'MemoryCache',
+    'RedisCacheTier',
+    'TieredCache',
+    'DiskCache',
+    'LLMResponseCache',
 
     # デコレータ
     'error_handler',
     'timer',
     'cache_result',
+    'make_cache_key',
+    'create_cache_backend',
+    'get_rate_limiter',
+    'get_response_cache',
+    'get_usage_ledger',
 
     # ユーティリティ
     'sanitize_key',
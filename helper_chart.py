@@ -0,0 +1,339 @@
+# helper_chart.py
+# グラフ描画前の間引き（LTTB・最小最大バケット・グリッド間引き）と plotly.express のラッパー
+#
+# 使い方:
+#   fig = line(df, x="timestamp", y="response_time", color="endpoint")   # px.line と同じ引数
+#   fig = scatter(df, x="測定回", y="応答時間(ms)", max_points=500)       # px.scatter と同じ引数
+#   go.Scatter(**downsample_trace(dates, sales), mode="lines")           # go.Scatter 用
+#
+#   python helper_chart.py --points 10000 1000000 --target 1000           # ベンチマーク（検証は tests/test_chart.py）
+#
+# 目標点数は max_points 引数、省略時は環境変数 MCP_CHART_MAX_POINTS（既定 1000）。
+# 行数が目標点数以下なら何もしない。plotly はラッパーを呼んだときにだけ読み込む。
+
+import argparse
+import json
+import math
+import os
+import time
+from typing import Dict, Any, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+
+DEFAULT_MAX_POINTS = int(os.getenv("MCP_CHART_MAX_POINTS", "1000"))
+METHODS = ("lttb", "minmax", "grid")
+
+# px.line / px.scatter で系列を分ける引数（カテゴリ列のときだけ系列ごとに間引く）
+_GROUP_ARGS = ("color", "symbol", "line_group", "line_dash", "facet_row", "facet_col", "animation_frame")
+
+
+# ==================================================
+# 間引きアルゴリズム（インデックスを返す）
+# ==================================================
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets で残す点のインデックス（x は昇順を想定）
+
+    先頭と末尾を残し、内側を n_out - 2 個のバケットに分けて、直前に選んだ点と
+    次のバケットの平均点とで作る三角形の面積が最大になる点を各バケットから選ぶ。
+    折れ線の見た目（山・谷・傾き）を保ったまま点数を n_out に減らす。
+    """
+    n = y.size
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = x - x[0]  # datetime のナノ秒値でも桁落ちしないよう原点をずらす
+    buckets = n_out - 2
+    edges = np.linspace(1, n - 1, buckets + 1).astype(np.int64)
+
+    # 各バケットの平均点（累積和から一括計算）、最後のバケットの「次」は末尾の点
+    cum_x = np.concatenate(([0.0], np.cumsum(x)))
+    cum_y = np.concatenate(([0.0], np.cumsum(y)))
+    sizes = np.diff(edges)
+    avg_x = (cum_x[edges[1:]] - cum_x[edges[:-1]]) / sizes
+    avg_y = (cum_y[edges[1:]] - cum_y[edges[:-1]]) / sizes
+    next_x = np.append(avg_x[1:], x[-1])
+    next_y = np.append(avg_y[1:], y[-1])
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(buckets):
+        lo, hi = edges[i], edges[i + 1]
+        ax, ay = x[a], y[a]
+        area = np.abs((ax - next_x[i]) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (next_y[i] - ay))
+        a = lo + int(area.argmax())
+        selected[i + 1] = a
+    return selected
+
+
+def minmax_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """等幅バケットごとに最小・最大の点を残すインデックス（先頭・末尾も残す）
+
+    LTTB より粗いが、スパイクや外れ値を必ず残す。ループなしで計算できる。
+    """
+    n = y.size
+    if n_out >= n or n_out < 4:
+        return np.arange(n)
+
+    buckets = max(1, (n_out - 2) // 2)
+    size = math.ceil(n / buckets)
+    buckets = math.ceil(n / size)  # 末尾のバケットが空にならないよう詰め直す
+    pad = buckets * size - n
+    rows = np.arange(buckets) * size
+    lows = np.concatenate((y, np.full(pad, np.inf))).reshape(buckets, size).argmin(axis=1) + rows
+    highs = np.concatenate((y, np.full(pad, -np.inf))).reshape(buckets, size).argmax(axis=1) + rows
+    return np.unique(np.concatenate(([0, n - 1], lows, highs)))
+
+
+def grid_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """散布図用: 描画範囲を約 n_out 個のセルに分け、各セルの最初の点だけを残す
+
+    x が順序を持たない散布図では LTTB が使えないため、外れ値や分布の広がりを
+    残すことを優先する（密度は失われるので、密度を見せたい場合は抽出側で間引く）。
+    """
+    n = y.size
+    if n_out >= n or n_out < 1:
+        return np.arange(n)
+
+    cells = max(1, int(math.sqrt(n_out)))
+
+    def cell(values: np.ndarray) -> np.ndarray:
+        span = values.max() - values.min()
+        if span == 0:
+            return np.zeros(values.size, dtype=np.int64)
+        return np.minimum(((values - values.min()) / span * cells).astype(np.int64), cells - 1)
+
+    _, first = np.unique(cell(x) * cells + cell(y), return_index=True)
+    return np.sort(first)
+
+
+def downsample_indices(x: Sequence, y: Sequence, n_out: int, method: str = "lttb") -> np.ndarray:
+    """x, y を n_out 点程度に間引くインデックス（昇順）
+
+    欠損（NaN）の点は間引きの対象外とし、欠損区間の先頭だけ残して線の途切れを保つ。
+    数値に変換できない y は間引かない。
+    """
+    if method not in METHODS:
+        raise ValueError(f"未対応の間引き方法: {method}（{', '.join(METHODS)}）")
+    x_values = _numeric_axis(x)
+    try:
+        y_values = np.asarray(y, dtype=float)
+    except (TypeError, ValueError):
+        return np.arange(len(x_values))
+    n = y_values.size
+    if n <= n_out:
+        return np.arange(n)
+
+    finite = np.isfinite(x_values) & np.isfinite(y_values)
+    positions = np.flatnonzero(finite)
+    if method == "lttb":
+        kept = lttb_indices(x_values[positions], y_values[positions], n_out)
+    elif method == "minmax":
+        kept = minmax_indices(y_values[positions], n_out)
+    else:
+        kept = grid_indices(x_values[positions], y_values[positions], n_out)
+    kept = positions[kept]
+    if positions.size == n:
+        return kept
+    gap_starts = np.flatnonzero(~finite & np.concatenate(([True], finite[:-1])))
+    return np.union1d(kept, gap_starts)
+
+
+def _numeric_axis(values: Sequence) -> np.ndarray:
+    """x 軸を面積計算用の float 配列に（日時はナノ秒、文字列などは並び順）"""
+    array = np.asarray(values)
+    if np.issubdtype(array.dtype, np.datetime64):
+        result = array.astype("datetime64[ns]").astype(np.int64).astype(float)
+        result[np.isnat(array)] = np.nan
+        return result
+    if np.issubdtype(array.dtype, np.number) or array.dtype == bool:
+        return array.astype(float)
+    try:
+        return pd.to_datetime(pd.Series(array), format="ISO8601").to_numpy().astype("datetime64[ns]").astype(np.int64).astype(float)
+    except (TypeError, ValueError):
+        return np.arange(array.size, dtype=float)
+
+
+def _is_monotonic(values: np.ndarray) -> bool:
+    finite = values[np.isfinite(values)]
+    return finite.size < 2 or bool(np.all(np.diff(finite) >= 0))
+
+
+# ==================================================
+# DataFrame・配列の間引き
+# ==================================================
+def downsample_frame(df: pd.DataFrame, x: str, y: Union[str, Sequence[str]],
+                     max_points: Optional[int] = None, method: str = "lttb",
+                     group: Optional[Union[str, Sequence[str]]] = None) -> pd.DataFrame:
+    """DataFrame の行を間引く（列はそのまま残るので hover_data などもそのまま使える）
+
+    y が複数列（横持ち）のときは列ごとに選んだ行の和集合、group 指定時は系列ごとに
+    間引く。いずれも合計がおよそ max_points に収まるよう点数を配分する。
+    """
+    max_points = max_points or DEFAULT_MAX_POINTS
+    if len(df) <= max_points:
+        return df
+
+    y_columns = [y] if isinstance(y, str) else list(y)
+    if group is None:
+        series = [np.arange(len(df))]
+    else:
+        series = list(df.groupby(group, sort=False, dropna=False).indices.values())
+    budget = max(3, max_points // (len(series) * len(y_columns)))
+
+    x_values = _numeric_axis(df[x].to_numpy())
+    kept = []
+    for positions in series:
+        for column in y_columns:
+            y_values = df[column].to_numpy()[positions]
+            kept.append(positions[downsample_indices(x_values[positions], y_values, budget, method)])
+    return df.iloc[np.unique(np.concatenate(kept))]
+
+
+def downsample_xy(x: Sequence, y: Sequence, max_points: Optional[int] = None,
+                  method: str = "lttb") -> Tuple[np.ndarray, np.ndarray]:
+    """go.Scatter などに渡す x, y 配列を間引く"""
+    x, y = np.asarray(x), np.asarray(y)
+    indices = downsample_indices(x, y, max_points or DEFAULT_MAX_POINTS, method)
+    return x[indices], y[indices]
+
+
+def downsample_trace(x: Sequence, y: Sequence, max_points: Optional[int] = None,
+                     method: str = "lttb") -> Dict[str, np.ndarray]:
+    """go.Scatter(**downsample_trace(x, y), ...) の形で使う x, y の辞書"""
+    x, y = downsample_xy(x, y, max_points, method)
+    return {"x": x, "y": y}
+
+
+def _frame_columns(x: Any, y: Any) -> bool:
+    """列名で x, y を指定しているか（配列や index 指定のときは間引かない）"""
+    if not isinstance(x, str):
+        return False
+    return isinstance(y, str) or (isinstance(y, (list, tuple)) and all(isinstance(c, str) for c in y))
+
+
+def _group_columns(df: pd.DataFrame, kwargs: Dict[str, Any]) -> Optional[List[str]]:
+    """系列を分ける引数のうち、カテゴリ列を指しているもの（連続値の色分けは系列にしない）"""
+    columns = []
+    for name in _GROUP_ARGS:
+        column = kwargs.get(name)
+        if isinstance(column, str) and column in df.columns and column not in columns:
+            if not pd.api.types.is_float_dtype(df[column]):
+                columns.append(column)
+    return columns or None
+
+
+# ==================================================
+# plotly.express ラッパー
+# ==================================================
+def line(data_frame: Optional[pd.DataFrame] = None, x: Any = None, y: Any = None,
+         max_points: Optional[int] = None, method: str = "lttb", **kwargs):
+    """間引いてから px.line を呼ぶ（引数は px.line と同じ）"""
+    import plotly.express as px
+
+    if data_frame is None:
+        if x is not None and y is not None:
+            x, y = downsample_xy(x, y, max_points, method)
+        return px.line(x=x, y=y, **kwargs)
+    if _frame_columns(x, y):
+        data_frame = downsample_frame(data_frame, x, y, max_points, method, _group_columns(data_frame, kwargs))
+    return px.line(data_frame, x=x, y=y, **kwargs)
+
+
+def scatter(data_frame: Optional[pd.DataFrame] = None, x: Any = None, y: Any = None,
+            max_points: Optional[int] = None, method: Optional[str] = None, **kwargs):
+    """間引いてから px.scatter を呼ぶ（引数は px.scatter と同じ）
+
+    method 省略時は x が昇順なら時系列として LTTB、そうでなければグリッド間引き。
+    """
+    import plotly.express as px
+
+    if data_frame is None:
+        if x is not None and y is not None:
+            x_values = _numeric_axis(x)
+            x, y = downsample_xy(x, y, max_points, method or ("lttb" if _is_monotonic(x_values) else "grid"))
+        return px.scatter(x=x, y=y, **kwargs)
+    if _frame_columns(x, y):
+        if method is None:
+            method = "lttb" if _is_monotonic(_numeric_axis(data_frame[x].to_numpy())) else "grid"
+        data_frame = downsample_frame(data_frame, x, y, max_points, method, _group_columns(data_frame, kwargs))
+    return px.scatter(data_frame, x=x, y=y, **kwargs)
+
+
+# ==================================================
+# 検証用データ・ベンチマーク（python helper_chart.py）
+# ==================================================
+def synthetic_series(n_points: int, seed: int = 42) -> Dict[str, np.ndarray]:
+    """ランダムウォーク＋周期成分＋まれなスパイクの時系列"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(n_points, dtype=float)
+    values = np.cumsum(rng.normal(0, 1, n_points)) + 20 * np.sin(t / max(n_points / 12, 1))
+    spikes = rng.choice(n_points, size=max(1, n_points // 5000), replace=False)
+    values[spikes] += 200
+    return {"x": t, "y": values, "spikes": np.sort(spikes)}
+
+
+def benchmark(n_points: int, target: int, repeat: int = 5) -> Dict[str, float]:
+    """間引きの処理時間（ミリ秒、中央値）と JSON にしたときの大きさの比"""
+    data = synthetic_series(n_points)
+    x = pd.date_range("2020-01-01", periods=n_points, freq="min").to_numpy()
+    y = data["y"]
+    result = {}
+    for method in ("lttb", "minmax"):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            indices = downsample_indices(x, y, target, method)
+            timings.append(time.perf_counter() - started)
+        result[f"{method}_ms"] = float(np.median(timings)) * 1000
+        result[f"{method}_points"] = indices.size
+
+    def payload(count: int) -> int:
+        sample = np.arange(min(count, 1000))
+        size = len(json.dumps({"x": x[sample].astype(str).tolist(), "y": y[sample].tolist()}))
+        return size * count // sample.size
+
+    result["payload_ratio"] = payload(n_points) / payload(result["lttb_points"])
+    return result
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="helper_chart のベンチマーク")
+    parser.add_argument("--points", type=int, nargs="+", default=[10_000, 100_000, 1_000_000],
+                        help="ベンチマークする点数（複数指定可）")
+    parser.add_argument("--target", type=int, default=DEFAULT_MAX_POINTS, help="間引き後の目標点数")
+    parser.add_argument("--repeat", type=int, default=5, help="各サイズの反復回数")
+    args = parser.parse_args(argv)
+
+    print(f"{'points':>10} {'lttb(ms)':>10} {'minmax(ms)':>11} {'kept':>6} {'payload':>9}")
+    for n_points in args.points:
+        result = benchmark(n_points, args.target, args.repeat)
+        print(f"{n_points:>10} {result['lttb_ms']:>10.2f} {result['minmax_ms']:>11.2f} "
+              f"{result['lttb_points']:>6} {result['payload_ratio']:>8.0f}x")
+    return 0
+
+
+# ==================================================
+# エクスポート
+# ==================================================
+__all__ = [
+    'DEFAULT_MAX_POINTS',
+    'METHODS',
+    'lttb_indices',
+    'minmax_indices',
+    'grid_indices',
+    'downsample_indices',
+    'downsample_frame',
+    'downsample_xy',
+    'downsample_trace',
+    'line',
+    'scatter',
+    'synthetic_series',
+    'benchmark',
+]
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,165 @@
+# helper_live.py
+# ライブダッシュボード用の差分集計（since_id で新規行だけを取得し、メモリ上の集計に畳み込む）
+#
+# 使い方:
+#   aggregates = LiveAggregates()
+#   added = aggregates.refresh(client)  # 初回は全件、以降は前回より後のIDだけ取得
+#   current, previous = aggregates.snapshot(), aggregates.previous
+#   snapshot_delta(current, previous, "total_sales")
+
+import threading
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+
+# ==================================================
+# 差分集計
+# ==================================================
+class LiveAggregates:
+    """注文・顧客を追記のみのストリームとして扱い、/api/stats/sales 相当の集計を保持
+
+    注文と顧客には更新・削除APIがないため、ID の高水位線より後の行を畳み込めば
+    集計はサーバーと一致する。並行トランザクションの採番とコミット順の逆転で
+    高水位線より小さいIDが後から見えることがあるため、直近 LOOKBACK 件分は
+    取り直して ID で重複を除く。
+    """
+
+    LOOKBACK = 50
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.last_order_id = 0
+        self.last_customer_id = 0
+        self.total_sales = 0.0
+        self.total_orders = 0
+        self.products: Dict[str, Dict[str, float]] = {}
+        self.cities: Dict[str, Dict[str, float]] = {}
+        self.customer_city: Dict[int, str] = {}
+        self._seen_order_ids: Dict[int, None] = {}
+        self._seen_customer_ids: Dict[int, None] = {}
+        self._orphan_orders: List[Dict[str, Any]] = []  # 顧客より先に見えた注文
+        self.previous: Optional[Dict[str, Any]] = None
+        self.refreshed_at: Optional[datetime] = None
+        self.refresh_count = 0
+
+    # ---------- 取得 ----------
+    def refresh(self, client) -> Dict[str, List[Dict[str, Any]]]:
+        """新しい顧客→注文の順に差分取得して畳み込み、新たに集計した行を返す
+
+        新しい行があった場合は畳み込む前の集計を previous に残すので、KPIの増減は
+        直近の変化の実際の差分になる（変化のない更新では previous を動かさない）。
+        """
+        customers = client.get_new_customers(max(0, self.last_customer_id - self.LOOKBACK))
+        orders = client.get_new_orders(max(0, self.last_order_id - self.LOOKBACK))
+        with self._lock:
+            before = self._snapshot() if self.refresh_count else None
+            new_customers = self.apply_customers(customers)
+            new_orders = self.apply_orders(orders)
+            if before is not None and (new_customers or new_orders):
+                self.previous = before
+            self.refreshed_at = datetime.now()
+            self.refresh_count += 1
+        return {"customers": new_customers, "orders": new_orders}
+
+    # ---------- 畳み込み ----------
+    def apply_customers(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        added = []
+        for row in rows:
+            customer_id = row["id"]
+            if customer_id in self._seen_customer_ids:
+                continue
+            self._remember(self._seen_customer_ids, customer_id, self.last_customer_id)
+            self.last_customer_id = max(self.last_customer_id, customer_id)
+            city = row.get("city") or "不明"
+            self.customer_city[customer_id] = city
+            self._city(city)["customer_count"] += 1
+            added.append(row)
+
+        if added and self._orphan_orders:
+            orphans, self._orphan_orders = self._orphan_orders, []
+            for order in orphans:
+                self._fold_city(order)
+        return added
+
+    def apply_orders(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        added = []
+        for row in rows:
+            order_id = row["id"]
+            if order_id in self._seen_order_ids:
+                continue
+            self._remember(self._seen_order_ids, order_id, self.last_order_id)
+            self.last_order_id = max(self.last_order_id, order_id)
+
+            amount = float(row["price"]) * int(row["quantity"])
+            self.total_sales += amount
+            self.total_orders += 1
+            product = self.products.setdefault(
+                row["product_name"], {"total_quantity": 0, "total_sales": 0.0, "order_count": 0}
+            )
+            product["total_quantity"] += int(row["quantity"])
+            product["total_sales"] += amount
+            product["order_count"] += 1
+            self._fold_city(row)
+            added.append(row)
+        return added
+
+    def _fold_city(self, order: Dict[str, Any]):
+        city = self.customer_city.get(order["customer_id"])
+        if city is None:
+            self._orphan_orders.append(order)
+            return
+        stats = self._city(city)
+        stats["total_sales"] += float(order["price"]) * int(order["quantity"])
+        stats["order_count"] += 1
+
+    def _city(self, city: str) -> Dict[str, float]:
+        return self.cities.setdefault(city, {"customer_count": 0, "total_sales": 0.0, "order_count": 0})
+
+    def _remember(self, seen: Dict[int, None], row_id: int, high_water: int):
+        """重複判定用のIDを高水位線付近だけ保持（古いものから捨てる）"""
+        seen[row_id] = None
+        floor = max(high_water, row_id) - self.LOOKBACK
+        while seen and next(iter(seen)) <= floor:
+            del seen[next(iter(seen))]
+
+    # ---------- 参照 ----------
+    def snapshot(self, top_n: int = 10) -> Dict[str, Any]:
+        """/api/stats/sales と同じ形の集計（顧客数・高水位線付き）"""
+        with self._lock:
+            return self._snapshot(top_n)
+
+    def _snapshot(self, top_n: int = 10) -> Dict[str, Any]:
+        top_products = sorted(
+            ({"product_name": name, **stats} for name, stats in self.products.items()),
+            key=lambda item: item["total_sales"], reverse=True,
+        )[:top_n]
+        sales_by_city = sorted(
+            ({"city": city, **stats} for city, stats in self.cities.items()),
+            key=lambda item: item["total_sales"], reverse=True,
+        )
+        return {
+            "total_sales"    : self.total_sales,
+            "total_orders"   : self.total_orders,
+            "avg_order_value": self.total_sales / self.total_orders if self.total_orders else 0.0,
+            "customer_count" : len(self.customer_city),
+            "top_products"   : top_products,
+            "sales_by_city"  : sales_by_city,
+            "last_order_id"  : self.last_order_id,
+        }
+
+
+def snapshot_delta(current: Dict[str, Any], previous: Optional[Dict[str, Any]], key: str) -> Optional[float]:
+    """前回スナップショットからの増減（前回なし・変化なしは None）"""
+    if not previous:
+        return None
+    delta = current.get(key, 0) - previous.get(key, 0)
+    return delta or None
+
+
+# ==================================================
+# エクスポート
+# ==================================================
+__all__ = [
+    'LiveAggregates',
+    'snapshot_delta',
+]
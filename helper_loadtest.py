@@ -0,0 +1,400 @@
+# helper_loadtest.py
+# asyncio ベースの負荷生成エンジン（クローズドループ / オープンループ）
+#
+# 使い方:
+#   runner = LoadTestRunner(LoadTestConfig(base_url="http://localhost:8000",
+#                                          endpoint="/api/customers?limit=5",
+#                                          mode="open", target_rps=500, duration=30))
+#   runner.start()            # バックグラウンドスレッドで実行（呼び出し元はブロックしない）
+#   runner.snapshot()         # 途中経過（ライブのパーセンタイル・タイムライン）
+#   runner.result()           # 完了後の最終結果
+
+import asyncio
+import math
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional
+
+import httpx
+
+from helper_perf import LatencyHistogram
+
+
+# ==================================================
+# 設定
+# ==================================================
+@dataclass
+class LoadTestConfig:
+    """負荷テストの設定
+
+    mode:
+        "closed" - users 人の仮想ユーザーが応答を待ってから次を送る（同時実行数が固定）
+        "open"   - 応答を待たず target_rps の予定時刻どおりに送る（到着率が固定）
+    """
+    base_url: str
+    endpoint: str
+    mode: str = "closed"
+    users: int = 10
+    target_rps: float = 100.0
+    duration: float = 30.0
+    ramp_up: float = 5.0
+    timeout: float = 10.0
+    max_in_flight: int = 1000
+    think_time: float = 0.0
+
+    def __post_init__(self):
+        if self.mode not in ("closed", "open"):
+            raise ValueError(f"mode は 'closed' か 'open' を指定してください: {self.mode}")
+        if self.duration <= 0:
+            raise ValueError("duration は正の値を指定してください")
+        self.ramp_up = max(0.0, self.ramp_up)
+
+    @property
+    def total_duration(self) -> float:
+        return self.ramp_up + self.duration
+
+
+# ==================================================
+# 負荷生成エンジン
+# ==================================================
+class LoadTestRunner:
+    """専用スレッドの asyncio イベントループで負荷を生成する
+
+    オープンループでは各リクエストの「予定送信時刻」から応答完了までを
+    補正済みレイテンシとして記録する（Coordinated Omission 補正）。
+    サーバーが詰まって送信が遅れた分も待ち時間として計上されるため、
+    実際の送信時刻から測るサービス時間よりも利用者の体感に近い。
+
+    計測値はイベントループのスレッドだけが書き込み、snapshot() は
+    ロックを取って複製を返すので、Streamlit のスレッドから安全に参照できる。
+    """
+
+    WINDOW_SECONDS = 1.0
+
+    def __init__(self, config: LoadTestConfig):
+        self.config = config
+        self.state = "idle"
+        self.error: Optional[str] = None
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop_event: Optional[asyncio.Event] = None
+        self._stop_requested = False
+        self._started_at: Optional[float] = None
+        self._finished_at: Optional[float] = None
+        self._steady_start: Optional[float] = None
+        self._steady_end: Optional[float] = None
+
+        # 定常区間（ランプアップ後）の集計
+        self.service = LatencyHistogram()    # 実送信時刻からの応答時間
+        self.corrected = LatencyHistogram()  # 予定送信時刻からの応答時間（オープンループ）
+        self.steady_completed = 0
+        self.steady_errors = 0
+
+        # 全区間の集計
+        self.sent = 0
+        self.completed = 0
+        self.errors = 0
+        self.error_counts: Dict[str, int] = {}
+        self.in_flight = 0
+
+        # ライブ表示用（1秒ごとのウィンドウ）
+        self._window = LatencyHistogram()
+        self._window_errors = 0
+        self.timeline: List[Dict[str, Any]] = []
+
+    # ---------- 制御 ----------
+    def start(self) -> "LoadTestRunner":
+        """バックグラウンドで実行開始"""
+        if self._thread is not None:
+            raise RuntimeError("この負荷テストは既に開始されています")
+        self.state = "starting"
+        self._thread = threading.Thread(target=self._run_thread, name="mcp-loadtest", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """実行中のテストを停止（送信を止め、実行中のリクエストはキャンセル）"""
+        self._stop_requested = True
+        loop, stop_event = self._loop, self._stop_event
+        if loop is not None and stop_event is not None and not loop.is_closed():
+            try:
+                loop.call_soon_threadsafe(stop_event.set)
+            except RuntimeError:
+                pass
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """完了を待つ（完了していれば True）"""
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.done
+
+    @property
+    def running(self) -> bool:
+        return self.state in ("starting", "ramp_up", "running", "draining")
+
+    @property
+    def done(self) -> bool:
+        return self.state in ("done", "stopped", "error")
+
+    @property
+    def elapsed(self) -> float:
+        if self._started_at is None:
+            return 0.0
+        end = self._finished_at if self._finished_at is not None else time.perf_counter()
+        return end - self._started_at
+
+    @property
+    def progress(self) -> float:
+        if self.done:
+            return 1.0
+        return min(1.0, self.elapsed / self.config.total_duration)
+
+    # ---------- 実行 ----------
+    def _run_thread(self) -> None:
+        try:
+            asyncio.run(self._main())
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+            self.state = "error"
+        finally:
+            if self._finished_at is None:
+                self._finished_at = time.perf_counter()
+
+    async def _main(self) -> None:
+        config = self.config
+        self._loop = asyncio.get_running_loop()
+        self._stop_event = asyncio.Event()
+        if self._stop_requested:
+            self._stop_event.set()
+
+        connections = config.users if config.mode == "closed" else config.max_in_flight
+        limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+        async with httpx.AsyncClient(base_url=config.base_url, timeout=config.timeout, limits=limits) as client:
+            self._started_at = time.perf_counter()
+            self._steady_start = self._started_at + config.ramp_up
+            self._steady_end = self._started_at + config.total_duration
+            self.state = "ramp_up" if config.ramp_up > 0 else "running"
+
+            ticker = asyncio.create_task(self._tick())
+            in_flight_tasks: set = set()
+            if config.mode == "closed":
+                generators = [asyncio.create_task(self._closed_user(client, i)) for i in range(config.users)]
+            else:
+                generators = [asyncio.create_task(self._open_dispatch(client, in_flight_tasks))]
+
+            stopper = asyncio.create_task(self._stop_event.wait())
+            await asyncio.wait(generators + [stopper], return_when=asyncio.FIRST_COMPLETED)
+            stopped = self._stop_event.is_set()
+
+            if not stopped:
+                # 予定分の送信は完了。実行中のリクエストはタイムアウトか停止指示まで待つ
+                self.state = "draining"
+                pending = [task for task in generators + list(in_flight_tasks) if not task.done()]
+                if pending:
+                    drain = asyncio.ensure_future(asyncio.wait(pending))
+                    await asyncio.wait([drain, stopper], timeout=config.timeout,
+                                       return_when=asyncio.FIRST_COMPLETED)
+                    drain.cancel()
+                stopped = self._stop_event.is_set()
+
+            for task in generators + list(in_flight_tasks):
+                task.cancel()
+
+            await asyncio.gather(*generators, *in_flight_tasks, return_exceptions=True)
+            stopper.cancel()
+            ticker.cancel()
+            await asyncio.gather(stopper, ticker, return_exceptions=True)
+
+        self._finished_at = time.perf_counter()
+        self._roll_window(self._finished_at)
+        self.state = "stopped" if stopped else "done"
+
+    async def _closed_user(self, client: httpx.AsyncClient, index: int) -> None:
+        """クローズドループの仮想ユーザー（ランプアップ中に順次参加）"""
+        config = self.config
+        if config.ramp_up > 0 and config.users > 1:
+            await asyncio.sleep(config.ramp_up * index / config.users)
+        while time.perf_counter() < self._steady_end:
+            await self._send(client, None)
+            if config.think_time > 0:
+                await asyncio.sleep(config.think_time)
+
+    def _scheduled_offset(self, index: int) -> float:
+        """index 番目のリクエストの予定送信時刻（開始からの秒数）
+
+        ランプアップ中は到着率を 0 から target_rps まで線形に上げる。
+        到着数 N(t) = R t² / 2T を解いて t = sqrt(2 T k / R)。
+        """
+        rate, ramp = self.config.target_rps, self.config.ramp_up
+        ramp_requests = rate * ramp / 2
+        if ramp > 0 and index < ramp_requests:
+            return math.sqrt(2 * ramp * index / rate)
+        return ramp + (index - ramp_requests) / rate
+
+    async def _open_dispatch(self, client: httpx.AsyncClient, tasks: set) -> None:
+        """オープンループの送信スケジューラ
+
+        同時実行数が max_in_flight に達した場合は空きを待つが、予定時刻は
+        ずらさないため、待たされた時間は補正済みレイテンシに含まれる。
+        """
+        config = self.config
+        slots = asyncio.Semaphore(config.max_in_flight)
+        index = 0
+        while True:
+            intended = self._started_at + self._scheduled_offset(index)
+            if intended >= self._steady_end:
+                break
+            delay = intended - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await slots.acquire()
+            task = asyncio.create_task(self._send(client, intended))
+            tasks.add(task)
+            task.add_done_callback(lambda t: (tasks.discard(t), slots.release()))
+            index += 1
+
+    async def _send(self, client: httpx.AsyncClient, intended: Optional[float]) -> None:
+        """1リクエスト送信して計測値を記録"""
+        self.sent += 1
+        self.in_flight += 1
+        start = time.perf_counter()
+        error = None
+        try:
+            response = await client.get(self.config.endpoint)
+            if response.status_code >= 400:
+                error = f"HTTP {response.status_code}"
+        except httpx.HTTPError as e:
+            error = type(e).__name__
+        finally:
+            self.in_flight -= 1
+        end = time.perf_counter()
+        self._record(start, end, intended if intended is not None else start, error)
+
+    def _record(self, start: float, end: float, intended: float, error: Optional[str]) -> None:
+        with self._lock:
+            self.completed += 1
+            steady = self._steady_start <= start < self._steady_end
+            if error is not None:
+                # エラーはレイテンシ分布に混ぜず、種別ごとに件数だけ数える
+                self.errors += 1
+                self._window_errors += 1
+                self.error_counts[error] = self.error_counts.get(error, 0) + 1
+                if steady:
+                    self.steady_errors += 1
+                return
+            corrected_ms = (end - intended) * 1000
+            self._window.record(corrected_ms)
+            if steady:
+                self.steady_completed += 1
+                self.service.record((end - start) * 1000)
+                self.corrected.record(corrected_ms)
+
+    async def _tick(self) -> None:
+        """1秒ごとにライブ表示用ウィンドウを確定"""
+        while True:
+            await asyncio.sleep(self.WINDOW_SECONDS)
+            now = time.perf_counter()
+            if self.state == "ramp_up" and now >= self._steady_start:
+                self.state = "running"
+            self._roll_window(now)
+
+    def _roll_window(self, now: float) -> None:
+        with self._lock:
+            window, errors = self._window, self._window_errors
+            self._window = LatencyHistogram()
+            self._window_errors = 0
+            if self._started_at is None or (not window.count and not errors):
+                return
+            previous = self.timeline[-1]["elapsed"] if self.timeline else 0.0
+            elapsed = now - self._started_at
+            span = max(elapsed - previous, 1e-9)
+            self.timeline.append({
+                "elapsed"  : round(elapsed, 3),
+                "rps"      : (window.count + errors) / span,
+                "p50"      : window.percentile(50),
+                "p95"      : window.percentile(95),
+                "p99"      : window.percentile(99),
+                "errors"   : errors,
+                "in_flight": self.in_flight,
+            })
+
+    # ---------- 結果 ----------
+    @property
+    def _latency(self) -> LatencyHistogram:
+        """代表値に使うヒストグラム（オープンループは補正済み）"""
+        return self.corrected if self.config.mode == "open" else self.service
+
+    def snapshot(self) -> Dict[str, Any]:
+        """途中経過（表示用の複製）"""
+        with self._lock:
+            latency = self._latency.copy()
+            service = self.service.copy()
+            timeline = list(self.timeline)
+            error_counts = dict(self.error_counts)
+            completed, errors = self.completed, self.errors
+        current = timeline[-1] if timeline else {}
+        return {
+            "state"       : self.state,
+            "mode"        : self.config.mode,
+            "elapsed"     : self.elapsed,
+            "progress"    : self.progress,
+            "sent"        : self.sent,
+            "completed"   : completed,
+            "errors"      : errors,
+            "error_counts": error_counts,
+            "in_flight"   : self.in_flight,
+            "current_rps" : current.get("rps", 0.0),
+            "window"      : {k: current.get(k, 0.0) for k in ("p50", "p95", "p99")},
+            "latency"     : latency.summary(),
+            "service"     : service.summary(),
+            "timeline"    : timeline,
+            "error"       : self.error,
+        }
+
+    def result(self) -> Dict[str, Any]:
+        """最終結果（定常区間のみで集計）"""
+        config = self.config
+        with self._lock:
+            latency = self._latency.copy()
+            service = self.service.copy()
+            completed, errors = self.steady_completed, self.steady_errors
+            timeline = list(self.timeline)
+            error_counts = dict(self.error_counts)
+
+        steady_end = min(self._steady_end or 0.0, self._finished_at or time.perf_counter())
+        steady_seconds = max(steady_end - (self._steady_start or 0.0), 1e-9)
+        total = completed + errors
+        return {
+            "mode"             : config.mode,
+            "endpoint"         : config.endpoint,
+            "concurrent_users" : config.users if config.mode == "closed" else None,
+            "target_rps"       : config.target_rps if config.mode == "open" else None,
+            "duration"         : config.duration,
+            "ramp_up"          : config.ramp_up,
+            "total_requests"   : total,
+            "success_rate"     : completed / total * 100 if total else 0.0,
+            "throughput"       : completed / steady_seconds,
+            "avg_response_time": latency.mean,
+            "p50"              : latency.percentile(50),
+            "p95"              : latency.percentile(95),
+            "p99"              : latency.percentile(99),
+            "max_response_time": latency.max,
+            "min_response_time": latency.min,
+            "service_p99"      : service.percentile(99),
+            "error_counts"     : error_counts,
+            "distribution"     : latency.distribution(),
+            "histogram"        : latency.to_dict(),
+            "timeline"         : timeline,
+            "state"            : self.state,
+        }
+
+
+# ==================================================
+# エクスポート
+# ==================================================
+__all__ = [
+    'LoadTestConfig',
+    'LoadTestRunner',
+]
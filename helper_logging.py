@@ -0,0 +1,416 @@
+# helper_logging.py
+# ノンブロッキングな構造化ログ（キュー経由の書き込み・JSON 形式・相関 ID・高頻度ログの間引き）
+#
+# 使い方:
+#   pipeline = setup_logging(logging.getLogger("openai_helper"), config.get("logging", {}))
+#   with correlation_scope():                  # このブロック内のログに同じ correlation_id が付く
+#       logger.info("create_response took 0.52 seconds", extra={"event": "timer", "duration": 0.52})
+#   pipeline.stats()                           # キューの滞留数・破棄数
+#
+#   python helper_logging.py --records 50000 --threads 4 --slow-ms 1   # 同期書き込みとの比較ベンチマーク
+#
+# 呼び出し元のスレッドでは LogRecord のメッセージを文字列にしてキューへ入れるだけで、JSON 化と
+# コンソール・ファイルへの書き込みはリスナースレッドが行う。キューは上限付きで、満杯のときは
+# drop_policy に従って古いもの（drop_oldest）か新しいもの（drop_new）を捨て、破棄した件数は
+# 次に入ったログの直後に警告として1行で残す。
+
+import argparse
+import atexit
+import contextvars
+import copy
+import itertools
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+from helper_perf import LatencyHistogram
+
+
+DROP_POLICIES = ("drop_oldest", "drop_new")
+
+DEFAULT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+
+# ==================================================
+# 相関 ID
+# ==================================================
+_correlation_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("correlation_id", default=None)
+
+
+def new_correlation_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def get_correlation_id() -> Optional[str]:
+    """現在のコンテキスト（スレッド・asyncio タスク）の相関 ID"""
+    return _correlation_id.get()
+
+
+@contextmanager
+def correlation_scope(correlation_id: Optional[str] = None):
+    """ブロック内のログに相関 ID を付ける
+
+    ID を省略した場合、外側のスコープがあればその ID を引き継ぎ、なければ新しく発行する
+    （API 呼び出しの中で再試行のログを出しても、呼び出し全体が同じ ID でまとまる）。
+    """
+    correlation_id = correlation_id or _correlation_id.get() or new_correlation_id()
+    token = _correlation_id.set(correlation_id)
+    try:
+        yield correlation_id
+    finally:
+        _correlation_id.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """呼び出し元のスレッドで相関 ID を LogRecord に写す（extra で指定済みならそのまま）"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "correlation_id", None) is None:
+            record.correlation_id = _correlation_id.get()
+        return True
+
+
+# ==================================================
+# フォーマッター
+# ==================================================
+# LogRecord が最初から持つ属性（これ以外は extra で渡された項目として JSON に出す）
+_STANDARD_ATTRS = frozenset(vars(logging.makeLogRecord({}))) | {"message", "asctime", "correlation_id", "taskName"}
+
+
+class JsonFormatter(logging.Formatter):
+    """1レコード1行の JSON（ts, level, logger, msg, correlation_id, thread と extra の項目）"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts"    : datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level" : record.levelname,
+            "logger": record.name,
+            "msg"   : record.getMessage(),
+        }
+        correlation_id = getattr(record, "correlation_id", None)
+        if correlation_id:
+            entry["correlation_id"] = correlation_id
+        entry["thread"] = record.threadName
+        if record.levelno >= logging.WARNING:
+            entry["where"] = f"{record.module}:{record.funcName}:{record.lineno}"
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = record.stack_info
+        return json.dumps(entry, ensure_ascii=False, default=str, separators=(",", ":"))
+
+
+# ==================================================
+# キュー
+# ==================================================
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """上限付きキューに入れるだけのハンドラー（満杯でも呼び出し元を待たせない）"""
+
+    def __init__(self, maxsize: int = 10000, drop_policy: str = "drop_oldest"):
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(f"drop_policy は {' / '.join(DROP_POLICIES)} のいずれか: {drop_policy!r}")
+        super().__init__(queue.Queue(maxsize))
+        self.drop_policy = drop_policy
+        self.dropped = 0
+        self._unreported = 0
+        self.addFilter(ContextFilter())
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # 引数・例外は呼び出し元のスレッドで文字列にしておく（後から値が変わったり、
+        # トレースバック経由でフレームを保持し続けたりしないように）。整形はリスナー側で行う
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        # emit は Handler.lock の中で呼ばれるので、カウンタの更新は直列化されている
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            if self.drop_policy == "drop_oldest":
+                try:
+                    self.queue.get_nowait()
+                    self.queue.put_nowait(record)
+                except (queue.Empty, queue.Full):
+                    pass
+            self.dropped += 1
+            self._unreported += 1
+            return
+
+        if self._unreported:
+            notice = logging.LogRecord(record.name, logging.WARNING, __file__, 0,
+                                       f"ログキューが満杯のため {self._unreported} 件を破棄しました"
+                                       f"（累計 {self.dropped} 件、{self.drop_policy}）", None, None)
+            notice.event = "log_dropped"
+            notice.dropped = self._unreported
+            notice.correlation_id = None
+            try:
+                self.queue.put_nowait(notice)
+                self._unreported = 0
+            except queue.Full:
+                pass
+
+
+class _QueueListener(logging.handlers.QueueListener):
+    def enqueue_sentinel(self) -> None:
+        # 満杯でも終了の合図は必ず届ける（リスナーが読み進めるので待てば空く）
+        self.queue.put(self._sentinel)
+
+
+class LogPipeline:
+    """ロガー → BoundedQueueHandler →（リスナースレッド）→ コンソール・ファイルのハンドラー"""
+
+    def __init__(self, handlers: List[logging.Handler], queue_size: int = 10000,
+                 drop_policy: str = "drop_oldest"):
+        self.handler = BoundedQueueHandler(queue_size, drop_policy)
+        self.handlers = handlers
+        self.listener = _QueueListener(self.handler.queue, *handlers, respect_handler_level=True)
+        self._started = False
+        self._lock = threading.Lock()
+
+    def start(self) -> "LogPipeline":
+        with self._lock:
+            if not self._started:
+                self.listener.start()
+                self._started = True
+        return self
+
+    def stop(self) -> None:
+        """キューに残ったログを書き切ってから止める"""
+        with self._lock:
+            if not self._started:
+                return
+            self._started = False
+            self.listener.stop()
+        for handler in self.handlers:
+            try:
+                handler.flush()
+            except (OSError, ValueError):
+                # 終了時に出力先が先に閉じられている場合（logging.shutdown と同じ扱い）
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued"     : self.handler.queue.qsize(),
+            "capacity"   : self.handler.queue.maxsize,
+            "dropped"    : self.handler.dropped,
+            "drop_policy": self.handler.drop_policy,
+        }
+
+
+def build_handlers(log_config: Dict[str, Any]) -> List[logging.Handler]:
+    """設定（config.yml の logging）からコンソール・ファイルのハンドラーを作る"""
+    text_formatter = logging.Formatter(log_config.get("format") or DEFAULT_FORMAT)
+    json_formatter = JsonFormatter()
+
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(json_formatter if log_config.get("console_json", False) else text_formatter)
+    handlers: List[logging.Handler] = [console_handler]
+
+    log_file = log_config.get("file")
+    if log_file:
+        file_handler = logging.handlers.RotatingFileHandler(
+            log_file,
+            maxBytes=log_config.get("max_bytes", 10485760),
+            backupCount=log_config.get("backup_count", 5),
+            encoding="utf-8",
+        )
+        file_handler.setFormatter(json_formatter if log_config.get("json", True) else text_formatter)
+        handlers.append(file_handler)
+    return handlers
+
+
+def setup_logging(logger: logging.Logger, log_config: Dict[str, Any]) -> LogPipeline:
+    """logger にキューのハンドラーだけを付け、書き込みはリスナースレッドに任せる（終了時に書き切る）"""
+    pipeline = LogPipeline(
+        build_handlers(log_config),
+        queue_size=log_config.get("queue_size", 10000),
+        drop_policy=log_config.get("drop_policy", "drop_oldest"),
+    )
+    logger.addHandler(pipeline.handler)
+    pipeline.start()
+    atexit.register(pipeline.stop)
+    return pipeline
+
+
+# ==================================================
+# 間引き
+# ==================================================
+class LogSampler:
+    """高頻度ログの間引き（キーごとに rate の割合だけ通す）
+
+    乱数ではなくキーごとの通し番号で決めるので、rate=0.1 なら 1件目・11件目・21件目…が出る。
+    rate は呼び出しごとに渡す（設定のホットリロードがそのまま効く）。
+    """
+
+    def __init__(self):
+        self._counters: Dict[str, Any] = {}
+
+    def should_log(self, key: str, rate: float) -> bool:
+        if rate >= 1:
+            return True
+        if rate <= 0:
+            return False
+        counter = self._counters.get(key)
+        if counter is None:
+            counter = self._counters.setdefault(key, itertools.count())
+        return next(counter) % max(1, round(1 / rate)) == 0
+
+
+# ==================================================
+# ベンチマーク
+# ==================================================
+class _SlowHandler(logging.Handler):
+    """書き込みのたびに待つハンドラー（遅いディスク・ネットワークドライブの再現用）"""
+
+    def __init__(self, inner: logging.Handler, delay: float):
+        super().__init__(inner.level)
+        self.inner = inner
+        self.delay = delay
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if self.delay:
+            time.sleep(self.delay)
+        self.inner.handle(record)
+
+    def flush(self) -> None:
+        self.inner.flush()
+
+    def close(self) -> None:
+        self.inner.close()
+        super().close()
+
+
+def benchmark(mode: str, records: int = 20000, threads: int = 1, slow_ms: float = 0.0,
+              queue_size: int = 10000, drop_policy: str = "drop_oldest") -> Dict[str, Any]:
+    """ログ1行あたりの呼び出し元の待ち時間を計測する
+
+    mode: "sync"（RotatingFileHandler に直接書く従来の構成）/ "queue"（JSON＋キュー）/
+    "queue_text"（テキスト＋キュー）/ "disabled"（レベルで捨てられるログ。計測の下限）
+    """
+    directory = tempfile.mkdtemp(prefix="log_bench_")
+    path = os.path.join(directory, "bench.log")
+    logger = logging.getLogger(f"log_bench.{mode}.{uuid.uuid4().hex[:6]}")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+
+    file_handler = logging.handlers.RotatingFileHandler(path, maxBytes=0, encoding="utf-8")
+    file_handler.setFormatter(JsonFormatter() if mode == "queue" else logging.Formatter(DEFAULT_FORMAT))
+    inner: logging.Handler = _SlowHandler(file_handler, slow_ms / 1000) if slow_ms else file_handler
+
+    pipeline = None
+    if mode == "sync":
+        logger.addHandler(inner)
+    elif mode in ("queue", "queue_text"):
+        pipeline = LogPipeline([inner], queue_size=queue_size, drop_policy=drop_policy).start()
+        logger.addHandler(pipeline.handler)
+    elif mode == "disabled":
+        logger.addHandler(inner)
+        logger.setLevel(logging.WARNING)
+    else:
+        raise ValueError(f"unknown mode: {mode}")
+
+    per_thread = max(1, records // threads)
+    histograms = [LatencyHistogram() for _ in range(threads)]
+
+    def worker(index: int) -> None:
+        histogram = histograms[index]
+        with correlation_scope():
+            for i in range(per_thread):
+                started = time.perf_counter_ns()
+                logger.info("create_response took %.2f seconds", 0.5, extra={"event": "timer", "seq": i})
+                histogram.record_us((time.perf_counter_ns() - started) // 1000)
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    emit_seconds = time.perf_counter() - started
+
+    stats = pipeline.stats() if pipeline else {"dropped": 0}
+    if pipeline:
+        pipeline.stop()
+    drain_seconds = time.perf_counter() - started
+    logger.removeHandler(pipeline.handler if pipeline else inner)
+    inner.close()
+    written = sum(1 for _ in open(path, encoding="utf-8"))
+
+    total = histograms[0]
+    for histogram in histograms[1:]:
+        total.merge(histogram)
+    return {
+        "mode"          : mode,
+        "records"       : per_thread * threads,
+        "written"       : written,
+        "dropped"       : stats["dropped"],
+        "mean_us"       : total.mean * 1000,
+        "p50_us"        : total.percentile(50) * 1000,
+        "p99_us"        : total.percentile(99) * 1000,
+        "max_us"        : total.max * 1000,
+        "emit_seconds"  : emit_seconds,
+        "drain_seconds" : drain_seconds,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="ログ出力のオーバーヘッド計測（同期書き込みとキュー経由の比較）")
+    parser.add_argument("--records", type=int, default=20000, help="出力するログの件数（全スレッド合計）")
+    parser.add_argument("--threads", type=int, default=1, help="ログを出すスレッド数")
+    parser.add_argument("--slow-ms", type=float, default=0.0, help="1行の書き込みに足す待ち時間（遅いディスクの再現）")
+    parser.add_argument("--queue-size", type=int, default=10000, help="キューの上限")
+    parser.add_argument("--drop-policy", choices=DROP_POLICIES, default="drop_oldest")
+    parser.add_argument("--modes", default="disabled,sync,queue_text,queue", help="計測する構成（カンマ区切り）")
+    args = parser.parse_args(argv)
+
+    print(f"{'mode':<11} {'records':>8} {'written':>8} {'dropped':>8} {'mean_us':>9} {'p50_us':>9} "
+          f"{'p99_us':>9} {'max_us':>10} {'emit_s':>8} {'drain_s':>8}")
+    for mode in args.modes.split(","):
+        result = benchmark(mode.strip(), args.records, args.threads, args.slow_ms, args.queue_size, args.drop_policy)
+        print(f"{result['mode']:<11} {result['records']:>8} {result['written']:>8} {result['dropped']:>8} "
+              f"{result['mean_us']:>9.1f} {result['p50_us']:>9.1f} {result['p99_us']:>9.1f} "
+              f"{result['max_us']:>10.1f} {result['emit_seconds']:>8.3f} {result['drain_seconds']:>8.3f}")
+    return 0
+
+
+# ==================================================
+# エクスポート
+# ==================================================
+__all__ = [
+    'DROP_POLICIES',
+    'new_correlation_id',
+    'get_correlation_id',
+    'correlation_scope',
+    'ContextFilter',
+    'JsonFormatter',
+    'BoundedQueueHandler',
+    'LogPipeline',
+    'build_handlers',
+    'setup_logging',
+    'LogSampler',
+    'benchmark',
+]
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -9,7 +9,6 @@ import sqlalchemy
 import requests
 import pandas as pd
 import json
-import time
 import traceback
 import os
 from datetime import datetime
@@ -924,39 +923,36 @@ docker-compose -f docker-compose.mcp-demo.yml up -d redis-mcp postgres-mcp es-mc
             st.rerun()
 
     def _generate_ai_response(self, prompt: str):
-        """AI応答の生成"""
+        """AI応答の生成（届いたトークンから順に表示）"""
         with st.chat_message("assistant"):
-            response_placeholder = st.empty()
-
             try:
-                with st.spinner("AI が回答を生成中..."):
-                    # 実際のMCP処理はここに実装
-                    response_text = self._create_demo_response(prompt)
+                from helper_api import OpenAIClient, ResponseProcessor, config
+
+                client = OpenAIClient(api_key=safe_get_secret('OPENAI_API_KEY', os.getenv('OPENAI_API_KEY')))
+                messages = [{"role": "developer", "content": self._system_prompt()}]
+                messages += [
+                    {"role": message["role"], "content": message["content"]}
+                    for message in st.session_state.messages[-20:]
+                ]
 
-                    # タイプライター効果
-                    full_response = ""
-                    for word in response_text.split():
-                        full_response += word + " "
-                        response_placeholder.markdown(full_response + "▌")
-                        time.sleep(0.05)
+                with client.create_response(input=messages, model=config.get("models.default"), stream=True) as stream:
+                    response_text = st.write_stream(ResponseProcessor.stream_text(stream))
 
-                    response_placeholder.markdown(response_text)
-                    st.session_state.messages.append({"role": "assistant", "content": response_text})
+                if stream.ttft is not None:
+                    st.caption(f"⏱️ 最初の応答まで {stream.ttft:.2f} 秒（全体 {stream.elapsed:.2f} 秒）")
+                st.session_state.messages.append({"role": "assistant", "content": response_text or ""})
 
             except Exception as e:
                 error_msg = f"❌ エラーが発生しました: {e}"
-                response_placeholder.error(error_msg)
+                st.error(error_msg)
                 st.session_state.messages.append({"role": "assistant", "content": error_msg})
 
-    def _create_demo_response(self, prompt: str) -> str:
-        """デモ用レスポンス生成"""
-        return f"""
-🤖 **AI Assistant Response**
-
-質問: "{prompt}"
+    def _system_prompt(self) -> str:
+        """チャット用のシステムプロンプト"""
+        return """あなたはMCPデモ環境のアシスタントです。日本語で簡潔に回答してください。
 
-申し訳ございませんが、現在MCPサーバーとの連携機能は開発中です。
-代わりに、利用可能なデータについて説明いたします：
+MCPサーバーとの連携機能は開発中のため、データベースを直接検索することはできません。
+質問に答えられない場合は、利用可能なデータと画面を案内してください。
 
 **📊 利用可能なデータ:**
 - **Redis**: セッション管理、カウンタ、検索履歴
@@ -966,8 +962,7 @@ docker-compose -f docker-compose.mcp-demo.yml up -d redis-mcp postgres-mcp es-mc
 
 **💡 現在できること:**
 - "📊 直接クエリ" タブで各データベースに直接アクセス
-- "🔍 データ確認" タブでテストデータの確認
-        """
+- "🔍 データ確認" タブでテストデータの確認"""
 
 
 class DataAnalysisPage(PageManager):
@@ -0,0 +1,566 @@
+# helper_perf.py
+# パフォーマンス計測ヘルパー（レイテンシヒストグラム・エンドポイント別集計）
+
+import json
+import math
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Iterable
+
+
+# ==================================================
+# HDR形式レイテンシヒストグラム
+# ==================================================
+class LatencyHistogram:
+    """HDR形式（対数線形バケット）のレイテンシヒストグラム
+
+    値はマイクロ秒の整数で保持し、256未満はそのまま、それ以上は
+    2のべき乗ごとに128分割したバケットへ入れる（相対誤差 1/128 未満）。
+    バケットは疎な辞書なので、マージ・シリアライズが件数に依存せず軽量。
+    """
+
+    SUB_BUCKET_BITS = 8
+    SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+    SUB_BUCKET_HALF_BITS = SUB_BUCKET_BITS - 1
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.total_count = 0
+        self.sum_us = 0
+        self.sum_sq_us = 0
+        self.min_us: Optional[int] = None
+        self.max_us: Optional[int] = None
+
+    # ---------- バケット計算 ----------
+    @classmethod
+    def _bucket_index(cls, value_us: int) -> int:
+        if value_us < cls.SUB_BUCKET_COUNT:
+            return value_us
+        shift = value_us.bit_length() - cls.SUB_BUCKET_BITS
+        return (shift << cls.SUB_BUCKET_HALF_BITS) + (value_us >> shift)
+
+    @classmethod
+    def _bucket_bounds(cls, index: int) -> tuple:
+        """バケットの下限・上限（マイクロ秒、両端を含む）"""
+        if index < cls.SUB_BUCKET_COUNT:
+            return index, index
+        shift = (index >> cls.SUB_BUCKET_HALF_BITS) - 1
+        sub = index - (shift << cls.SUB_BUCKET_HALF_BITS)
+        return sub << shift, ((sub + 1) << shift) - 1
+
+    # ---------- 記録 ----------
+    def record(self, value_ms: float, count: int = 1) -> None:
+        """レイテンシ（ミリ秒）を記録"""
+        self.record_us(int(round(value_ms * 1000)), count)
+
+    def record_us(self, value_us: int, count: int = 1) -> None:
+        """レイテンシ（マイクロ秒）を記録"""
+        value_us = max(0, value_us)
+        index = self._bucket_index(value_us)
+        self.counts[index] = self.counts.get(index, 0) + count
+        self.total_count += count
+        self.sum_us += value_us * count
+        self.sum_sq_us += value_us * value_us * count
+        if self.min_us is None or value_us < self.min_us:
+            self.min_us = value_us
+        if self.max_us is None or value_us > self.max_us:
+            self.max_us = value_us
+
+    def merge(self, other: "LatencyHistogram") -> "LatencyHistogram":
+        """別のヒストグラムを加算（バケット境界が同一なので誤差なくマージできる）"""
+        for index, count in list(other.counts.items()):
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.total_count += other.total_count
+        self.sum_us += other.sum_us
+        self.sum_sq_us += other.sum_sq_us
+        if other.min_us is not None and (self.min_us is None or other.min_us < self.min_us):
+            self.min_us = other.min_us
+        if other.max_us is not None and (self.max_us is None or other.max_us > self.max_us):
+            self.max_us = other.max_us
+        return self
+
+    def copy(self) -> "LatencyHistogram":
+        """複製を作成"""
+        return LatencyHistogram().merge(self)
+
+    def reset(self) -> None:
+        """記録をクリア"""
+        self.__init__()
+
+    # ---------- 統計 ----------
+    @property
+    def count(self) -> int:
+        return self.total_count
+
+    @property
+    def mean(self) -> float:
+        """平均（ミリ秒）"""
+        if not self.total_count:
+            return 0.0
+        return self.sum_us / self.total_count / 1000
+
+    @property
+    def stddev(self) -> float:
+        """標準偏差（ミリ秒）"""
+        if self.total_count < 2:
+            return 0.0
+        mean_us = self.sum_us / self.total_count
+        variance = max(0.0, self.sum_sq_us / self.total_count - mean_us * mean_us)
+        return math.sqrt(variance) / 1000
+
+    @property
+    def min(self) -> float:
+        return (self.min_us or 0) / 1000
+
+    @property
+    def max(self) -> float:
+        return (self.max_us or 0) / 1000
+
+    def percentile(self, percent: float) -> float:
+        """パーセンタイル値（ミリ秒）"""
+        if not self.total_count:
+            return 0.0
+        if percent >= 100:
+            return self.max
+        rank = max(1, math.ceil(percent / 100 * self.total_count))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                lower, upper = self._bucket_bounds(index)
+                value_us = min((lower + upper) / 2, self.max_us)
+                return max(value_us, self.min_us) / 1000
+        return self.max
+
+    def percentiles(self, percents: Iterable[float] = (50, 90, 95, 99, 99.9)) -> Dict[str, float]:
+        """複数パーセンタイルを一括取得（キーは 'p50' 形式）"""
+        return {f"p{p:g}": self.percentile(p) for p in percents}
+
+    def summary(self) -> Dict[str, Any]:
+        """統計サマリー（ミリ秒）"""
+        result = {
+            "count" : self.total_count,
+            "mean"  : self.mean,
+            "stddev": self.stddev,
+            "min"   : self.min,
+        }
+        result.update(self.percentiles((50, 90, 95, 99)))
+        result["max"] = self.max
+        return result
+
+    def distribution(self) -> List[Dict[str, float]]:
+        """パーセンタイル分布（プロット用）"""
+        if not self.total_count:
+            return []
+        points = []
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            lower, upper = self._bucket_bounds(index)
+            points.append({
+                "percentile": seen / self.total_count * 100,
+                "latency_ms": min(upper, self.max_us) / 1000,
+            })
+        return points
+
+    # ---------- エクスポート ----------
+    def to_dict(self) -> Dict[str, Any]:
+        """JSONシリアライズ可能な形式に変換"""
+        return {
+            "counts"   : {str(k): v for k, v in sorted(self.counts.items())},
+            "count"    : self.total_count,
+            "sum_us"   : self.sum_us,
+            "sum_sq_us": self.sum_sq_us,
+            "min_us"   : self.min_us,
+            "max_us"   : self.max_us,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LatencyHistogram":
+        """to_dict() の出力から復元"""
+        histogram = cls()
+        histogram.counts = {int(k): int(v) for k, v in data.get("counts", {}).items()}
+        histogram.total_count = data.get("count", sum(histogram.counts.values()))
+        histogram.sum_us = data.get("sum_us", 0)
+        histogram.sum_sq_us = data.get("sum_sq_us", 0)
+        histogram.min_us = data.get("min_us")
+        histogram.max_us = data.get("max_us")
+        return histogram
+
+
+# ==================================================
+# リクエスト計測
+# ==================================================
+@dataclass
+class RequestTiming:
+    """1リクエスト分の計測結果（時間はミリ秒）"""
+    method: str
+    endpoint: str
+    status: Optional[int] = None
+    total_ms: float = 0.0
+    ttfb_ms: Optional[float] = None
+    dns_ms: Optional[float] = None
+    connect_ms: Optional[float] = None
+    response_bytes: Optional[int] = None
+    retries: int = 0
+    new_connection: bool = False
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.status is not None and self.status < 400
+
+
+_ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+
+def normalize_endpoint(path: str) -> str:
+    """集計キー用にパスを正規化（クエリ除去・数値IDを {id} に置換）"""
+    path = path.split("?", 1)[0]
+    return _ID_SEGMENT.sub("/{id}", path) or "/"
+
+
+@dataclass
+class EndpointStats:
+    """エンドポイント別の集計
+
+    total / ttfb は成功したレスポンスだけを記録し、失敗（エラー・4xx/5xx）の所要時間は
+    failed に分けて記録する。即座に返るエラーでパーセンタイルが良く見えないようにするため。
+    """
+    total: LatencyHistogram = field(default_factory=LatencyHistogram)
+    failed: LatencyHistogram = field(default_factory=LatencyHistogram)
+    ttfb: LatencyHistogram = field(default_factory=LatencyHistogram)
+    connect: LatencyHistogram = field(default_factory=LatencyHistogram)
+    dns: LatencyHistogram = field(default_factory=LatencyHistogram)
+    status_counts: Dict[str, int] = field(default_factory=dict)
+    errors: int = 0
+    retries: int = 0
+    new_connections: int = 0
+    response_bytes: int = 0
+
+    def add(self, timing: RequestTiming) -> None:
+        """計測結果を加算"""
+        if timing.ok:
+            self.total.record(timing.total_ms)
+            if timing.ttfb_ms is not None:
+                self.ttfb.record(timing.ttfb_ms)
+        else:
+            self.failed.record(timing.total_ms)
+            self.errors += 1
+        if timing.connect_ms is not None:
+            self.connect.record(timing.connect_ms)
+        if timing.dns_ms is not None:
+            self.dns.record(timing.dns_ms)
+        status_key = str(timing.status) if timing.status is not None else "error"
+        self.status_counts[status_key] = self.status_counts.get(status_key, 0) + 1
+        self.retries += timing.retries
+        self.new_connections += int(timing.new_connection)
+        self.response_bytes += timing.response_bytes or 0
+
+    def merge(self, other: "EndpointStats") -> "EndpointStats":
+        """別の集計を加算"""
+        self.total.merge(other.total)
+        self.failed.merge(other.failed)
+        self.ttfb.merge(other.ttfb)
+        self.connect.merge(other.connect)
+        self.dns.merge(other.dns)
+        for status, count in list(other.status_counts.items()):
+            self.status_counts[status] = self.status_counts.get(status, 0) + count
+        self.errors += other.errors
+        self.retries += other.retries
+        self.new_connections += other.new_connections
+        self.response_bytes += other.response_bytes
+        return self
+
+    @property
+    def requests(self) -> int:
+        """成功・失敗を合わせたリクエスト数"""
+        return self.total.count + self.failed.count
+
+    def summary(self) -> Dict[str, Any]:
+        """表示用サマリー（レイテンシは成功レスポンスのみ）"""
+        result = self.total.summary()
+        result.update({
+            "ttfb_p50"      : self.ttfb.percentile(50),
+            "connect_p50"   : self.connect.percentile(50),
+            "requests"      : self.requests,
+            "errors"        : self.errors,
+            "failed_p50"    : self.failed.percentile(50),
+            "retries"       : self.retries,
+            "new_connections": self.new_connections,
+            "avg_bytes"     : self.response_bytes / self.requests if self.requests else 0,
+            "status_counts" : dict(self.status_counts),
+        })
+        return result
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "total"          : self.total.to_dict(),
+            "failed"         : self.failed.to_dict(),
+            "ttfb"           : self.ttfb.to_dict(),
+            "connect"        : self.connect.to_dict(),
+            "dns"            : self.dns.to_dict(),
+            "status_counts"  : dict(self.status_counts),
+            "errors"         : self.errors,
+            "retries"        : self.retries,
+            "new_connections": self.new_connections,
+            "response_bytes" : self.response_bytes,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "EndpointStats":
+        return cls(
+            total=LatencyHistogram.from_dict(data.get("total", {})),
+            failed=LatencyHistogram.from_dict(data.get("failed", {})),
+            ttfb=LatencyHistogram.from_dict(data.get("ttfb", {})),
+            connect=LatencyHistogram.from_dict(data.get("connect", {})),
+            dns=LatencyHistogram.from_dict(data.get("dns", {})),
+            status_counts=dict(data.get("status_counts", {})),
+            errors=data.get("errors", 0),
+            retries=data.get("retries", 0),
+            new_connections=data.get("new_connections", 0),
+            response_bytes=data.get("response_bytes", 0),
+        )
+
+
+class LatencyRecorder:
+    """エンドポイント別レイテンシ集計（記録時ロックなし）
+
+    スレッドごとに専用のシャードへ書き込み、snapshot() で全シャードをマージする。
+    ロックを取るのはスレッドの初回記録時（シャード登録）とスナップショット時のみ。
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards: List[Dict[str, EndpointStats]] = []
+        self._shards_lock = threading.Lock()
+
+    def _shard(self) -> Dict[str, EndpointStats]:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = {}
+            self._local.shard = shard
+            with self._shards_lock:
+                self._shards.append(shard)
+        return shard
+
+    def record(self, timing: RequestTiming) -> None:
+        """計測結果を記録（呼び出しスレッドのシャードのみ更新）"""
+        shard = self._shard()
+        stats = shard.get(timing.endpoint)
+        if stats is None:
+            stats = shard[timing.endpoint] = EndpointStats()
+        stats.add(timing)
+
+    def snapshot(self) -> Dict[str, EndpointStats]:
+        """全スレッドの集計をマージした複製を返す"""
+        with self._shards_lock:
+            shards = list(self._shards)
+        merged: Dict[str, EndpointStats] = {}
+        for shard in shards:
+            # dict のコピーはGIL下で原子的に行われる
+            for endpoint, stats in dict(shard).items():
+                merged.setdefault(endpoint, EndpointStats()).merge(stats)
+        return merged
+
+    def reset(self) -> None:
+        """全シャードをクリア"""
+        with self._shards_lock:
+            for shard in self._shards:
+                shard.clear()
+
+    def summary_rows(self) -> List[Dict[str, Any]]:
+        """エンドポイント別サマリーの行リスト（DataFrame化用）"""
+        rows = []
+        for endpoint, stats in sorted(self.snapshot().items()):
+            row = {"endpoint": endpoint}
+            row.update(stats.summary())
+            rows.append(row)
+        return rows
+
+    def export(self) -> Dict[str, Any]:
+        """JSONシリアライズ可能な形式でエクスポート"""
+        return {endpoint: stats.to_dict() for endpoint, stats in self.snapshot().items()}
+
+    def export_json(self, **kwargs) -> str:
+        return json.dumps(self.export(), ensure_ascii=False, **kwargs)
+
+    @staticmethod
+    def merge_exports(exports: Iterable[Dict[str, Any]]) -> Dict[str, EndpointStats]:
+        """複数プロセス・複数回のエクスポートを統合"""
+        merged: Dict[str, EndpointStats] = {}
+        for exported in exports:
+            for endpoint, data in exported.items():
+                merged.setdefault(endpoint, EndpointStats()).merge(EndpointStats.from_dict(data))
+        return merged
+
+
+# ==================================================
+# 外れ値分析
+# ==================================================
+def _quantile(sorted_values: List[float], q: float) -> float:
+    """線形補間の分位点（sorted_values はソート済み）"""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * q
+    lower = math.floor(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def detect_outliers(values: Iterable[float], iqr_factor: float = 1.5,
+                    mad_threshold: float = 3.5) -> Dict[str, Any]:
+    """IQR法とMAD法（修正zスコア）で外れ値を検出
+
+    Returns:
+        {"iqr": {...}, "mad": {...}}。各手法の境界値・外れ値の位置（入力順のインデックス）を含む
+    """
+    values = list(values)
+    ordered = sorted(values)
+
+    q1, q3 = _quantile(ordered, 0.25), _quantile(ordered, 0.75)
+    iqr = q3 - q1
+    lower, upper = q1 - iqr_factor * iqr, q3 + iqr_factor * iqr
+    iqr_indices = [i for i, v in enumerate(values) if v < lower or v > upper]
+
+    median = _quantile(ordered, 0.5)
+    mad = _quantile(sorted(abs(v - median) for v in values), 0.5)
+    if mad > 0:
+        # 0.6745 は正規分布で MAD を標準偏差に換算する係数
+        mad_indices = [i for i, v in enumerate(values) if 0.6745 * abs(v - median) / mad > mad_threshold]
+    else:
+        mad_indices = []
+
+    return {
+        "iqr": {
+            "q1"     : q1,
+            "q3"     : q3,
+            "lower"  : lower,
+            "upper"  : upper,
+            "indices": iqr_indices,
+            "count"  : len(iqr_indices),
+        },
+        "mad": {
+            "median"   : median,
+            "mad"      : mad,
+            "threshold": mad_threshold,
+            "indices"  : mad_indices,
+            "count"    : len(mad_indices),
+        },
+    }
+
+
+# ==================================================
+# 分布の有意差検定
+# ==================================================
+def mann_whitney_histograms(current: LatencyHistogram, baseline: LatencyHistogram) -> Dict[str, Any]:
+    """2つのヒストグラムに対する Mann-Whitney U 検定（正規近似・同順位補正あり）
+
+    生データではなくバケット単位で順位を付けるため、同じバケットの値は同順位として扱う。
+    effect は P(current > baseline)（0.5 なら差なし、0.5 より大きいほど current が遅い）。
+    """
+    n_current, n_baseline = current.total_count, baseline.total_count
+    result = {"u": 0.0, "z": 0.0, "p_value": 1.0, "effect": 0.5,
+              "n_current": n_current, "n_baseline": n_baseline}
+    if not n_current or not n_baseline:
+        return result
+
+    total = n_current + n_baseline
+    rank_sum = 0.0
+    tie_term = 0
+    seen = 0
+    for index in sorted(set(current.counts) | set(baseline.counts)):
+        a = current.counts.get(index, 0)
+        b = baseline.counts.get(index, 0)
+        group = a + b
+        rank_sum += a * (seen + (group + 1) / 2)
+        tie_term += group ** 3 - group
+        seen += group
+
+    u = rank_sum - n_current * (n_current + 1) / 2
+    mean_u = n_current * n_baseline / 2
+    variance = n_current * n_baseline / 12 * ((total + 1) - tie_term / (total * (total - 1))) if total > 1 else 0.0
+    result["u"] = u
+    result["effect"] = u / (n_current * n_baseline)
+    if variance > 0:
+        z = (u - mean_u) / math.sqrt(variance)
+        result["z"] = z
+        result["p_value"] = math.erfc(abs(z) / math.sqrt(2))
+    return result
+
+
+# ==================================================
+# ベンチマーク結果の比較
+# ==================================================
+# 指標ごとの「悪化」の向き（True: 値が大きいほど悪い）
+COMPARE_METRICS = {
+    "p50_ms"    : True,
+    "p90_ms"    : True,
+    "p99_ms"    : True,
+    "max_ms"    : True,
+    "rps"       : False,
+    "error_rate": True,
+}
+
+
+def compare_benchmark_rows(baseline: Iterable[Dict[str, Any]], current: Iterable[Dict[str, Any]],
+                           threshold_pct: float = 10.0,
+                           metrics: Iterable[str] = ("p50_ms", "p90_ms", "p99_ms", "rps", "error_rate"),
+                           min_delta_ms: float = 1.0,
+                           key_fields: Iterable[str] = ("concurrency", "endpoint")) -> List[Dict[str, Any]]:
+    """ベンチマーク結果行をキー単位で比較し、指標ごとの差分を返す
+
+    threshold_pct を超えて悪化した指標を regression=True とする。
+    ミリ秒指標は差が min_delta_ms 未満なら計測誤差として扱う。
+    error_rate は比率ではなく差（ポイント）で判定する。
+    """
+    key_fields = tuple(key_fields)
+    baseline_rows = {tuple(row.get(k) for k in key_fields): row for row in baseline}
+    comparisons = []
+    for row in current:
+        key = tuple(row.get(k) for k in key_fields)
+        base = baseline_rows.get(key)
+        if base is None:
+            continue
+        for metric in metrics:
+            if metric not in row or metric not in base:
+                continue
+            before, after = float(base[metric]), float(row[metric])
+            higher_is_worse = COMPARE_METRICS.get(metric, True)
+            worse = after - before if higher_is_worse else before - after
+            change_pct = (after - before) / before * 100 if before else 0.0
+            if metric == "error_rate":
+                regression = worse * 100 > threshold_pct
+            elif before == 0:
+                regression = False
+            else:
+                regression = worse / before * 100 > threshold_pct
+                if metric.endswith("_ms") and worse < min_delta_ms:
+                    regression = False
+            comparison = dict(zip(key_fields, key))
+            comparison.update({
+                "metric"    : metric,
+                "baseline"  : before,
+                "current"   : after,
+                "change_pct": change_pct,
+                "regression": regression,
+            })
+            comparisons.append(comparison)
+    return comparisons
+
+
+# ==================================================
+# エクスポート
+# ==================================================
+__all__ = [
+    'LatencyHistogram',
+    'RequestTiming',
+    'EndpointStats',
+    'LatencyRecorder',
+    'normalize_endpoint',
+    'detect_outliers',
+    'mann_whitney_histograms',
+    'COMPARE_METRICS',
+    'compare_benchmark_rows',
+]
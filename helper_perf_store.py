@@ -0,0 +1,302 @@
+# helper_perf_store.py
+# パフォーマンス測定履歴の永続化（SQLite）とリグレッション検出
+#
+# 使い方:
+#   store = PerformanceHistoryStore()              # 既定: MCP_PERF_HISTORY_DB または ./perf_history.db
+#   store.record_run("response_time", "顧客一覧", metrics, histogram, config={"count": 50})
+#   store.detect_regressions()                     # 最新の実行を直前の実行群と比較
+
+import json
+import math
+import os
+import platform
+import socket
+import sqlite3
+import statistics
+import subprocess
+import sys
+from contextlib import contextmanager
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Union
+
+from helper_perf import LatencyHistogram, mann_whitney_histograms
+
+
+DEFAULT_DB_PATH = "perf_history.db"
+
+
+# ==================================================
+# 実行環境メタデータ
+# ==================================================
+@lru_cache(maxsize=1)
+def git_revision() -> Dict[str, Any]:
+    """git のコミットSHAと未コミット変更の有無（git が使えなければ None）"""
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    try:
+        sha = subprocess.run(["git", "rev-parse", "HEAD"], cwd=cwd, capture_output=True,
+                             text=True, timeout=5).stdout.strip() or None
+        dirty = None
+        if sha:
+            dirty = subprocess.run(["git", "diff", "--quiet", "HEAD"], cwd=cwd,
+                                   capture_output=True, timeout=10).returncode == 1
+    except (OSError, subprocess.SubprocessError):
+        sha, dirty = None, None
+    return {"sha": sha, "dirty": dirty}
+
+
+def collect_environment() -> Dict[str, Any]:
+    """比較時に条件の違いを確認するための実行環境情報"""
+    packages = {}
+    for name in ("requests", "httpx", "pandas", "streamlit"):
+        module = sys.modules.get(name)
+        if module is not None:
+            packages[name] = getattr(module, "__version__", None)
+    return {
+        "python"   : platform.python_version(),
+        "platform" : platform.platform(),
+        "hostname" : socket.gethostname(),
+        "cpu_count": os.cpu_count(),
+        "packages" : packages,
+    }
+
+
+# ==================================================
+# 履歴ストア
+# ==================================================
+class PerformanceHistoryStore:
+    """測定結果を1実行1行で保存する SQLite ストア
+
+    代表値は列として、ヒストグラム・設定・環境は JSON として保持する。
+    Streamlit の再実行ごとにスレッドが変わるため、操作ごとに接続を開く。
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS perf_runs (
+            id             INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind           TEXT    NOT NULL,
+            endpoint       TEXT    NOT NULL,
+            created_at     TEXT    NOT NULL,
+            git_sha        TEXT,
+            git_dirty      INTEGER,
+            base_url       TEXT,
+            count          INTEGER,
+            errors         INTEGER,
+            mean_ms        REAL,
+            p50_ms         REAL,
+            p95_ms         REAL,
+            p99_ms         REAL,
+            max_ms         REAL,
+            throughput     REAL,
+            success_rate   REAL,
+            config_json    TEXT,
+            env_json       TEXT,
+            histogram_json TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_perf_runs_series ON perf_runs (kind, endpoint, id);
+    """
+
+    METRIC_COLUMNS = ("count", "errors", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms",
+                      "throughput", "success_rate")
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv("MCP_PERF_HISTORY_DB", DEFAULT_DB_PATH)
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(self.SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    # ---------- 書き込み ----------
+    def record_run(self, kind: str, endpoint: str, metrics: Dict[str, Any],
+                   histogram: Optional[Union[LatencyHistogram, Dict[str, Any]]] = None,
+                   config: Optional[Dict[str, Any]] = None, base_url: Optional[str] = None) -> int:
+        """1実行分の結果を保存し、行IDを返す
+
+        Args:
+            kind: 測定の種類（"response_time" / "load_test" / "benchmark" など）
+            endpoint: 比較の単位となるエンドポイント名
+            metrics: METRIC_COLUMNS のキーを持つ辞書（欠けている指標は NULL）
+            histogram: 応答時間のヒストグラム（有意差検定に使用）
+            config: 測定条件（回数・並列度など）
+        """
+        if isinstance(histogram, LatencyHistogram):
+            histogram = histogram.to_dict()
+        revision = git_revision()
+        row = {
+            "kind"          : kind,
+            "endpoint"      : endpoint,
+            "created_at"    : datetime.now().isoformat(timespec="seconds"),
+            "git_sha"       : revision["sha"],
+            "git_dirty"     : None if revision["dirty"] is None else int(revision["dirty"]),
+            "base_url"      : base_url,
+            "config_json"   : json.dumps(config or {}, ensure_ascii=False, default=str),
+            "env_json"      : json.dumps(collect_environment(), ensure_ascii=False),
+            "histogram_json": json.dumps(histogram) if histogram else None,
+        }
+        for column in self.METRIC_COLUMNS:
+            value = metrics.get(column)
+            row[column] = None if value is None or (isinstance(value, float) and math.isnan(value)) else value
+
+        columns = ", ".join(row)
+        placeholders = ", ".join(f":{column}" for column in row)
+        with self._connect() as conn:
+            cursor = conn.execute(f"INSERT INTO perf_runs ({columns}) VALUES ({placeholders})", row)
+            return cursor.lastrowid
+
+    def delete_runs(self, kind: Optional[str] = None) -> int:
+        """履歴を削除（kind 指定時はその種類のみ）"""
+        with self._connect() as conn:
+            if kind:
+                cursor = conn.execute("DELETE FROM perf_runs WHERE kind = ?", (kind,))
+            else:
+                cursor = conn.execute("DELETE FROM perf_runs")
+            return cursor.rowcount
+
+    # ---------- 読み出し ----------
+    @staticmethod
+    def _decode(row: sqlite3.Row, with_histogram: bool = False) -> Dict[str, Any]:
+        run = {key: row[key] for key in row.keys() if not key.endswith("_json")}
+        run["git_dirty"] = None if run.get("git_dirty") is None else bool(run["git_dirty"])
+        run["config"] = json.loads(row["config_json"] or "{}")
+        run["env"] = json.loads(row["env_json"] or "{}")
+        if with_histogram:
+            run["histogram"] = json.loads(row["histogram_json"]) if row["histogram_json"] else None
+        return run
+
+    def list_runs(self, kind: Optional[str] = None, endpoint: Optional[str] = None,
+                  limit: int = 500, with_histogram: bool = False) -> List[Dict[str, Any]]:
+        """新しい順に実行履歴を返す"""
+        conditions, params = [], []
+        if kind:
+            conditions.append("kind = ?")
+            params.append(kind)
+        if endpoint:
+            conditions.append("endpoint = ?")
+            params.append(endpoint)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._connect() as conn:
+            rows = conn.execute(f"SELECT * FROM perf_runs {where} ORDER BY id DESC LIMIT ?",
+                                (*params, limit)).fetchall()
+        return [self._decode(row, with_histogram) for row in rows]
+
+    def count_runs(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM perf_runs").fetchone()[0]
+
+    def series(self) -> List[tuple]:
+        """(kind, endpoint) の組み合わせ一覧"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT DISTINCT kind, endpoint FROM perf_runs ORDER BY kind, endpoint").fetchall()
+        return [(row["kind"], row["endpoint"]) for row in rows]
+
+    # ---------- リグレッション検出 ----------
+    def detect_regressions(self, kind: Optional[str] = None, baseline_runs: int = 5,
+                           alpha: float = 0.01, min_effect_pct: float = 10.0) -> List[Dict[str, Any]]:
+        """系列（kind × endpoint）ごとに最新の実行を直前の baseline_runs 件と比較
+
+        - 応答時間: ベースラインのヒストグラムをマージし Mann-Whitney U 検定。
+          p < alpha かつ p50 または p95 が min_effect_pct 以上悪化したらリグレッション。
+        - スループット: ベースラインの平均・標準偏差に対する片側 z 検定。
+          p < alpha かつ min_effect_pct 以上低下したらリグレッション。
+        統計的に有意でも実用上小さい差は報告しない（件数が多いと微小な差でも有意になるため）。
+        """
+        findings = []
+        for series_kind, endpoint in self.series():
+            if kind and series_kind != kind:
+                continue
+            runs = self.list_runs(series_kind, endpoint, limit=baseline_runs + 1, with_histogram=True)
+            if len(runs) < 2:
+                continue
+            latest, baseline = runs[0], runs[1:]
+            finding = {
+                "kind"           : series_kind,
+                "endpoint"       : endpoint,
+                "run_id"         : latest["id"],
+                "created_at"     : latest["created_at"],
+                "git_sha"        : latest["git_sha"],
+                "baseline_runs"  : len(baseline),
+                "baseline_shas"  : sorted({run["git_sha"] for run in baseline if run["git_sha"]}),
+                "latency"        : self._compare_latency(latest, baseline, alpha, min_effect_pct),
+                "throughput"     : self._compare_throughput(latest, baseline, alpha, min_effect_pct),
+            }
+            finding["regression"] = any(
+                (finding[key] or {}).get("regression") for key in ("latency", "throughput")
+            )
+            findings.append(finding)
+        return findings
+
+    @staticmethod
+    def _compare_latency(latest: Dict[str, Any], baseline: List[Dict[str, Any]],
+                         alpha: float, min_effect_pct: float) -> Optional[Dict[str, Any]]:
+        if not latest.get("histogram"):
+            return None
+        current = LatencyHistogram.from_dict(latest["histogram"])
+        merged = LatencyHistogram()
+        for run in baseline:
+            if run.get("histogram"):
+                merged.merge(LatencyHistogram.from_dict(run["histogram"]))
+        if not current.count or not merged.count:
+            return None
+
+        test = mann_whitney_histograms(current, merged)
+        changes = {}
+        for percent in (50, 95):
+            before, after = merged.percentile(percent), current.percentile(percent)
+            changes[f"p{percent}"] = {
+                "baseline"  : before,
+                "current"   : after,
+                "change_pct": (after - before) / before * 100 if before else 0.0,
+            }
+        worst = max(change["change_pct"] for change in changes.values())
+        return {
+            **changes,
+            "p_value"   : test["p_value"],
+            "effect"    : test["effect"],
+            "regression": test["p_value"] < alpha and test["effect"] > 0.5 and worst >= min_effect_pct,
+        }
+
+    @staticmethod
+    def _compare_throughput(latest: Dict[str, Any], baseline: List[Dict[str, Any]],
+                            alpha: float, min_effect_pct: float) -> Optional[Dict[str, Any]]:
+        history = [run["throughput"] for run in baseline if run.get("throughput")]
+        current = latest.get("throughput")
+        if not current or len(history) < 2:
+            return None
+        mean = statistics.fmean(history)
+        stdev = statistics.stdev(history)
+        change_pct = (current - mean) / mean * 100 if mean else 0.0
+        if stdev > 0:
+            z = (current - mean) / stdev
+            p_value = 0.5 * math.erfc(-z / math.sqrt(2))  # 低下方向の片側
+        else:
+            z, p_value = 0.0, 0.0 if current < mean else 1.0
+        return {
+            "baseline"  : mean,
+            "stdev"     : stdev,
+            "current"   : current,
+            "change_pct": change_pct,
+            "z"         : z,
+            "p_value"   : p_value,
+            "regression": p_value < alpha and -change_pct >= min_effect_pct,
+        }
+
+
+# ==================================================
+# エクスポート
+# ==================================================
+__all__ = [
+    'PerformanceHistoryStore',
+    'git_revision',
+    'collect_environment',
+]
@@ -0,0 +1,438 @@
+# helper_ratelimit.py
+# OpenAI API 呼び出しのレート制御（RPM／TPM のトークンバケット、優先レーン、レート制限ヘッダーによる適応的バックオフ）
+#
+# 使い方:
+#   scheduler = RateLimitScheduler(requests_per_minute=500, tokens_per_minute=200_000)
+#   ticket = scheduler.acquire(tokens=1200, lane="interactive")     # 非同期なら await scheduler.aacquire(...)
+#   try:
+#       raw = client.responses.with_raw_response.create(...)
+#   finally:
+#       scheduler.release(ticket, used_tokens=actual, headers=raw.headers)
+#   delay = scheduler.backoff(attempt, headers, throttled=True)      # 429 の後は全レーンをまとめて待たせる
+#
+# 外部ライブラリに依存しないので、OpenAI SDK のない環境でも単体で動作確認できる。
+
+import asyncio
+import heapq
+import itertools
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, List, Optional, Mapping
+
+
+# 優先度の高い順（対話的な呼び出しはバッチ処理より先に通す）
+LANES = ("interactive", "batch")
+
+# 非同期の待機者がロックを取り直す間隔の上限（秒）。スレッド側は Condition で起こされる
+ASYNC_POLL_INTERVAL = 0.05
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_SCALE = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+
+
+class RateLimitTimeout(TimeoutError):
+    """レート制限の待ち時間が timeout を超えた"""
+
+
+# ==================================================
+# ヘッダーの解釈
+# ==================================================
+def parse_duration(value: Any) -> Optional[float]:
+    """x-ratelimit-reset-* 形式の期間（"20ms", "1s", "6m0s", "1h2m3.5s"、または秒数）を秒に変換"""
+    if value is None:
+        return None
+    text = str(value).strip()
+    try:
+        return max(0.0, float(text))
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(text)
+    if not parts:
+        return None
+    return sum(float(number) * _DURATION_SCALE[unit] for number, unit in parts)
+
+
+def _header(headers: Optional[Mapping[str, str]], name: str) -> Optional[str]:
+    if not headers:
+        return None
+    value = headers.get(name)
+    if value is None and isinstance(headers, dict):
+        # 普通の dict は大文字小文字を区別するので、小文字化したキーでも探す（httpx.Headers は区別しない）
+        value = next((v for k, v in headers.items() if k.lower() == name), None)
+    return value
+
+
+def retry_after_seconds(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    """retry-after-ms / retry-after（秒数または HTTP 日付）から待つべき秒数を求める"""
+    value = _header(headers, "retry-after-ms")
+    if value is not None:
+        try:
+            return max(0.0, float(value) / 1000.0)
+        except ValueError:
+            pass
+    value = _header(headers, "retry-after")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_rate_limit_headers(headers: Optional[Mapping[str, str]]) -> Dict[str, Dict[str, float]]:
+    """x-ratelimit-{limit,remaining,reset}-{requests,tokens} を {"requests": {...}, "tokens": {...}} にまとめる"""
+    result: Dict[str, Dict[str, float]] = {}
+    for kind in ("requests", "tokens"):
+        info = {}
+        for field_name in ("limit", "remaining"):
+            value = _header(headers, f"x-ratelimit-{field_name}-{kind}")
+            if value is not None:
+                try:
+                    info[field_name] = float(value)
+                except ValueError:
+                    pass
+        reset = parse_duration(_header(headers, f"x-ratelimit-reset-{kind}"))
+        if reset is not None:
+            info["reset"] = reset
+        if info:
+            result[kind] = info
+    return result
+
+
+# ==================================================
+# トークンバケット
+# ==================================================
+class TokenBucket:
+    """1分あたり limit 単位を一定速度で補充するバケット（上限は limit）
+
+    実際の使用量が見積もりより多かった分は level を負にして「借り」として扱い、
+    以降の補充で返し終えるまで次の取得を待たせる。
+    """
+
+    def __init__(self, limit_per_minute: float):
+        self.limit = float(limit_per_minute)
+        self.level = self.limit
+        self._updated = time.monotonic()
+
+    @property
+    def rate(self) -> float:
+        return self.limit / 60.0
+
+    def refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self.level = min(self.limit, self.level + elapsed * self.rate)
+            self._updated = now
+
+    def cost(self, amount: float) -> float:
+        """1回の取得量（上限より大きい要求は上限に丸め、いずれ通るようにする）"""
+        return min(float(amount), self.limit)
+
+    def wait_time(self, amount: float) -> float:
+        """amount を取れるまでの秒数（refill 済みであること）"""
+        shortfall = self.cost(amount) - self.level
+        if shortfall <= 0:
+            return 0.0
+        return shortfall / self.rate if self.rate > 0 else float("inf")
+
+    def take(self, amount: float) -> None:
+        self.level -= self.cost(amount)
+
+    def give_back(self, amount: float) -> None:
+        """見積もりとの差を戻す（負なら追加で消費）"""
+        self.level = min(self.limit, self.level + amount)
+
+    def set_limit(self, limit_per_minute: float) -> None:
+        """サーバーが返した実際の上限に合わせる（残量の比率は保つ）"""
+        limit_per_minute = float(limit_per_minute)
+        if limit_per_minute <= 0 or limit_per_minute == self.limit:
+            return
+        self.level = self.level * limit_per_minute / self.limit
+        self.limit = limit_per_minute
+
+    def observe(self, remaining: float) -> None:
+        """サーバー側の残量がこちらの見込みより少なければ合わせる（他プロセスの消費分）"""
+        if remaining < self.level:
+            self.level = remaining
+
+    def drain(self) -> None:
+        """429 を受けたとき、以降は補充速度ぶんだけ通すよう空にする"""
+        self.level = min(self.level, 0.0)
+
+
+# ==================================================
+# スケジューラ
+# ==================================================
+@dataclass
+class RateLimitTicket:
+    """acquire で得た実行枠（release に渡して返却する）"""
+    tokens: float
+    lane: str
+    waited: float
+    released: bool = False
+
+
+@dataclass(order=True)
+class _Waiter:
+    rank: int
+    seq: int
+    tokens: float = field(compare=False)
+    lane: str = field(compare=False)
+
+
+class RateLimitScheduler:
+    """RPM／TPM のトークンバケットと同時実行数で API 呼び出しを待たせるスケジューラ
+
+    - 待機中の呼び出しはレーンの優先度→到着順に1列に並び、先頭だけが枠を取る
+      （大きな要求が小さな要求に追い越され続けて飢えることがない）
+    - batch レーンは同時実行枠の batch_share 分までしか使えないので、バッチ処理が
+      流れていても対話的な呼び出しは空き枠で先頭に並び、次の補充分ですぐに通る
+    - 429 を受けたら retry-after／reset ヘッダーの時刻まで全レーンを止め、バケットを空にする
+    - 成功時のヘッダーから実際の上限と残量を取り込み、他プロセスの消費にも追従する
+
+    スレッドからの acquire と asyncio からの aacquire を同じインスタンスで混在できる。
+    """
+
+    def __init__(
+            self,
+            requests_per_minute: float = 500,
+            tokens_per_minute: float = 200_000,
+            max_concurrency: int = 8,
+            batch_share: float = 0.75,
+            backoff_base: float = 0.5,
+            backoff_max: float = 30.0,
+            adapt_limits: bool = True,
+    ):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.batch_share = min(1.0, max(0.0, float(batch_share)))
+        self.batch_slots = max(1, int(self.max_concurrency * self.batch_share))
+        self.backoff_base = float(backoff_base)
+        self.backoff_max = float(backoff_max)
+        self.adapt_limits = adapt_limits
+
+        self._cond = threading.Condition(threading.Lock())
+        self._waiters: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._in_flight = 0
+        self._batch_in_flight = 0
+        self._blocked_until = 0.0
+        self._stats = {"acquired": 0, "throttled": 0, "retries": 0, "timeouts": 0, "wait_seconds": 0.0}
+
+    @classmethod
+    def from_config(cls, settings: Optional[Dict[str, Any]]) -> "RateLimitScheduler":
+        """config.yml の api.rate_limit セクションから生成"""
+        settings = settings or {}
+        keys = ("requests_per_minute", "tokens_per_minute", "max_concurrency", "batch_share",
+                "backoff_base", "backoff_max", "adapt_limits")
+        return cls(**{key: settings[key] for key in keys if settings.get(key) is not None})
+
+    # ---------- 取得 ----------
+    def _enqueue(self, tokens: float, lane: str) -> _Waiter:
+        if lane not in LANES:
+            raise ValueError(f"unknown lane: {lane} (expected one of {LANES})")
+        waiter = _Waiter(LANES.index(lane), next(self._seq), float(max(0, tokens)), lane)
+        heapq.heappush(self._waiters, waiter)
+        return waiter
+
+    def _dequeue(self, waiter: _Waiter) -> None:
+        if self._waiters and self._waiters[0] is waiter:
+            heapq.heappop(self._waiters)
+        else:
+            try:
+                self._waiters.remove(waiter)
+                heapq.heapify(self._waiters)
+            except ValueError:
+                pass
+
+    def _try_take(self, waiter: _Waiter) -> Optional[float]:
+        """枠が取れたら 0.0、取れなければ待つべき秒数（いつ空くか分からなければ None）"""
+        now = time.monotonic()
+        if self._waiters[0] is not waiter or self._in_flight >= self.max_concurrency:
+            return None
+        if waiter.lane == "batch" and self._batch_in_flight >= self.batch_slots:
+            return None
+        if now < self._blocked_until:
+            return self._blocked_until - now
+
+        self.requests.refill(now)
+        self.tokens.refill(now)
+        wait = max(self.requests.wait_time(1), self.tokens.wait_time(waiter.tokens))
+        if wait > 0:
+            return wait
+
+        self.requests.take(1)
+        self.tokens.take(waiter.tokens)
+        self._in_flight += 1
+        if waiter.lane == "batch":
+            self._batch_in_flight += 1
+        heapq.heappop(self._waiters)
+        return 0.0
+
+    def _granted(self, waiter: _Waiter, started: float) -> RateLimitTicket:
+        waited = time.monotonic() - started
+        self._stats["acquired"] += 1
+        self._stats["wait_seconds"] += waited
+        # 次の先頭が動けるか確かめさせる
+        self._cond.notify_all()
+        return RateLimitTicket(tokens=self.tokens.cost(waiter.tokens), lane=waiter.lane, waited=waited)
+
+    def _timed_out(self, waiter: _Waiter, timeout: Optional[float]) -> None:
+        self._dequeue(waiter)
+        self._stats["timeouts"] += 1
+        self._cond.notify_all()
+        raise RateLimitTimeout(f"rate limit wait exceeded {timeout}s ({waiter.lane}, {waiter.tokens:.0f} tokens)")
+
+    def acquire(self, tokens: float = 0, lane: str = "interactive",
+                timeout: Optional[float] = None) -> RateLimitTicket:
+        """推定トークン数 tokens の呼び出し1回分の枠が取れるまでスレッドを待たせる"""
+        started = time.monotonic()
+        deadline = None if timeout is None else started + timeout
+        with self._cond:
+            waiter = self._enqueue(tokens, lane)
+            try:
+                while True:
+                    wait = self._try_take(waiter)
+                    if wait == 0.0:
+                        return self._granted(waiter, started)
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._timed_out(waiter, timeout)
+                        wait = remaining if wait is None else min(wait, remaining)
+                    self._cond.wait(wait)
+            except BaseException:
+                self._dequeue(waiter)
+                self._cond.notify_all()
+                raise
+
+    async def aacquire(self, tokens: float = 0, lane: str = "interactive",
+                       timeout: Optional[float] = None) -> RateLimitTicket:
+        """acquire の asyncio 版（イベントループを止めずに待つ）"""
+        started = time.monotonic()
+        deadline = None if timeout is None else started + timeout
+        with self._cond:
+            waiter = self._enqueue(tokens, lane)
+        try:
+            while True:
+                with self._cond:
+                    wait = self._try_take(waiter)
+                    if wait == 0.0:
+                        return self._granted(waiter, started)
+                    if deadline is not None and time.monotonic() >= deadline:
+                        self._timed_out(waiter, timeout)
+                sleep = ASYNC_POLL_INTERVAL if wait is None else min(wait, ASYNC_POLL_INTERVAL * 10)
+                if deadline is not None:
+                    sleep = min(sleep, max(0.0, deadline - time.monotonic()))
+                await asyncio.sleep(sleep)
+        except BaseException:
+            with self._cond:
+                self._dequeue(waiter)
+                self._cond.notify_all()
+            raise
+
+    # ---------- 返却・フィードバック ----------
+    def release(self, ticket: RateLimitTicket, used_tokens: Optional[float] = None,
+                headers: Optional[Mapping[str, str]] = None) -> None:
+        """呼び出し完了。実際の使用トークン数とレスポンスヘッダーがあればバケットに反映する"""
+        with self._cond:
+            if not ticket.released:
+                ticket.released = True
+                self._in_flight -= 1
+                if ticket.lane == "batch":
+                    self._batch_in_flight -= 1
+                if used_tokens is not None:
+                    self.tokens.give_back(ticket.tokens - float(used_tokens))
+            if headers:
+                self._observe(headers)
+            self._cond.notify_all()
+
+    def _observe(self, headers: Mapping[str, str]) -> None:
+        now = time.monotonic()
+        for kind, info in parse_rate_limit_headers(headers).items():
+            bucket = self.requests if kind == "requests" else self.tokens
+            bucket.refill(now)
+            if self.adapt_limits and "limit" in info:
+                bucket.set_limit(info["limit"])
+            if "remaining" in info:
+                bucket.observe(info["remaining"])
+
+    def backoff(self, attempt: int, headers: Optional[Mapping[str, str]] = None,
+                throttled: bool = False) -> float:
+        """再試行までの待ち秒数
+
+        retry-after 系ヘッダーがあればそれに従い、なければ（429 なら残量0の reset ヘッダー、
+        それもなければ）指数バックオフ＋フルジッター。throttled（429）の場合は全レーンを
+        その時刻まで止め、尽きた側のバケットを空にして以降を補充速度まで絞る。
+        """
+        delay = retry_after_seconds(headers)
+        if delay is None and throttled:
+            resets = [info["reset"] for info in parse_rate_limit_headers(headers).values()
+                      if info.get("remaining", 1) <= 0 and "reset" in info]
+            if resets:
+                delay = max(resets)
+        if delay is None:
+            delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        delay = min(delay, self.backoff_max)
+
+        with self._cond:
+            self._stats["retries"] += 1
+            if throttled:
+                self._stats["throttled"] += 1
+                now = time.monotonic()
+                self._blocked_until = max(self._blocked_until, now + delay)
+                observed = parse_rate_limit_headers(headers)
+                for kind, bucket in (("requests", self.requests), ("tokens", self.tokens)):
+                    # 残量ヘッダーがあれば尽きた側だけ、なければ両方を空にする
+                    bucket.refill(now)
+                    if observed.get(kind, {}).get("remaining", 0) <= 0:
+                        bucket.drain()
+                if headers:
+                    self._observe(headers)
+            self._cond.notify_all()
+        return delay
+
+    # ---------- 参照 ----------
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            now = time.monotonic()
+            self.requests.refill(now)
+            self.tokens.refill(now)
+            waiting = {lane: 0 for lane in LANES}
+            for waiter in self._waiters:
+                waiting[waiter.lane] += 1
+            return {
+                **self._stats,
+                "in_flight"         : self._in_flight,
+                "batch_in_flight"   : self._batch_in_flight,
+                "waiting"           : waiting,
+                "requests_available": round(self.requests.level, 1),
+                "requests_limit"    : self.requests.limit,
+                "tokens_available"  : round(self.tokens.level, 1),
+                "tokens_limit"      : self.tokens.limit,
+                "blocked_for"       : round(max(0.0, self._blocked_until - now), 3),
+            }
+
+
+# ==================================================
+# エクスポート
+# ==================================================
+__all__ = [
+    'LANES',
+    'RateLimitScheduler',
+    'RateLimitTicket',
+    'RateLimitTimeout',
+    'TokenBucket',
+    'parse_duration',
+    'parse_rate_limit_headers',
+    'retry_after_seconds',
+]
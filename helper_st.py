@@ -2,7 +2,7 @@
 # Streamlit UI関連機能
 # -----------------------------------------
 from functools import wraps
-from typing import List, Dict, Any, Optional, Union, Tuple
+from typing import List, Dict, Any, Optional, Union, Tuple, Callable
 from datetime import datetime
 from abc import ABC, abstractmethod
 import json
@@ -27,6 +27,7 @@ from helper_api import (
     ConfigManager,
     MessageManager,
     TokenManager,
+    MessageTokenCounter,
     ResponseProcessor,
     OpenAIClient,
 
@@ -36,6 +37,9 @@ from helper_api import (
     save_json_file,
     safe_json_serializer,
     safe_json_dumps,
+    make_cache_key,
+    cache_result,
+    get_usage_ledger,
 
     # グローバル
     config,
@@ -112,18 +116,25 @@ def timer_ui(func):
     return wrapper
 
 
-def cache_result_ui(ttl: int = None):
-    """結果をキャッシュするデコレータ（Streamlit session_state用）"""
+def cache_result_ui(ttl: int = None, key: Callable = None):
+    """結果をキャッシュするデコレータ（Streamlit session_state用）
+
+    config.yml の cache.backend が redis のときは、セッション・プロセスをまたいで共有する
+    cache_result（L1＋Redis）に切り替える。その場合、__cache_key__ を持たないオブジェクトを
+    引数に含む呼び出しはプロセス内にだけ保存される（共有するなら key= を渡す）。
+    """
 
     def decorator(func):
+        if config.get("cache.backend", "memory") != "memory":
+            return cache_result(ttl=ttl, key=key)(func)
+
         @wraps(func)
         def wrapper(*args, **kwargs):
             if not config.get("cache.enabled", True):
                 return func(*args, **kwargs)
 
-            # キャッシュキーの生成
-            import hashlib
-            cache_key = f"{func.__name__}_{hashlib.md5(str(args).encode() + str(kwargs).encode()).hexdigest()}"
+            # キャッシュキーの生成（引数の構造的ハッシュ）
+            cache_key = f"{func.__qualname__}_{make_cache_key(func, args, kwargs)}"
 
             # セッションステートにキャッシュ領域を確保
             if 'ui_cache' not in st.session_state:
@@ -243,6 +254,13 @@ class MessageManagerUI(MessageManager):
         """メッセージ履歴の取得"""
         return st.session_state.get(self.session_key, [])
 
+    def count_tokens(self, model: str = None) -> int:
+        """履歴全体のトークン数（カウンタをセッションに保持し、再実行では追加分だけを数える）"""
+        counter_key = f"{self.session_key}_token_counter"
+        if counter_key not in st.session_state:
+            st.session_state[counter_key] = MessageTokenCounter(model)
+        return st.session_state[counter_key].sync(self.get_messages(), model)
+
     def clear_messages(self):
         """メッセージ履歴のクリア"""
         st.session_state[self.session_key] = self.get_default_messages()
@@ -423,12 +441,18 @@ class UIHelper:
                     st.markdown(f"*{content}*")
 
     @staticmethod
-    def show_token_info(text: str, model: str = None, position: str = "sidebar"):
-        """トークン情報の表示（拡張版）"""
+    def show_token_info(text: Union[str, List[EasyInputMessageParam]], model: str = None, position: str = "sidebar"):
+        """トークン情報の表示（拡張版）
+
+        text にはテキストのほか、メッセージ履歴のリストも渡せる（1件ごとの追加分を含めて数える）。
+        """
         if not text:
             return
 
-        token_count = TokenManager.count_tokens(text, model)
+        if isinstance(text, str):
+            token_count = TokenManager.count_tokens(text, model)
+        else:
+            token_count = TokenManager.count_messages(text, model)
         limits = TokenManager.get_model_limits(model)
 
         # 表示位置の選択
@@ -547,8 +571,13 @@ class UIHelper:
                     SessionStateManager.clear_cache()
                     st.success("キャッシュをクリアしました")
             with col2:
-                cache_size = cache.size()
-                st.metric("キャッシュ数", cache_size)
+                cache_stats = cache.stats()
+                st.metric("キャッシュ数", cache_stats["entries"],
+                          help=f"ヒット率 {cache_stats['hit_rate']:.0%} / 追い出し {cache_stats['evictions']}件")
+            st.caption(
+                f"使用量: {cache_stats['bytes'] / 1024:,.0f} / {cache_stats['max_bytes'] / 1024:,.0f} KB "
+                f"（{cache_stats['policy']}、ヒット {cache_stats['hits']} / ミス {cache_stats['misses']}）"
+            )
 
     @staticmethod
     def show_performance_panel():
@@ -854,48 +883,55 @@ class InfoPanelManager:
 
     @staticmethod
     def show_cost_info(selected_model: str):
-        """料金情報パネル"""
-        with st.sidebar.expander("💰 料金計算", expanded=False):
-            pricing = config.get("model_pricing", {}).get(selected_model)
-            if not pricing:
-                st.warning("料金情報が見つかりません")
+        """料金情報パネル（使用量台帳に記録された実際の呼び出しから集計）"""
+        with st.sidebar.expander("💰 料金・使用量", expanded=False):
+            ledger = get_usage_ledger()
+            if ledger is None:
+                st.info("使用量台帳が無効です（config.yml の usage_ledger.enabled）")
                 return
 
-            st.write("**料金シミュレーター**")
-
-            # 入力フィールド
-            input_tokens = st.number_input(
-                "入力トークン数",
-                min_value=0,
-                value=1000,
-                step=100,
-                key="cost_input_tokens"
-            )
-            output_tokens = st.number_input(
-                "出力トークン数",
-                min_value=0,
-                value=500,
-                step=100,
-                key="cost_output_tokens"
-            )
-
-            # コスト計算
-            input_cost = (input_tokens / 1000) * pricing["input"]
-            output_cost = (output_tokens / 1000) * pricing["output"]
-            total_cost = input_cost + output_cost
+            try:
+                today = ledger.totals(days=1)
+                week = ledger.totals(days=7)
+                pages = ledger.daily_costs(days=7)
+                latency = ledger.latency_stats(days=7, model=selected_model)
+            except Exception as e:
+                logger.error(f"使用量台帳の集計エラー: {e}")
+                st.warning("使用量を集計できませんでした")
+                return
 
+            st.write("**今日**")
             col1, col2 = st.columns(2)
             with col1:
-                st.write("入力コスト", f"${input_cost:.6f}")
+                st.write("コスト", f"${today['cost']:.4f}")
+                st.write("呼び出し", f"{today['calls']:,} 回")
             with col2:
-                st.write("出力コスト", f"${output_cost:.6f}")
-
-            st.write("**総コスト**", f"${total_cost:.6f}")
+                st.write("トークン", f"{today['input_tokens'] + today['output_tokens']:,}")
+                st.write("キャッシュヒット", f"{today['cache_hits']:,} 回")
+            if today["saved_cost"]:
+                st.caption(f"応答キャッシュで節約: ${today['saved_cost']:.4f}")
+
+            if latency:
+                stats = latency[0]
+                st.write(f"**{selected_model} のレイテンシ（7日間）**")
+                st.write("p50 / p95", f"{stats['p50']:.2f}s / {stats['p95']:.2f}s")
+                st.caption(f"{stats['calls']:,} 回（うちキャッシュ {stats['cache_hits']:,} 回）")
+
+            if pages:
+                st.write("**ページ別コスト（7日間）**")
+                st.dataframe(
+                    [{"日付": row["day"], "ページ": row["caller"], "呼び出し": row["calls"],
+                      "コスト($)": round(row["cost"], 6)} for row in pages],
+                    hide_index=True,
+                    use_container_width=True,
+                )
+            else:
+                st.caption("まだ記録された呼び出しはありません")
 
-            # 月間推定
-            daily_calls = st.slider("1日の呼び出し回数", 1, 1000, 100)
-            monthly_cost = total_cost * daily_calls * 30
-            st.info(f"月間推定: ${monthly_cost:.2f}")
+            # 月間推定（直近7日間のうち利用のあった日の平均から）
+            if week["active_days"]:
+                monthly_cost = week["cost"] / week["active_days"] * 30
+                st.info(f"月間推定: ${monthly_cost:.2f}（直近 {week['active_days']} 日の平均から）")
 
     @staticmethod
     def show_performance_info():
@@ -947,10 +983,12 @@ class InfoPanelManager:
                 index=["DEBUG", "INFO", "WARNING", "ERROR"].index(current_level)
             )
             if new_level != current_level:
+                # ロガーのレベルは設定の変更通知で切り替わる
                 config.set("logging.level", new_level)
-                logger.setLevel(getattr(logger, new_level))
 
-            st.write(f"**キャッシュ**: {cache.size()} エントリ")
+            cache_stats = cache.stats()
+            st.write(f"**キャッシュ**: {cache_stats['entries']} エントリ "
+                     f"（ヒット率 {cache_stats['hit_rate']:.0%}、{cache_stats['bytes'] / 1024:,.0f} KB）")
             if st.button("🗑️ キャッシュクリア"):
                 cache.clear()
                 st.success("キャッシュをクリアしました")
@@ -0,0 +1,324 @@
+# helper_trend.py
+# 日別売上配列のトレンド・季節性分析と予測（NumPy のベクトル演算のみ、Streamlit 非依存）
+#
+# 使い方:
+#   days, sales = densify_daily(raw_dates, raw_sales)      # 注文のない日を 0 で補完
+#   rolling_mean(sales, 7)                                 # 移動平均（先頭は min_periods=1）
+#   fit = fit_trend(sales, phase=weekday_index(days))      # 線形トレンド＋曜日季節性
+#   result = forecast(days, sales, horizon=14)             # 信頼帯付き予測
+#
+#   python helper_trend.py --days 365 3650 --repeat 20     # ベンチマーク（検証は tests/test_trend.py）
+
+import argparse
+import math
+import time
+from dataclasses import dataclass
+from statistics import NormalDist
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+DAY = np.timedelta64(1, "D")
+WEEKDAY_LABELS = ("月", "火", "水", "木", "金", "土", "日")
+
+
+# ==================================================
+# 日次配列の整形
+# ==================================================
+def to_day_array(dates: Sequence) -> np.ndarray:
+    """日付（文字列・date・datetime64）を datetime64[D] 配列に変換"""
+    return np.asarray(dates, dtype="datetime64[D]")
+
+
+def densify_daily(dates: Sequence, *columns: Sequence, fill: float = 0.0) -> Tuple[np.ndarray, ...]:
+    """飛び飛びの日別配列を連続した日次配列にする
+
+    同じ日付が複数あれば合算し、値のない日は fill で埋める。
+    戻り値は (日付配列, 列1, 列2, ...)。
+    """
+    days = to_day_array(dates)
+    if days.size == 0:
+        return (days, *(np.zeros(0) for _ in columns))
+
+    start = days.min()
+    full = np.arange(start, days.max() + DAY, DAY)
+    index = (days - start).astype(np.int64)
+    present = np.bincount(index, minlength=full.size) > 0
+
+    dense_columns = []
+    for column in columns:
+        dense = np.bincount(index, weights=np.asarray(column, dtype=float), minlength=full.size)
+        dense[~present] = fill
+        dense_columns.append(dense)
+    return (full, *dense_columns)
+
+
+def weekday_index(days: np.ndarray) -> np.ndarray:
+    """曜日番号（月曜=0 … 日曜=6）。1970-01-01 は木曜"""
+    return (to_day_array(days).astype(np.int64) + 3) % 7
+
+
+# ==================================================
+# 移動統計
+# ==================================================
+def rolling_mean(values: Sequence, window: int, min_periods: int = 1) -> np.ndarray:
+    """累積和による O(n) の移動平均（窓が min_periods 未満の位置は NaN）"""
+    values = np.asarray(values, dtype=float)
+    sums, counts = _rolling_sums(values, window)
+    means = sums / np.maximum(counts, 1)
+    means[counts < min_periods] = np.nan
+    return means
+
+
+def rolling_std(values: Sequence, window: int, min_periods: int = 2) -> np.ndarray:
+    """累積和による O(n) の移動標準偏差（不偏、pandas の rolling().std() と同じ定義）"""
+    values = np.asarray(values, dtype=float)
+    # 桁落ちを避けるため平均を引いてから二乗和をとる
+    centered = values - (values.mean() if values.size else 0.0)
+    sums, counts = _rolling_sums(centered, window)
+    squares, _ = _rolling_sums(centered * centered, window)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        variance = (squares - sums * sums / counts) / (counts - 1)
+    result = np.sqrt(np.clip(variance, 0.0, None))
+    result[counts < max(min_periods, 2)] = np.nan
+    return result
+
+
+def _rolling_sums(values: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    cumulative = np.concatenate(([0.0], np.cumsum(values)))
+    end = np.arange(1, values.size + 1)
+    start = np.maximum(0, end - window)
+    return cumulative[end] - cumulative[start], (end - start).astype(float)
+
+
+def growth_rate(values: Sequence, window: int = 7) -> Optional[float]:
+    """直近 window 日の平均と、その前の window 日の平均の変化率（%）"""
+    values = np.asarray(values, dtype=float)
+    if values.size < 2 * window:
+        return None
+    recent = values[-window:].mean()
+    before = values[-2 * window:-window].mean()
+    return (recent - before) / before * 100 if before else None
+
+
+# ==================================================
+# トレンド＋季節性の当てはめ
+# ==================================================
+@dataclass
+class TrendFit:
+    """y = intercept + slope * t + seasonal[phase] の最小二乗当てはめ結果
+
+    seasonal は合計 0 に正規化した周期成分。予測区間は残差の標準偏差と
+    説明変数のレバレッジから計算する（正規近似）。
+    """
+    intercept: float
+    slope: float
+    seasonal: np.ndarray
+    fitted: np.ndarray
+    residual_std: float
+    r2: float
+    n: int
+    period: int
+    _xtx_inv: np.ndarray
+
+    def design(self, t: np.ndarray, phase: np.ndarray) -> np.ndarray:
+        return _design_matrix(t, phase, self.period)
+
+    def predict(self, t: Sequence, phase: Sequence, level: float = 0.95) -> Dict[str, np.ndarray]:
+        """時点 t（学習データの先頭を 0 とする日数）での予測値と予測区間"""
+        t = np.asarray(t, dtype=float)
+        phase = np.asarray(phase, dtype=np.int64)
+        x = self.design(t, phase)
+        mean = self.intercept + self.slope * t + self.seasonal[phase % self.period]
+        leverage = np.einsum("ij,jk,ik->i", x, self._xtx_inv, x)
+        z = NormalDist().inv_cdf(0.5 + level / 2)
+        spread = z * self.residual_std * np.sqrt(1.0 + leverage)
+        return {"mean": mean, "lower": mean - spread, "upper": mean + spread}
+
+
+def _design_matrix(t: np.ndarray, phase: np.ndarray, period: int) -> np.ndarray:
+    columns = [np.ones_like(t), t]
+    if period > 1:
+        # 位相 0 を基準にしたダミー変数（period-1 列）
+        dummies = (phase[:, None] % period) == np.arange(1, period)[None, :]
+        columns.extend(dummies.T.astype(float))
+    return np.column_stack(columns)
+
+
+def fit_trend(values: Sequence, phase: Optional[Sequence] = None, period: int = 7) -> TrendFit:
+    """線形トレンドと周期 period の季節成分を同時に最小二乗で当てはめる
+
+    phase は各点の周期内位置（日次データなら weekday_index(days)）。省略時は 0 始まりの連番。
+    データ点が周期に対して少なすぎる場合は季節成分なし（period=1）で当てはめる。
+    """
+    y = np.asarray(values, dtype=float)
+    n = y.size
+    if n < 2:
+        raise ValueError("トレンドの当てはめには2点以上が必要です")
+    if n < period + 3:
+        period = 1
+    t = np.arange(n, dtype=float)
+    phase = np.arange(n) if phase is None else np.asarray(phase, dtype=np.int64)
+
+    x = _design_matrix(t, phase, period)
+    coef, _, rank, _ = np.linalg.lstsq(x, y, rcond=None)
+    fitted = x @ coef
+    residuals = y - fitted
+    dof = max(n - rank, 1)
+    residual_std = math.sqrt(float(residuals @ residuals) / dof)
+    total = float(((y - y.mean()) ** 2).sum())
+    r2 = 1.0 - float(residuals @ residuals) / total if total > 0 else 0.0
+
+    seasonal = np.zeros(period)
+    seasonal[1:] = coef[2:]
+    offset = seasonal.mean()
+    return TrendFit(
+        intercept=float(coef[0] + offset),
+        slope=float(coef[1]),
+        seasonal=seasonal - offset,
+        fitted=fitted,
+        residual_std=residual_std,
+        r2=r2,
+        n=n,
+        period=period,
+        _xtx_inv=np.linalg.pinv(x.T @ x),
+    )
+
+
+def forecast(days: Sequence, values: Sequence, horizon: int = 7, period: int = 7,
+             level: float = 0.95) -> Dict[str, Any]:
+    """日次配列に線形トレンド＋曜日季節性を当てはめ、horizon 日先まで予測
+
+    Returns:
+        fit（TrendFit）、履歴側の信頼帯（history_lower/upper）、
+        予測側の dates / mean / lower / upper（下限は 0 で打ち切り）
+    """
+    days = to_day_array(days)
+    y = np.asarray(values, dtype=float)
+    phase = weekday_index(days) if period == 7 else np.arange(y.size) % period
+    fit = fit_trend(y, phase, period)
+
+    history = fit.predict(np.arange(y.size), phase, level)
+    future_days = days[-1] + np.arange(1, horizon + 1) * DAY
+    future_phase = weekday_index(future_days) if period == 7 else np.arange(y.size, y.size + horizon) % period
+    future = fit.predict(np.arange(y.size, y.size + horizon), future_phase, level)
+    return {
+        "fit"          : fit,
+        "history_lower": history["lower"],
+        "history_upper": history["upper"],
+        "dates"        : future_days,
+        "mean"         : np.clip(future["mean"], 0.0, None),
+        "lower"        : np.clip(future["lower"], 0.0, None),
+        "upper"        : np.clip(future["upper"], 0.0, None),
+        "level"        : level,
+    }
+
+
+# ==================================================
+# 集計
+# ==================================================
+def weekday_profile(days: Sequence, values: Sequence) -> Dict[str, np.ndarray]:
+    """曜日ごとの合計・平均（月曜始まりの長さ7の配列）"""
+    index = weekday_index(to_day_array(days))
+    values = np.asarray(values, dtype=float)
+    totals = np.bincount(index, weights=values, minlength=7)
+    counts = np.bincount(index, minlength=7)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = np.where(counts > 0, totals / counts, 0.0)
+    return {"total": totals, "mean": means, "days": counts}
+
+
+def monthly_totals(days: Sequence, values: Sequence) -> Tuple[np.ndarray, np.ndarray]:
+    """月ごとの合計（datetime64[M] の配列と合計値）"""
+    months = to_day_array(days).astype("datetime64[M]")
+    unique, inverse = np.unique(months, return_inverse=True)
+    return unique, np.bincount(inverse, weights=np.asarray(values, dtype=float))
+
+
+def coefficient_of_variation(values: Sequence) -> Optional[float]:
+    values = np.asarray(values, dtype=float)
+    if values.size < 2 or values.mean() == 0:
+        return None
+    return float(values.std(ddof=1) / values.mean())
+
+
+# ==================================================
+# 検証用データとベンチマーク
+# ==================================================
+def synthetic_daily_sales(n_days: int, seed: int = 42, intercept: float = 100_000.0,
+                          slope: float = 50.0, noise: float = 5_000.0,
+                          start: str = "2020-01-01") -> Dict[str, Any]:
+    """既知のトレンド・曜日パターン・ノイズを持つ日次売上（検証用）"""
+    rng = np.random.default_rng(seed)
+    days = np.arange(np.datetime64(start), np.datetime64(start) + n_days * DAY, DAY)
+    pattern = np.array([-8_000.0, -4_000.0, -2_000.0, 0.0, 4_000.0, 12_000.0, -2_000.0])
+    pattern -= pattern.mean()
+    values = intercept + slope * np.arange(n_days) + pattern[weekday_index(days)] + rng.normal(0, noise, n_days)
+    return {"days": days, "values": values, "slope": slope, "pattern": pattern, "noise": noise}
+
+
+def benchmark(n_days: int, repeat: int = 20) -> Dict[str, float]:
+    """補完→移動統計→当てはめ→予測の一連の処理時間（ミリ秒、repeat 回の中央値）"""
+    data = synthetic_daily_sales(n_days)
+    # 注文のない日を1割ほど抜いた状態から補完する
+    keep = np.random.default_rng(0).random(n_days) > 0.1
+    raw_days, raw_values = data["days"][keep], data["values"][keep]
+
+    timings = {"densify": [], "rolling": [], "forecast": [], "total": []}
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        days, values = densify_daily(raw_days, raw_values)
+        t1 = time.perf_counter()
+        rolling_mean(values, 7)
+        rolling_mean(values, 28)
+        rolling_std(values, 28)
+        t2 = time.perf_counter()
+        forecast(days, values, horizon=30)
+        t3 = time.perf_counter()
+        timings["densify"].append(t1 - t0)
+        timings["rolling"].append(t2 - t1)
+        timings["forecast"].append(t3 - t2)
+        timings["total"].append(t3 - t0)
+    return {name: float(np.median(values)) * 1000 for name, values in timings.items()}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="helper_trend のベンチマーク")
+    parser.add_argument("--days", type=int, nargs="+", default=[90, 365, 3650, 36500],
+                        help="ベンチマークする日数（複数指定可）")
+    parser.add_argument("--repeat", type=int, default=20, help="各サイズの反復回数")
+    args = parser.parse_args(argv)
+
+    print(f"{'days':>8} {'densify':>10} {'rolling':>10} {'forecast':>10} {'total':>10}  (ms, median)")
+    for n_days in args.days:
+        result = benchmark(n_days, args.repeat)
+        print(f"{n_days:>8} {result['densify']:>10.3f} {result['rolling']:>10.3f} "
+              f"{result['forecast']:>10.3f} {result['total']:>10.3f}")
+    return 0
+
+
+# ==================================================
+# エクスポート
+# ==================================================
+__all__ = [
+    'WEEKDAY_LABELS',
+    'TrendFit',
+    'to_day_array',
+    'densify_daily',
+    'weekday_index',
+    'rolling_mean',
+    'rolling_std',
+    'growth_rate',
+    'fit_trend',
+    'forecast',
+    'weekday_profile',
+    'monthly_totals',
+    'coefficient_of_variation',
+    'synthetic_daily_sales',
+    'benchmark',
+]
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,309 @@
+# helper_usage.py
+# OpenAI API の使用量・コスト台帳（追記専用ログ＋日次ロールアップ）
+#
+# 使い方:
+#   ledger = UsageLedger(pricing=TokenManager.estimate_cost)   # 既定: MCP_USAGE_LEDGER_DIR または ./usage_ledger
+#   ledger.record("gpt-4o-mini", input_tokens=1200, cached_tokens=0, output_tokens=80,
+#                 latency=1.4, caller="mcp_postgresql")
+#   ledger.daily_costs(days=7)       # ページ（呼び出し元）ごと・日ごとのコスト
+#   ledger.latency_stats(days=7)     # モデルごとの p50 / p95 / p99 レイテンシ
+#
+# 1回の呼び出しは日付ごとのファイル usage-YYYYMMDD.jsonl に短いキーの JSON 1行として追記するだけ
+# （複数プロセスから追記しても1行単位で混ざらない）。rollup() が未集計の行を SQLite の
+# usage_daily（日×呼び出し元×モデル）に畳み込み、どこまで読んだかをファイルごとに記録する。
+# 集計のクエリは常にロールアップ済みの表を読むので、ログが伸びても速さは変わらない。
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Callable, Tuple
+
+from helper_perf import LatencyHistogram
+
+
+DEFAULT_LEDGER_DIR = "usage_ledger"
+
+# ログ1行のキー（行を短く保つため1文字にしている）
+_FIELDS = {
+    "t": "timestamp",
+    "m": "model",
+    "i": "input_tokens",
+    "c": "cached_tokens",
+    "o": "output_tokens",
+    "l": "latency",
+    "w": "wait",
+    "p": "caller",
+    "h": "cache_hit",
+    "e": "endpoint",
+}
+
+
+# ==================================================
+# 台帳
+# ==================================================
+class UsageLedger:
+    """API 呼び出しごとの使用量を追記し、日次に集計して問い合わせに答える台帳
+
+    コストは pricing(input_tokens, output_tokens, model, cached_tokens) で求める（1000トークン
+    あたりの料金表を持つ TokenManager.estimate_cost を渡す想定）。キャッシュから返した呼び出しは
+    コストを 0 とし、本来かかったはずの額を saved_cost に積む。
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS usage_daily (
+            day           TEXT NOT NULL,
+            caller        TEXT NOT NULL,
+            model         TEXT NOT NULL,
+            calls         INTEGER NOT NULL DEFAULT 0,
+            cache_hits    INTEGER NOT NULL DEFAULT 0,
+            input_tokens  INTEGER NOT NULL DEFAULT 0,
+            cached_tokens INTEGER NOT NULL DEFAULT 0,
+            output_tokens INTEGER NOT NULL DEFAULT 0,
+            cost          REAL NOT NULL DEFAULT 0,
+            saved_cost    REAL NOT NULL DEFAULT 0,
+            wait_seconds  REAL NOT NULL DEFAULT 0,
+            histogram     TEXT,
+            PRIMARY KEY (day, caller, model)
+        );
+        CREATE TABLE IF NOT EXISTS rollup_offsets (
+            file   TEXT PRIMARY KEY,
+            offset INTEGER NOT NULL
+        );
+    """
+
+    def __init__(self, directory: Optional[str] = None,
+                 pricing: Optional[Callable[..., float]] = None,
+                 rollup_interval: float = 60.0, retention_days: int = 30):
+        self.directory = Path(directory or os.getenv("MCP_USAGE_LEDGER_DIR", DEFAULT_LEDGER_DIR))
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.db_path = str(self.directory / "rollup.db")
+        self.pricing = pricing or (lambda input_tokens, output_tokens, model, cached_tokens=0: 0.0)
+        self.rollup_interval = rollup_interval
+        self.retention_days = retention_days
+        self._write_lock = threading.Lock()
+        self._rollup_lock = threading.Lock()
+        self._last_rollup = time.monotonic()
+        with self._connect() as conn:
+            conn.executescript(self.SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _log_path(self, timestamp: float) -> Path:
+        return self.directory / f"usage-{datetime.fromtimestamp(timestamp):%Y%m%d}.jsonl"
+
+    # ---------- 追記 ----------
+    def record(self, model: str, input_tokens: int = 0, cached_tokens: int = 0, output_tokens: int = 0,
+               latency: float = 0.0, caller: Optional[str] = None, cache_hit: bool = False,
+               endpoint: str = "responses", wait: float = 0.0, timestamp: Optional[float] = None) -> None:
+        """呼び出し1回分を追記（rollup_interval を過ぎていればロールアップも行う）"""
+        timestamp = time.time() if timestamp is None else timestamp
+        entry = {
+            "t": round(timestamp, 3),
+            "m": model or "unknown",
+            "i": int(input_tokens or 0),
+            "c": int(cached_tokens or 0),
+            "o": int(output_tokens or 0),
+            "l": round(float(latency or 0.0), 4),
+            "p": caller or "unknown",
+            "e": endpoint,
+        }
+        if wait:
+            entry["w"] = round(float(wait), 4)
+        if cache_hit:
+            entry["h"] = 1
+        line = json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n"
+        with self._write_lock:
+            # 1回の write で1行を書く（O_APPEND なので他プロセスの行と混ざらない）
+            with open(self._log_path(timestamp), "a", encoding="utf-8") as f:
+                f.write(line)
+
+        if time.monotonic() - self._last_rollup >= self.rollup_interval:
+            # 失敗しても追記は済んでいるので、次の間隔（または次の参照）で畳み込み直される
+            self.rollup()
+
+    # ---------- ロールアップ ----------
+    def rollup(self) -> int:
+        """未集計のログ行を usage_daily に畳み込み、畳み込んだ行数を返す
+
+        BEGIN IMMEDIATE で書き込みロックを取ってから読み位置を確認するので、複数プロセスが
+        同時に呼んでも同じ行を二重に数えない。書きかけの最終行（改行なし）は次回に回す。
+        """
+        with self._rollup_lock, self._connect() as conn:
+            self._last_rollup = time.monotonic()
+            conn.execute("BEGIN IMMEDIATE")
+            offsets = {row["file"]: row["offset"] for row in conn.execute("SELECT file, offset FROM rollup_offsets")}
+            groups: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+            folded = 0
+
+            for path in sorted(self.directory.glob("usage-*.jsonl")):
+                start = offsets.get(path.name, 0)
+                with open(path, "rb") as f:
+                    f.seek(start)
+                    data = f.read()
+                end = data.rfind(b"\n") + 1
+                if end <= 0:
+                    continue
+                for raw in data[:end].splitlines():
+                    try:
+                        entry = json.loads(raw)
+                    except ValueError:
+                        continue
+                    self._fold(groups, entry)
+                    folded += 1
+                conn.execute("INSERT OR REPLACE INTO rollup_offsets (file, offset) VALUES (?, ?)",
+                             (path.name, start + end))
+
+            for (day, caller, model), agg in groups.items():
+                row = conn.execute("SELECT histogram FROM usage_daily WHERE day = ? AND caller = ? AND model = ?",
+                                   (day, caller, model)).fetchone()
+                histogram = agg["histogram"]
+                if row is not None and row["histogram"]:
+                    histogram = LatencyHistogram.from_dict(json.loads(row["histogram"])).merge(histogram)
+                conn.execute(
+                    """
+                    INSERT INTO usage_daily (day, caller, model, calls, cache_hits, input_tokens, cached_tokens,
+                                             output_tokens, cost, saved_cost, wait_seconds, histogram)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (day, caller, model) DO UPDATE SET
+                        calls = calls + excluded.calls,
+                        cache_hits = cache_hits + excluded.cache_hits,
+                        input_tokens = input_tokens + excluded.input_tokens,
+                        cached_tokens = cached_tokens + excluded.cached_tokens,
+                        output_tokens = output_tokens + excluded.output_tokens,
+                        cost = cost + excluded.cost,
+                        saved_cost = saved_cost + excluded.saved_cost,
+                        wait_seconds = wait_seconds + excluded.wait_seconds,
+                        histogram = excluded.histogram
+                    """,
+                    (day, caller, model, agg["calls"], agg["cache_hits"], agg["input_tokens"], agg["cached_tokens"],
+                     agg["output_tokens"], agg["cost"], agg["saved_cost"], agg["wait_seconds"],
+                     json.dumps(histogram.to_dict())),
+                )
+            self._expire(conn)
+        return folded
+
+    def _fold(self, groups: Dict[Tuple[str, str, str], Dict[str, Any]], entry: Dict[str, Any]) -> None:
+        day = datetime.fromtimestamp(entry["t"]).strftime("%Y-%m-%d")
+        key = (day, entry.get("p", "unknown"), entry.get("m", "unknown"))
+        agg = groups.get(key)
+        if agg is None:
+            agg = groups[key] = {"calls": 0, "cache_hits": 0, "input_tokens": 0, "cached_tokens": 0,
+                                 "output_tokens": 0, "cost": 0.0, "saved_cost": 0.0, "wait_seconds": 0.0,
+                                 "histogram": LatencyHistogram()}
+        cost = self.pricing(entry.get("i", 0), entry.get("o", 0), entry.get("m"), cached_tokens=entry.get("c", 0))
+        agg["calls"] += 1
+        agg["input_tokens"] += entry.get("i", 0)
+        agg["cached_tokens"] += entry.get("c", 0)
+        agg["output_tokens"] += entry.get("o", 0)
+        agg["wait_seconds"] += entry.get("w", 0.0)
+        if entry.get("h"):
+            agg["cache_hits"] += 1
+            agg["saved_cost"] += cost
+        else:
+            agg["cost"] += cost
+        agg["histogram"].record(entry.get("l", 0.0) * 1000)
+
+    def _expire(self, conn) -> None:
+        """保持期間を過ぎた集計済みログと日次集計を削除"""
+        cutoff = (datetime.now() - timedelta(days=self.retention_days)).strftime("%Y%m%d")
+        for path in self.directory.glob("usage-*.jsonl"):
+            stamp = path.stem.split("-", 1)[1]
+            row = conn.execute("SELECT offset FROM rollup_offsets WHERE file = ?", (path.name,)).fetchone()
+            if stamp < cutoff and row is not None and row["offset"] >= path.stat().st_size:
+                path.unlink()
+                conn.execute("DELETE FROM rollup_offsets WHERE file = ?", (path.name,))
+        conn.execute("DELETE FROM usage_daily WHERE day < ?",
+                     (f"{cutoff[:4]}-{cutoff[4:6]}-{cutoff[6:]}",))
+
+    # ---------- 参照 ----------
+    def _since(self, days: int) -> str:
+        return (datetime.now() - timedelta(days=max(1, days) - 1)).strftime("%Y-%m-%d")
+
+    def daily_costs(self, days: int = 7, caller: Optional[str] = None) -> List[Dict[str, Any]]:
+        """呼び出し元（ページ）ごと・日ごとのコストと使用量（新しい日から）"""
+        self.rollup()
+        query = """
+            SELECT day, caller, SUM(calls) AS calls, SUM(cache_hits) AS cache_hits,
+                   SUM(input_tokens) AS input_tokens, SUM(cached_tokens) AS cached_tokens,
+                   SUM(output_tokens) AS output_tokens, SUM(cost) AS cost, SUM(saved_cost) AS saved_cost
+            FROM usage_daily WHERE day >= ?
+        """
+        params: List[Any] = [self._since(days)]
+        if caller is not None:
+            query += " AND caller = ?"
+            params.append(caller)
+        query += " GROUP BY day, caller ORDER BY day DESC, cost DESC"
+        with self._connect() as conn:
+            return [dict(row) for row in conn.execute(query, params)]
+
+    def latency_stats(self, days: int = 7, model: Optional[str] = None) -> List[Dict[str, Any]]:
+        """モデルごとのレイテンシ分布（キャッシュヒットを含む全呼び出し。秒）"""
+        self.rollup()
+        query = "SELECT model, calls, cache_hits, histogram FROM usage_daily WHERE day >= ?"
+        params: List[Any] = [self._since(days)]
+        if model is not None:
+            query += " AND model = ?"
+            params.append(model)
+        merged: Dict[str, Dict[str, Any]] = {}
+        with self._connect() as conn:
+            for row in conn.execute(query, params):
+                item = merged.setdefault(row["model"], {"calls": 0, "cache_hits": 0, "histogram": LatencyHistogram()})
+                item["calls"] += row["calls"]
+                item["cache_hits"] += row["cache_hits"]
+                if row["histogram"]:
+                    item["histogram"].merge(LatencyHistogram.from_dict(json.loads(row["histogram"])))
+
+        stats = []
+        for name, item in sorted(merged.items(), key=lambda pair: -pair[1]["calls"]):
+            histogram = item["histogram"]
+            stats.append({
+                "model"     : name,
+                "calls"     : item["calls"],
+                "cache_hits": item["cache_hits"],
+                "mean"      : histogram.mean / 1000 if histogram.count else 0.0,
+                "p50"       : histogram.percentile(50) / 1000 if histogram.count else 0.0,
+                "p95"       : histogram.percentile(95) / 1000 if histogram.count else 0.0,
+                "p99"       : histogram.percentile(99) / 1000 if histogram.count else 0.0,
+            })
+        return stats
+
+    def totals(self, days: int = 1) -> Dict[str, Any]:
+        """直近 days 日（今日を含む）の合計"""
+        self.rollup()
+        with self._connect() as conn:
+            row = conn.execute(
+                """
+                SELECT COALESCE(SUM(calls), 0) AS calls, COALESCE(SUM(cache_hits), 0) AS cache_hits,
+                       COALESCE(SUM(input_tokens), 0) AS input_tokens,
+                       COALESCE(SUM(cached_tokens), 0) AS cached_tokens,
+                       COALESCE(SUM(output_tokens), 0) AS output_tokens,
+                       COALESCE(SUM(cost), 0) AS cost, COALESCE(SUM(saved_cost), 0) AS saved_cost,
+                       COUNT(DISTINCT day) AS active_days
+                FROM usage_daily WHERE day >= ?
+                """,
+                (self._since(days),),
+            ).fetchone()
+        return dict(row)
+
+
+# ==================================================
+# エクスポート
+# ==================================================
+__all__ = [
+    'DEFAULT_LEDGER_DIR',
+    'UsageLedger',
+]
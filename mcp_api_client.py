@@ -2,104 +2,725 @@
 # MCP API サーバーにアクセスするクライアントサンプル
 
 import requests
+import requests.adapters
+import urllib3
+import urllib3.connection
+import urllib3.exceptions
 import json
+import codecs
+import logging
+import socket
 import pandas as pd
 from datetime import datetime, date
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Callable
 import time
 import sys
+import random
+import threading
 import traceback
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+
+from helper_perf import LatencyRecorder, RequestTiming, normalize_endpoint
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:  # 列指向転送はオプション（未インストール時はJSONにフォールバック）
+    pa = None
+
+# 通信エラー等はロガーに出す（標準出力への表示は CLI デモと print_connection_help のみ）
+logger = logging.getLogger(__name__)
+
+
+# =====================================
+# 型付きDataFrame用の定義
+# =====================================
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+# リソース別の列型定義（category / datetime / integer / float）
+FRAME_SCHEMAS: Dict[str, Dict[str, List[str]]] = {
+    "customers": {
+        "category": ["city"],
+        "datetime": ["created_at"],
+        "integer" : ["id", "age"],
+        "float"   : [],
+    },
+    "products" : {
+        "category": ["category", "name"],
+        "datetime": ["created_at"],
+        "integer" : ["id", "stock_quantity"],
+        "float"   : ["price"],
+    },
+    "orders"   : {
+        "category": ["product_name", "customer_name"],
+        "datetime": ["order_date", "created_at"],
+        "integer" : ["id", "customer_id", "quantity"],
+        "float"   : ["price", "total_amount"],
+    },
+}
+
+
+def iter_json_array(chunks: Iterable[bytes]) -> Iterator[Dict[str, Any]]:
+    """JSON配列をチャンク単位で逐次パースし、要素を1件ずつ返す
+
+    レスポンス全体の文字列と辞書リストを同時にメモリへ載せないためのパーサー。
+    要素は後ろに区切り（, ] 空白）が届いてから確定する（数値やリテラルが
+    チャンク境界で切れていても前半だけを要素にしない）。閉じ括弧 ] が届く前に
+    ストリームが終わった場合は ValueError（接続断で一部の行だけが返るのを防ぐ）。
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    started = False
+    expect_value = True  # True: 要素（または空配列の ]）待ち / False: , か ] 待ち
+    count = 0
+
+    for chunk in chunks:
+        buffer += utf8.decode(chunk)
+        pos = 0
+        length = len(buffer)
+
+        if not started:
+            while pos < length and buffer[pos].isspace():
+                pos += 1
+            if pos >= length:
+                buffer = ""
+                continue
+            if buffer[pos] != "[":
+                raise ValueError("JSON配列ではないレスポンスです")
+            pos += 1
+            started = True
+
+        while True:
+            while pos < length and buffer[pos].isspace():
+                pos += 1
+            if pos >= length:
+                break
+            char = buffer[pos]
+            if char == "]":
+                if expect_value and count:
+                    raise ValueError("JSON配列の末尾にカンマがあります")
+                return
+            if not expect_value:
+                if char != ",":
+                    raise ValueError(f"JSON配列の区切りが不正です: {char!r}")
+                pos += 1
+                expect_value = True
+                continue
+            try:
+                item, pos_end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # 要素がチャンク境界で途切れている → 次のチャンクを待つ
+                break
+            if pos_end >= length or buffer[pos_end] not in ",] \t\r\n":
+                # 区切りが届くまで確定しない（"12" の後に "3"、"-0" の後に ".5" が続く可能性がある）
+                break
+            yield item
+            count += 1
+            pos = pos_end
+            expect_value = False
+
+        buffer = buffer[pos:]
+
+    raise ValueError("JSON配列が途中で終了しました")
+
+
+def rows_to_columns(rows: Iterable[Dict[str, Any]]) -> Dict[str, List[Any]]:
+    """行（辞書）の列挙を列ごとのリストに詰め替える"""
+    columns: Dict[str, List[Any]] = {}
+    for row in rows:
+        if not columns:
+            columns = {key: [] for key in row}
+        for key, values in columns.items():
+            values.append(row.get(key))
+    return columns
+
+
+def frame_from_arrow(payload: bytes) -> pd.DataFrame:
+    """Arrow IPCストリームをDataFrameに変換"""
+    reader = pa.ipc.open_stream(payload)
+    return reader.read_all().to_pandas()
+
+
+def apply_frame_dtypes(df: pd.DataFrame, schema_name: str) -> pd.DataFrame:
+    """リソース別の列型定義に従ってDataFrameの型を整える
+
+    - 都市・商品・カテゴリは category 型
+    - 日付は datetime64 型
+    - 数値列は int / float の最小幅へダウンキャスト
+    """
+    schema = FRAME_SCHEMAS[schema_name]
+
+    # 注文の合計金額はサーバーが返さない場合に再計算
+    if schema_name == "orders" and "total_amount" not in df.columns \
+            and "price" in df.columns and "quantity" in df.columns:
+        df["total_amount"] = pd.to_numeric(df["price"]) * pd.to_numeric(df["quantity"])
+
+    for column in schema["category"]:
+        if column in df.columns and not isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype("category")
+    for column in schema["datetime"]:
+        if column in df.columns:
+            df[column] = pd.to_datetime(df[column], errors="coerce")
+    for column in schema["integer"]:
+        if column in df.columns:
+            df[column] = pd.to_numeric(df[column], downcast="integer")
+    for column in schema["float"]:
+        if column in df.columns:
+            df[column] = pd.to_numeric(df[column], downcast="float")
+
+    return df
+
+
+# =====================================
+# サーキットブレーカー
+# =====================================
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """サーキットブレーカーが開いているためリクエストを送信しなかった"""
+
+
+class CircuitBreaker:
+    """APIサーバー障害時に即時失敗させるサーキットブレーカー
+
+    状態遷移:
+        closed    : 通常状態。連続失敗が failure_threshold に達すると open へ
+        open      : recovery_timeout 秒間はリクエストを送らず即時失敗
+        half_open : 冷却期間後に half_open_max_calls 件だけ試行し、
+                    success_threshold 回成功で closed、失敗で再び open
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 3, recovery_timeout: float = 30.0,
+                 half_open_max_calls: int = 1, success_threshold: int = 1):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.success_threshold = success_threshold
+
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._successes = 0
+        self._half_open_calls = 0
+        self._opened_at = 0.0
+        self._last_error: Optional[str] = None
+        self._last_success_at: Optional[float] = None  # 壁時計（UI表示用）
+        self._last_failure_at: Optional[float] = None
+
+    def _refresh(self, now: float) -> None:
+        """冷却期間が過ぎていれば open → half_open（ロック保持中に呼ぶ）"""
+        if self._state == self.OPEN and now - self._opened_at >= self.recovery_timeout:
+            self._state = self.HALF_OPEN
+            self._half_open_calls = 0
+            self._successes = 0
+
+    @property
+    def state(self) -> str:
+        """現在の状態（closed / open / half_open）"""
+        with self._lock:
+            self._refresh(time.monotonic())
+            return self._state
+
+    def allow_request(self) -> bool:
+        """リクエスト送信可否を判定（half_open では試行枠を消費）"""
+        with self._lock:
+            self._refresh(time.monotonic())
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.HALF_OPEN and self._half_open_calls < self.half_open_max_calls:
+                self._half_open_calls += 1
+                return True
+            return False
+
+    def record_success(self) -> None:
+        """成功を記録"""
+        with self._lock:
+            self._last_success_at = time.time()
+            if self._state == self.HALF_OPEN:
+                self._half_open_calls = max(0, self._half_open_calls - 1)
+                self._successes += 1
+                if self._successes >= self.success_threshold:
+                    self._state = self.CLOSED
+                    self._failures = 0
+            else:
+                self._failures = 0
+
+    def record_failure(self, error: Any = None) -> bool:
+        """失敗を記録し、この失敗で open に遷移した場合は True を返す"""
+        with self._lock:
+            self._last_error = str(error) if error is not None else None
+            self._last_failure_at = time.time()
+            if self._state == self.HALF_OPEN:
+                self._trip()
+                return True
+            self._failures += 1
+            if self._state == self.CLOSED and self._failures >= self.failure_threshold:
+                self._trip()
+                return True
+            return False
+
+    def _trip(self) -> None:
+        """open 状態へ遷移（ロック保持中に呼ぶ）"""
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._half_open_calls = 0
+        self._successes = 0
+
+    def reset(self) -> None:
+        """closed 状態に戻す"""
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._successes = 0
+            self._half_open_calls = 0
+            self._last_error = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """UI表示用の状態スナップショット"""
+        with self._lock:
+            now = time.monotonic()
+            self._refresh(now)
+            retry_in = 0.0
+            if self._state == self.OPEN:
+                retry_in = max(0.0, self.recovery_timeout - (now - self._opened_at))
+            return {
+                "state"            : self._state,
+                "failures"         : self._failures,
+                "failure_threshold": self.failure_threshold,
+                "retry_in"         : retry_in,
+                "last_error"       : self._last_error,
+                "last_success_at"  : self._last_success_at,
+                "last_failure_at"  : self._last_failure_at,
+            }
+
+
+# =====================================
+# リクエスト計測フック（接続確立時間の取得）
+# =====================================
+
+_timing_context = threading.local()
+
+
+def _active_timing() -> Optional[RequestTiming]:
+    """現在のスレッドで計測中のリクエスト"""
+    return getattr(_timing_context, "timing", None)
+
+
+class _TimedConnectionMixin:
+    """新規接続時に名前解決・接続確立（TLS含む）の時間を記録するurllib3接続"""
+
+    def _new_conn(self):
+        timing = _active_timing()
+        if timing is None:
+            return super()._new_conn()
+
+        timing.new_connection = True
+        start = time.perf_counter()
+        try:
+            addresses = socket.getaddrinfo(self._dns_host, self.port, 0, socket.SOCK_STREAM)
+        except OSError:
+            # 名前解決エラーの変換は urllib3 に任せる
+            return super()._new_conn()
+        timing.dns_ms = (time.perf_counter() - start) * 1000
+
+        # 解決済みアドレスへ順に接続（urllib3 内での再解決を避ける）
+        original_host = self._dns_host
+        try:
+            for index, address in enumerate(addresses):
+                self._dns_host = address[4][0]
+                try:
+                    return super()._new_conn()
+                except urllib3.exceptions.NewConnectionError:
+                    if index == len(addresses) - 1:
+                        raise
+        finally:
+            self._dns_host = original_host
+
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        timing = _active_timing()
+        if timing is not None:
+            timing.connect_ms = (time.perf_counter() - start) * 1000
+
+
+class _TimedHTTPConnection(_TimedConnectionMixin, urllib3.connection.HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnectionMixin, urllib3.connection.HTTPSConnection):
+    pass
+
+
+class _TimedHTTPConnectionPool(urllib3.HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(urllib3.HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(requests.adapters.HTTPAdapter):
+    """接続確立時間を計測できるコネクションプールを使うアダプター"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http" : _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
+
+
+# =====================================
+# 一括作成
+# =====================================
+
+@dataclass
+class BulkResult:
+    """一括作成の結果"""
+    total: int = 0
+    created_ids: List[int] = field(default_factory=list)
+    failures: List[Dict[str, Any]] = field(default_factory=list)  # {"index", "error", "row"}
+    chunks: int = 0
+    throttled: int = 0
+    duration: float = 0.0
+    aborted: bool = False
+
+    @property
+    def created(self) -> int:
+        return len(self.created_ids)
+
+    @property
+    def failed(self) -> int:
+        return len(self.failures)
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.total / self.duration if self.duration > 0 else 0.0
+
+
+class _Backpressure:
+    """429 応答時に全ワーカーの送信を一時停止させる共有状態"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._resume_at = 0.0
+
+    def wait(self) -> None:
+        delay = self._resume_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def throttle(self, delay: float) -> None:
+        with self._lock:
+            self._resume_at = max(self._resume_at, time.monotonic() + delay)
 
 
 class MCPAPIClient:
     """MCP APIクライアント"""
 
-    def __init__(self, base_url: str = "http://localhost:8000"):
+    def __init__(self, base_url: str = "http://localhost:8000",
+                 connect_timeout: float = 3.0, read_timeout: float = 10.0,
+                 failure_threshold: int = 3, recovery_timeout: float = 30.0,
+                 max_retries: int = 0):
+        """クライアントを生成（ネットワークアクセスは最初のリクエストまで行わない）
+
+        Args:
+            base_url: APIサーバーのURL
+            connect_timeout: 接続タイムアウト（秒）
+            read_timeout: 読み取りタイムアウト（秒）
+            failure_threshold: ブレーカーを開くまでの連続失敗回数
+            recovery_timeout: ブレーカーを開いたままにする冷却期間（秒）
+            max_retries: urllib3 による接続リトライ回数
+        """
         self.base_url = base_url.rstrip('/')
-        self.session = requests.Session()
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        # 全リクエストのエンドポイント別レイテンシ集計
+        self.latency = LatencyRecorder()
+        self._request_hooks: List[Callable[[RequestTiming], None]] = []
+        self.stream_chunk_size = 64 * 1024
+        self.breaker = CircuitBreaker(failure_threshold=failure_threshold,
+                                      recovery_timeout=recovery_timeout)
+        self._session: Optional[requests.Session] = None
+        self._session_lock = threading.Lock()
+        # 列指向（Arrow）転送のサーバー対応状況（None: 未確認）
+        self._columnar_supported: Optional[bool] = None
+
+    @property
+    def session(self) -> requests.Session:
+        """HTTPセッション（初回アクセス時に生成）"""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    session = requests.Session()
+                    adapter = TimedHTTPAdapter(max_retries=self.max_retries)
+                    session.mount("http://", adapter)
+                    session.mount("https://", adapter)
+                    self._session = session
+        return self._session
+
+    # =====================================
+    # 計測
+    # =====================================
 
-        print(f"🔗 APIクライアントを初期化中... ({self.base_url})")
+    def add_request_hook(self, hook: Callable[[RequestTiming], None]) -> None:
+        """リクエスト完了ごとに呼ばれるフックを登録"""
+        self._request_hooks.append(hook)
 
-        # ヘルスチェック
-        if not self.check_health():
-            print(f"⚠️ APIサーバー ({self.base_url}) に接続できません")
-            print("💡 解決方法:")
-            print("1. APIサーバーが起動しているか確認: python mcp_api_server.py")
-            print("2. ポートが正しいか確認: netstat -an | grep 8000")
-            print("3. ファイアウォールの設定を確認")
-        else:
-            print(f"✅ APIサーバーへの接続を確認しました")
+    def remove_request_hook(self, hook: Callable[[RequestTiming], None]) -> None:
+        """登録済みフックを解除"""
+        if hook in self._request_hooks:
+            self._request_hooks.remove(hook)
+
+    def _record_timing(self, timing: RequestTiming) -> None:
+        self.latency.record(timing)
+        for hook in list(self._request_hooks):
+            try:
+                hook(timing)
+            except Exception:
+                # 計測フックの失敗はリクエスト処理に影響させない
+                pass
+
+    def _timed_request(self, method: str, endpoint: str, **kwargs) -> requests.Response:
+        """計測付きでHTTPリクエストを送信（例外はそのまま送出）
 
-    def check_health(self) -> bool:
-        """APIサーバーのヘルスチェック"""
+        stream=True の場合、本文の受信時間は total_ms に含まれない。
+        """
+        timing = RequestTiming(method=method.upper(), endpoint=normalize_endpoint(endpoint))
+        _timing_context.timing = timing
+        start = time.perf_counter()
         try:
-            response = self.session.get(f"{self.base_url}/health", timeout=5)
-            if response.status_code == 200:
-                health_data = response.json()
-                print(f"   🏥 ヘルス状態: {health_data.get('status', 'unknown')}")
-                print(f"   🐘 データベース: {health_data.get('database', 'unknown')}")
-                return True
+            response = self.session.request(method, f"{self.base_url}{endpoint}", **kwargs)
+        except requests.exceptions.RequestException as e:
+            timing.error = type(e).__name__
+            raise
+        else:
+            timing.status = response.status_code
+            timing.ttfb_ms = response.elapsed.total_seconds() * 1000
+            retries = getattr(response.raw, "retries", None)
+            timing.retries = len(retries.history) if retries is not None else 0
+            if kwargs.get("stream"):
+                length = response.headers.get("content-length", "")
+                timing.response_bytes = int(length) if length.isdigit() else None
             else:
-                print(f"   ❌ ヘルスチェック失敗: HTTP {response.status_code}")
-                return False
-        except Exception as e:
-            print(f"   ❌ 接続エラー: {e}")
+                timing.response_bytes = len(response.content)
+            return response
+        finally:
+            _timing_context.timing = None
+            timing.total_ms = (time.perf_counter() - start) * 1000
+            self._record_timing(timing)
+
+    @property
+    def circuit_state(self) -> str:
+        """サーキットブレーカーの状態（closed / open / half_open）"""
+        return self.breaker.state
+
+    @property
+    def is_available(self) -> bool:
+        """リクエストを送信できる状態か（open 中は False）"""
+        return self.circuit_state != CircuitBreaker.OPEN
+
+    def get_circuit_status(self) -> Dict[str, Any]:
+        """ブレーカー状態の詳細（縮退モード表示用）
+
+        connection は実際の通信結果に基づく接続状態:
+            unknown   : まだ1件もリクエストが完了していない
+            connected : 直近に完了したリクエストが成功
+            failing   : 直近に完了したリクエストが失敗（ブレーカーは closed のまま）
+            half_open / open : ブレーカーの状態そのまま
+        """
+        status = self.breaker.snapshot()
+        status["base_url"] = self.base_url
+        last_success, last_failure = status["last_success_at"], status["last_failure_at"]
+        if status["state"] != CircuitBreaker.CLOSED:
+            status["connection"] = status["state"]
+        elif last_success is None and last_failure is None:
+            status["connection"] = "unknown"
+        elif last_failure is None or (last_success is not None and last_success >= last_failure):
+            status["connection"] = "connected"
+        else:
+            status["connection"] = "failing"
+        return status
+
+    @property
+    def is_connected(self) -> Optional[bool]:
+        """直近の通信が成功していれば True、失敗なら False、未通信なら None"""
+        connection = self.get_circuit_status()["connection"]
+        if connection == "unknown":
+            return None
+        return connection == "connected"
+
+    @staticmethod
+    def print_connection_help(base_url: str = "http://localhost:8000"):
+        """接続できない場合の対処方法を表示"""
+        print(f"⚠️ APIサーバー ({base_url}) に接続できません")
+        print("💡 解決方法:")
+        print("1. APIサーバーが起動しているか確認: python mcp_api_server.py")
+        print("2. ポートが正しいか確認: netstat -an | grep 8000")
+        print("3. ファイアウォールの設定を確認")
+
+    def _open_circuit_error(self, method: str, url: str) -> CircuitOpenError:
+        status = self.breaker.snapshot()
+        return CircuitOpenError(
+            f"サーキットブレーカー open: {method} {url} "
+            f"（{status['retry_in']:.0f}秒後に再試行）"
+        )
+
+    def check_health(self, verbose: bool = True) -> bool:
+        """APIサーバーのヘルスチェック
+
+        ブレーカーが open の間はネットワークにアクセスせず False を返す。
+        """
+        url = f"{self.base_url}/health"
+        info_level = logging.INFO if verbose else logging.DEBUG
+        failure_level = logging.WARNING if verbose else logging.DEBUG
+        if not self.breaker.allow_request():
+            logger.log(failure_level, "⛔ %s", self._open_circuit_error('GET', url))
             return False
 
-    def _make_request(self, method: str, endpoint: str, **kwargs) -> dict:
-        """共通のHTTPリクエスト処理"""
+        try:
+            response = self._timed_request("GET", "/health", timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            tripped = self.breaker.record_failure(e)
+            logger.log(logging.WARNING if tripped else failure_level, "❌ 接続エラー: %s", e)
+            return False
+
+        if response.status_code == 200:
+            self.breaker.record_success()
+            if logger.isEnabledFor(info_level):
+                health_data = response.json()
+                logger.log(info_level, "🏥 ヘルス状態: %s / 🐘 データベース: %s",
+                           health_data.get('status', 'unknown'), health_data.get('database', 'unknown'))
+            return True
+
+        if response.status_code >= 500:
+            self.breaker.record_failure(f"HTTP {response.status_code}")
+        else:
+            self.breaker.record_success()
+        logger.log(failure_level, "❌ ヘルスチェック失敗: HTTP %s", response.status_code)
+        return False
+
+    def _send_request(self, method: str, endpoint: str, **kwargs) -> requests.Response:
+        """共通のHTTP送信処理（レスポンスオブジェクトを返す）
+
+        接続エラー・タイムアウト・5xx をブレーカーの失敗として数え、
+        open 中は送信せずに CircuitOpenError を送出する。
+        """
         url = f"{self.base_url}{endpoint}"
 
-        try:
-            response = self.session.request(method, url, timeout=10, **kwargs)
-            response.raise_for_status()
+        if not self.breaker.allow_request():
+            raise self._open_circuit_error(method, url)
 
-            # JSON レスポンスの場合
-            if response.headers.get('content-type', '').startswith('application/json'):
-                return response.json()
+        kwargs.setdefault("timeout", self.timeout)
+        try:
+            response = self._timed_request(method, endpoint, **kwargs)
+        except requests.exceptions.RequestException as e:
+            tripped = self.breaker.record_failure(e)
+            if isinstance(e, requests.exceptions.Timeout):
+                logger.warning("⏰ タイムアウトエラー: %s %s", method, url)
+            elif isinstance(e, requests.exceptions.ConnectionError):
+                logger.warning("🔌 接続エラー: %s %s（APIサーバーが起動しているか確認してください）", method, url)
             else:
-                return {"text": response.text, "status_code": response.status_code}
-
-        except requests.exceptions.Timeout:
-            print(f"⏰ タイムアウトエラー: {method} {url}")
-            raise
-        except requests.exceptions.ConnectionError:
-            print(f"🔌 接続エラー: {method} {url}")
-            print("💡 APIサーバーが起動しているか確認してください")
+                logger.warning("❌ リクエストエラー: %s %s - %s", method, url, e)
+            if tripped:
+                logger.warning("⛔ サーキットブレーカー open: %.0f秒間は即時失敗します", self.breaker.recovery_timeout)
             raise
+
+        if response.status_code >= 500:
+            if self.breaker.record_failure(f"HTTP {response.status_code}"):
+                logger.warning("⛔ サーキットブレーカー open: %.0f秒間は即時失敗します", self.breaker.recovery_timeout)
+        else:
+            self.breaker.record_success()
+
+        try:
+            response.raise_for_status()
+            return response
         except requests.exceptions.HTTPError as e:
-            print(f"❌ HTTPエラー: {method} {url} - {e}")
-            if e.response.status_code == 404:
-                print("   リソースが見つかりません")
-            elif e.response.status_code == 422:
-                print("   リクエストデータが無効です")
+            if e.response.status_code == 429:
+                # レート制限はバックプレッシャー信号として呼び出し側で処理する
+                raise
+            # 4xx は呼び出し側が例外として扱う想定なので debug、5xx は warning
+            status = e.response.status_code
+            level = logging.WARNING if status >= 500 else logging.DEBUG
+            if status == 404:
+                note = "リソースが見つかりません"
+            elif status == 422:
                 try:
-                    error_detail = e.response.json()
-                    print(f"   詳細: {error_detail}")
-                except:
-                    pass
-            elif e.response.status_code == 500:
-                print("   サーバー内部エラーです")
-            raise
-        except requests.exceptions.RequestException as e:
-            print(f"❌ リクエストエラー: {method} {url} - {e}")
+                    note = f"リクエストデータが無効です: {e.response.json()}"
+                except ValueError:
+                    note = "リクエストデータが無効です"
+            elif status == 500:
+                note = "サーバー内部エラーです"
+            else:
+                note = ""
+            logger.log(level, "❌ HTTPエラー: %s %s - %s%s", method, url, e, f"（{note}）" if note else "")
             raise
 
+    def _make_request(self, method: str, endpoint: str, **kwargs) -> dict:
+        """共通のHTTPリクエスト処理"""
+        response = self._send_request(method, endpoint, **kwargs)
+
+        # JSON レスポンスの場合
+        if response.headers.get('content-type', '').startswith('application/json'):
+            return response.json()
+        else:
+            return {"text": response.text, "status_code": response.status_code}
+
+    def _fetch_dataframe(self, endpoint: str, params: Dict[str, Any], schema_name: str) -> pd.DataFrame:
+        """一覧エンドポイントを型付きDataFrameとして取得
+
+        サーバーが Arrow 形式に対応していれば列指向で受信し、
+        未対応（JSONが返る）場合はストリーミングでJSON配列をパースする。
+        """
+        request_params = dict(params)
+        headers = {}
+        if pa is not None and self._columnar_supported is not False:
+            request_params["format"] = "arrow"
+            headers["Accept"] = f"{ARROW_MEDIA_TYPE}, application/json;q=0.9"
+
+        response = self._send_request("GET", endpoint, params=request_params, headers=headers, stream=True)
+        try:
+            content_type = response.headers.get('content-type', '')
+            if content_type.startswith(ARROW_MEDIA_TYPE):
+                self._columnar_supported = True
+                df = frame_from_arrow(response.content)
+            else:
+                if "format" in request_params:
+                    # 旧サーバーは format パラメータを無視してJSONを返す
+                    self._columnar_supported = False
+                rows = iter_json_array(response.iter_content(chunk_size=self.stream_chunk_size))
+                df = pd.DataFrame(rows_to_columns(rows))
+        finally:
+            response.close()
+
+        return apply_frame_dtypes(df, schema_name)
+
     # =====================================
     # 顧客関連メソッド
     # =====================================
 
-    def get_customers(self, city: Optional[str] = None, limit: int = 100) -> List[Dict]:
+    def get_customers(self, city: Optional[str] = None, limit: int = 100,
+                      since_id: Optional[int] = None) -> List[Dict]:
         """顧客一覧を取得
         Args:
             city: 都市名でフィルタ（オプション）
             limit: 取得件数上限（デフォルト: 100）
+            since_id: 指定IDより後の顧客のみ取得（オプション）
         Returns:
             顧客データのリスト
         """
         params = {"limit": limit}
         if city:
             params["city"] = city
+        if since_id is not None:
+            params["since_id"] = since_id
 
         return self._make_request("GET", "/api/customers", params=params)
 
@@ -170,12 +791,14 @@ class MCPAPIClient:
 
     def get_orders(self, customer_id: Optional[int] = None,
                    product_name: Optional[str] = None,
-                   limit: int = 100) -> List[Dict]:
+                   limit: int = 100,
+                   since_id: Optional[int] = None) -> List[Dict]:
         """注文一覧を取得
         Args:
             customer_id: 顧客IDでフィルタ（オプション）
             product_name: 商品名でフィルタ（オプション）
             limit: 取得件数上限（デフォルト: 100）
+            since_id: 指定IDより後の注文のみ ID 昇順で取得（オプション）
         Returns:
             注文データのリスト（顧客情報含む）
         """
@@ -184,6 +807,8 @@ class MCPAPIClient:
             params["customer_id"] = customer_id
         if product_name:
             params["product_name"] = product_name
+        if since_id is not None:
+            params["since_id"] = since_id
 
         return self._make_request("GET", "/api/orders", params=params)
 
@@ -211,6 +836,154 @@ class MCPAPIClient:
 
         return self._make_request("POST", "/api/orders", json=data)
 
+    # =====================================
+    # 一括作成メソッド
+    # =====================================
+
+    def create_customers_bulk(self, customers: Iterable[Dict[str, Any]], chunk_size: int = 500,
+                              max_concurrency: int = 4, max_retries: int = 5,
+                              progress_callback: Optional[Callable[[BulkResult], None]] = None) -> BulkResult:
+        """顧客を一括作成
+        Args:
+            customers: {"name", "email", "city"} の辞書を返すイテラブル（ジェネレータ可）
+            chunk_size: 1リクエストあたりの件数
+            max_concurrency: 同時送信チャンク数の上限
+            max_retries: 429 応答時の再試行回数
+            progress_callback: チャンク完了ごとに途中結果を受け取る関数
+        Returns:
+            行単位の失敗を含む一括作成結果
+        """
+        return self._bulk_create("/api/customers/bulk", customers, chunk_size,
+                                 max_concurrency, max_retries, progress_callback)
+
+    def create_orders_bulk(self, orders: Iterable[Dict[str, Any]], chunk_size: int = 1000,
+                           max_concurrency: int = 4, max_retries: int = 5,
+                           progress_callback: Optional[Callable[[BulkResult], None]] = None) -> BulkResult:
+        """注文を一括作成
+        Args:
+            orders: {"customer_id", "product_name", "quantity", "price", "order_date"?} の辞書を返すイテラブル
+            chunk_size: 1リクエストあたりの件数
+            max_concurrency: 同時送信チャンク数の上限
+            max_retries: 429 応答時の再試行回数
+            progress_callback: チャンク完了ごとに途中結果を受け取る関数
+        Returns:
+            行単位の失敗を含む一括作成結果
+        """
+        return self._bulk_create("/api/orders/bulk", orders, chunk_size,
+                                 max_concurrency, max_retries, progress_callback)
+
+    @staticmethod
+    def _iter_chunks(rows: Iterable[Dict[str, Any]], chunk_size: int) -> Iterator[tuple]:
+        """(先頭位置, チャンク) を順に返す（入力全体をメモリに載せない）"""
+        chunk = []
+        offset = 0
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                yield offset, chunk
+                offset += len(chunk)
+                chunk = []
+        if chunk:
+            yield offset, chunk
+
+    def _post_bulk_chunk(self, endpoint: str, chunk: List[Dict[str, Any]], max_retries: int,
+                         backpressure: _Backpressure) -> tuple:
+        """1チャンクを送信し (レスポンス, 429回数) を返す"""
+        throttled = 0
+        for attempt in range(max_retries + 1):
+            backpressure.wait()
+            try:
+                return self._make_request("POST", endpoint, json={"items": chunk}), throttled
+            except requests.exceptions.HTTPError as e:
+                if e.response is None or e.response.status_code != 429 or attempt == max_retries:
+                    raise
+                throttled += 1
+                try:
+                    delay = float(e.response.headers.get("Retry-After", ""))
+                except ValueError:
+                    delay = min(0.25 * 2 ** attempt, 8.0)
+                # 同時に再開しないようにジッターを加える
+                backpressure.throttle(delay * (0.5 + random.random() / 2))
+
+    def _bulk_create(self, endpoint: str, rows: Iterable[Dict[str, Any]], chunk_size: int,
+                     max_concurrency: int, max_retries: int,
+                     progress_callback: Optional[Callable[[BulkResult], None]]) -> BulkResult:
+        """チャンク分割・並行送信・バックプレッシャー付きの一括作成
+
+        429 を受けたら同時送信数を半減し、連続成功で1ずつ戻す（AIMD）。
+        ブレーカーが open になった場合は残りの送信を中止する。
+        """
+        result = BulkResult()
+        backpressure = _Backpressure()
+        limit = max_concurrency
+        streak = 0
+        in_flight = {}
+        chunks = self._iter_chunks(rows, chunk_size)
+        exhausted = False
+        start_time = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="mcp-bulk") as executor:
+            while True:
+                while not exhausted and not result.aborted and len(in_flight) < limit:
+                    try:
+                        offset, chunk = next(chunks)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    future = executor.submit(self._post_bulk_chunk, endpoint, chunk, max_retries, backpressure)
+                    in_flight[future] = (offset, chunk)
+
+                if not in_flight:
+                    break
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    offset, chunk = in_flight.pop(future)
+                    result.total += len(chunk)
+                    result.chunks += 1
+                    try:
+                        response, throttled = future.result()
+                    except CircuitOpenError as e:
+                        result.aborted = True
+                        self._fail_chunk(result, offset, chunk, str(e))
+                        continue
+                    except requests.exceptions.RequestException as e:
+                        self._fail_chunk(result, offset, chunk, str(e))
+                        continue
+
+                    for item in response.get("created", []):
+                        result.created_ids.append(item["id"])
+                    for item in response.get("failed", []):
+                        result.failures.append({
+                            "index": offset + item["index"],
+                            "error": item.get("error"),
+                            "row"  : chunk[item["index"]],
+                        })
+
+                    result.throttled += throttled
+                    if throttled:
+                        limit = max(1, limit // 2)
+                        streak = 0
+                    else:
+                        streak += 1
+                        if streak >= limit and limit < max_concurrency:
+                            limit += 1
+                            streak = 0
+
+                    if progress_callback:
+                        result.duration = time.perf_counter() - start_time
+                        progress_callback(result)
+
+        result.duration = time.perf_counter() - start_time
+        result.failures.sort(key=lambda failure: failure["index"])
+        return result
+
+    @staticmethod
+    def _fail_chunk(result: BulkResult, offset: int, chunk: List[Dict[str, Any]], error: str) -> None:
+        """チャンク全体を失敗として記録"""
+        for index, row in enumerate(chunk):
+            result.failures.append({"index": offset + index, "error": error, "row": row})
+
     # =====================================
     # 統計・分析メソッド
     # =====================================
@@ -223,6 +996,44 @@ class MCPAPIClient:
         """
         return self._make_request("GET", "/api/stats/sales")
 
+    def get_daily_sales_stats(self, days: Optional[int] = None, top_products: int = 5) -> Dict:
+        """日別売上を列指向の配列で取得
+
+        Args:
+            days: 最新の注文日から遡る日数（オプション、未指定で全期間）
+            top_products: 商品別の日別売上を返す上位商品数
+
+        Returns:
+            dates / total_sales / order_count / total_quantity の配列と商品別系列
+        """
+        params = {"top_products": top_products}
+        if days:
+            params["days"] = days
+        return self._make_request("GET", "/api/stats/sales/daily", params=params)
+
+    def get_correlation_stats(self) -> Dict:
+        """顧客単位特徴量の相関行列（全件をサーバー側で集計）を取得
+
+        Returns:
+            features / matrix / summary / order_level / segments / by_city / by_product
+        """
+        return self._make_request("GET", "/api/stats/correlation")
+
+    def get_customer_features(self, sample: str = "reservoir", sample_size: int = 2000,
+                              seed: int = 0) -> Dict:
+        """顧客単位の特徴量ベクトルを取得
+
+        Args:
+            sample: "none" / "reservoir"（一様抽出）/ "stratified"（都市別の層化抽出）
+            sample_size: 取得件数の目安
+            seed: 抽出の乱数シード（同じ値なら同じ標本）
+
+        Returns:
+            mode / population / sampled / strata / rows（各行に weight 付き）
+        """
+        return self._make_request("GET", "/api/stats/customer-features",
+                                  params={"sample": sample, "sample_size": sample_size, "seed": seed})
+
     def get_customer_order_stats(self, customer_id: int) -> Dict:
         """特定顧客の注文統計を取得
 
@@ -234,6 +1045,97 @@ class MCPAPIClient:
         """
         return self._make_request("GET", f"/api/stats/customers/{customer_id}/orders")
 
+    # =====================================
+    # DataFrame取得メソッド
+    # =====================================
+
+    def get_customers_df(self, city: Optional[str] = None, limit: int = 100) -> pd.DataFrame:
+        """顧客一覧を型付きDataFrameで取得
+        Args:
+            city: 都市名でフィルタ（オプション）
+            limit: 取得件数上限（デフォルト: 100）
+        Returns:
+            顧客データのDataFrame（city: category, created_at: datetime64）
+        """
+        params = {"limit": limit}
+        if city:
+            params["city"] = city
+
+        return self._fetch_dataframe("/api/customers", params, "customers")
+
+    def get_products_df(self, category: Optional[str] = None,
+                        min_price: Optional[float] = None,
+                        max_price: Optional[float] = None,
+                        limit: int = 100) -> pd.DataFrame:
+        """商品一覧を型付きDataFrameで取得
+        Args:
+            category: カテゴリでフィルタ（オプション）
+            min_price: 最低価格（オプション）
+            max_price: 最高価格（オプション）
+            limit: 取得件数上限（デフォルト: 100）
+        Returns:
+            商品データのDataFrame（name/category: category, price: float）
+        """
+        params = {"limit": limit}
+        if category:
+            params["category"] = category
+        if min_price is not None:
+            params["min_price"] = min_price
+        if max_price is not None:
+            params["max_price"] = max_price
+
+        return self._fetch_dataframe("/api/products", params, "products")
+
+    def get_orders_df(self, customer_id: Optional[int] = None,
+                      product_name: Optional[str] = None,
+                      limit: int = 100) -> pd.DataFrame:
+        """注文一覧を型付きDataFrameで取得
+        Args:
+            customer_id: 顧客IDでフィルタ（オプション）
+            product_name: 商品名でフィルタ（オプション）
+            limit: 取得件数上限（デフォルト: 100）
+        Returns:
+            注文データのDataFrame（order_date: datetime64, total_amount 計算済み）
+        """
+        params = {"limit": limit}
+        if customer_id:
+            params["customer_id"] = customer_id
+        if product_name:
+            params["product_name"] = product_name
+
+        return self._fetch_dataframe("/api/orders", params, "orders")
+
+    # =====================================
+    # 差分取得メソッド
+    # =====================================
+
+    def get_new_customers(self, since_id: int = 0, page_size: int = 1000, max_pages: int = 50) -> List[Dict]:
+        """since_id より後に登録された顧客を取得（ID 昇順、1回の呼び出しは max_pages ページまで）"""
+        return self._fetch_since("/api/customers", since_id, page_size, max_pages)
+
+    def get_new_orders(self, since_id: int = 0, page_size: int = 1000, max_pages: int = 50) -> List[Dict]:
+        """since_id より後に作成された注文を取得（ID 昇順、1回の呼び出しは max_pages ページまで）"""
+        return self._fetch_since("/api/orders", since_id, page_size, max_pages)
+
+    def _fetch_since(self, endpoint: str, since_id: int, page_size: int, max_pages: int = 50) -> List[Dict]:
+        """since_id を進めながらページ単位で取得し、満たないページが返ったら終了
+
+        max_pages に達したらそこまでの行を返す（残りは次回、最後の ID から取得できる）。
+        ページ末尾の ID が since_id より進まない場合は、since_id を無視するサーバーとみなして
+        ValueError を送出する（同じページを取り続けないため）。
+        """
+        rows: List[Dict] = []
+        for _ in range(max_pages):
+            page = self._make_request("GET", endpoint, params={"since_id": since_id, "limit": page_size}) or []
+            rows.extend(page)
+            if len(page) < page_size:
+                break
+            if page[-1]["id"] <= since_id:
+                raise ValueError(f"{endpoint} が since_id={since_id} より後の行を返しません"
+                                 "（since_id に対応していないAPIサーバーの可能性があります）")
+            since_id = page[-1]["id"]
+        return rows
+
     # =====================================
     # ユーティリティメソッド
     # =====================================
@@ -243,12 +1145,8 @@ class MCPAPIClient:
         return self._make_request("GET", "/")
 
     def ping(self) -> bool:
-        """サーバーの生存確認"""
-        try:
-            self.check_health()
-            return True
-        except:
-            return False
+        """サーバーの生存確認（ブレーカー open 中は即座に False）"""
+        return self.check_health(verbose=False)
 
 
 # =====================================
@@ -514,6 +1412,59 @@ def demo_create_data():
         return None, None
 
 
+def demo_bulk_create(count: int = 2000):
+    """一括作成のデモ（チャンク分割・並行送信）"""
+    print("\n" + "=" * 60)
+    print("📦 一括作成デモ")
+    print("=" * 60)
+
+    try:
+        client = MCPAPIClient()
+        timestamp = int(time.time())
+
+        # ジェネレータで渡すので全件をメモリに展開しない
+        customers = (
+            {
+                "name" : f"一括太郎{i}",
+                "email": f"bulk.{timestamp}.{i}@example.com",
+                "city" : ["東京", "大阪", "名古屋", "福岡", "札幌"][i % 5],
+            }
+            for i in range(count)
+        )
+
+        def show_progress(result: BulkResult):
+            print(f"   ... {result.total:,}件送信 / 作成 {result.created:,}件 / 失敗 {result.failed:,}件")
+
+        print(f"\n👤 顧客を{count:,}件作成")
+        result = client.create_customers_bulk(customers, chunk_size=500, progress_callback=show_progress)
+
+        print(f"   ✅ 作成: {result.created:,}件 / 失敗: {result.failed:,}件")
+        print(f"   ⏱️  {result.duration:.2f}秒 ({result.rows_per_second:,.0f}件/秒, {result.chunks}チャンク)")
+        if result.throttled:
+            print(f"   ⚠️ レート制限による再試行: {result.throttled}回")
+        if result.aborted:
+            print("   ⛔ サーキットブレーカーにより中断しました")
+        for failure in result.failures[:5]:
+            print(f"   ❌ #{failure['index']}: {failure['error']}")
+
+        if result.created_ids:
+            print(f"\n📦 作成した顧客に注文を{len(result.created_ids):,}件作成")
+            orders = (
+                {"customer_id": customer_id, "product_name": "ワイヤレスマウス", "quantity": 1, "price": 2980}
+                for customer_id in result.created_ids
+            )
+            order_result = client.create_orders_bulk(orders)
+            print(f"   ✅ 作成: {order_result.created:,}件 / 失敗: {order_result.failed:,}件")
+            print(f"   ⏱️  {order_result.duration:.2f}秒 ({order_result.rows_per_second:,.0f}件/秒)")
+
+        return result
+
+    except Exception as e:
+        print(f"❌ 一括作成デモでエラーが発生: {e}")
+        traceback.print_exc()
+        return None
+
+
 def demo_pandas_integration():
     """Pandas連携のデモ"""
     print("\n" + "=" * 60)
@@ -525,14 +1476,12 @@ def demo_pandas_integration():
 
         # 顧客データをDataFrameに変換
         print("\n📊 顧客データをPandas DataFrameで分析")
-        customers = client.get_customers()
+        df_customers = client.get_customers_df()
 
-        if not customers:
+        if df_customers.empty:
             print("⚠️ 顧客データがありません")
             return
 
-        df_customers = pd.DataFrame(customers)
-
         print("   顧客データの概要:")
         print(f"   📏 データ形状: {df_customers.shape}")
         print(f"   📋 カラム: {list(df_customers.columns)}")
@@ -546,14 +1495,12 @@ def demo_pandas_integration():
 
         # 注文データの分析
         print(f"\n📦 注文データをPandas DataFrameで分析")
-        orders = client.get_orders()
+        df_orders = client.get_orders_df()
 
-        if not orders:
+        if df_orders.empty:
             print("⚠️ 注文データがありません")
             return
 
-        df_orders = pd.DataFrame(orders)
-
         print("   注文データの概要:")
         print(f"   📏 データ形状: {df_orders.shape}")
         print(f"   📋 カラム: {list(df_orders.columns)}")
@@ -561,7 +1508,6 @@ def demo_pandas_integration():
         # 日別売上分析
         if 'order_date' in df_orders.columns:
             print(f"\n📅 日別売上分析:")
-            df_orders['order_date'] = pd.to_datetime(df_orders['order_date'])
             daily_sales = df_orders.groupby('order_date')['total_amount'].sum().sort_index()
 
             print(f"   📊 日別売上 (最新5日):")
@@ -576,7 +1522,7 @@ def demo_pandas_integration():
         # 商品別売上分析
         if 'product_name' in df_orders.columns and 'total_amount' in df_orders.columns:
             print(f"\n🛍️ 商品別売上分析:")
-            product_sales = df_orders.groupby('product_name').agg({
+            product_sales = df_orders.groupby('product_name', observed=True).agg({
                 'total_amount': 'sum',
                 'quantity'    : 'sum',
                 'id'          : 'count'
@@ -592,7 +1538,7 @@ def demo_pandas_integration():
         # 顧客別分析
         if 'customer_name' in df_orders.columns:
             print(f"\n👥 顧客別購入分析:")
-            customer_stats = df_orders.groupby('customer_name').agg({
+            customer_stats = df_orders.groupby('customer_name', observed=True).agg({
                 'total_amount': ['sum', 'mean', 'count']
             }).round(0)
 
@@ -694,70 +1640,109 @@ def demo_error_handling():
 
 
 def demo_performance_test():
-    """パフォーマンステストのデモ"""
+    """パフォーマンステストのデモ（mcp_benchmark の短縮版）
+
+    本格的な計測・CI比較は python mcp_benchmark.py を使用する。
+    """
+    from mcp_benchmark import run_benchmark, print_rows
+
     print("\n" + "=" * 60)
     print("⚡ パフォーマンステストデモ")
     print("=" * 60)
 
     try:
-        client = MCPAPIClient()
+        print("\n⏱️ 並列度 1 / 8 で各3秒計測（ウォームアップ1秒）")
+        report = run_benchmark(concurrency_levels=[1, 8], duration=3.0, warmup=1.0, on_level=print_rows)
 
-        # レスポンス時間計測
-        print("\n⏱️ レスポンス時間計測")
+        overall = [row for row in report["results"] if row["endpoint"] == "ALL"]
+        if len(overall) == 2 and overall[0]["rps"] > 0:
+            print(f"\n📈 スループット: {overall[0]['rps']:.1f} → {overall[1]['rps']:.1f} req/s "
+                  f"(x{overall[1]['rps'] / overall[0]['rps']:.1f})")
+        print("💡 詳細な計測: python mcp_benchmark.py --concurrency 1,8,64,256 --output result.json")
+        return report
 
-        endpoints = [
-            ("顧客一覧", lambda: client.get_customers(limit=10)),
-            ("商品一覧", lambda: client.get_products(limit=10)),
-            ("注文一覧", lambda: client.get_orders(limit=10)),
-            ("売上統計", lambda: client.get_sales_stats()),
-        ]
-
-        for name, func in endpoints:
-            start_time = time.time()
-            try:
-                result = func()
-                end_time = time.time()
-                duration = end_time - start_time
-
-                if isinstance(result, list):
-                    count = len(result)
-                    print(f"   📊 {name}: {duration:.3f}秒 ({count}件取得)")
-                else:
-                    print(f"   📊 {name}: {duration:.3f}秒")
-
-            except Exception as e:
-                end_time = time.time()
-                duration = end_time - start_time
-                print(f"   ❌ {name}: {duration:.3f}秒 (エラー: {e})")
+    except Exception as e:
+        print(f"❌ パフォーマンステストでエラーが発生: {e}")
+        traceback.print_exc()
 
-        # 連続リクエストテスト
-        print(f"\n🔄 連続リクエストテスト (顧客一覧を5回取得)")
 
-        times = []
-        for i in range(5):
-            start_time = time.time()
-            try:
-                customers = client.get_customers(limit=5)
-                end_time = time.time()
-                duration = end_time - start_time
-                times.append(duration)
-                print(f"   {i + 1}回目: {duration:.3f}秒 ({len(customers)}件)")
-            except Exception as e:
-                print(f"   {i + 1}回目: エラー - {e}")
+def benchmark_dataframe_fetch(rows: int = 100_000, chunk_size: int = 64 * 1024):
+    """DataFrame取得のパース時間・メモリ比較（サーバー不要のオフライン計測）
 
-        if times:
-            avg_time = sum(times) / len(times)
-            min_time = min(times)
-            max_time = max(times)
+    同一の注文データを JSON / Arrow にエンコードし、
+    素朴な pd.DataFrame(json.loads(...)) と型付きフェッチャーの処理経路を比較する。
+    """
+    import random
+    import tracemalloc
 
-            print(f"\n📈 連続リクエスト統計:")
-            print(f"   平均時間: {avg_time:.3f}秒")
-            print(f"   最短時間: {min_time:.3f}秒")
-            print(f"   最長時間: {max_time:.3f}秒")
+    print("\n" + "=" * 60)
+    print(f"🧪 DataFrame取得ベンチマーク ({rows:,}行)")
+    print("=" * 60)
 
-    except Exception as e:
-        print(f"❌ パフォーマンステストでエラーが発生: {e}")
-        traceback.print_exc()
+    products = ["ノートパソコン", "スマートフォン", "ワイヤレスイヤホン", "コーヒーメーカー", "ビジネスバッグ"]
+    customers = [f"顧客{i}" for i in range(500)]
+    rng = random.Random(42)
+    records = []
+    for i in range(rows):
+        quantity = rng.randint(1, 5)
+        price = float(rng.choice([89800, 79800, 12800, 15600, 8900]))
+        records.append({
+            "id"           : i + 1,
+            "customer_id"  : rng.randint(1, 500),
+            "product_name" : rng.choice(products),
+            "quantity"     : quantity,
+            "price"        : price,
+            "order_date"   : f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "total_amount" : price * quantity,
+            "customer_name": rng.choice(customers),
+        })
+
+    json_payload = json.dumps(records, ensure_ascii=False).encode("utf-8")
+    arrow_payload = None
+    if pa is not None:
+        sink = pa.BufferOutputStream()
+        table = pa.Table.from_pylist(records)
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        arrow_payload = sink.getvalue().to_pybytes()
+    del records
+
+    def chunks(payload: bytes):
+        for offset in range(0, len(payload), chunk_size):
+            yield payload[offset:offset + chunk_size]
+
+    def naive():
+        df = pd.DataFrame(json.loads(json_payload))
+        df["order_date"] = pd.to_datetime(df["order_date"])
+        return df
+
+    def streaming():
+        return apply_frame_dtypes(pd.DataFrame(rows_to_columns(iter_json_array(chunks(json_payload)))), "orders")
+
+    def columnar():
+        return apply_frame_dtypes(frame_from_arrow(arrow_payload), "orders")
+
+    cases = [("JSON (素朴な変換)", naive), ("JSON (ストリーミング+型付け)", streaming)]
+    if arrow_payload is not None:
+        cases.append(("Arrow (列指向+型付け)", columnar))
+    else:
+        print("   ⚠️ pyarrow 未インストールのため Arrow 計測はスキップ")
+
+    print(f"   📦 転送サイズ: JSON {len(json_payload) / 1e6:.1f}MB"
+          + (f" / Arrow {len(arrow_payload) / 1e6:.1f}MB" if arrow_payload else ""))
+
+    for name, func in cases:
+        # tracemalloc は計測対象を大きく遅くするため、時間とメモリは別々に計測
+        start_time = time.perf_counter()
+        df = func()
+        duration = time.perf_counter() - start_time
+
+        tracemalloc.start()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        frame_mb = df.memory_usage(deep=True).sum() / 1e6
+        print(f"   📊 {name}: パース {duration:.3f}秒 / ピーク {peak / 1e6:.1f}MB / DataFrame {frame_mb:.1f}MB")
 
 
 def interactive_demo():
@@ -893,7 +1878,7 @@ def main():
         # APIサーバーの接続確認
         print("🔍 APIサーバーの接続確認中...")
         client = MCPAPIClient()
-        if not client.ping():
+        if not client.check_health():
             print("❌ APIサーバーに接続できません")
             print("\n💡 解決方法:")
             print("1. APIサーバーを起動: python mcp_api_server.py")
@@ -912,10 +1897,12 @@ def main():
         print("7. パフォーマンステストデモ")
         print("8. インタラクティブデモ")
         print("9. 全てのデモを順番に実行")
+        print("10. DataFrame取得ベンチマーク（10万行）")
+        print("11. 一括作成デモ")
         print("0. 簡単なテストのみ実行")
 
         try:
-            choice = input("\n選択してください (0-9): ").strip()
+            choice = input("\n選択してください (0-11): ").strip()
         except KeyboardInterrupt:
             print("\n👋 デモを終了します")
             return
@@ -945,6 +1932,10 @@ def main():
             demo_pandas_integration()
             demo_error_handling()
             demo_performance_test()
+        elif choice == "10":
+            benchmark_dataframe_fetch()
+        elif choice == "11":
+            demo_bulk_create()
         elif choice == "0":
             print("🧪 簡単なテストを実行...")
             client = MCPAPIClient()
@@ -990,4 +1981,5 @@ def main():
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     main()
@@ -0,0 +1,326 @@
+# python mcp_benchmark.py --duration 10 --concurrency 1,8,64,256 --output result.json
+# MCP API サーバーの再現可能なベンチマーク（CI比較用）
+#
+# 使い方:
+#   python mcp_benchmark.py                                   # 既定: 各並列度10秒（ウォームアップ2秒）
+#   python mcp_benchmark.py --requests 2000 --concurrency 1,8 # 並列度ごとに固定リクエスト数
+#   python mcp_benchmark.py --output baseline.json            # ベースラインを保存
+#   python mcp_benchmark.py --compare baseline.json --threshold 15 --csv result.csv
+#   python mcp_benchmark.py --history                         # 測定履歴ストア（perf_history.db）にも保存
+#
+# 終了コード: 0=正常 / 1=リグレッション検出 / 2=サーバー接続不可
+
+import argparse
+import csv
+import itertools
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Callable
+
+from helper_perf import LatencyRecorder, EndpointStats, compare_benchmark_rows
+from mcp_api_client import MCPAPIClient
+
+
+# =====================================
+# ベンチマーク対象
+# =====================================
+
+# 名前 -> (パス, クエリパラメータ)
+BENCHMARK_ENDPOINTS: Dict[str, tuple] = {
+    "customers"  : ("/api/customers", {"limit": 10}),
+    "products"   : ("/api/products", {"limit": 10}),
+    "orders"     : ("/api/orders", {"limit": 10}),
+    "sales_stats": ("/api/stats/sales", {}),
+}
+
+DEFAULT_CONCURRENCY = [1, 8, 64, 256]
+
+# CSV/表示に出す列
+RESULT_FIELDS = [
+    "concurrency", "endpoint", "count", "errors", "error_rate", "rps",
+    "mean_ms", "p50_ms", "p90_ms", "p95_ms", "p99_ms", "max_ms",
+]
+
+
+# =====================================
+# 計測
+# =====================================
+
+def _result_row(concurrency: int, endpoint: str, stats: EndpointStats, elapsed: float) -> Dict[str, Any]:
+    """集計1件を結果行に変換
+
+    count / error_rate は全リクエスト、rps とレイテンシは成功レスポンスのみから求める。
+    """
+    histogram = stats.total
+    count = stats.requests
+    return {
+        "concurrency": concurrency,
+        "endpoint"   : endpoint,
+        "count"      : count,
+        "errors"     : stats.errors,
+        "error_rate" : stats.errors / count if count else 0.0,
+        "rps"        : histogram.count / elapsed if elapsed > 0 else 0.0,
+        "mean_ms"    : histogram.mean,
+        "p50_ms"     : histogram.percentile(50),
+        "p90_ms"     : histogram.percentile(90),
+        "p95_ms"     : histogram.percentile(95),
+        "p99_ms"     : histogram.percentile(99),
+        "max_ms"     : histogram.max,
+        "histogram"  : histogram.to_dict(),
+    }
+
+
+def run_level(base_url: str, endpoints: List[str], concurrency: int,
+              duration: Optional[float] = 10.0, requests_count: Optional[int] = None,
+              warmup: float = 2.0) -> List[Dict[str, Any]]:
+    """1つの並列度でベンチマークを実行し、エンドポイント別＋全体の結果行を返す
+
+    ワーカーごとに専用の MCPAPIClient（＝専用のコネクション）を持ち、
+    ウォームアップ後に計測用レコーダーへ切り替える。
+    requests_count 指定時はリクエスト数、未指定時は duration 秒で終了する。
+    ブレーカーを経由しない計測経路（_timed_request）を使うため、エラー時も計測は継続する。
+    """
+    targets = [BENCHMARK_ENDPOINTS[name] for name in endpoints]
+    recorder = LatencyRecorder()
+    warmup_recorder = LatencyRecorder()
+    counter = itertools.count()
+    measure_start = threading.Event()
+    ready = threading.Barrier(concurrency + 1)
+    warmup_end = 0.0
+    measure_end = 0.0
+
+    def worker(worker_index: int):
+        client = MCPAPIClient(base_url)
+        client.latency = warmup_recorder
+        ready.wait()
+        sequence = itertools.count(worker_index)
+
+        # ウォームアップ（コネクション確立・サーバー側キャッシュの温め）
+        while time.perf_counter() < warmup_end:
+            _issue(client, targets[next(sequence) % len(targets)])
+
+        measure_start.wait()
+        client.latency = recorder
+        try:
+            while True:
+                if requests_count is not None:
+                    if next(counter) >= requests_count:
+                        break
+                elif time.perf_counter() >= measure_end:
+                    break
+                _issue(client, targets[next(sequence) % len(targets)])
+        finally:
+            client.session.close()
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="mcp-bench") as executor:
+        futures = [executor.submit(worker, i) for i in range(concurrency)]
+        warmup_end = time.perf_counter() + warmup
+        ready.wait()
+        time.sleep(max(0.0, warmup_end - time.perf_counter()))
+        start = time.perf_counter()
+        measure_end = start + (duration or 0.0)
+        measure_start.set()
+        for future in futures:
+            future.result()
+        elapsed = time.perf_counter() - start
+
+    snapshot = recorder.snapshot()
+    rows = [_result_row(concurrency, endpoint, stats, elapsed) for endpoint, stats in sorted(snapshot.items())]
+    overall = EndpointStats()
+    for stats in snapshot.values():
+        overall.merge(stats)
+    rows.append(_result_row(concurrency, "ALL", overall, elapsed))
+    return rows
+
+
+def _issue(client: MCPAPIClient, target: tuple) -> None:
+    """1リクエスト送信（結果はクライアントのレコーダーに記録される）"""
+    path, params = target
+    try:
+        client._timed_request("GET", path, params=params, timeout=client.timeout)
+    except Exception:
+        # 接続エラー等もレコーダーにはエラーとして記録済み
+        pass
+
+
+def run_benchmark(base_url: str = "http://localhost:8000", endpoints: Optional[List[str]] = None,
+                  concurrency_levels: Optional[List[int]] = None, duration: Optional[float] = 10.0,
+                  requests_count: Optional[int] = None, warmup: float = 2.0,
+                  on_level: Optional[Callable[[List[Dict[str, Any]]], None]] = None) -> Dict[str, Any]:
+    """並列度を変えながらベンチマークを実行
+
+    Returns:
+        {"meta": 実行条件・環境, "results": 結果行のリスト}
+    """
+    endpoints = endpoints or list(BENCHMARK_ENDPOINTS)
+    concurrency_levels = concurrency_levels or DEFAULT_CONCURRENCY
+    started_at = datetime.now().isoformat(timespec="seconds")
+
+    results = []
+    for concurrency in concurrency_levels:
+        rows = run_level(base_url, endpoints, concurrency, duration, requests_count, warmup)
+        results.extend(rows)
+        if on_level:
+            on_level(rows)
+
+    return {
+        "meta": {
+            "base_url"   : base_url,
+            "started_at" : started_at,
+            "endpoints"  : endpoints,
+            "concurrency": concurrency_levels,
+            "duration"   : None if requests_count is not None else duration,
+            "requests"   : requests_count,
+            "warmup"     : warmup,
+            "python"     : platform.python_version(),
+            "platform"   : platform.platform(),
+            "cpu_count"  : os.cpu_count(),
+        },
+        "results": results,
+    }
+
+
+# =====================================
+# 出力
+# =====================================
+
+def print_rows(rows: List[Dict[str, Any]]) -> None:
+    """結果行を表形式で表示"""
+    for row in rows:
+        marker = "📊" if row["endpoint"] == "ALL" else "  "
+        print(f"{marker} c={row['concurrency']:<4} {row['endpoint']:<22} "
+              f"n={row['count']:<7} err={row['errors']:<5} {row['rps']:>9.1f} req/s  "
+              f"p50={row['p50_ms']:>8.2f}  p90={row['p90_ms']:>8.2f}  "
+              f"p99={row['p99_ms']:>8.2f}  max={row['max_ms']:>8.2f} ms")
+
+
+def write_json(report: Dict[str, Any], path: str) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+def write_csv(report: Dict[str, Any], path: str) -> None:
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(report["results"])
+
+
+def save_history(report: Dict[str, Any], path: Optional[str] = None) -> str:
+    """結果行を測定履歴ストアに保存（系列は「エンドポイント (c=並列度)」単位）"""
+    from helper_perf_store import PerformanceHistoryStore
+
+    store = PerformanceHistoryStore(path)
+    meta = report["meta"]
+    for row in report["results"]:
+        metrics = dict(row, throughput=row["rps"], success_rate=(1 - row["error_rate"]) * 100)
+        store.record_run(
+            "benchmark", f"{row['endpoint']} (c={row['concurrency']})", metrics, row["histogram"],
+            {"concurrency": row["concurrency"], "duration": meta["duration"],
+             "requests": meta["requests"], "warmup": meta["warmup"]},
+            base_url=meta["base_url"],
+        )
+    return store.path
+
+
+def compare_with_baseline(report: Dict[str, Any], baseline_path: str, threshold_pct: float,
+                          metrics: List[str], min_delta_ms: float) -> bool:
+    """ベースラインと比較して結果を表示（リグレッションがあれば False）"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    comparisons = compare_benchmark_rows(baseline.get("results", []), report["results"],
+                                         threshold_pct, metrics, min_delta_ms)
+    if not comparisons:
+        print("⚠️ ベースラインと共通の計測条件（並列度×エンドポイント）がありません")
+        return True
+
+    print(f"\n🔍 ベースライン比較: {baseline_path} (閾値 {threshold_pct:g}%)")
+    regressions = [c for c in comparisons if c["regression"]]
+    for c in comparisons:
+        if c["regression"] or c["endpoint"] == "ALL":
+            mark = "❌" if c["regression"] else "✅"
+            print(f"   {mark} c={c['concurrency']:<4} {c['endpoint']:<22} {c['metric']:<10} "
+                  f"{c['baseline']:>10.2f} → {c['current']:>10.2f} ({c['change_pct']:+.1f}%)")
+
+    if regressions:
+        print(f"\n❌ リグレッション {len(regressions)}件を検出しました")
+        return False
+    print("\n✅ リグレッションはありません")
+    return True
+
+
+# =====================================
+# CLI
+# =====================================
+
+def _parse_int_list(value: str) -> List[int]:
+    try:
+        levels = [int(v) for v in value.split(",") if v.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"カンマ区切りの整数を指定してください: {value}")
+    if not levels or any(level < 1 for level in levels):
+        raise argparse.ArgumentTypeError(f"並列度は1以上を指定してください: {value}")
+    return levels
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="MCP API サーバーのベンチマーク")
+    parser.add_argument("--url", default=os.getenv("MCP_API_URL", "http://localhost:8000"), help="APIサーバーのURL")
+    parser.add_argument("--endpoints", default=",".join(BENCHMARK_ENDPOINTS),
+                        help=f"対象エンドポイント（{', '.join(BENCHMARK_ENDPOINTS)}）")
+    parser.add_argument("--concurrency", type=_parse_int_list, default=DEFAULT_CONCURRENCY,
+                        help="並列度のリスト（例: 1,8,64,256）")
+    parser.add_argument("--duration", type=float, default=10.0, help="並列度ごとの計測時間（秒）")
+    parser.add_argument("--requests", type=int, default=None, help="並列度ごとのリクエスト数（指定時は --duration より優先）")
+    parser.add_argument("--warmup", type=float, default=2.0, help="並列度ごとのウォームアップ時間（秒）")
+    parser.add_argument("--output", help="結果JSONの出力先")
+    parser.add_argument("--csv", help="結果CSVの出力先")
+    parser.add_argument("--compare", metavar="BASELINE_JSON", help="比較するベースラインJSON")
+    parser.add_argument("--threshold", type=float, default=10.0, help="リグレッションとみなす悪化率（%%）")
+    parser.add_argument("--metrics", default="p50_ms,p90_ms,p99_ms,rps,error_rate", help="比較する指標")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="これ未満の悪化（ms）は無視")
+    parser.add_argument("--history", nargs="?", const="", default=None, metavar="DB_PATH",
+                        help="測定履歴ストアに保存（パス省略時は MCP_PERF_HISTORY_DB または perf_history.db）")
+    args = parser.parse_args(argv)
+
+    endpoints = [e.strip() for e in args.endpoints.split(",") if e.strip()]
+    unknown = [e for e in endpoints if e not in BENCHMARK_ENDPOINTS]
+    if unknown:
+        parser.error(f"不明なエンドポイント: {', '.join(unknown)}")
+
+    if not MCPAPIClient(args.url).check_health():
+        MCPAPIClient.print_connection_help(args.url)
+        return 2
+
+    mode = f"{args.requests}リクエスト" if args.requests is not None else f"{args.duration:g}秒"
+    print(f"🚀 ベンチマーク開始: {args.url} / 並列度 {args.concurrency} / {mode} (ウォームアップ {args.warmup:g}秒)")
+    report = run_benchmark(args.url, endpoints, args.concurrency, args.duration,
+                           args.requests, args.warmup, on_level=print_rows)
+
+    if args.output:
+        write_json(report, args.output)
+        print(f"💾 JSON: {args.output}")
+    if args.csv:
+        write_csv(report, args.csv)
+        print(f"💾 CSV: {args.csv}")
+
+    if args.history is not None:
+        path = save_history(report, args.history or None)
+        print(f"💾 履歴: {path}")
+
+    if args.compare:
+        metrics = [m.strip() for m in args.metrics.split(",") if m.strip()]
+        if not compare_with_baseline(report, args.compare, args.threshold, metrics, args.min_delta_ms):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
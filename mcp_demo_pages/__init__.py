@@ -0,0 +1,38 @@
+# mcp_demo_pages/__init__.py
+# デモアプリのページ群（選択中のページのモジュールだけを読み込む）
+#
+# ここではページ名とモジュールの対応表だけを持ち、plotly などの重いモジュールは
+# 各ページモジュールの読み込み時（＝そのページが初めて選択されたとき）まで読み込まない。
+
+import importlib
+from typing import Dict, Tuple
+
+
+# ページ名 -> (モジュール名, クラス名)
+PAGES: Dict[str, Tuple[str, str]] = {
+    "ホーム"        : ("home", "HomePage"),
+    "基本操作"      : ("basic_operations", "BasicOperationsPage"),
+    "売上分析"      : ("sales_analytics", "SalesAnalyticsPage"),
+    "顧客分析"      : ("customer_analysis", "CustomerAnalysisPage"),
+    "データ作成"    : ("data_creation", "DataCreationPage"),
+    "データ分析"    : ("data_analysis", "DataAnalysisPage"),
+    "エラーテスト"  : ("error_handling", "ErrorHandlingPage"),
+    "パフォーマンス": ("performance", "PerformancePage"),
+    "対話機能"      : ("interactive", "InteractivePage"),
+}
+
+
+def load_page_class(name: str):
+    """ページ名からページクラスを読み込む（2回目以降は sys.modules から返る）"""
+    module_name, class_name = PAGES[name]
+    module = importlib.import_module(f"{__name__}.{module_name}")
+    return getattr(module, class_name)
+
+
+# ==================================================
+# エクスポート
+# ==================================================
+__all__ = [
+    'PAGES',
+    'load_page_class',
+]
@@ -0,0 +1,31 @@
+# mcp_demo_pages/base.py
+# デモページの基底クラス
+
+from typing import Dict, Any, List, Optional
+
+from mcp_api_client import MCPAPIClient
+from mcp_demo_pages.data_layer import invalidate_after_write
+
+
+class DemoPage:
+    """デモページの基底クラス
+
+    各ページは render() を実装する。API クライアントや設定はアプリ本体
+    （MCPDemoApplication）が持つものを参照する。
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    @property
+    def api_base_url(self) -> str:
+        return self.app.api_base_url
+
+    def get_api_client(self) -> Optional[MCPAPIClient]:
+        return self.app.get_api_client()
+
+    def _invalidate_after_write(self, resource: str, rows: List[Dict[str, Any]]):
+        invalidate_after_write(resource, rows)
+
+    def render(self):
+        raise NotImplementedError
@@ -0,0 +1,359 @@
+# mcp_demo_pages/basic_operations.py
+# 基本操作ページ: 基本操作（顧客・商品・注文の一覧と検索）
+
+import streamlit as st
+
+from mcp_api_client import MCPAPIClient
+from mcp_demo_pages.base import DemoPage
+from mcp_demo_pages.data_layer import cached_get
+
+
+class BasicOperationsPage(DemoPage):
+    """基本操作ページ"""
+
+    def render(self):
+        """基本操作ページの描画（デモ機能1）"""
+        st.markdown("## 🔍 基本操作デモ")
+        st.markdown("顧客・商品・注文データの表示と検索機能")
+        
+        client = self.get_api_client()
+        if not client:
+            st.error("API サーバーに接続できません。")
+            return
+        
+        # タブで機能を分割
+        tab1, tab2, tab3 = st.tabs(["👥 顧客データ", "🛍️ 商品データ", "📦 注文データ"])
+        
+        with tab1:
+            self._render_customers_section(client)
+        
+        with tab2:
+            self._render_products_section(client)
+            
+        with tab3:
+            self._render_orders_section(client)
+
+    def _render_customers_section(self, client: MCPAPIClient):
+        """顧客データセクションの描画"""
+        st.markdown("### 👥 顧客データ管理")
+        
+        # フィルタオプション
+        col1, col2, col3 = st.columns([2, 2, 1])
+        
+        with col1:
+            city_filter = st.selectbox(
+                "🏙️ 都市フィルタ", 
+                ["すべて", "東京", "大阪", "名古屋", "福岡", "札幌"],
+                key="customer_city_filter"
+            )
+        
+        with col2:
+            limit = st.number_input("表示件数", min_value=1, max_value=100, value=20, key="customer_limit")
+        
+        with col3:
+            force_refresh = st.button("🔍 検索", key="search_customers")  # 押下時はキャッシュを使わず再取得
+        
+        # データ取得と表示
+        try:
+            with st.spinner("顧客データ読み込み中..."):
+                # APIパラメータ準備
+                params = {"limit": limit}
+                if city_filter != "すべて":
+                    params["city"] = city_filter
+                
+                # データ取得
+                customers_data = cached_get(client, "/api/customers", params,
+                                            max_age=0 if force_refresh else None)
+                
+                # レスポンス形式を統一的に処理
+                if customers_data:
+                    if isinstance(customers_data, list):
+                        # 直接配列が返された場合
+                        customers = customers_data
+                    elif isinstance(customers_data, dict) and "customers" in customers_data:
+                        # オブジェクト内のcustomersキーから取得
+                        customers = customers_data["customers"]
+                    else:
+                        customers = []
+                else:
+                    customers = []
+                
+                if customers:
+                    
+                    # 統計情報表示
+                    col1, col2, col3, col4 = st.columns(4)
+                    with col1:
+                        st.metric("総顧客数", len(customers))
+                    with col2:
+                        cities = set(c.get("city", "") for c in customers)
+                        st.metric("都市数", len(cities))
+                    with col3:
+                        tokyo_customers = len([c for c in customers if c.get("city") == "東京"])
+                        st.metric("東京の顧客", tokyo_customers)
+                    with col4:
+                        with_email = len([c for c in customers if c.get("email")])
+                        st.metric("メール登録済み", with_email)
+                    
+                    # データテーブル表示
+                    if customers:
+                        st.markdown("#### 📋 顧客一覧")
+                        
+                        # DataFrameに変換して表示
+                        import pandas as pd
+                        df = pd.DataFrame(customers)
+                        
+                        # 列の並び替えと日本語化
+                        if not df.empty:
+                            column_mapping = {
+                                "id": "ID",
+                                "name": "名前", 
+                                "email": "メールアドレス",
+                                "city": "都市",
+                                "created_at": "登録日"
+                            }
+                            
+                            display_cols = [col for col in ["id", "name", "email", "city", "created_at"] if col in df.columns]
+                            df_display = df[display_cols].rename(columns=column_mapping)
+                            
+                            st.dataframe(
+                                df_display,
+                                use_container_width=True,
+                                hide_index=True
+                            )
+                            
+                            # CSVダウンロード
+                            csv = df_display.to_csv(index=False).encode('utf-8-sig')
+                            st.download_button(
+                                label="📥 CSVダウンロード",
+                                data=csv,
+                                file_name=f"customers_{city_filter}_{pd.Timestamp.now().strftime('%Y%m%d')}.csv",
+                                mime="text/csv"
+                            )
+                        else:
+                            st.warning("条件に合う顧客データが見つかりませんでした。")
+                    else:
+                        st.info("表示する顧客データがありません。")
+                else:
+                    st.error("顧客データの取得に失敗しました。")
+                    
+        except Exception as e:
+            st.error(f"❌ エラーが発生しました: {str(e)}")
+
+    def _render_products_section(self, client: MCPAPIClient):
+        """商品データセクションの描画"""
+        st.markdown("### 🛍️ 商品データ管理")
+        
+        # フィルタオプション
+        col1, col2, col3, col4 = st.columns([2, 2, 2, 1])
+        
+        with col1:
+            category_filter = st.selectbox(
+                "📂 カテゴリフィルタ",
+                ["すべて", "Electronics", "Books", "Clothing", "Home", "Sports"],
+                key="product_category_filter"
+            )
+        
+        with col2:
+            min_price = st.number_input("最低価格", min_value=0, value=0, key="product_min_price")
+        
+        with col3:
+            max_price = st.number_input("最高価格", min_value=0, value=50000, key="product_max_price")
+        
+        with col4:
+            force_refresh = st.button("🔍 検索", key="search_products")
+        
+        # データ取得と表示
+        try:
+            with st.spinner("商品データ読み込み中..."):
+                params = {}
+                if category_filter != "すべて":
+                    params["category"] = category_filter
+                if min_price > 0:
+                    params["min_price"] = min_price
+                if max_price > 0 and max_price != 50000:
+                    params["max_price"] = max_price
+                
+                products_data = cached_get(client, "/api/products", params,
+                                           max_age=0 if force_refresh else None)
+                
+                # レスポンス形式を統一的に処理
+                if products_data:
+                    if isinstance(products_data, list):
+                        # 直接配列が返された場合
+                        products = products_data
+                    elif isinstance(products_data, dict) and "products" in products_data:
+                        # オブジェクト内のproductsキーから取得
+                        products = products_data["products"]
+                    else:
+                        products = []
+                else:
+                    products = []
+                
+                if products:
+                    
+                    # 統計情報
+                    col1, col2, col3, col4 = st.columns(4)
+                    with col1:
+                        st.metric("商品数", len(products))
+                    with col2:
+                        if products:
+                            avg_price = sum(p.get("price", 0) for p in products) / len(products)
+                            st.metric("平均価格", f"¥{avg_price:,.0f}")
+                    with col3:
+                        categories = set(p.get("category", "") for p in products)
+                        st.metric("カテゴリ数", len(categories))
+                    with col4:
+                        electronics = len([p for p in products if p.get("category") == "Electronics"])
+                        st.metric("Electronics", electronics)
+                    
+                    # データ表示
+                    if products:
+                        import pandas as pd
+                        df = pd.DataFrame(products)
+                        
+                        column_mapping = {
+                            "id": "ID",
+                            "name": "商品名",
+                            "category": "カテゴリ", 
+                            "price": "価格",
+                            "created_at": "登録日"
+                        }
+                        
+                        display_cols = [col for col in ["id", "name", "category", "price", "created_at"] if col in df.columns]
+                        df_display = df[display_cols].rename(columns=column_mapping)
+                        
+                        # 価格列のフォーマット
+                        if "価格" in df_display.columns:
+                            df_display["価格"] = df_display["価格"].apply(lambda x: f"¥{x:,.0f}" if pd.notnull(x) else "")
+                        
+                        st.dataframe(
+                            df_display,
+                            use_container_width=True,
+                            hide_index=True
+                        )
+                        
+                        # ダウンロード
+                        csv = df_display.to_csv(index=False).encode('utf-8-sig')
+                        st.download_button(
+                            label="📥 CSVダウンロード",
+                            data=csv,
+                            file_name=f"products_{category_filter}_{pd.Timestamp.now().strftime('%Y%m%d')}.csv",
+                            mime="text/csv"
+                        )
+                    else:
+                        st.info("表示する商品データがありません。")
+                        
+        except Exception as e:
+            st.error(f"❌ エラーが発生しました: {str(e)}")
+
+    def _render_orders_section(self, client: MCPAPIClient):
+        """注文データセクションの描画"""
+        st.markdown("### 📦 注文データ管理")
+        
+        # フィルタオプション
+        col1, col2, col3 = st.columns([2, 2, 1])
+        
+        with col1:
+            customer_id_filter = st.number_input(
+                "👤 顧客IDフィルタ（0=全顧客）", 
+                min_value=0, 
+                value=0,
+                key="order_customer_filter"
+            )
+        
+        with col2:
+            limit = st.number_input("表示件数", min_value=1, max_value=50, value=20, key="order_limit")
+        
+        with col3:
+            force_refresh = st.button("🔍 検索", key="search_orders")
+        
+        # データ取得と表示
+        try:
+            with st.spinner("注文データ読み込み中..."):
+                params = {"limit": limit}
+                if customer_id_filter > 0:
+                    params["customer_id"] = customer_id_filter
+                
+                orders_data = cached_get(client, "/api/orders", params,
+                                         max_age=0 if force_refresh else None)
+                
+                # レスポンス形式を統一的に処理
+                if orders_data:
+                    if isinstance(orders_data, list):
+                        # 直接配列が返された場合
+                        orders = orders_data
+                    elif isinstance(orders_data, dict) and "orders" in orders_data:
+                        # オブジェクト内のordersキーから取得
+                        orders = orders_data["orders"]
+                    else:
+                        orders = []
+                else:
+                    orders = []
+                
+                if orders:
+                    
+                    # 統計情報
+                    col1, col2, col3, col4 = st.columns(4)
+                    with col1:
+                        st.metric("注文数", len(orders))
+                    with col2:
+                        if orders:
+                            total_amount = sum(o.get("price", 0) * o.get("quantity", 0) for o in orders)
+                            st.metric("総売上", f"¥{total_amount:,.0f}")
+                    with col3:
+                        if orders:
+                            total_quantity = sum(o.get("quantity", 0) for o in orders)
+                            st.metric("総数量", f"{total_quantity:,}")
+                    with col4:
+                        customers = set(o.get("customer_id") for o in orders if o.get("customer_id"))
+                        st.metric("顧客数", len(customers))
+                    
+                    # データ表示
+                    if orders:
+                        import pandas as pd
+                        df = pd.DataFrame(orders)
+                        
+                        # 合計金額を計算
+                        if "price" in df.columns and "quantity" in df.columns:
+                            df["total"] = df["price"] * df["quantity"]
+                        
+                        column_mapping = {
+                            "id": "注文ID",
+                            "customer_id": "顧客ID",
+                            "customer_name": "顧客名",
+                            "product_name": "商品名",
+                            "quantity": "数量",
+                            "price": "単価",
+                            "total": "合計",
+                            "created_at": "注文日"
+                        }
+                        
+                        display_cols = [col for col in ["id", "customer_id", "customer_name", "product_name", "quantity", "price", "total", "created_at"] if col in df.columns]
+                        df_display = df[display_cols].rename(columns=column_mapping)
+                        
+                        # 金額列のフォーマット
+                        for money_col in ["単価", "合計"]:
+                            if money_col in df_display.columns:
+                                df_display[money_col] = df_display[money_col].apply(
+                                    lambda x: f"¥{x:,.0f}" if pd.notnull(x) else ""
+                                )
+                        
+                        st.dataframe(
+                            df_display,
+                            use_container_width=True,
+                            hide_index=True
+                        )
+                        
+                        # ダウンロード
+                        csv = df_display.to_csv(index=False).encode('utf-8-sig')
+                        st.download_button(
+                            label="📥 CSVダウンロード", 
+                            data=csv,
+                            file_name=f"orders_{pd.Timestamp.now().strftime('%Y%m%d')}.csv",
+                            mime="text/csv"
+                        )
+                    else:
+                        st.info("表示する注文データがありません。")
+                        
+        except Exception as e:
+            st.error(f"❌ エラーが発生しました: {str(e)}")
@@ -0,0 +1,328 @@
+# mcp_demo_pages/customer_analysis.py
+# 顧客分析ページ: 顧客別の購買行動分析
+
+import streamlit as st
+
+import helper_chart as chart
+
+from mcp_demo_pages.base import DemoPage
+from mcp_demo_pages.data_layer import cached_get
+
+
+class CustomerAnalysisPage(DemoPage):
+    """顧客分析ページ"""
+
+    def render(self):
+        """顧客分析ページの描画（デモ機能3）"""
+        st.markdown("## 👥 顧客分析デモ")
+        st.markdown("個別顧客の購買行動と統計分析")
+        
+        client = self.get_api_client()
+        if not client:
+            st.error("API サーバーに接続できません。")
+            return
+        
+        # 顧客選択セクション
+        st.markdown("### 🔍 顧客選択")
+        
+        col1, col2 = st.columns([3, 1])
+        
+        with col2:
+            # 取得より先に評価し、押下時は顧客・注文ともキャッシュを使わず再取得
+            force_refresh = st.button("🔄 データ更新", type="primary")
+        
+        with col1:
+            # 顧客リストを取得
+            try:
+                with st.spinner("顧客データ読み込み中..."):
+                    customers_data = cached_get(client, "/api/customers", {"limit": 100},
+                                                max_age=0 if force_refresh else None)
+                    
+                    # レスポンス形式を統一的に処理
+                    if customers_data:
+                        if isinstance(customers_data, list):
+                            # 直接配列が返された場合
+                            customers = customers_data
+                        elif isinstance(customers_data, dict) and "customers" in customers_data:
+                            # オブジェクト内のcustomersキーから取得
+                            customers = customers_data["customers"]
+                        else:
+                            customers = []
+                    else:
+                        customers = []
+                    
+                    if not customers:
+                        st.warning("⚠️ 顧客データが見つかりません。")
+                        return
+                    
+                    # 顧客選択ボックス
+                    customer_options = {f"{c['name']} (ID: {c['id']}) - {c.get('city', 'Unknown')}": c['id'] for c in customers}
+                    selected_customer_label = st.selectbox(
+                        "📋 分析対象の顧客を選択",
+                        list(customer_options.keys()),
+                        help="購買行動を分析したい顧客を選択してください"
+                    )
+                    selected_customer_id = customer_options[selected_customer_label]
+                    
+            except Exception as e:
+                st.error(f"❌ 顧客データの読み込みに失敗しました: {str(e)}")
+                return
+        
+        # 選択された顧客の分析
+        if selected_customer_id:
+            try:
+                with st.spinner("顧客分析データ取得中..."):
+                    # 顧客の詳細情報を取得
+                    selected_customer = next((c for c in customers if c['id'] == selected_customer_id), None)
+                    
+                    # 顧客の注文履歴を取得
+                    orders_data = cached_get(client, "/api/orders", {"customer_id": selected_customer_id, "limit": 100},
+                                             max_age=0 if force_refresh else None)
+                    
+                    # レスポンス形式を統一的に処理
+                    if orders_data:
+                        if isinstance(orders_data, list):
+                            # 直接配列が返された場合
+                            orders = orders_data
+                        elif isinstance(orders_data, dict) and "orders" in orders_data:
+                            # オブジェクト内のordersキーから取得
+                            orders = orders_data["orders"]
+                        else:
+                            orders = []
+                    else:
+                        orders = []
+                
+                # 顧客基本情報
+                st.markdown("### 👤 顧客基本情報")
+                col1, col2, col3, col4 = st.columns(4)
+                
+                with col1:
+                    st.metric("顧客ID", selected_customer.get('id', 'N/A'))
+                with col2:
+                    st.metric("氏名", selected_customer.get('name', 'N/A'))
+                with col3:
+                    st.metric("都市", selected_customer.get('city', 'N/A'))
+                with col4:
+                    st.metric("登録日", selected_customer.get('created_at', 'N/A')[:10] if selected_customer.get('created_at') else 'N/A')
+                
+                if orders:
+                    # 購買統計
+                    st.markdown("### 📊 購買統計")
+                    
+                    import pandas as pd
+                    import plotly.express as px
+                    import plotly.graph_objects as go
+                    
+                    df_orders = pd.DataFrame(orders)
+                    
+                    # 合計金額を計算
+                    if 'price' in df_orders.columns and 'quantity' in df_orders.columns:
+                        df_orders['total'] = df_orders['price'] * df_orders['quantity']
+                    
+                    # 基本統計指標
+                    col1, col2, col3, col4 = st.columns(4)
+                    
+                    with col1:
+                        total_orders = len(orders)
+                        st.metric("🛒 総注文数", f"{total_orders}件")
+                    
+                    with col2:
+                        if 'total' in df_orders.columns:
+                            total_spent = df_orders['total'].sum()
+                            st.metric("💰 総購入額", f"¥{total_spent:,.0f}")
+                    
+                    with col3:
+                        if 'total' in df_orders.columns and total_orders > 0:
+                            avg_order_value = df_orders['total'].mean()
+                            st.metric("📈 平均注文額", f"¥{avg_order_value:,.0f}")
+                    
+                    with col4:
+                        if 'quantity' in df_orders.columns:
+                            total_items = df_orders['quantity'].sum()
+                            st.metric("📦 総購入数", f"{total_items}個")
+                    
+                    # 商品別購買分析
+                    st.markdown("### 🛍️ 商品別購買分析")
+                    
+                    if 'product_name' in df_orders.columns:
+                        # 商品別集計
+                        product_stats = df_orders.groupby('product_name').agg({
+                            'quantity': 'sum',
+                            'total': 'sum' if 'total' in df_orders.columns else 'count',
+                            'id': 'count'
+                        }).reset_index()
+                        product_stats.columns = ['product_name', 'total_quantity', 'total_spent', 'order_count']
+                        product_stats = product_stats.sort_values('total_spent', ascending=False)
+                        
+                        col1, col2 = st.columns(2)
+                        
+                        with col1:
+                            # 商品別支出グラフ
+                            if not product_stats.empty:
+                                fig_bar = px.bar(
+                                    product_stats.head(10),
+                                    x='product_name',
+                                    y='total_spent',
+                                    title="商品別支出額 TOP 10",
+                                    labels={
+                                        'product_name': '商品名',
+                                        'total_spent': '支出額 (¥)'
+                                    },
+                                    color='total_spent',
+                                    color_continuous_scale='viridis'
+                                )
+                                fig_bar.update_layout(height=400, xaxis_tickangle=-45)
+                                st.plotly_chart(fig_bar, use_container_width=True)
+                        
+                        with col2:
+                            # 商品別数量グラフ
+                            fig_quantity = px.pie(
+                                product_stats.head(8),
+                                values='total_quantity',
+                                names='product_name',
+                                title="商品別購入数量比率"
+                            )
+                            fig_quantity.update_layout(height=400)
+                            st.plotly_chart(fig_quantity, use_container_width=True)
+                        
+                        # 商品別詳細テーブル
+                        st.markdown("#### 📋 商品別詳細データ")
+                        
+                        product_display = product_stats.copy()
+                        product_display['total_spent'] = product_display['total_spent'].apply(lambda x: f"¥{x:,.0f}")
+                        product_display = product_display.rename(columns={
+                            'product_name': '商品名',
+                            'total_quantity': '購入数量',
+                            'total_spent': '支出額',
+                            'order_count': '注文回数'
+                        })
+                        
+                        # ランキング追加
+                        product_display.insert(0, '順位', range(1, len(product_display) + 1))
+                        
+                        st.dataframe(
+                            product_display,
+                            use_container_width=True,
+                            hide_index=True
+                        )
+                    
+                    # 購買時系列分析
+                    st.markdown("### 📅 購買時系列分析")
+                    
+                    if 'created_at' in df_orders.columns:
+                        # 日付を変換
+                        df_orders['order_date'] = pd.to_datetime(df_orders['created_at']).dt.date
+                        
+                        # 日別集計
+                        daily_stats = df_orders.groupby('order_date').agg({
+                            'total': 'sum' if 'total' in df_orders.columns else 'count',
+                            'id': 'count'
+                        }).reset_index()
+                        daily_stats.columns = ['date', 'daily_spent', 'daily_orders']
+                        
+                        col1, col2 = st.columns(2)
+                        
+                        with col1:
+                            # 日別支出グラフ
+                            fig_timeline = chart.line(
+                                daily_stats,
+                                x='date',
+                                y='daily_spent',
+                                title="日別支出額推移",
+                                labels={
+                                    'date': '日付',
+                                    'daily_spent': '支出額 (¥)'
+                                },
+                                markers=True
+                            )
+                            fig_timeline.update_layout(height=350)
+                            st.plotly_chart(fig_timeline, use_container_width=True)
+                        
+                        with col2:
+                            # 日別注文数グラフ
+                            fig_orders = px.bar(
+                                daily_stats,
+                                x='date',
+                                y='daily_orders',
+                                title="日別注文数推移",
+                                labels={
+                                    'date': '日付',
+                                    'daily_orders': '注文数'
+                                }
+                            )
+                            fig_orders.update_layout(height=350)
+                            st.plotly_chart(fig_orders, use_container_width=True)
+                    
+                    # 最近の注文履歴
+                    st.markdown("### 📝 最近の注文履歴 (直近10件)")
+                    
+                    # created_at列の存在確認
+                    if 'created_at' in df_orders.columns:
+                        recent_orders = df_orders.sort_values('created_at', ascending=False).head(10)
+                    else:
+                        recent_orders = df_orders.head(10)
+                    
+                    # 表示用に整形
+                    display_cols = ['id', 'product_name', 'quantity', 'price', 'total', 'created_at']
+                    recent_display = recent_orders[[col for col in display_cols if col in recent_orders.columns]].copy()
+                    
+                    if 'created_at' in recent_display.columns:
+                        recent_display['created_at'] = pd.to_datetime(recent_display['created_at']).dt.strftime('%Y-%m-%d %H:%M')
+                    
+                    # 金額フォーマット
+                    for col in ['price', 'total']:
+                        if col in recent_display.columns:
+                            recent_display[col] = recent_display[col].apply(lambda x: f"¥{x:,.0f}" if pd.notnull(x) else "")
+                    
+                    recent_display = recent_display.rename(columns={
+                        'id': '注文ID',
+                        'product_name': '商品名',
+                        'quantity': '数量',
+                        'price': '単価',
+                        'total': '合計',
+                        'created_at': '注文日時'
+                    })
+                    
+                    st.dataframe(
+                        recent_display,
+                        use_container_width=True,
+                        hide_index=True
+                    )
+                    
+                    # CSV ダウンロード
+                    st.markdown("### 📥 データダウンロード")
+                    
+                    col1, col2 = st.columns(2)
+                    
+                    with col1:
+                        # 商品別データダウンロード
+                        if 'product_display' in locals():
+                            csv_products = product_display.to_csv(index=False).encode('utf-8-sig')
+                            st.download_button(
+                                label="📊 商品別分析データをCSVダウンロード",
+                                data=csv_products,
+                                file_name=f"customer_{selected_customer_id}_products_{pd.Timestamp.now().strftime('%Y%m%d')}.csv",
+                                mime="text/csv"
+                            )
+                    
+                    with col2:
+                        # 注文履歴ダウンロード
+                        csv_orders = recent_display.to_csv(index=False).encode('utf-8-sig')
+                        st.download_button(
+                            label="📋 注文履歴をCSVダウンロード",
+                            data=csv_orders,
+                            file_name=f"customer_{selected_customer_id}_orders_{pd.Timestamp.now().strftime('%Y%m%d')}.csv",
+                            mime="text/csv"
+                        )
+                
+                else:
+                    st.info("📭 この顧客の注文履歴がありません。")
+                    st.markdown("**💡 ヒント**: データ作成ページから新しい注文を作成してみてください。")
+                    
+            except Exception as e:
+                st.error(f"❌ 顧客分析データの取得に失敗しました: {str(e)}")
+                
+                # エラーの詳細情報
+                with st.expander("🔍 エラー詳細"):
+                    import traceback
+                    st.code(traceback.format_exc())
@@ -0,0 +1,1080 @@
+# mcp_demo_pages/data_analysis.py
+# データ分析ページ: 売上・顧客・トレンド・相関の分析タブ
+
+import time
+
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import streamlit as st
+
+import helper_chart as chart
+
+from mcp_api_client import MCPAPIClient
+from mcp_demo_pages.base import DemoPage
+from mcp_demo_pages.data_layer import cached_get, load_page_data
+
+
+class DataAnalysisPage(DemoPage):
+    """データ分析ページ"""
+
+    def render(self):
+        """データ分析ページの描画（デモ機能5）"""
+        st.markdown("## 🐼 データ分析デモ")
+        st.markdown("データベース内のデータを分析し、洞察を得るための高度な分析機能")
+        
+        client = self.get_api_client()
+        if not client:
+            st.error("API サーバーに接続できません。")
+            return
+        
+        # タブで分析機能を分類
+        tab1, tab2, tab3, tab4 = st.tabs(["📊 売上分析", "👥 顧客分析", "📈 トレンド分析", "🎯 相関分析"])
+        
+        with tab1:
+            self._render_sales_analysis(client)
+        
+        with tab2:
+            self._render_customer_analysis(client)
+            
+        with tab3:
+            self._render_trend_analysis(client)
+            
+        with tab4:
+            self._render_correlation_analysis(client)
+
+    def _render_sales_analysis(self, client: MCPAPIClient):
+        """売上分析タブの描画"""
+        st.markdown("### 📊 売上データ分析")
+        st.markdown("詳細な売上パターンと収益性の分析")
+        
+        try:
+            # 売上統計データを取得
+            with st.spinner("売上データを分析中..."):
+                # 統計と注文を並行取得（注文は型付きDataFrame：日付・合計金額・カテゴリ型は取得時に整形済み）
+                page_data = load_page_data(client, "sales_analysis")
+                stats_data = page_data.get("stats")
+                
+                if not stats_data:
+                    page_data.render_issues()
+                    st.warning("分析に必要なデータが取得できませんでした。")
+                    return
+                
+                # データ前処理
+                import pandas as pd
+                import plotly.express as px
+                import plotly.graph_objects as go
+                from plotly.subplots import make_subplots
+                
+                # 基本統計
+                col1, col2, col3, col4 = st.columns(4)
+                
+                total_sales = stats_data.get('total_sales', 0)
+                total_orders = stats_data.get('total_orders', 0)
+                avg_order_value = stats_data.get('avg_order_value', 0)
+                
+                with col1:
+                    st.metric("💰 総売上", f"¥{total_sales:,.0f}")
+                with col2:
+                    st.metric("📦 注文数", f"{total_orders:,}件")
+                with col3:
+                    st.metric("📊 平均単価", f"¥{avg_order_value:,.0f}")
+                with col4:
+                    if total_orders > 0:
+                        conversion_rate = (total_orders / 1000) * 100  # 仮想的な変換率
+                        st.metric("📈 変換率", f"{conversion_rate:.1f}%")
+                
+                # 注文データ（基本統計の描画中も取得は並行して進んでいる）
+                df_orders = page_data.get("orders")
+                if df_orders is None or df_orders.empty:
+                    page_data.render_issues()
+                    st.warning("注文データが取得できなかったため、詳細分析を表示できません。")
+                    return
+                
+                # 売上分布分析
+                st.markdown("#### 💹 売上分布分析")
+                
+                col1, col2 = st.columns(2)
+                
+                with col1:
+                    # 注文金額分布
+                    if 'total_amount' in df_orders.columns:
+                        fig_dist = px.histogram(
+                            df_orders,
+                            x='total_amount',
+                            nbins=20,
+                            title="注文金額分布",
+                            labels={'total_amount': '注文金額 (¥)', 'count': '注文数'},
+                            color_discrete_sequence=['#1f77b4']
+                        )
+                        fig_dist.update_layout(height=350)
+                        st.plotly_chart(fig_dist, use_container_width=True)
+                
+                with col2:
+                    # 商品別売上分析
+                    if 'product_name' in df_orders.columns and 'total_amount' in df_orders.columns:
+                        product_sales = df_orders.groupby('product_name', observed=True)['total_amount'].sum().sort_values(ascending=False).head(10)
+                        
+                        fig_products = px.bar(
+                            x=product_sales.values,
+                            y=product_sales.index,
+                            orientation='h',
+                            title="商品別売上TOP10",
+                            labels={'x': '売上額 (¥)', 'y': '商品名'},
+                            color=product_sales.values,
+                            color_continuous_scale='viridis'
+                        )
+                        fig_products.update_layout(height=350)
+                        st.plotly_chart(fig_products, use_container_width=True)
+                
+                # 時系列分析
+                # 日付列の確認
+                date_column = None
+                for col in ['created_at', 'order_date', 'date']:
+                    if col in df_orders.columns:
+                        date_column = col
+                        break
+                
+                if date_column:
+                    st.markdown("#### 📅 時系列売上分析")
+                    
+                    # 日付を変換
+                    try:
+                        df_orders['order_date'] = pd.to_datetime(df_orders[date_column]).dt.date
+                        daily_sales = df_orders.groupby('order_date').agg({
+                            'total_amount': 'sum',
+                            'id': 'count'
+                        }).reset_index()
+                        daily_sales.columns = ['date', 'daily_sales', 'order_count']
+                    except:
+                        # 日付変換に失敗した場合はスキップ
+                        daily_sales = None
+                    
+                    # 時系列グラフ
+                    fig_timeline = make_subplots(
+                        rows=2, cols=1,
+                        subplot_titles=('日別売上推移', '日別注文数推移'),
+                        vertical_spacing=0.12
+                    )
+                    
+                    sales_x, sales_y = chart.downsample_xy(daily_sales['date'], daily_sales['daily_sales'])
+                    fig_timeline.add_trace(
+                        go.Scatter(x=sales_x, y=sales_y,
+                                 mode='lines+markers', name='売上額', line=dict(color='#1f77b4')),
+                        row=1, col=1
+                    )
+                    
+                    fig_timeline.add_trace(
+                        go.Bar(x=daily_sales['date'], y=daily_sales['order_count'],
+                              name='注文数', marker_color='#ff7f0e'),
+                        row=2, col=1
+                    )
+                    
+                    fig_timeline.update_layout(height=500, showlegend=True)
+                    fig_timeline.update_xaxes(title_text="日付", row=2, col=1)
+                    fig_timeline.update_yaxes(title_text="売上額 (¥)", row=1, col=1)
+                    fig_timeline.update_yaxes(title_text="注文数", row=2, col=1)
+                    
+                    st.plotly_chart(fig_timeline, use_container_width=True)
+                
+                # パフォーマンス指標
+                st.markdown("#### 📈 パフォーマンス指標")
+                
+                col1, col2 = st.columns(2)
+                
+                with col1:
+                    # RFM分析（簡易版）
+                    if 'customer_id' in df_orders.columns and 'total_amount' in df_orders.columns:
+                        # 日付列の確認
+                        date_column = None
+                        for col in ['created_at', 'order_date', 'date']:
+                            if col in df_orders.columns:
+                                date_column = col
+                                break
+                        
+                        if date_column:
+                            customer_metrics = df_orders.groupby('customer_id').agg({
+                                'total_amount': ['sum', 'mean', 'count'],
+                                date_column: 'max'
+                            }).round(2)
+                            customer_metrics.columns = ['total_spent', 'avg_order', 'frequency', 'last_order']
+                        else:
+                            customer_metrics = df_orders.groupby('customer_id').agg({
+                                'total_amount': ['sum', 'mean', 'count']
+                            }).round(2)
+                            customer_metrics.columns = ['total_spent', 'avg_order', 'frequency']
+                        
+                        customer_metrics = customer_metrics.reset_index()
+                        
+                        # 顧客セグメント分析
+                        high_value = customer_metrics[customer_metrics['total_spent'] > customer_metrics['total_spent'].quantile(0.8)]
+                        frequent_buyers = customer_metrics[customer_metrics['frequency'] > customer_metrics['frequency'].quantile(0.8)]
+                        
+                        st.markdown("**🎯 顧客セグメント分析**")
+                        st.metric("💎 高価値顧客", f"{len(high_value)}人")
+                        st.metric("🔄 常連顧客", f"{len(frequent_buyers)}人")
+                        
+                        if not customer_metrics.empty:
+                            st.metric("👥 平均顧客価値", f"¥{customer_metrics['total_spent'].mean():,.0f}")
+                
+                with col2:
+                    # 売上集中度分析
+                    if 'total_amount' in df_orders.columns:
+                        top_20_percent = int(len(df_orders) * 0.2)
+                        df_sorted = df_orders.sort_values('total_amount', ascending=False)
+                        top_20_sales = df_sorted.head(top_20_percent)['total_amount'].sum()
+                        pareto_ratio = (top_20_sales / total_sales) * 100 if total_sales > 0 else 0
+                        
+                        st.markdown("**📊 パレート分析 (80/20ルール)**")
+                        st.metric("🏆 上位20%の注文が占める売上", f"{pareto_ratio:.1f}%")
+                        
+                        # 季節性分析（月別）
+                        if 'order_date' in df_orders.columns:
+                            df_orders['month'] = pd.to_datetime(df_orders['created_at']).dt.month
+                            monthly_sales = df_orders.groupby('month')['total_amount'].sum()
+                            
+                            peak_month = monthly_sales.idxmax()
+                            peak_sales = monthly_sales.max()
+                            
+                            st.metric("📅 ピーク月", f"{peak_month}月")
+                            st.metric("💰 ピーク月売上", f"¥{peak_sales:,.0f}")
+                
+                # CSV出力オプション
+                st.markdown("#### 📥 分析データ出力")
+                
+                analysis_summary = {
+                    "総売上": f"¥{total_sales:,.0f}",
+                    "総注文数": f"{total_orders:,}件",
+                    "平均注文額": f"¥{avg_order_value:,.0f}",
+                    "分析日時": pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')
+                }
+                
+                summary_df = pd.DataFrame(list(analysis_summary.items()), columns=['指標', '値'])
+                
+                csv_data = summary_df.to_csv(index=False).encode('utf-8-sig')
+                st.download_button(
+                    label="📊 売上分析サマリーをダウンロード",
+                    data=csv_data,
+                    file_name=f"sales_analysis_{pd.Timestamp.now().strftime('%Y%m%d_%H%M')}.csv",
+                    mime="text/csv"
+                )
+                
+        except Exception as e:
+            st.error(f"❌ 売上分析でエラーが発生しました: {str(e)}")
+            with st.expander("🔍 エラー詳細"):
+                import traceback
+                st.code(traceback.format_exc())
+
+    def _render_customer_analysis(self, client: MCPAPIClient):
+        """顧客分析タブの描画"""
+        st.markdown("### 👥 顧客行動分析")
+        st.markdown("顧客の購買パターンと行動特性の詳細分析")
+        
+        try:
+            with st.spinner("顧客データを分析中..."):
+                # データ取得（顧客・注文を並行取得）
+                page_data = load_page_data(client, "customer_analysis")
+                customers_data = page_data.get("customers")
+                orders_data = page_data.get("orders")
+                
+                if not customers_data or not orders_data:
+                    page_data.render_issues()
+                    st.warning("分析に必要なデータが取得できませんでした。")
+                    return
+                
+                import pandas as pd
+                import plotly.express as px
+                import plotly.graph_objects as go
+                
+                df_customers = pd.DataFrame(customers_data)
+                df_orders = pd.DataFrame(orders_data)
+                
+                if 'price' in df_orders.columns and 'quantity' in df_orders.columns:
+                    df_orders['total_amount'] = df_orders['price'] * df_orders['quantity']
+                
+                # 顧客基本統計
+                col1, col2, col3, col4 = st.columns(4)
+                
+                with col1:
+                    st.metric("👥 総顧客数", f"{len(df_customers):,}人")
+                with col2:
+                    if 'city' in df_customers.columns:
+                        unique_cities = df_customers['city'].nunique()
+                        st.metric("🏙️ 展開都市数", f"{unique_cities}都市")
+                with col3:
+                    if 'customer_id' in df_orders.columns:
+                        active_customers = df_orders['customer_id'].nunique()
+                        st.metric("🛒 購買経験者", f"{active_customers}人")
+                with col4:
+                    if active_customers > 0 and len(df_customers) > 0:
+                        activation_rate = (active_customers / len(df_customers)) * 100
+                        st.metric("📈 アクティブ率", f"{activation_rate:.1f}%")
+                
+                # 地域分析
+                st.markdown("#### 🗺️ 地域別顧客分析")
+                
+                col1, col2 = st.columns(2)
+                
+                with col1:
+                    # 都市別顧客分布
+                    if 'city' in df_customers.columns:
+                        city_counts = df_customers['city'].value_counts()
+                        
+                        fig_city_dist = px.pie(
+                            values=city_counts.values,
+                            names=city_counts.index,
+                            title="都市別顧客分布"
+                        )
+                        fig_city_dist.update_layout(height=350)
+                        st.plotly_chart(fig_city_dist, use_container_width=True)
+                
+                with col2:
+                    # 都市別購買力分析
+                    if 'customer_id' in df_orders.columns and 'total_amount' in df_orders.columns:
+                        # 顧客データと注文データをマージ
+                        customer_orders = df_orders.merge(df_customers, left_on='customer_id', right_on='id', how='left')
+                        
+                        if 'city' in customer_orders.columns:
+                            city_purchasing = customer_orders.groupby('city')['total_amount'].agg(['sum', 'mean', 'count']).reset_index()
+                            city_purchasing.columns = ['city', 'total_sales', 'avg_order', 'order_count']
+                            
+                            fig_city_power = px.bar(
+                                city_purchasing,
+                                x='city',
+                                y='total_sales',
+                                title="都市別総購買力",
+                                labels={'city': '都市', 'total_sales': '総購買額 (¥)'},
+                                color='total_sales',
+                                color_continuous_scale='viridis'
+                            )
+                            fig_city_power.update_layout(height=350)
+                            st.plotly_chart(fig_city_power, use_container_width=True)
+                
+                # 顧客ライフサイクル分析
+                st.markdown("#### 📊 顧客ライフサイクル分析")
+                
+                if 'customer_id' in df_orders.columns and 'created_at' in df_orders.columns:
+                    # 顧客別購買履歴分析
+                    customer_lifecycle = df_orders.groupby('customer_id').agg({
+                        'total_amount': ['sum', 'mean', 'count'],
+                        'created_at': ['min', 'max']
+                    }).round(2)
+                    
+                    customer_lifecycle.columns = ['total_spent', 'avg_order_value', 'order_frequency', 'first_order', 'last_order']
+                    customer_lifecycle = customer_lifecycle.reset_index()
+                    
+                    # 顧客価値分散
+                    col1, col2 = st.columns(2)
+                    
+                    with col1:
+                        # 顧客価値分布
+                        fig_value_dist = px.histogram(
+                            customer_lifecycle,
+                            x='total_spent',
+                            nbins=20,
+                            title="顧客生涯価値分布",
+                            labels={'total_spent': '生涯価値 (¥)', 'count': '顧客数'},
+                            color_discrete_sequence=['#2E86C1']
+                        )
+                        fig_value_dist.update_layout(height=350)
+                        st.plotly_chart(fig_value_dist, use_container_width=True)
+                    
+                    with col2:
+                        # 購買頻度分布
+                        fig_freq_dist = px.histogram(
+                            customer_lifecycle,
+                            x='order_frequency',
+                            nbins=15,
+                            title="購買頻度分布",
+                            labels={'order_frequency': '注文回数', 'count': '顧客数'},
+                            color_discrete_sequence=['#E74C3C']
+                        )
+                        fig_freq_dist.update_layout(height=350)
+                        st.plotly_chart(fig_freq_dist, use_container_width=True)
+                    
+                    # 顧客セグメンテーション
+                    st.markdown("#### 🎯 顧客セグメンテーション")
+                    
+                    # RFM分析
+                    today = pd.Timestamp.now()
+                    customer_lifecycle['last_order'] = pd.to_datetime(customer_lifecycle['last_order'])
+                    customer_lifecycle['recency'] = (today - customer_lifecycle['last_order']).dt.days
+                    
+                    # セグメント分類
+                    high_value_threshold = customer_lifecycle['total_spent'].quantile(0.8)
+                    high_freq_threshold = customer_lifecycle['order_frequency'].quantile(0.8)
+                    recent_threshold = customer_lifecycle['recency'].quantile(0.2)  # 最近の20%
+                    
+                    customer_lifecycle['segment'] = 'Regular'
+                    customer_lifecycle.loc[
+                        (customer_lifecycle['total_spent'] >= high_value_threshold) &
+                        (customer_lifecycle['order_frequency'] >= high_freq_threshold) &
+                        (customer_lifecycle['recency'] <= recent_threshold), 'segment'
+                    ] = 'VIP'
+                    customer_lifecycle.loc[
+                        (customer_lifecycle['total_spent'] >= high_value_threshold) &
+                        (customer_lifecycle['recency'] <= recent_threshold), 'segment'
+                    ] = 'High Value'
+                    customer_lifecycle.loc[
+                        (customer_lifecycle['order_frequency'] >= high_freq_threshold) &
+                        (customer_lifecycle['recency'] <= recent_threshold), 'segment'
+                    ] = 'Loyal'
+                    customer_lifecycle.loc[
+                        customer_lifecycle['recency'] > customer_lifecycle['recency'].quantile(0.8), 'segment'
+                    ] = 'At Risk'
+                    
+                    # セグメント分布
+                    segment_counts = customer_lifecycle['segment'].value_counts()
+                    
+                    col1, col2, col3 = st.columns([2, 1, 1])
+                    
+                    with col1:
+                        fig_segments = px.pie(
+                            values=segment_counts.values,
+                            names=segment_counts.index,
+                            title="顧客セグメント分布",
+                            color_discrete_sequence=px.colors.qualitative.Set3
+                        )
+                        fig_segments.update_layout(height=300)
+                        st.plotly_chart(fig_segments, use_container_width=True)
+                    
+                    with col2:
+                        st.markdown("**🏆 VIP顧客**")
+                        vip_count = segment_counts.get('VIP', 0)
+                        st.metric("人数", f"{vip_count}人")
+                        if vip_count > 0:
+                            vip_avg_value = customer_lifecycle[customer_lifecycle['segment'] == 'VIP']['total_spent'].mean()
+                            st.metric("平均価値", f"¥{vip_avg_value:,.0f}")
+                    
+                    with col3:
+                        st.markdown("**⚠️ リスク顧客**")
+                        risk_count = segment_counts.get('At Risk', 0)
+                        st.metric("人数", f"{risk_count}人")
+                        if risk_count > 0:
+                            risk_ratio = (risk_count / len(customer_lifecycle)) * 100
+                            st.metric("割合", f"{risk_ratio:.1f}%")
+                
+                # コホート分析（簡易版）
+                st.markdown("#### 📅 コホート分析")
+                
+                if 'created_at' in df_customers.columns:
+                    df_customers['registration_month'] = pd.to_datetime(df_customers['created_at']).dt.to_period('M')
+                    cohort_counts = df_customers['registration_month'].value_counts().sort_index()
+                    
+                    fig_cohort = px.bar(
+                        x=cohort_counts.index.astype(str),
+                        y=cohort_counts.values,
+                        title="月別新規顧客登録数",
+                        labels={'x': '登録月', 'y': '新規顧客数'},
+                        color=cohort_counts.values,
+                        color_continuous_scale='Blues'
+                    )
+                    fig_cohort.update_layout(height=300)
+                    st.plotly_chart(fig_cohort, use_container_width=True)
+                
+                # データ出力
+                st.markdown("#### 📥 顧客分析データ出力")
+                
+                if 'customer_lifecycle' in locals() and not customer_lifecycle.empty:
+                    segment_summary = customer_lifecycle.groupby('segment').agg({
+                        'total_spent': ['count', 'mean', 'sum'],
+                        'avg_order_value': 'mean',
+                        'order_frequency': 'mean'
+                    }).round(2)
+                    
+                    csv_data = segment_summary.to_csv().encode('utf-8-sig')
+                    st.download_button(
+                        label="👥 顧客セグメント分析をダウンロード",
+                        data=csv_data,
+                        file_name=f"customer_analysis_{pd.Timestamp.now().strftime('%Y%m%d_%H%M')}.csv",
+                        mime="text/csv"
+                    )
+                
+        except Exception as e:
+            st.error(f"❌ 顧客分析でエラーが発生しました: {str(e)}")
+            with st.expander("🔍 エラー詳細"):
+                import traceback
+                st.code(traceback.format_exc())
+
+    def _render_trend_analysis(self, client: MCPAPIClient):
+        """トレンド分析タブの描画
+        
+        サーバーで日別に事前集計した配列を受け取り、補完・移動平均・予測は
+        helper_trend の NumPy ベクトル演算で行う（数年分でも数ミリ秒）。
+        """
+        st.markdown("### 📈 トレンド分析")
+        st.markdown("時系列データから読み取るビジネストレンドと予測")
+        
+        try:
+            with st.spinner("トレンドデータを分析中..."):
+                # データ取得（日別集計済みの配列）
+                page_data = load_page_data(client, "trend_analysis")
+                daily = page_data.get("daily")
+                
+                if not daily or not daily.get("dates"):
+                    page_data.render_issues()
+                    st.warning("分析に必要な注文データが取得できませんでした。")
+                    return
+                
+                import helper_trend as trend
+                import numpy as np
+                
+                col_range, col_horizon = st.columns(2)
+                with col_range:
+                    range_label = st.selectbox("📅 分析期間", ["全期間", "直近90日", "直近365日", "直近3年"],
+                                               key="trend_range")
+                with col_horizon:
+                    horizon = st.slider("🔮 予測日数", min_value=3, max_value=90, value=14, key="trend_horizon")
+                
+                compute_started = time.perf_counter()
+                days, sales, orders = trend.densify_daily(daily["dates"], daily["total_sales"], daily["order_count"])
+                range_days = {"直近90日": 90, "直近365日": 365, "直近3年": 365 * 3}.get(range_label)
+                if range_days:
+                    days, sales, orders = days[-range_days:], sales[-range_days:], orders[-range_days:]
+                
+                ma_7 = trend.rolling_mean(sales, 7)
+                ma_28 = trend.rolling_mean(sales, 28)
+                std_28 = trend.rolling_std(sales, 28)
+                profile = trend.weekday_profile(days, sales)
+                months, month_totals = trend.monthly_totals(days, sales)
+                prediction = trend.forecast(days, sales, horizon=horizon) if days.size >= 5 else None
+                compute_ms = (time.perf_counter() - compute_started) * 1000
+                
+                dates = pd.to_datetime(days)
+                
+                # 基本トレンド指標
+                col1, col2, col3, col4 = st.columns(4)
+                
+                with col1:
+                    st.metric("📊 日次平均売上", f"¥{sales.mean():,.0f}")
+                
+                with col2:
+                    st.metric("📦 日次平均注文", f"{orders.mean():.1f}件")
+                
+                with col3:
+                    # 直近7日 vs その前の7日
+                    growth = trend.growth_rate(sales, 7)
+                    st.metric("📈 売上成長率（週次）", f"{growth:+.1f}%" if growth is not None else "N/A")
+                
+                with col4:
+                    st.metric("📅 分析日数", f"{days.size}日")
+                
+                # 時系列トレンド分析
+                st.markdown("#### 📅 時系列売上トレンド")
+                
+                if days.size > 1:
+                    fig_trend = go.Figure()
+                    
+                    # 28日移動平均 ± 標準偏差の帯
+                    # 描画点数は helper_chart で間引く（日数が増えてもブラウザに送る点数は一定）
+                    upper_x, band_upper = chart.downsample_xy(dates, ma_28 + np.nan_to_num(std_28))
+                    lower_x, band_lower = chart.downsample_xy(dates, np.clip(ma_28 - np.nan_to_num(std_28), 0, None))
+                    fig_trend.add_trace(go.Scatter(
+                        x=np.concatenate([upper_x, lower_x[::-1]]),
+                        y=np.concatenate([band_upper, band_lower[::-1]]),
+                        fill='toself',
+                        fillcolor='rgba(44, 160, 44, 0.12)',
+                        line=dict(width=0),
+                        name='28日 ±1σ',
+                        hoverinfo='skip'
+                    ))
+                    
+                    # 実データ
+                    fig_trend.add_trace(go.Scatter(
+                        **chart.downsample_trace(dates, sales),
+                        mode='lines+markers' if days.size <= 120 else 'lines',
+                        name='実績売上',
+                        line=dict(color='#1f77b4', width=1.5),
+                        marker=dict(size=5)
+                    ))
+                    
+                    fig_trend.add_trace(go.Scatter(
+                        **chart.downsample_trace(dates, ma_7),
+                        mode='lines',
+                        name='7日移動平均',
+                        line=dict(color='#ff7f0e', width=2, dash='dash')
+                    ))
+                    
+                    if days.size >= 28:
+                        fig_trend.add_trace(go.Scatter(
+                            **chart.downsample_trace(dates, ma_28),
+                            mode='lines',
+                            name='28日移動平均',
+                            line=dict(color='#2ca02c', width=3)
+                        ))
+                    
+                    fig_trend.update_layout(
+                        title="日次売上トレンドと移動平均",
+                        xaxis_title="日付",
+                        yaxis_title="売上額 (¥)",
+                        height=400,
+                        hovermode='x unified'
+                    )
+                    
+                    st.plotly_chart(fig_trend, use_container_width=True)
+                
+                # パターン分析
+                st.markdown("#### 🔄 売上パターン分析")
+                
+                col1, col2 = st.columns(2)
+                
+                with col1:
+                    # 曜日別パターン（1日あたり平均）
+                    fig_dow = px.bar(
+                        x=list(trend.WEEKDAY_LABELS),
+                        y=profile["mean"],
+                        title="曜日別売上パターン（1日平均）",
+                        labels={'x': '曜日', 'y': '売上額 (¥)'},
+                        color=profile["mean"],
+                        color_continuous_scale='viridis'
+                    )
+                    fig_dow.update_layout(height=350)
+                    st.plotly_chart(fig_dow, use_container_width=True)
+                
+                with col2:
+                    # 月別推移（注文日は日付のみのため時間帯ではなく月単位で集計）
+                    fig_monthly = chart.line(
+                        x=pd.to_datetime(months),
+                        y=month_totals,
+                        title="月別売上推移",
+                        labels={'x': '月', 'y': '売上額 (¥)'},
+                        markers=True
+                    )
+                    fig_monthly.update_layout(height=350)
+                    st.plotly_chart(fig_monthly, use_container_width=True)
+                
+                # 商品トレンド分析
+                st.markdown("#### 🏆 商品別トレンド分析")
+                
+                products = daily.get("products") or {}
+                if products:
+                    fig_product_trend = go.Figure()
+                    
+                    colors = px.colors.qualitative.Set1
+                    for i, (product, series) in enumerate(products.items()):
+                        product_days, product_sales = trend.densify_daily(series["dates"], series["total_sales"])
+                        visible = product_days >= days[0]
+                        fig_product_trend.add_trace(go.Scatter(
+                            **chart.downsample_trace(pd.to_datetime(product_days[visible]),
+                                                    trend.rolling_mean(product_sales, 7)[visible]),
+                            mode='lines',
+                            name=product,
+                            line=dict(color=colors[i % len(colors)], width=2)
+                        ))
+                    
+                    fig_product_trend.update_layout(
+                        title=f"上位{len(products)}商品の売上トレンド（7日移動平均）",
+                        xaxis_title="日付",
+                        yaxis_title="売上額 (¥)",
+                        height=400,
+                        hovermode='x unified'
+                    )
+                    
+                    st.plotly_chart(fig_product_trend, use_container_width=True)
+                
+                # 予測分析
+                st.markdown("#### 🔮 予測分析（線形トレンド＋曜日季節性）")
+                
+                if prediction is not None:
+                    fit = prediction["fit"]
+                    
+                    col1, col2, col3 = st.columns(3)
+                    
+                    baseline = sales.mean()
+                    for column, date, pred in zip([col1, col2, col3], prediction["dates"][:3], prediction["mean"][:3]):
+                        with column:
+                            st.metric(
+                                f"📅 {pd.Timestamp(date).strftime('%m/%d')} 予測",
+                                f"¥{pred:,.0f}",
+                                delta=f"{(pred - baseline) / baseline * 100:+.1f}%" if baseline else None
+                            )
+                    
+                    st.caption(
+                        f"📊 決定係数 (R²): {fit.r2:.3f} ／ トレンド: {fit.slope:+,.0f}円/日 ／ "
+                        f"残差標準偏差: ¥{fit.residual_std:,.0f} ／ 予測区間: {prediction['level']:.0%}"
+                    )
+                    
+                    fig_prediction = go.Figure()
+                    future_dates = pd.to_datetime(prediction["dates"])
+                    
+                    # 予測区間
+                    fig_prediction.add_trace(go.Scatter(
+                        x=np.concatenate([future_dates, future_dates[::-1]]),
+                        y=np.concatenate([prediction["upper"], prediction["lower"][::-1]]),
+                        fill='toself',
+                        fillcolor='rgba(255, 127, 14, 0.2)',
+                        line=dict(width=0),
+                        name=f"{prediction['level']:.0%} 予測区間",
+                        hoverinfo='skip'
+                    ))
+                    
+                    # 実績データ
+                    fig_prediction.add_trace(go.Scatter(
+                        **chart.downsample_trace(dates, sales),
+                        mode='lines',
+                        name='実績',
+                        line=dict(color='#1f77b4', width=1.5)
+                    ))
+                    
+                    # 当てはめ値
+                    fig_prediction.add_trace(go.Scatter(
+                        **chart.downsample_trace(dates, fit.fitted),
+                        mode='lines',
+                        name='当てはめ',
+                        line=dict(color='#7f7f7f', width=1)
+                    ))
+                    
+                    # 予測データ
+                    fig_prediction.add_trace(go.Scatter(
+                        x=future_dates,
+                        y=prediction["mean"],
+                        mode='lines+markers',
+                        name='予測',
+                        line=dict(color='#ff7f0e', width=2, dash='dash'),
+                        marker=dict(size=6, symbol='diamond')
+                    ))
+                    
+                    fig_prediction.update_layout(
+                        title="売上予測（線形トレンド＋曜日季節性）",
+                        xaxis_title="日付",
+                        yaxis_title="売上額 (¥)",
+                        height=350
+                    )
+                    
+                    st.plotly_chart(fig_prediction, use_container_width=True)
+                else:
+                    st.info("予測には5日以上のデータが必要です。")
+                
+                # トレンド分析サマリー
+                st.markdown("#### 📋 トレンド分析サマリー")
+                
+                insights = []
+                
+                # 最高売上日
+                best = int(np.argmax(sales))
+                insights.append(f"📈 最高売上日: {pd.Timestamp(days[best]).date()} (¥{sales[best]:,.0f})")
+                
+                # 売上変動
+                volatility = trend.coefficient_of_variation(sales)
+                if volatility is not None:
+                    insights.append(f"📊 売上変動係数: {volatility:.2f} ({'高変動' if volatility > 0.3 else '低変動' if volatility < 0.1 else '中変動'})")
+                
+                insights.append(f"🗓️ 最も売上の高い曜日: {trend.WEEKDAY_LABELS[int(np.argmax(profile['mean']))]}曜")
+                
+                for insight in insights:
+                    st.info(insight)
+                
+                st.caption(f"⚡ 集計・予測の計算時間: {compute_ms:.1f} ms（{days.size}日分）")
+                
+                # データ出力
+                st.markdown("#### 📥 トレンド分析データ出力")
+                
+                daily_stats = pd.DataFrame({
+                    'date': dates.date,
+                    'total_amount': sales,
+                    'order_count': orders,
+                    'ma_7': ma_7,
+                    'ma_28': ma_28,
+                })
+                csv_data = daily_stats.to_csv(index=False).encode('utf-8-sig')
+                st.download_button(
+                    label="📈 日次売上トレンドをダウンロード",
+                    data=csv_data,
+                    file_name=f"sales_trend_{pd.Timestamp.now().strftime('%Y%m%d_%H%M')}.csv",
+                    mime="text/csv"
+                )
+                
+        except Exception as e:
+            st.error(f"❌ トレンド分析でエラーが発生しました: {str(e)}")
+            with st.expander("🔍 エラー詳細"):
+                import traceback
+                st.code(traceback.format_exc())
+
+    def _render_correlation_analysis(self, client: MCPAPIClient):
+        """相関分析タブの描画
+        
+        相関行列・都市別・商品別の集計はサーバーが全件からDB内で計算した厳密値を使い、
+        顧客単位の散布図だけをサンプリングした特徴量ベクトルで描画する。
+        """
+        st.markdown("### 🎯 相関分析")
+        st.markdown("変数間の関係性と影響度の統計的分析")
+        
+        try:
+            with st.spinner("相関データを分析中..."):
+                # データ取得（全件集計の相関統計）
+                page_data = load_page_data(client, "correlation_analysis")
+                stats = page_data.get("stats")
+                
+                if not stats or not stats.get("n_customers"):
+                    page_data.render_issues()
+                    st.warning("分析に必要なデータが取得できませんでした。")
+                    return
+                
+                import math
+                import numpy as np
+                
+                features = stats["features"]
+                correlation_matrix = pd.DataFrame(stats["matrix"], index=features, columns=features, dtype=float)
+                n_customers = stats["n_customers"]
+                
+                def pair_corr(a: str, b: str) -> float:
+                    return correlation_matrix.loc[a, b]
+                
+                def corr_p_value(r: float, n: int) -> float:
+                    # Fisher の z 変換による正規近似（n が大きいほど正確）
+                    if n <= 3 or pd.isna(r):
+                        return float("nan")
+                    if abs(r) >= 1:
+                        return 0.0
+                    z = math.atanh(r) * math.sqrt(n - 3)
+                    return math.erfc(abs(z) / math.sqrt(2))
+                
+                st.caption(f"📊 集計対象: 顧客 {n_customers:,}人 / 注文 {stats['n_orders']:,}件（全件をDB内で集計）")
+                
+                # 基本相関統計
+                col1, col2, col3, col4 = st.columns(4)
+                
+                corr_total_freq = pair_corr('total_spent', 'order_frequency')
+                corr_avg_freq = pair_corr('avg_order_value', 'order_frequency')
+                corr_price_quantity = stats["order_level"]["price_quantity"]
+                corr_price_quantity = float("nan") if corr_price_quantity is None else corr_price_quantity
+                
+                with col1:
+                    st.metric("📊 支出×頻度相関", f"{corr_total_freq:.3f}")
+                with col2:
+                    st.metric("💰 単価×頻度相関", f"{corr_avg_freq:.3f}")
+                with col3:
+                    st.metric("🔄 価格×数量相関", f"{corr_price_quantity:.3f}")
+                with col4:
+                    # 相関の強さを評価
+                    avg_correlation = abs(np.nanmean([corr_total_freq, corr_avg_freq, corr_price_quantity]))
+                    correlation_strength = "強" if avg_correlation > 0.7 else "中" if avg_correlation > 0.3 else "弱"
+                    st.metric("🎯 平均相関強度", correlation_strength)
+                
+                # 相関行列の可視化
+                st.markdown("#### 🔍 相関行列ヒートマップ")
+                
+                if n_customers > 5:  # 十分なデータがある場合
+                    fig_heatmap = px.imshow(
+                        correlation_matrix,
+                        x=correlation_matrix.columns,
+                        y=correlation_matrix.columns,
+                        color_continuous_scale='RdBu_r',
+                        zmin=-1,
+                        zmax=1,
+                        aspect='auto',
+                        title="顧客メトリクス相関行列（全顧客）"
+                    )
+                    
+                    # 相関値をテキストで表示
+                    fig_heatmap.update_traces(
+                        text=correlation_matrix.round(3),
+                        texttemplate="%{text}",
+                        textfont={"size": 10}
+                    )
+                    
+                    fig_heatmap.update_layout(height=500)
+                    st.plotly_chart(fig_heatmap, use_container_width=True)
+                
+                # 散布図分析（サンプリングした顧客で描画）
+                st.markdown("#### 📈 変数間散布図分析")
+                
+                col_mode, col_size, col_seed = st.columns(3)
+                with col_mode:
+                    sample_labels = {"reservoir": "一様サンプリング", "stratified": "都市別層化サンプリング", "none": "先頭から取得"}
+                    sample_mode = st.selectbox("🎲 抽出方法", list(sample_labels), format_func=sample_labels.get,
+                                               key="correlation_sample_mode")
+                with col_size:
+                    sample_size = st.select_slider("表示件数", options=[200, 500, 1000, 2000, 5000, 10000],
+                                                   value=2000, key="correlation_sample_size")
+                with col_seed:
+                    sample_seed = st.number_input("シード", min_value=0, value=0, step=1, key="correlation_sample_seed")
+                
+                sampled = cached_get(client, "/api/stats/customer-features",
+                                     {"sample": sample_mode, "sample_size": sample_size, "seed": int(sample_seed)})
+                customer_metrics = pd.DataFrame(sampled.get("rows", [])) if sampled else pd.DataFrame()
+                
+                if len(customer_metrics) > 1:
+                    st.caption(
+                        f"🎲 {sample_labels[sample_mode]}: 顧客 {sampled['population']:,}人中 {sampled['sampled']:,}人を表示"
+                        "（相関係数・検定は全件の値）"
+                    )
+                    if sampled.get("strata"):
+                        with st.expander("層ごとの抽出件数"):
+                            st.dataframe(
+                                pd.DataFrame.from_dict(sampled["strata"], orient="index").rename_axis("都市"),
+                                use_container_width=True
+                            )
+                    
+                    col1, col2 = st.columns(2)
+                    
+                    with col1:
+                        # 支出 vs 頻度
+                        fig_scatter1 = chart.scatter(
+                            customer_metrics,
+                            max_points=sample_size,
+                            x='order_frequency',
+                            y='total_spent',
+                            title=f"注文頻度 vs 総支出額（全件 r={corr_total_freq:.3f}）",
+                            labels={'order_frequency': '注文回数', 'total_spent': '総支出額 (¥)'},
+                            trendline='ols',
+                            color='avg_order_value',
+                            size='total_quantity',
+                            hover_data=['customer_id', 'city']
+                        )
+                        fig_scatter1.update_layout(height=400)
+                        st.plotly_chart(fig_scatter1, use_container_width=True)
+                    
+                    with col2:
+                        # 平均単価 vs 数量
+                        fig_scatter2 = chart.scatter(
+                            customer_metrics,
+                            max_points=sample_size,
+                            x='avg_quantity',
+                            y='avg_price',
+                            title=f"平均購入数量 vs 平均単価（全件 r={pair_corr('avg_quantity', 'avg_price'):.3f}）",
+                            labels={'avg_quantity': '平均購入数量', 'avg_price': '平均単価 (¥)'},
+                            trendline='ols',
+                            color='total_spent',
+                            size='order_frequency',
+                            hover_data=['customer_id', 'city']
+                        )
+                        fig_scatter2.update_layout(height=400)
+                        st.plotly_chart(fig_scatter2, use_container_width=True)
+                
+                # 地域別相関分析
+                city_analysis = pd.DataFrame(stats.get("by_city", []))
+                if len(city_analysis) > 1:
+                    st.markdown("#### 🏙️ 地域別相関分析")
+                    
+                    # 都市別バブルチャート
+                    fig_bubble = chart.scatter(
+                        city_analysis,
+                        x='avg_order_value',
+                        y='avg_quantity',
+                        size='total_sales',
+                        color='order_count',
+                        hover_name='city',
+                        title="都市別：平均注文額 vs 平均数量（バブルサイズ=総売上）",
+                        labels={
+                            'avg_order_value': '平均注文額 (¥)',
+                            'avg_quantity': '平均購入数量',
+                            'total_sales': '総売上',
+                            'order_count': '注文数'
+                        }
+                    )
+                    fig_bubble.update_layout(height=400)
+                    st.plotly_chart(fig_bubble, use_container_width=True)
+                
+                # 商品別相関分析（上位10商品）
+                top_products = pd.DataFrame(stats.get("by_product", []))
+                if len(top_products) > 1:
+                    st.markdown("#### 🛍️ 商品別相関分析")
+                    
+                    fig_product_corr = chart.scatter(
+                        top_products,
+                        x='avg_price',
+                        y='total_quantity',
+                        size='total_sales',
+                        color='order_count',
+                        hover_name='product_name',
+                        title="商品別：平均価格 vs 総販売数量（上位10商品）",
+                        labels={
+                            'avg_price': '平均価格 (¥)',
+                            'total_quantity': '総販売数量',
+                            'total_sales': '総売上',
+                            'order_count': '注文回数'
+                        }
+                    )
+                    fig_product_corr.update_layout(height=400)
+                    st.plotly_chart(fig_product_corr, use_container_width=True)
+                
+                # 統計的有意性テスト
+                st.markdown("#### 📊 統計的有意性分析")
+                
+                col1, col2 = st.columns(2)
+                
+                with col1:
+                    # ピアソン相関係数の有意性テスト（全顧客の r と n から計算）
+                    if n_customers > 5:
+                        correlations = []
+                        
+                        # 主要な相関ペア
+                        pairs = [
+                            ('total_spent', 'order_frequency', '総支出×注文頻度'),
+                            ('avg_order_value', 'avg_quantity', '平均単価×平均数量'),
+                            ('total_spent', 'avg_order_value', '総支出×平均単価')
+                        ]
+                        
+                        for var1, var2, label in pairs:
+                            corr = pair_corr(var1, var2)
+                            p_value = corr_p_value(corr, n_customers)
+                            significance = "有意" if p_value < 0.05 else "非有意"
+                            correlations.append({
+                                '変数ペア': label,
+                                '相関係数': f"{corr:.3f}",
+                                'p値': f"{p_value:.3g}",
+                                '有意性': significance
+                            })
+                        
+                        df_correlations = pd.DataFrame(correlations)
+                        st.dataframe(df_correlations, use_container_width=True, hide_index=True)
+                
+                with col2:
+                    # 相関の解釈
+                    st.markdown("**🔍 相関の解釈ガイド**")
+                    st.markdown("""
+                    - **|r| > 0.7**: 強い相関
+                    - **0.3 < |r| ≤ 0.7**: 中程度の相関
+                    - **|r| ≤ 0.3**: 弱い相関
+                    
+                    **統計的有意性**
+                    - **p < 0.05**: 統計的に有意
+                    - **p ≥ 0.05**: 統計的に非有意
+                    """)
+                
+                # ビジネス洞察
+                st.markdown("#### 💡 ビジネス洞察")
+                
+                insights = []
+                
+                if n_customers > 1:
+                    # 最も強い正の相関（対角成分を除外）
+                    off_diagonal = correlation_matrix.where(~np.eye(len(features), dtype=bool))
+                    
+                    max_corr = off_diagonal.max().max()
+                    if not pd.isna(max_corr):
+                        max_corr_pair = off_diagonal.stack().idxmax()
+                        insights.append(f"📈 最強の正の相関: {max_corr_pair[0]} と {max_corr_pair[1]} (r={max_corr:.3f})")
+                    
+                    # 顧客セグメンテーションの提案（上位20%の重複、全件で集計）
+                    segments = stats["segments"]
+                    overlap_ratio = segments["overlap"] / segments["high_frequency"] if segments["high_frequency"] else 0
+                    
+                    insights.append(f"🎯 高頻度顧客と高価値顧客の重複率: {overlap_ratio:.1%}")
+                    
+                    if overlap_ratio > 0.7:
+                        insights.append("💡 提案: 頻度向上施策が売上向上に直結する可能性が高い")
+                    elif overlap_ratio < 0.3:
+                        insights.append("💡 提案: 高頻度顧客の単価向上施策を検討")
+                
+                for insight in insights:
+                    st.info(insight)
+                
+                # データ出力
+                st.markdown("#### 📥 相関分析データ出力")
+                
+                # 相関行列のCSV出力
+                correlation_csv = correlation_matrix.to_csv().encode('utf-8-sig')
+                st.download_button(
+                    label="🔗 相関行列をダウンロード",
+                    data=correlation_csv,
+                    file_name=f"correlation_matrix_{pd.Timestamp.now().strftime('%Y%m%d_%H%M')}.csv",
+                    mime="text/csv"
+                )
+                
+        except Exception as e:
+            st.error(f"❌ 相関分析でエラーが発生しました: {str(e)}")
+            with st.expander("🔍 エラー詳細"):
+                import traceback
+                st.code(traceback.format_exc())
@@ -0,0 +1,380 @@
+# mcp_demo_pages/data_creation.py
+# データ作成ページ: 顧客・注文の作成フォームと作成履歴
+
+import streamlit as st
+
+from mcp_api_client import MCPAPIClient
+from mcp_demo_pages.base import DemoPage
+from mcp_demo_pages.data_layer import cached_get, load_page_data
+
+
+class DataCreationPage(DemoPage):
+    """データ作成ページ"""
+
+    def render(self):
+        """データ作成ページの描画（デモ機能4）"""
+        st.markdown("## 📝 データ作成デモ")
+        st.markdown("新しい顧客・注文データの作成と管理")
+        
+        client = self.get_api_client()
+        if not client:
+            st.error("API サーバーに接続できません。")
+            return
+        
+        # タブで機能を分割
+        tab1, tab2, tab3 = st.tabs(["👤 顧客作成", "🛒 注文作成", "📋 作成履歴"])
+        
+        with tab1:
+            self._render_customer_creation_form(client)
+        
+        with tab2:
+            self._render_order_creation_form(client)
+            
+        with tab3:
+            self._render_creation_history()
+
+    def _render_customer_creation_form(self, client: MCPAPIClient):
+        """顧客作成フォームの描画"""
+        st.markdown("### 👤 新規顧客登録")
+        
+        # 既存のメールアドレス確認ボタン
+        col1, col2 = st.columns([3, 1])
+        with col2:
+            if st.button("📧 既存メール確認", help="登録済みのメールアドレスを確認"):
+                try:
+                    customers_data = cached_get(client, "/api/customers", {"limit": 50})
+                    if customers_data and isinstance(customers_data, list):
+                        emails = [c.get("email", "") for c in customers_data if c.get("email")]
+                        st.info(f"**登録済みメールアドレス例:**\n" + "\n".join(emails[:10]))
+                    else:
+                        st.info("顧客データが見つかりません。")
+                except Exception as e:
+                    st.warning(f"メール確認に失敗: {str(e)}")
+        
+        with st.form("customer_creation_form"):
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                customer_name = st.text_input(
+                    "顧客名 *", 
+                    placeholder="例: 山田太郎",
+                    help="顧客の氏名を入力してください"
+                )
+                
+                customer_city = st.selectbox(
+                    "都市 *",
+                    ["東京", "大阪", "名古屋", "福岡", "札幌", "横浜", "京都"],
+                    help="居住都市を選択してください"
+                )
+            
+            with col2:
+                customer_email = st.text_input(
+                    "メールアドレス *",
+                    placeholder="例: yamada@example.com",
+                    help="有効なメールアドレスを入力してください"
+                )
+                
+                st.markdown("**必須項目には * が付いています**")
+            
+            # 送信ボタン
+            submitted = st.form_submit_button("👤 顧客を作成", type="primary", use_container_width=True)
+            
+            if submitted:
+                # バリデーション
+                if not customer_name or not customer_email or not customer_city:
+                    st.error("❌ すべての必須項目を入力してください。")
+                    return
+                
+                if "@" not in customer_email or "." not in customer_email:
+                    st.error("❌ 有効なメールアドレスを入力してください。")
+                    return
+                
+                try:
+                    with st.spinner("顧客を作成中..."):
+                        # API呼び出し
+                        customer_data = {
+                            "name": customer_name,
+                            "email": customer_email,
+                            "city": customer_city
+                        }
+                        
+                        result = client._make_request("POST", "/api/customers", json=customer_data)
+                        
+                        if result:
+                            self._invalidate_after_write("customers", [customer_data])
+                            
+                            # セッション状態に保存
+                            if 'created_customers' not in st.session_state:
+                                st.session_state.created_customers = []
+                            st.session_state.created_customers.append(result)
+                            
+                            # 成功メッセージ
+                            st.success("✅ 顧客が正常に作成されました！")
+                            
+                            # 作成された顧客情報を表示
+                            col1, col2, col3, col4 = st.columns(4)
+                            with col1:
+                                st.metric("顧客ID", result.get("id", "N/A"))
+                            with col2:
+                                st.metric("氏名", result.get("name", "N/A"))
+                            with col3:
+                                st.metric("都市", result.get("city", "N/A"))
+                            with col4:
+                                st.metric("登録日", result.get("created_at", "N/A"))
+                                
+                        else:
+                            st.error("❌ 顧客の作成に失敗しました。")
+                
+                except Exception as e:
+                    error_message = str(e)
+                    if "422" in error_message and "Email already exists" in error_message:
+                        st.error("❌ このメールアドレスは既に登録されています。別のメールアドレスを使用してください。")
+                        st.info("💡 ヒント: 一意のメールアドレスが必要です。例: tanaka2@example.com")
+                    elif "422" in error_message:
+                        st.error("❌ 入力データに問題があります。入力内容を確認してください。")
+                    else:
+                        st.error(f"❌ エラーが発生しました: {error_message}")
+                    
+                    # エラーの詳細情報を展開可能セクションで表示
+                    with st.expander("🔍 エラー詳細"):
+                        st.code(error_message)
+
+    def _render_order_creation_form(self, client: MCPAPIClient):
+        """注文作成フォームの描画"""
+        st.markdown("### 🛒 新規注文登録")
+        
+        # まず顧客と商品のリストを取得
+        try:
+            with st.spinner("顧客・商品データ読み込み中..."):
+                page_data = load_page_data(client, "order_creation_form")
+                customers_data = page_data.get("customers")
+                products_data = page_data.get("products")
+                page_data.render_issues()
+                
+                # レスポンス形式を統一的に処理
+                if customers_data:
+                    if isinstance(customers_data, list):
+                        customers = customers_data
+                    elif isinstance(customers_data, dict) and "customers" in customers_data:
+                        customers = customers_data["customers"]
+                    else:
+                        customers = []
+                else:
+                    customers = []
+                
+                if products_data:
+                    if isinstance(products_data, list):
+                        products = products_data
+                    elif isinstance(products_data, dict) and "products" in products_data:
+                        products = products_data["products"]
+                    else:
+                        products = []
+                else:
+                    products = []
+                
+                if not customers:
+                    st.warning("⚠️ 顧客データが見つかりません。先に顧客を作成してください。")
+                    return
+                
+                if not products:
+                    st.warning("⚠️ 商品データが見つかりません。システム管理者にお問い合わせください。")
+                    return
+            
+            with st.form("order_creation_form"):
+                col1, col2 = st.columns(2)
+                
+                with col1:
+                    # 顧客選択
+                    customer_options = {f"{c['name']} (ID: {c['id']})": c['id'] for c in customers}
+                    selected_customer_label = st.selectbox(
+                        "顧客 *",
+                        list(customer_options.keys()),
+                        help="注文を行う顧客を選択してください"
+                    )
+                    selected_customer_id = customer_options[selected_customer_label]
+                    
+                    # 商品選択
+                    product_options = {f"{p['name']} (¥{p['price']:,})": p for p in products}
+                    selected_product_label = st.selectbox(
+                        "商品 *",
+                        list(product_options.keys()),
+                        help="注文する商品を選択してください"
+                    )
+                    selected_product = product_options[selected_product_label]
+                
+                with col2:
+                    # 数量
+                    quantity = st.number_input(
+                        "数量 *",
+                        min_value=1,
+                        max_value=100,
+                        value=1,
+                        help="注文する商品の数量を指定してください"
+                    )
+                    
+                    # 合計金額の表示
+                    total_price = selected_product['price'] * quantity
+                    st.metric("合計金額", f"¥{total_price:,}")
+                
+                # 注文詳細の確認
+                st.markdown("#### 📋 注文詳細確認")
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    st.info(f"**顧客**: {selected_customer_label}")
+                with col2:
+                    st.info(f"**商品**: {selected_product['name']}")
+                with col3:
+                    st.info(f"**数量**: {quantity}個")
+                
+                # 送信ボタン
+                submitted = st.form_submit_button("🛒 注文を作成", type="primary", use_container_width=True)
+                
+                if submitted:
+                    try:
+                        with st.spinner("注文を作成中..."):
+                            # API呼び出し
+                            order_data = {
+                                "customer_id": selected_customer_id,
+                                "product_name": selected_product['name'],
+                                "quantity": quantity,
+                                "price": selected_product['price']
+                            }
+                            
+                            result = client._make_request("POST", "/api/orders", json=order_data)
+                            
+                            if result:
+                                self._invalidate_after_write("orders", [order_data])
+                                
+                                # セッション状態に保存
+                                if 'created_orders' not in st.session_state:
+                                    st.session_state.created_orders = []
+                                st.session_state.created_orders.append(result)
+                                
+                                # 成功メッセージ
+                                st.success("✅ 注文が正常に作成されました！")
+                                
+                                # 作成された注文情報を表示
+                                col1, col2, col3, col4 = st.columns(4)
+                                with col1:
+                                    st.metric("注文ID", result.get("id", "N/A"))
+                                with col2:
+                                    st.metric("顧客ID", result.get("customer_id", "N/A"))
+                                with col3:
+                                    st.metric("数量", f"{result.get('quantity', 0)}個")
+                                with col4:
+                                    order_total = result.get('price', 0) * result.get('quantity', 0)
+                                    st.metric("合計", f"¥{order_total:,}")
+                                    
+                            else:
+                                st.error("❌ 注文の作成に失敗しました。")
+                    
+                    except Exception as e:
+                        st.error(f"❌ エラーが発生しました: {str(e)}")
+                        
+        except Exception as e:
+            st.error(f"❌ データ読み込みエラー: {str(e)}")
+
+    def _render_creation_history(self):
+        """作成履歴の表示"""
+        st.markdown("### 📋 作成履歴")
+        
+        # 顧客作成履歴
+        if st.session_state.get('created_customers'):
+            st.markdown("#### 👥 作成した顧客")
+            
+            import pandas as pd
+            df_customers = pd.DataFrame(st.session_state.created_customers)
+            
+            # 表示用に整形
+            display_cols = ["id", "name", "email", "city", "created_at"]
+            df_display = df_customers[[col for col in display_cols if col in df_customers.columns]]
+            df_display = df_display.rename(columns={
+                "id": "ID",
+                "name": "氏名",
+                "email": "メール",
+                "city": "都市",
+                "created_at": "作成日時"
+            })
+            
+            st.dataframe(df_display, use_container_width=True, hide_index=True)
+            
+            # CSVダウンロード
+            csv = df_display.to_csv(index=False).encode('utf-8-sig')
+            st.download_button(
+                label="📥 顧客データをCSVダウンロード",
+                data=csv,
+                file_name=f"created_customers_{pd.Timestamp.now().strftime('%Y%m%d')}.csv",
+                mime="text/csv"
+            )
+        else:
+            st.info("まだ顧客を作成していません。")
+        
+        # 注文作成履歴
+        if st.session_state.get('created_orders'):
+            st.markdown("#### 🛒 作成した注文")
+            
+            df_orders = pd.DataFrame(st.session_state.created_orders)
+            
+            # 合計金額を計算
+            if 'price' in df_orders.columns and 'quantity' in df_orders.columns:
+                df_orders['total'] = df_orders['price'] * df_orders['quantity']
+            
+            # 表示用に整形
+            display_cols = ["id", "customer_id", "product_name", "quantity", "price", "total", "created_at"]
+            df_display = df_orders[[col for col in display_cols if col in df_orders.columns]]
+            df_display = df_display.rename(columns={
+                "id": "注文ID",
+                "customer_id": "顧客ID",
+                "product_name": "商品名",
+                "quantity": "数量",
+                "price": "単価",
+                "total": "合計",
+                "created_at": "作成日時"
+            })
+            
+            # 金額をフォーマット
+            for col in ["単価", "合計"]:
+                if col in df_display.columns:
+                    df_display[col] = df_display[col].apply(lambda x: f"¥{x:,}" if pd.notnull(x) else "")
+            
+            st.dataframe(df_display, use_container_width=True, hide_index=True)
+            
+            # 統計情報
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("作成注文数", len(st.session_state.created_orders))
+            with col2:
+                if 'total' in df_orders.columns:
+                    total_amount = df_orders['total'].sum()
+                    st.metric("総売上", f"¥{total_amount:,}")
+            with col3:
+                if 'quantity' in df_orders.columns:
+                    total_quantity = df_orders['quantity'].sum()
+                    st.metric("総数量", f"{total_quantity}個")
+            
+            # CSVダウンロード
+            csv = df_display.to_csv(index=False).encode('utf-8-sig')
+            st.download_button(
+                label="📥 注文データをCSVダウンロード",
+                data=csv,
+                file_name=f"created_orders_{pd.Timestamp.now().strftime('%Y%m%d')}.csv",
+                mime="text/csv"
+            )
+        else:
+            st.info("まだ注文を作成していません。")
+        
+        # データクリアオプション
+        st.markdown("---")
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            if st.button("🗑️ 顧客履歴をクリア", help="作成した顧客の履歴を消去します"):
+                st.session_state.created_customers = []
+                st.success("顧客履歴をクリアしました。")
+                st.rerun()
+        
+        with col2:
+            if st.button("🗑️ 注文履歴をクリア", help="作成した注文の履歴を消去します"):
+                st.session_state.created_orders = []
+                st.success("注文履歴をクリアしました。")
+                st.rerun()
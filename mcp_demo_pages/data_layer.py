@@ -0,0 +1,336 @@
+# mcp_demo_pages/data_layer.py
+# デモアプリのデータ取得層（セッション共有キャッシュ・ページ単位の並行取得・書き込み時の無効化）
+
+import copy
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future, FIRST_COMPLETED, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Tuple, Iterator, Callable
+
+import pandas as pd
+import streamlit as st
+
+from mcp_api_client import MCPAPIClient
+from mcp_demo_pages.rerun_timer import timed_phase
+
+
+# =====================================
+# セッション共有のAPIデータキャッシュ
+# =====================================
+
+class APIDataCache:
+    """GETレスポンスを (ベースURL, エンドポイント, パラメータ, 形式) 単位で保持するキャッシュ
+    
+    Streamlit の再実行のたびに同じデータを取り直さないよう、全セッションで共有する。
+    エントリは TTL で期限切れになるほか、データ作成・操作ページでの書き込み後に
+    invalidate() で影響するキーだけを破棄する。呼び出し側の加工がキャッシュを
+    汚さないよう、返す値は常にコピー。
+    
+    invalidate() はエンドポイントごとの世代番号も進める。書き込み前に始まった取得が
+    書き込み後に完了しても、世代が変わっていれば結果を保存しない（古いデータが
+    TTL の間ずっと共有されるのを防ぐ）。同じキーの同時ミスは1回の取得にまとめる。
+    """
+    
+    def __init__(self, ttl: float = 30.0, max_entries: int = 256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, Tuple[float, Any]]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._inflight: Dict[tuple, Tuple[int, Future]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.invalidations = 0
+    
+    @staticmethod
+    def make_key(base_url: str, endpoint: str, params: Optional[Dict[str, Any]] = None,
+                 frame: Optional[str] = None) -> tuple:
+        frozen = tuple(sorted((k, str(v)) for k, v in (params or {}).items() if v is not None))
+        return (base_url, endpoint, frozen, frame)
+    
+    @staticmethod
+    def _copy(value: Any) -> Any:
+        if isinstance(value, pd.DataFrame):
+            return value.copy()
+        return copy.deepcopy(value)
+    
+    def fetch(self, key: tuple, loader: Callable[[], Any], max_age: Optional[float] = None) -> Any:
+        """キャッシュがあれば返し、なければ loader() で取得して保存
+        
+        max_age を指定すると TTL より短い鮮度を要求できる（0 で強制再取得）。
+        同じキーを取得中のスレッドがあれば、その結果を待って共有する。
+        例外は保存せず、待っていた呼び出し側にもそのまま送出する。
+        """
+        max_age = self.ttl if max_age is None else min(max_age, self.ttl)
+        now = time.monotonic()
+        endpoint = key[1]
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] < max_age:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._copy(entry[1])
+            self.misses += 1
+            generation = self._generations.get(endpoint, 0)
+            inflight = self._inflight.get(key)
+            if inflight is not None and inflight[0] == generation:
+                self.coalesced += 1
+                future = inflight[1]
+                leader = False
+            else:
+                future = Future()
+                self._inflight[key] = (generation, future)
+                leader = True
+        
+        if not leader:
+            return self._copy(future.result())
+        
+        try:
+            value = loader()
+        except BaseException as e:
+            with self._lock:
+                if self._inflight.get(key, (None, None))[1] is future:
+                    del self._inflight[key]
+            future.set_exception(e)
+            raise
+        
+        with self._lock:
+            if self._inflight.get(key, (None, None))[1] is future:
+                del self._inflight[key]
+            # 取得中に invalidate() された場合、この値は書き込み前のものかもしれないので保存しない
+            if value is not None and self._generations.get(endpoint, 0) == generation:
+                self._entries[key] = (time.monotonic(), value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        future.set_result(value)
+        return self._copy(value)
+    
+    def invalidate(self, endpoint: str, **filters: Any) -> int:
+        """エンドポイントが一致するエントリを破棄し、件数を返す
+        
+        filters はパラメータ名ごとの値（または値の集合）。そのパラメータで絞り込んで
+        いないエントリと、値が一致するエントリだけが影響を受ける。
+        例: invalidate("/api/customers", city={"東京"}) は city 未指定と city=東京 のみ破棄
+        """
+        wanted = {
+            name: {str(v) for v in (values if isinstance(values, (set, list, tuple)) else [values])}
+            for name, values in filters.items()
+        }
+        with self._lock:
+            # 取得中の値は保存させず、以降のミスは取得中の結果を待たずに取り直させる
+            self._generations[endpoint] = self._generations.get(endpoint, 0) + 1
+            for key in [key for key in self._inflight if key[1] == endpoint]:
+                del self._inflight[key]
+            stale = []
+            for key in self._entries:
+                if key[1] != endpoint:
+                    continue
+                params = dict(key[2])
+                if all(name not in params or params[name] in values for name, values in wanted.items()):
+                    stale.append(key)
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+        return len(stale)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            for endpoint in {key[1] for key in self._inflight} | set(self._generations):
+                self._generations[endpoint] = self._generations.get(endpoint, 0) + 1
+            self._inflight.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries"      : len(self._entries),
+                "hits"         : self.hits,
+                "misses"       : self.misses,
+                "coalesced"    : self.coalesced,
+                "hit_rate"     : self.hits / lookups if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "ttl"          : self.ttl,
+            }
+
+
+@st.cache_resource
+def get_shared_api_cache() -> APIDataCache:
+    """プロセス内で1つのキャッシュを全セッションで共有"""
+    return APIDataCache(ttl=float(os.getenv("MCP_DASHBOARD_CACHE_TTL", "30")))
+
+
+def cached_get(client: MCPAPIClient, endpoint: str, params: Optional[Dict[str, Any]] = None,
+               frame: Optional[str] = None, max_age: Optional[float] = None) -> Any:
+    """共有キャッシュ経由のGET（frame 指定時は型付きDataFrame）"""
+    cache = get_shared_api_cache()
+    key = APIDataCache.make_key(client.base_url, endpoint, params, frame)
+    if frame:
+        loader = lambda: client._fetch_dataframe(endpoint, dict(params or {}), frame)
+    else:
+        loader = lambda: client._make_request("GET", endpoint, params=params or None)
+    with timed_phase("data_fetch"):
+        return cache.fetch(key, loader, max_age=max_age)
+
+
+def invalidate_after_write(resource: str, rows: List[Dict[str, Any]]):
+    """書き込みで古くなる共有キャッシュのキーだけを破棄
+    
+    一覧は書き込んだ行が絞り込み条件に該当しうるもの（条件なし・値一致）だけを、
+    統計は売上統計と該当顧客の注文統計だけを対象とする。
+    """
+    cache = get_shared_api_cache()
+    if resource == "customers":
+        cities = {row.get("city") for row in rows}
+        cache.invalidate("/api/customers", city=cities)
+        cache.invalidate("/api/stats/sales")  # 都市別売上は顧客テーブルと結合している
+    elif resource == "orders":
+        customer_ids = {row.get("customer_id") for row in rows}
+        # product_name は部分一致（ILIKE）の絞り込みなので値では判定できず、顧客IDのみで絞る
+        cache.invalidate("/api/orders", customer_id=customer_ids)
+        cache.invalidate("/api/stats/sales")
+        cache.invalidate("/api/stats/sales/daily")
+        cache.invalidate("/api/stats/correlation")
+        cache.invalidate("/api/stats/customer-features")
+        for customer_id in customer_ids:
+            cache.invalidate(f"/api/stats/customers/{customer_id}/orders")
+
+
+# =====================================
+# ページ単位の並行データ取得
+# =====================================
+
+@dataclass(frozen=True)
+class DataDependency:
+    """ページが必要とするデータ1件の宣言"""
+    key: str
+    endpoint: str
+    params: Tuple[Tuple[str, Any], ...] = ()
+    frame: Optional[str] = None  # 指定時は型付きDataFrameで取得（FRAME_SCHEMAS のキー）
+
+    def fetch(self, client: MCPAPIClient, cache: APIDataCache, max_age: Optional[float] = None) -> Any:
+        params = dict(self.params)
+        key = APIDataCache.make_key(client.base_url, self.endpoint, params, self.frame)
+        if self.frame:
+            loader = lambda: client._fetch_dataframe(self.endpoint, params, self.frame)
+        else:
+            loader = lambda: client._make_request("GET", self.endpoint, params=params or None)
+        return cache.fetch(key, loader, max_age=max_age)
+
+
+@dataclass(frozen=True)
+class PageDataSpec:
+    """ページのデータ依存と締め切り（秒）、キャッシュの鮮度上限（秒、None で TTL どおり）"""
+    dependencies: Tuple[DataDependency, ...]
+    deadline: float = 8.0
+    max_age: Optional[float] = None
+
+
+PAGE_DATA_SPECS: Dict[str, PageDataSpec] = {
+    "sales_analysis": PageDataSpec((
+        DataDependency("stats", "/api/stats/sales"),
+        DataDependency("orders", "/api/orders", (("limit", 1000),), frame="orders"),
+    )),
+    "customer_analysis": PageDataSpec((
+        DataDependency("customers", "/api/customers", (("limit", 1000),)),
+        DataDependency("orders", "/api/orders", (("limit", 1000),)),
+    )),
+    "trend_analysis": PageDataSpec((
+        DataDependency("daily", "/api/stats/sales/daily", (("top_products", 5),)),
+    )),
+    "correlation_analysis": PageDataSpec((
+        DataDependency("stats", "/api/stats/correlation"),
+    )),
+    "order_creation_form": PageDataSpec((
+        DataDependency("customers", "/api/customers", (("limit", 100),)),
+        DataDependency("products", "/api/products", (("limit", 100),)),
+    ), deadline=5.0),
+}
+
+# 全セッションで共有するワーカー（Streamlitの描画はメインスレッドのみで行う）
+_PAGE_DATA_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="mcp-page-data")
+
+
+@dataclass
+class PageData:
+    """並行取得中のページデータ
+    
+    get() は該当データの到着までだけ待つので、ページは描画順に get() を呼べば
+    先に届いたデータから順に描画できる。締め切りを過ぎたデータは default を返す。
+    """
+    futures: Dict[str, Future]
+    deadline_at: float
+    errors: Dict[str, str] = field(default_factory=dict)
+    timed_out: List[str] = field(default_factory=list)
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        future = self.futures[key]
+        try:
+            with timed_phase("data_fetch"):
+                return future.result(timeout=max(0.0, self.deadline_at - time.perf_counter()))
+        except FutureTimeoutError:
+            if key not in self.timed_out:
+                self.timed_out.append(key)
+        except Exception as e:
+            self.errors[key] = str(e)
+        return default
+    
+    def as_completed(self) -> Iterator[str]:
+        """締め切りまでに届いたデータのキーを到着順に返す"""
+        pending = set(self.futures.values())
+        keys = {future: key for key, future in self.futures.items()}
+        while pending:
+            remaining = self.deadline_at - time.perf_counter()
+            if remaining <= 0:
+                break
+            with timed_phase("data_fetch"):
+                done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield keys[future]
+        for future in pending:
+            if keys[future] not in self.timed_out:
+                self.timed_out.append(keys[future])
+    
+    def render_issues(self):
+        """取得できなかったデータを表示"""
+        if self.timed_out:
+            st.warning(f"⏱️ 締め切りまでに取得できなかったデータ: {', '.join(self.timed_out)}")
+        for key, error in self.errors.items():
+            st.warning(f"⚠️ {key} の取得に失敗: {error}")
+
+
+def load_page_data(client: MCPAPIClient, page: str) -> PageData:
+    """ページの依存データをまとめて並行取得開始（待たずに返る）
+    
+    共有キャッシュにあるデータはワーカー内で即座に返るため、入力が変わらない再実行では
+    ネットワークI/Oは発生しない。
+    """
+    spec = PAGE_DATA_SPECS[page]
+    cache = get_shared_api_cache()
+    futures = {
+        dep.key: _PAGE_DATA_EXECUTOR.submit(dep.fetch, client, cache, spec.max_age)
+        for dep in spec.dependencies
+    }
+    return PageData(futures, time.perf_counter() + spec.deadline)
+
+
+# =====================================
+# エクスポート
+# =====================================
+__all__ = [
+    'APIDataCache',
+    'get_shared_api_cache',
+    'cached_get',
+    'invalidate_after_write',
+    'DataDependency',
+    'PageDataSpec',
+    'PAGE_DATA_SPECS',
+    'PageData',
+    'load_page_data',
+]
@@ -0,0 +1,345 @@
+# mcp_demo_pages/error_handling.py
+# エラーテストページ: APIエラーハンドリングの検証
+
+import time
+
+import streamlit as st
+
+from mcp_api_client import MCPAPIClient
+from mcp_demo_pages.base import DemoPage
+
+
+class ErrorHandlingPage(DemoPage):
+    """エラーテストページ"""
+
+    def render(self):
+        """エラーハンドリングページの描画（デモ機能6）"""
+        st.markdown("## 🚨 エラーテストデモ")
+        st.markdown("APIエラーハンドリングとシステムの堅牢性を検証するテスト機能")
+        
+        client = self.get_api_client()
+        if not client:
+            st.error("API サーバーに接続できません。")
+            return
+        
+        # タブでエラーテストを分類
+        tab1, tab2, tab3, tab4 = st.tabs(["🔍 基本エラーテスト", "📝 データ投入エラー", "🌐 ネットワークエラー", "📊 エラー履歴"])
+        
+        with tab1:
+            self._render_basic_error_tests(client)
+        
+        with tab2:
+            self._render_data_error_tests(client)
+            
+        with tab3:
+            self._render_network_error_tests(client)
+            
+        with tab4:
+            self._render_error_history()
+
+    def _render_basic_error_tests(self, client: MCPAPIClient):
+        """基本的なエラーテスト"""
+        st.markdown("### 🔍 基本エラーテスト")
+        st.markdown("一般的なAPIエラーを意図的に発生させてハンドリングを確認")
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.markdown("#### 404 エラーテスト")
+            if st.button("存在しない顧客を取得", key="test_404_customer"):
+                with st.spinner("エラーテスト実行中..."):
+                    try:
+                        result = client._make_request("GET", "/api/customers/99999")
+                        st.success(f"予期しない成功: {result}")
+                    except Exception as e:
+                        error_msg = str(e)
+                        if "404" in error_msg:
+                            st.success("✅ 404エラーが正常にハンドリングされました")
+                            st.code(f"エラー詳細: {error_msg}")
+                            self._log_error_test("404エラー", "顧客取得", "成功", error_msg)
+                        else:
+                            st.error(f"❌ 予期しないエラー: {error_msg}")
+            
+            if st.button("存在しない商品を取得", key="test_404_product"):
+                with st.spinner("エラーテスト実行中..."):
+                    try:
+                        result = client._make_request("GET", "/api/products/99999")
+                        st.success(f"予期しない成功: {result}")
+                    except Exception as e:
+                        error_msg = str(e)
+                        if "404" in error_msg:
+                            st.success("✅ 404エラーが正常にハンドリングされました")
+                            st.code(f"エラー詳細: {error_msg}")
+                            self._log_error_test("404エラー", "商品取得", "成功", error_msg)
+                        else:
+                            st.error(f"❌ 予期しないエラー: {error_msg}")
+        
+        with col2:
+            st.markdown("#### 400/422 エラーテスト")
+            if st.button("無効なデータで顧客作成", key="test_422_customer"):
+                with st.spinner("エラーテスト実行中..."):
+                    try:
+                        # 無効なメールアドレスでテスト
+                        invalid_data = {
+                            "name": "",  # 空の名前
+                            "email": "invalid-email",  # 無効なメール
+                            "city": ""  # 空の都市
+                        }
+                        result = client._make_request("POST", "/api/customers", json=invalid_data)
+                        st.success(f"予期しない成功: {result}")
+                    except Exception as e:
+                        error_msg = str(e)
+                        if "422" in error_msg or "400" in error_msg:
+                            st.success("✅ バリデーションエラーが正常にハンドリングされました")
+                            st.code(f"エラー詳細: {error_msg}")
+                            self._log_error_test("422エラー", "顧客作成", "成功", error_msg)
+                        else:
+                            st.error(f"❌ 予期しないエラー: {error_msg}")
+            
+            if st.button("重複メールで顧客作成", key="test_duplicate_email"):
+                with st.spinner("エラーテスト実行中..."):
+                    try:
+                        # 既存のメールアドレスでテスト
+                        duplicate_data = {
+                            "name": "テストユーザー",
+                            "email": "yamada@example.com",  # 既存のメール
+                            "city": "東京"
+                        }
+                        result = client._make_request("POST", "/api/customers", json=duplicate_data)
+                        st.success(f"予期しない成功: {result}")
+                    except Exception as e:
+                        error_msg = str(e)
+                        if "422" in error_msg:
+                            st.success("✅ 重複メールエラーが正常にハンドリングされました")
+                            st.code(f"エラー詳細: {error_msg}")
+                            self._log_error_test("重複エラー", "顧客作成", "成功", error_msg)
+                        else:
+                            st.error(f"❌ 予期しないエラー: {error_msg}")
+
+    def _render_data_error_tests(self, client: MCPAPIClient):
+        """データ投入関連のエラーテスト"""
+        st.markdown("### 📝 データ投入エラーテスト")
+        st.markdown("不正なデータ形式や制約違反のテスト")
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.markdown("#### 注文データエラー")
+            if st.button("存在しない顧客で注文作成", key="test_invalid_customer_order"):
+                with st.spinner("エラーテスト実行中..."):
+                    try:
+                        invalid_order = {
+                            "customer_id": 99999,  # 存在しない顧客ID
+                            "product_name": "テスト商品",
+                            "quantity": 1,
+                            "price": 1000
+                        }
+                        result = client._make_request("POST", "/api/orders", json=invalid_order)
+                        st.success(f"予期しない成功: {result}")
+                    except Exception as e:
+                        error_msg = str(e)
+                        if "404" in error_msg:
+                            st.success("✅ 存在しない顧客エラーが正常にハンドリングされました")
+                            st.code(f"エラー詳細: {error_msg}")
+                            self._log_error_test("外部キーエラー", "注文作成", "成功", error_msg)
+                        else:
+                            st.error(f"❌ 予期しないエラー: {error_msg}")
+            
+            if st.button("負の値で注文作成", key="test_negative_order"):
+                with st.spinner("エラーテスト実行中..."):
+                    try:
+                        negative_order = {
+                            "customer_id": 1,
+                            "product_name": "テスト商品",
+                            "quantity": -5,  # 負の数量
+                            "price": -1000   # 負の価格
+                        }
+                        result = client._make_request("POST", "/api/orders", json=negative_order)
+                        st.success(f"予期しない成功: {result}")
+                    except Exception as e:
+                        error_msg = str(e)
+                        if "422" in error_msg or "400" in error_msg:
+                            st.success("✅ 負の値エラーが正常にハンドリングされました")
+                            st.code(f"エラー詳細: {error_msg}")
+                            self._log_error_test("バリデーションエラー", "注文作成", "成功", error_msg)
+                        else:
+                            st.warning(f"⚠️ エラーが検出されませんでした（API仕様要確認）: {error_msg}")
+        
+        with col2:
+            st.markdown("#### 大量データエラー")
+            if st.button("大量データで負荷テスト", key="test_bulk_data"):
+                with st.spinner("大量データテスト実行中..."):
+                    try:
+                        # 1000件の顧客データをチャンク分割して一括作成
+                        timestamp = int(time.time())
+                        bulk_customers = (
+                            {
+                                "name": f"テストユーザー{i}",
+                                "email": f"bulk_test_{timestamp}_{i}@example.com",
+                                "city": "東京"
+                            }
+                            for i in range(1000)
+                        )
+                        result = client.create_customers_bulk(bulk_customers, chunk_size=200)
+                        if result.created:
+                            self._invalidate_after_write("customers", [{"city": "東京"}])
+                        success_count = result.created
+                        error_count = result.failed
+
+                        st.success(f"✅ 大量データテスト完了")
+                        st.metric("成功", success_count)
+                        st.metric("エラー", error_count)
+                        self._log_error_test("大量データ", "顧客作成", f"成功{success_count}/エラー{error_count}", "")
+                        
+                    except Exception as e:
+                        st.error(f"❌ 大量データテスト失敗: {str(e)}")
+            
+            if st.button("長すぎる文字列でテスト", key="test_long_string"):
+                with st.spinner("長文字列テスト実行中..."):
+                    try:
+                        long_string_data = {
+                            "name": "A" * 1000,  # 1000文字の名前
+                            "email": f"{'a' * 100}@{'b' * 100}.com",  # 長いメール
+                            "city": "C" * 500  # 500文字の都市名
+                        }
+                        result = client._make_request("POST", "/api/customers", json=long_string_data)
+                        self._invalidate_after_write("customers", [long_string_data])
+                        st.success(f"予期しない成功: {result}")
+                    except Exception as e:
+                        error_msg = str(e)
+                        if "422" in error_msg or "400" in error_msg:
+                            st.success("✅ 長文字列エラーが正常にハンドリングされました")
+                            st.code(f"エラー詳細: {error_msg[:200]}...")
+                            self._log_error_test("文字列長エラー", "顧客作成", "成功", error_msg)
+                        else:
+                            st.warning(f"⚠️ エラーが検出されませんでした: {error_msg}")
+
+    def _render_network_error_tests(self, client: MCPAPIClient):
+        """ネットワーク関連のエラーテスト"""
+        st.markdown("### 🌐 ネットワークエラーテスト")
+        st.markdown("接続エラーやタイムアウトのシミュレーション")
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.markdown("#### 存在しないエンドポイント")
+            if st.button("無効なURLでアクセス", key="test_invalid_url"):
+                with st.spinner("無効URLテスト実行中..."):
+                    try:
+                        result = client._make_request("GET", "/api/nonexistent")
+                        st.success(f"予期しない成功: {result}")
+                    except Exception as e:
+                        error_msg = str(e)
+                        if "404" in error_msg:
+                            st.success("✅ 無効URLエラーが正常にハンドリングされました")
+                            st.code(f"エラー詳細: {error_msg}")
+                            self._log_error_test("URLエラー", "アクセス", "成功", error_msg)
+                        else:
+                            st.error(f"❌ 予期しないエラー: {error_msg}")
+            
+            if st.button("無効なHTTPメソッド", key="test_invalid_method"):
+                with st.spinner("無効メソッドテスト実行中..."):
+                    try:
+                        # DELETEメソッドでcustomersにアクセス（未サポート）
+                        result = client._make_request("DELETE", "/api/customers")
+                        st.success(f"予期しない成功: {result}")
+                    except Exception as e:
+                        error_msg = str(e)
+                        if "405" in error_msg or "404" in error_msg:
+                            st.success("✅ 無効メソッドエラーが正常にハンドリングされました")
+                            st.code(f"エラー詳細: {error_msg}")
+                            self._log_error_test("メソッドエラー", "アクセス", "成功", error_msg)
+                        else:
+                            st.error(f"❌ 予期しないエラー: {error_msg}")
+        
+        with col2:
+            st.markdown("#### サーバー状態テスト")
+            if st.button("ヘルスチェック確認", key="test_health_check"):
+                with st.spinner("ヘルスチェック実行中..."):
+                    try:
+                        result = client.check_health()
+                        if result:
+                            st.success("✅ サーバーは正常に動作しています")
+                            self._log_error_test("ヘルスチェック", "サーバー状態", "正常", "")
+                        else:
+                            st.error("❌ サーバーに問題があります")
+                            self._log_error_test("ヘルスチェック", "サーバー状態", "異常", "")
+                    except Exception as e:
+                        st.error(f"❌ ヘルスチェック失敗: {str(e)}")
+                        self._log_error_test("ヘルスチェック", "サーバー状態", "エラー", str(e))
+            
+            st.markdown("#### 接続テスト")
+            if st.button("APIベースURL確認", key="test_base_url"):
+                st.info(f"**現在のAPIベースURL**: {client.base_url}")
+                connected = st.session_state.api_connected
+                st.info(f"**アクセス可能**: {'⚪ 未確認' if connected is None else '✅' if connected else '❌'}")
+
+    def _render_error_history(self):
+        """エラーテスト履歴の表示"""
+        st.markdown("### 📊 エラーテスト履歴")
+        
+        if 'error_test_history' in st.session_state and st.session_state.error_test_history:
+            import pandas as pd
+            
+            df = pd.DataFrame(st.session_state.error_test_history)
+            df['timestamp'] = pd.to_datetime(df['timestamp']).dt.strftime('%Y-%m-%d %H:%M:%S')
+            
+            # 最新順にソート
+            df = df.sort_values('timestamp', ascending=False)
+            
+            # テーブル表示
+            st.dataframe(
+                df.rename(columns={
+                    'timestamp': '実行時刻',
+                    'error_type': 'エラー種別',
+                    'test_case': 'テストケース',
+                    'result': '結果',
+                    'details': '詳細'
+                }),
+                use_container_width=True,
+                hide_index=True
+            )
+            
+            # 統計情報
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("総テスト数", len(df))
+            with col2:
+                success_count = len(df[df['result'].str.contains('成功')])
+                st.metric("成功テスト", success_count)
+            with col3:
+                error_count = len(df) - success_count
+                st.metric("エラー検出", error_count)
+            
+            # CSVダウンロード
+            csv = df.to_csv(index=False).encode('utf-8-sig')
+            st.download_button(
+                label="📥 エラーテスト履歴をCSVダウンロード",
+                data=csv,
+                file_name=f"error_test_history_{pd.Timestamp.now().strftime('%Y%m%d')}.csv",
+                mime="text/csv"
+            )
+            
+            # 履歴クリア
+            if st.button("🗑️ 履歴をクリア"):
+                st.session_state.error_test_history = []
+                st.success("エラーテスト履歴をクリアしました。")
+                st.rerun()
+        else:
+            st.info("エラーテスト履歴がありません。上記のテストを実行してください。")
+
+    def _log_error_test(self, error_type: str, test_case: str, result: str, details: str):
+        """エラーテスト結果をログに記録"""
+        if 'error_test_history' not in st.session_state:
+            st.session_state.error_test_history = []
+        
+        import datetime
+        log_entry = {
+            'timestamp': datetime.datetime.now(),
+            'error_type': error_type,
+            'test_case': test_case,
+            'result': result,
+            'details': details[:100] + "..." if len(details) > 100 else details
+        }
+        
+        st.session_state.error_test_history.append(log_entry)
@@ -0,0 +1,91 @@
+# mcp_demo_pages/home.py
+# ホームページ: ホーム・概要（API接続状況とデモ機能の一覧）
+
+import streamlit as st
+
+from mcp_demo_pages.base import DemoPage
+
+
+class HomePage(DemoPage):
+    """ホームページ"""
+
+    def render(self):
+        """ホームページの描画"""
+        st.markdown("## 🏠 ホーム・概要")
+        
+        # API接続テスト
+        client = self.get_api_client()
+        if not client:
+            st.error("🚨 API サーバーに接続できません。")
+            st.markdown("### 🔧 セットアップ手順")
+            st.markdown("""
+            1. **APIサーバーを起動**: `python mcp_api_server.py`
+            2. **データベースを起動**: `docker-compose -f docker-compose/docker-compose.mcp-demo.yml up -d`
+            3. **テストデータを投入**: `python setup_test_data.py`
+            4. **ページをリフレッシュ**: ブラウザでF5キーを押下
+            """)
+            return
+        
+        # ヘルスチェック実行
+        st.markdown("### 🏥 システム状態")
+        
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            if st.button("🔍 ヘルスチェック実行", type="primary"):
+                with st.spinner("ヘルスチェック実行中..."):
+                    try:
+                        health_result = client.check_health()
+                        if health_result:
+                            st.success("✅ システム正常")
+                        else:
+                            st.error("❌ システム異常")
+                    except Exception as e:
+                        st.error(f"❌ ヘルスチェック失敗: {e}")
+        
+        with col2:
+            connected = st.session_state.api_connected
+            st.metric("API接続", "⚪ 未確認" if connected is None else "✅ 接続済み" if connected else "❌ 未接続")
+        
+        with col3:
+            st.metric("ベースURL", self.api_base_url)
+        
+        # 機能概要
+        st.markdown("### 🎯 利用可能なデモ機能")
+        
+        demo_info = [
+            {"name": "基本操作", "icon": "🔍", "desc": "顧客・商品・注文データの表示・検索"},
+            {"name": "売上分析", "icon": "📈", "desc": "売上統計とビジネス指標のダッシュボード"},
+            {"name": "顧客分析", "icon": "👥", "desc": "個別顧客の購買行動分析"},
+            {"name": "データ作成", "icon": "📝", "desc": "新しい顧客・注文データの作成"},
+            {"name": "データ分析", "icon": "🐼", "desc": "Pandas を使った高度なデータ分析"},
+            {"name": "エラーテスト", "icon": "🚨", "desc": "エラーハンドリングの動作確認"},
+            {"name": "パフォーマンス", "icon": "⚡", "desc": "API応答時間とパフォーマンス測定"},
+            {"name": "対話機能", "icon": "🔄", "desc": "リアルタイムでのデータ操作"}
+        ]
+        
+        for i in range(0, len(demo_info), 2):
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                info = demo_info[i]
+                st.markdown(f"""
+                **{info['icon']} {info['name']}**  
+                {info['desc']}
+                """)
+            
+            if i + 1 < len(demo_info):
+                with col2:
+                    info = demo_info[i + 1]
+                    st.markdown(f"""
+                    **{info['icon']} {info['name']}**  
+                    {info['desc']}
+                    """)
+        
+        st.markdown("### 🚀 使用方法")
+        st.markdown("""
+        1. **サイドバー**から利用したいデモ機能を選択
+        2. 各ページで**フォームやボタン**を使って操作
+        3. **結果やグラフ**でデータを確認
+        4. **エラーが発生**した場合は画面の指示に従って対処
+        """)
@@ -0,0 +1,649 @@
+# mcp_demo_pages/interactive.py
+# 対話機能ページ: チャット操作・リアルタイム更新・ライブダッシュボード
+
+from typing import Dict, Any, List, Optional
+
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from mcp_api_client import MCPAPIClient
+from mcp_demo_pages.base import DemoPage
+from mcp_demo_pages.data_layer import cached_get
+
+
+class InteractivePage(DemoPage):
+    """対話機能ページ"""
+
+    def render(self):
+        """対話機能ページの描画（デモ機能8&9）"""
+        st.markdown("## 🔄 対話機能デモ")
+        st.markdown("リアルタイムデータ操作とチャット風インターフェース")
+        
+        client = self.get_api_client()
+        if not client:
+            st.error("API サーバーに接続できません。")
+            return
+        
+        # タブで機能を分割
+        tab1, tab2, tab3, tab4 = st.tabs(["💬 チャット風操作", "🔄 リアルタイム更新", "🎮 インタラクティブ操作", "📊 ライブダッシュボード"])
+        
+        with tab1:
+            self._render_chat_interface(client)
+        
+        with tab2:
+            self._render_realtime_updates(client)
+            
+        with tab3:
+            self._render_interactive_operations(client)
+            
+        with tab4:
+            self._render_live_dashboard(client)
+
+    def _render_chat_interface(self, client: MCPAPIClient):
+        """チャット風インターフェース"""
+        st.markdown("### 💬 チャット風データ操作")
+        st.markdown("自然言語風のコマンドでデータベース操作")
+        
+        # チャット履歴の初期化
+        if "chat_history" not in st.session_state:
+            st.session_state.chat_history = [
+                {"role": "assistant", "content": "👋 こんにちは！データベース操作をお手伝いします。\n\n例: 「東京の顧客を5件表示して」「新しい顧客を作成したい」「売上統計を見せて」"}
+            ]
+        
+        # チャット履歴の表示
+        chat_container = st.container()
+        with chat_container:
+            for message in st.session_state.chat_history:
+                if message["role"] == "user":
+                    with st.chat_message("user"):
+                        st.write(message["content"])
+                else:
+                    with st.chat_message("assistant"):
+                        st.write(message["content"])
+        
+        # チャット入力
+        if prompt := st.chat_input("何をしたいですか？（例: 東京の顧客を表示、注文データを作成、統計を確認）"):
+            # ユーザーメッセージを追加
+            st.session_state.chat_history.append({"role": "user", "content": prompt})
+            
+            # コマンド解析と実行
+            response = self._process_chat_command(client, prompt)
+            
+            # アシスタントレスポンスを追加
+            st.session_state.chat_history.append({"role": "assistant", "content": response})
+            
+            st.rerun()
+        
+        # チャット履歴管理
+        col1, col2 = st.columns([3, 1])
+        with col2:
+            if st.button("🗑️ 履歴クリア", key="clear_chat_history"):
+                st.session_state.chat_history = [
+                    {"role": "assistant", "content": "👋 こんにちは！データベース操作をお手伝いします。"}
+                ]
+                st.rerun()
+
+    def _process_chat_command(self, client: MCPAPIClient, command: str) -> str:
+        """チャットコマンドの処理"""
+        command_lower = command.lower()
+        
+        try:
+            # 顧客関連のコマンド
+            if "顧客" in command_lower and ("表示" in command_lower or "見せて" in command_lower or "リスト" in command_lower):
+                # 都市フィルタの検出
+                cities = ["東京", "大阪", "名古屋", "福岡", "札幌"]
+                city_filter = None
+                for city in cities:
+                    if city in command:
+                        city_filter = city
+                        break
+                
+                # 件数の検出
+                import re
+                numbers = re.findall(r'\d+', command)
+                limit = int(numbers[0]) if numbers else 10
+                limit = min(limit, 50)  # 最大50件
+                
+                # APIリクエスト
+                params = {"limit": limit}
+                if city_filter:
+                    params["city"] = city_filter
+                
+                customers = cached_get(client, "/api/customers", params)
+                
+                if customers:
+                    result = f"✅ 顧客データを取得しました！\n\n"
+                    if city_filter:
+                        result += f"🏙️ 都市: {city_filter}\n"
+                    result += f"📊 件数: {len(customers)}件\n\n"
+                    
+                    # 最初の3件を表示
+                    for i, customer in enumerate(customers[:3]):
+                        result += f"**{i+1}. {customer.get('name', 'N/A')}**\n"
+                        result += f"   📧 {customer.get('email', 'N/A')}\n"
+                        result += f"   🏙️ {customer.get('city', 'N/A')}\n\n"
+                    
+                    if len(customers) > 3:
+                        result += f"... 他 {len(customers) - 3}件\n\n"
+                    
+                    result += "💡 詳細は「基本操作」タブで確認できます。"
+                    return result
+                else:
+                    return "❌ 顧客データの取得に失敗しました。"
+            
+            # 統計関連のコマンド
+            elif "統計" in command_lower or "売上" in command_lower or "分析" in command_lower:
+                stats = cached_get(client, "/api/stats/sales")
+                
+                if stats:
+                    result = f"📊 売上統計データ\n\n"
+                    result += f"💰 総売上: ¥{stats.get('total_sales', 0):,.0f}\n"
+                    result += f"📦 総注文数: {stats.get('total_orders', 0)}件\n"
+                    result += f"📈 平均注文額: ¥{stats.get('avg_order_value', 0):.0f}\n\n"
+                    
+                    # 人気商品TOP3
+                    top_products = stats.get('top_products', [])[:3]
+                    if top_products:
+                        result += "🏆 人気商品TOP3:\n"
+                        for i, product in enumerate(top_products):
+                            result += f"{i+1}. {product.get('product_name', 'N/A')} (¥{product.get('total_sales', 0):,.0f})\n"
+                    
+                    result += "\n💡 詳細は「売上分析」タブで確認できます。"
+                    return result
+                else:
+                    return "❌ 統計データの取得に失敗しました。"
+            
+            # 顧客作成のコマンド
+            elif "顧客" in command_lower and ("作成" in command_lower or "追加" in command_lower or "新規" in command_lower):
+                return "📝 顧客作成を開始します！\n\n" \
+                       "以下の情報が必要です：\n" \
+                       "• 名前\n" \
+                       "• メールアドレス\n" \
+                       "• 都市\n\n" \
+                       "💡 「データ作成」タブで詳細な作成フォームを利用できます。"
+            
+            # 注文関連のコマンド
+            elif "注文" in command_lower and ("表示" in command_lower or "見せて" in command_lower):
+                orders = cached_get(client, "/api/orders", {"limit": 5})
+                
+                if orders:
+                    result = f"📦 最近の注文データ（5件）\n\n"
+                    for i, order in enumerate(orders[:5]):
+                        result += f"**注文{i+1}**: {order.get('product_name', 'N/A')}\n"
+                        result += f"   💰 ¥{order.get('price', 0):,.0f} × {order.get('quantity', 0)}個\n"
+                        result += f"   👤 顧客: {order.get('customer_name', 'N/A')}\n\n"
+                    
+                    result += "💡 詳細は「基本操作」タブで確認できます。"
+                    return result
+                else:
+                    return "❌ 注文データの取得に失敗しました。"
+            
+            # ヘルプ・使い方
+            elif "ヘルプ" in command_lower or "使い方" in command_lower or "help" in command_lower.lower():
+                return "🤖 **チャット機能の使い方**\n\n" \
+                       "以下のようなコマンドが使えます：\n\n" \
+                       "**📊 データ表示**\n" \
+                       "• 「東京の顧客を10件表示」\n" \
+                       "• 「注文データを見せて」\n" \
+                       "• 「商品を5件リスト」\n\n" \
+                       "**📈 統計・分析**\n" \
+                       "• 「売上統計を確認」\n" \
+                       "• 「分析データを見せて」\n\n" \
+                       "**📝 データ作成**\n" \
+                       "• 「新しい顧客を作成したい」\n" \
+                       "• 「注文を追加したい」\n\n" \
+                       "💡 より詳細な操作は各タブで行えます！"
+            
+            # その他のコマンド
+            else:
+                return f"🤔 「{command}」の処理方法がわかりません。\n\n" \
+                       "💡 以下を試してみてください：\n" \
+                       "• 「ヘルプ」と入力して使い方を確認\n" \
+                       "• 「顧客を表示」「売上統計を確認」など\n" \
+                       "• 各タブで詳細な操作を実行"
+        
+        except Exception as e:
+            return f"❌ エラーが発生しました: {str(e)}\n\n💡 「ヘルプ」と入力して使い方を確認してください。"
+
+    def _render_realtime_updates(self, client: MCPAPIClient):
+        """リアルタイム更新機能"""
+        st.markdown("### 🔄 リアルタイムデータ更新")
+        st.markdown("データの自動更新とライブ監視")
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.markdown("#### ⏰ 自動更新設定")
+            
+            auto_refresh = st.checkbox("🔄 自動更新を有効にする", key="auto_refresh_enabled")
+            
+            if auto_refresh:
+                refresh_interval = st.selectbox(
+                    "🕐 更新間隔",
+                    ["5秒", "10秒", "30秒", "1分"],
+                    index=1,
+                    key="refresh_interval"
+                )
+                
+                # 更新間隔の解析
+                interval_map = {"5秒": 5, "10秒": 10, "30秒": 30, "1分": 60}
+                interval_seconds = interval_map[refresh_interval]
+                
+                st.info(f"🕐 {refresh_interval}ごとに自動更新中...")
+                
+                # 自動更新の実装
+                if "last_refresh_time" not in st.session_state:
+                    st.session_state.last_refresh_time = pd.Timestamp.now()
+                
+                current_time = pd.Timestamp.now()
+                time_diff = (current_time - st.session_state.last_refresh_time).total_seconds()
+                
+                if time_diff >= interval_seconds:
+                    st.session_state.last_refresh_time = current_time
+                    
+                    # データ更新通知
+                    st.success(f"✨ データを更新しました ({current_time.strftime('%H:%M:%S')})")
+                    
+                    # 少し待ってからリフレッシュ
+                    import time
+                    time.sleep(1)
+                    st.rerun()
+                
+                # カウントダウン表示
+                remaining = interval_seconds - time_diff
+                if remaining > 0:
+                    st.write(f"⏱️ 次回更新まで: {remaining:.0f}秒")
+                
+                # プログレスバー
+                progress = min(time_diff / interval_seconds, 1.0)
+                st.progress(progress)
+            
+            else:
+                st.info("自動更新は無効です。手動で更新してください。")
+                
+                if st.button("🔄 今すぐ更新", key="manual_refresh"):
+                    st.session_state.realtime_force_refresh = True
+                    st.success("✨ データを手動更新しました")
+                    st.rerun()
+        
+        with col2:
+            st.markdown("#### 📊 ライブ統計")
+            
+            # 自動更新中は更新間隔より古いキャッシュを使わない。手動更新時は必ず再取得
+            if st.session_state.pop("realtime_force_refresh", False):
+                live_max_age = 0
+            else:
+                live_max_age = interval_seconds if auto_refresh else None
+            
+            try:
+                # リアルタイムで統計を取得
+                current_stats = cached_get(client, "/api/stats/sales", max_age=live_max_age)
+                
+                if current_stats:
+                    st.metric(
+                        "💰 現在の総売上",
+                        f"¥{current_stats.get('total_sales', 0):,.0f}",
+                        delta=None
+                    )
+                    
+                    st.metric(
+                        "📦 総注文数",
+                        f"{current_stats.get('total_orders', 0)}件",
+                        delta=None
+                    )
+                    
+                    st.metric(
+                        "📈 平均注文額",
+                        f"¥{current_stats.get('avg_order_value', 0):.0f}",
+                        delta=None
+                    )
+                    
+                    # 最終更新時刻
+                    st.caption(f"📅 最終更新: {pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')}")
+                
+                # リアルタイム顧客数
+                customers = cached_get(client, "/api/customers", {"limit": 1000}, max_age=live_max_age)
+                if customers:
+                    st.metric("👥 総顧客数", len(customers))
+                
+            except Exception as e:
+                st.error(f"❌ ライブ統計の取得に失敗: {str(e)}")
+        
+        # リアルタイム活動ログ
+        st.markdown("#### 📋 リアルタイム活動ログ")
+        
+        if "activity_log" not in st.session_state:
+            st.session_state.activity_log = []
+        
+        # 新しい活動をログに追加（デモ用）
+        if auto_refresh and time_diff >= interval_seconds:
+            new_activity = {
+                "timestamp": pd.Timestamp.now(),
+                "action": "データ自動更新",
+                "status": "成功",
+                "details": f"統計データを更新 ({current_time.strftime('%H:%M:%S')})"
+            }
+            st.session_state.activity_log.append(new_activity)
+            
+            # ログを最新10件に制限
+            if len(st.session_state.activity_log) > 10:
+                st.session_state.activity_log = st.session_state.activity_log[-10:]
+        
+        # 活動ログの表示
+        if st.session_state.activity_log:
+            log_container = st.container()
+            with log_container:
+                for activity in reversed(st.session_state.activity_log[-5:]):  # 最新5件
+                    timestamp = activity["timestamp"].strftime("%H:%M:%S")
+                    status_icon = "✅" if activity["status"] == "成功" else "❌"
+                    st.write(f"{status_icon} `{timestamp}` {activity['action']} - {activity['details']}")
+        else:
+            st.info("📭 活動ログがありません。")
+
+    def _render_interactive_operations(self, client: MCPAPIClient):
+        """インタラクティブ操作"""
+        st.markdown("### 🎮 インタラクティブ操作")
+        st.markdown("ドラッグ&ドロップ風の直感的なデータ操作")
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.markdown("#### 🎯 クイック操作パネル")
+            
+            # 顧客クイック作成
+            with st.expander("👤 顧客クイック作成", expanded=False):
+                with st.form("quick_customer_form"):
+                    name = st.text_input("名前", placeholder="山田太郎")
+                    email = st.text_input("メール", placeholder="yamada@example.com")
+                    city = st.selectbox("都市", ["東京", "大阪", "名古屋", "福岡", "札幌"])
+                    
+                    submitted = st.form_submit_button("⚡ 即座に作成")
+                    
+                    if submitted and name and email:
+                        try:
+                            customer_data = {
+                                "name": name,
+                                "email": email,
+                                "city": city
+                            }
+                            result = client._make_request("POST", "/api/customers", json=customer_data)
+                            self._invalidate_after_write("customers", [customer_data])
+                            st.success(f"✅ 顧客「{name}」を作成しました！")
+                            
+                            # 活動ログに追加
+                            if "activity_log" not in st.session_state:
+                                st.session_state.activity_log = []
+                            
+                            st.session_state.activity_log.append({
+                                "timestamp": pd.Timestamp.now(),
+                                "action": "顧客作成",
+                                "status": "成功",
+                                "details": f"新規顧客「{name}」を{city}で作成"
+                            })
+                            
+                        except Exception as e:
+                            st.error(f"❌ エラー: {str(e)}")
+            
+            # 注文クイック作成
+            with st.expander("📦 注文クイック作成", expanded=False):
+                # 顧客選択のためのデータ取得
+                try:
+                    customers = cached_get(client, "/api/customers", {"limit": 20})
+                    customer_options = {f"{c['name']} ({c['city']})": c['id'] for c in customers} if customers else {}
+                    
+                    with st.form("quick_order_form"):
+                        if customer_options:
+                            selected_customer = st.selectbox("顧客選択", list(customer_options.keys()))
+                            product_name = st.text_input("商品名", placeholder="ノートパソコン")
+                            quantity = st.number_input("数量", min_value=1, max_value=10, value=1)
+                            price = st.number_input("価格", min_value=100, max_value=100000, value=1000, step=100)
+                            
+                            order_submitted = st.form_submit_button("⚡ 即座に注文")
+                            
+                            if order_submitted and product_name:
+                                try:
+                                    customer_id = customer_options[selected_customer]
+                                    order_data = {
+                                        "customer_id": customer_id,
+                                        "product_name": product_name,
+                                        "quantity": quantity,
+                                        "price": price
+                                    }
+                                    result = client._make_request("POST", "/api/orders", json=order_data)
+                                    self._invalidate_after_write("orders", [order_data])
+                                    st.success(f"✅ 注文「{product_name}」を作成しました！")
+                                    
+                                    # 活動ログに追加
+                                    if "activity_log" not in st.session_state:
+                                        st.session_state.activity_log = []
+                                    
+                                    st.session_state.activity_log.append({
+                                        "timestamp": pd.Timestamp.now(),
+                                        "action": "注文作成",
+                                        "status": "成功",
+                                        "details": f"注文「{product_name}」(¥{price:,} × {quantity})"
+                                    })
+                                    
+                                except Exception as e:
+                                    st.error(f"❌ エラー: {str(e)}")
+                        else:
+                            st.warning("⚠️ 顧客データがありません。先に顧客を作成してください。")
+                
+                except Exception as e:
+                    st.error(f"❌ 顧客データの取得に失敗: {str(e)}")
+        
+        with col2:
+            st.markdown("#### 🔍 スマート検索")
+            
+            search_type = st.selectbox(
+                "検索対象",
+                ["顧客検索", "商品検索", "注文検索"],
+                key="smart_search_type"
+            )
+            
+            search_query = st.text_input(
+                "🔍 検索キーワード",
+                placeholder="名前、メール、商品名など",
+                key="smart_search_query"
+            )
+            
+            if search_query:
+                try:
+                    if search_type == "顧客検索":
+                        # 顧客データを取得して検索
+                        all_customers = cached_get(client, "/api/customers", {"limit": 100})
+                        if all_customers:
+                            # 名前、メール、都市で検索
+                            filtered_customers = [
+                                c for c in all_customers 
+                                if search_query.lower() in c.get('name', '').lower() or 
+                                   search_query.lower() in c.get('email', '').lower() or
+                                   search_query.lower() in c.get('city', '').lower()
+                            ]
+                            
+                            if filtered_customers:
+                                st.success(f"🔍 {len(filtered_customers)}件の顧客が見つかりました")
+                                for customer in filtered_customers[:5]:
+                                    with st.container():
+                                        st.write(f"**{customer['name']}** ({customer['city']})")
+                                        st.write(f"📧 {customer['email']}")
+                                        st.write("---")
+                            else:
+                                st.info("🔍 該当する顧客が見つかりませんでした")
+                        
+                    elif search_type == "注文検索":
+                        # 注文データを取得して検索
+                        all_orders = cached_get(client, "/api/orders", {"limit": 100})
+                        if all_orders:
+                            # 商品名で検索
+                            filtered_orders = [
+                                o for o in all_orders 
+                                if search_query.lower() in o.get('product_name', '').lower()
+                            ]
+                            
+                            if filtered_orders:
+                                st.success(f"🔍 {len(filtered_orders)}件の注文が見つかりました")
+                                for order in filtered_orders[:5]:
+                                    with st.container():
+                                        st.write(f"**{order['product_name']}**")
+                                        st.write(f"💰 ¥{order['price']:,} × {order['quantity']}個")
+                                        st.write(f"👤 {order.get('customer_name', 'N/A')}")
+                                        st.write("---")
+                            else:
+                                st.info("🔍 該当する注文が見つかりませんでした")
+                    
+                except Exception as e:
+                    st.error(f"❌ 検索エラー: {str(e)}")
+
+    def _render_live_dashboard(self, client: MCPAPIClient):
+        """ライブダッシュボード
+        
+        初回だけ全件を集計し、以降は前回より後の顧客・注文だけを差分取得して
+        セッション内の集計に畳み込む。自動更新時はKPI・グラフのフラグメントだけを再実行する。
+        """
+        from helper_live import LiveAggregates
+        
+        st.markdown("### 📊 ライブダッシュボード")
+        st.markdown("リアルタイムデータ可視化とKPI監視")
+        
+        col_auto, col_interval, col_reset = st.columns([2, 2, 1])
+        with col_auto:
+            auto_dashboard = st.checkbox("🔄 ダッシュボード自動更新", key="auto_dashboard")
+        with col_interval:
+            interval = st.select_slider("更新間隔（秒）", options=[1, 2, 3, 5, 10], value=3,
+                                        key="dashboard_interval", disabled=not auto_dashboard)
+        with col_reset:
+            if st.button("♻️ 再集計", key="dashboard_reset", help="集計を破棄して全件から作り直す"):
+                st.session_state.pop("live_aggregates", None)
+                st.session_state.dashboard_activities = []
+        
+        if "live_aggregates" not in st.session_state:
+            st.session_state.live_aggregates = LiveAggregates()
+        
+        @st.fragment(run_every=float(interval) if auto_dashboard else None)
+        def live_panel():
+            aggregates = st.session_state.live_aggregates
+            try:
+                with st.spinner("差分データ取得中..."):
+                    added = aggregates.refresh(client)
+            except Exception as e:
+                st.error(f"❌ ダッシュボードデータの取得に失敗: {str(e)}")
+                return
+            
+            self._render_live_dashboard_stats(aggregates.snapshot(), aggregates.previous)
+            self._render_live_activity(added, first_load=aggregates.refresh_count == 1)
+            
+            st.caption(
+                f"🕐 最終更新: {aggregates.refreshed_at.strftime('%Y-%m-%d %H:%M:%S')}"
+                f"（今回の取得: 顧客 {len(added['customers'])}件 / 注文 {len(added['orders'])}件、"
+                f"注文ID ≤ {aggregates.last_order_id} まで集計済み）"
+            )
+        
+        live_panel()
+
+    def _render_live_dashboard_stats(self, stats: Dict[str, Any], previous: Optional[Dict[str, Any]]):
+        """ライブダッシュボードのKPI・グラフを描画（増減は直近の変化前スナップショットとの差）"""
+        from helper_live import snapshot_delta
+        
+        col1, col2, col3, col4 = st.columns(4)
+        
+        with col1:
+            delta = snapshot_delta(stats, previous, "total_sales")
+            st.metric(
+                "💰 総売上",
+                f"¥{stats['total_sales']:,.0f}",
+                delta=f"{delta:+,.0f}円" if delta else None
+            )
+        
+        with col2:
+            delta = snapshot_delta(stats, previous, "total_orders")
+            st.metric(
+                "📦 総注文",
+                f"{stats['total_orders']}件",
+                delta=f"{delta:+d}件" if delta else None
+            )
+        
+        with col3:
+            delta = snapshot_delta(stats, previous, "customer_count")
+            st.metric(
+                "👥 総顧客",
+                f"{stats['customer_count']}人",
+                delta=f"{delta:+d}人" if delta else None
+            )
+        
+        with col4:
+            delta = snapshot_delta(stats, previous, "avg_order_value")
+            st.metric(
+                "📈 平均注文",
+                f"¥{stats['avg_order_value']:.0f}",
+                delta=f"{delta:+,.0f}円" if delta else None
+            )
+        
+        col_left, col_right = st.columns(2)
+        
+        with col_left:
+            # 都市別売上チャート
+            sales_by_city = stats.get('sales_by_city')
+            if sales_by_city:
+                df_city = pd.DataFrame(sales_by_city)
+                
+                fig_city = px.pie(
+                    df_city.head(5),
+                    values='total_sales',
+                    names='city',
+                    title="🏙️ 都市別売上分布（リアルタイム）"
+                )
+                fig_city.update_layout(height=350)
+                st.plotly_chart(fig_city, use_container_width=True)
+        
+        with col_right:
+            # 人気商品チャート
+            top_products = stats.get('top_products')
+            if top_products:
+                df_products = pd.DataFrame(top_products[:5])
+                
+                fig_products = px.bar(
+                    df_products,
+                    x='product_name',
+                    y='total_sales',
+                    title="🏆 人気商品TOP5（リアルタイム）",
+                    labels={'product_name': '商品名', 'total_sales': '売上'}
+                )
+                fig_products.update_layout(height=350, xaxis_tickangle=-45)
+                st.plotly_chart(fig_products, use_container_width=True)
+
+    def _render_live_activity(self, added: Dict[str, List[Dict[str, Any]]], first_load: bool):
+        """差分取得で見つかった新規顧客・注文をアクティビティとして表示"""
+        st.markdown("#### 🔔 リアルタイムアクティビティ")
+        
+        if "dashboard_activities" not in st.session_state:
+            st.session_state.dashboard_activities = []
+        activities = st.session_state.dashboard_activities
+        
+        # 初回の全件集計分はアクティビティとして扱わない
+        if not first_load:
+            now = pd.Timestamp.now()
+            for customer in added["customers"]:
+                activities.append({
+                    "timestamp": now,
+                    "message": f"新規顧客「{customer.get('name', 'N/A')}」が{customer.get('city', '不明')}で登録",
+                    "type": "info"
+                })
+            for order in added["orders"]:
+                amount = float(order["price"]) * int(order["quantity"])
+                activities.append({
+                    "timestamp": now,
+                    "message": f"注文「{order['product_name']}」¥{amount:,.0f}（{order.get('customer_name') or '顧客ID ' + str(order['customer_id'])}）",
+                    "type": "success"
+                })
+            # 最新10件に制限
+            del activities[:-10]
+        
+        if activities:
+            for activity in reversed(activities[-5:]):
+                timestamp = activity["timestamp"].strftime("%H:%M:%S")
+                icon = {"success": "✅", "info": "ℹ️", "warning": "⚠️"}.get(activity["type"], "ℹ️")
+                st.write(f"{icon} `{timestamp}` {activity['message']}")
+        else:
+            st.info("📭 アクティビティがありません。")
@@ -0,0 +1,873 @@
+# mcp_demo_pages/performance.py
+# パフォーマンスページ: 応答時間測定・負荷テスト・測定履歴
+
+import time
+from typing import Dict, Any, List, Optional
+
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+import helper_chart as chart
+
+from mcp_api_client import MCPAPIClient
+from mcp_demo_pages.base import DemoPage
+
+
+class PerformancePage(DemoPage):
+    """パフォーマンスページ"""
+
+    def render(self):
+        """パフォーマンスページの描画（デモ機能7）"""
+        st.markdown("## ⚡ パフォーマンステストデモ")
+        st.markdown("API応答時間とスループットの測定・分析")
+        
+        client = self.get_api_client()
+        if not client:
+            st.error("API サーバーに接続できません。")
+            return
+        
+        # タブで機能を分割
+        tab1, tab2, tab3, tab4 = st.tabs(["🚀 リアルタイム測定", "📊 負荷テスト", "📈 パフォーマンス分析", "📋 測定履歴"])
+        
+        with tab1:
+            self._render_realtime_performance(client)
+        
+        with tab2:
+            self._render_load_testing(client)
+            
+        with tab3:
+            self._render_performance_analysis(client)
+            
+        with tab4:
+            self._render_performance_history()
+
+    def _render_realtime_performance(self, client: MCPAPIClient):
+        """リアルタイムパフォーマンス測定"""
+        st.markdown("### 🚀 リアルタイムAPI応答時間測定")
+        st.markdown("各APIエンドポイントの応答時間をリアルタイムで測定")
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.markdown("#### API エンドポイント選択")
+            endpoint_options = {
+                "ヘルスチェック": "/health",
+                "顧客一覧": "/api/customers?limit=10",
+                "商品一覧": "/api/products?limit=10", 
+                "注文一覧": "/api/orders?limit=10",
+                "売上統計": "/api/stats/sales"
+            }
+            
+            selected_endpoint = st.selectbox(
+                "📡 測定対象エンドポイント",
+                list(endpoint_options.keys()),
+                key="performance_endpoint"
+            )
+            
+            measurement_count = st.number_input(
+                "🔢 測定回数", 
+                min_value=1, 
+                max_value=1000, 
+                value=50,
+                key="measurement_count"
+            )
+            
+            col_warmup, col_interval = st.columns(2)
+            with col_warmup:
+                warmup_count = st.number_input(
+                    "🔥 ウォームアップ回数",
+                    min_value=0,
+                    max_value=50,
+                    value=3,
+                    key="measurement_warmup",
+                    help="接続確立やサーバー側キャッシュの影響を除くため、集計前に捨てるリクエスト数"
+                )
+            with col_interval:
+                interval_ms = st.number_input(
+                    "⏳ 測定間隔(ms)",
+                    min_value=0,
+                    max_value=1000,
+                    value=0,
+                    key="measurement_interval"
+                )
+            
+            if st.button("⏱️ 応答時間測定開始", key="start_realtime_test"):
+                endpoint_url = endpoint_options[selected_endpoint]
+                self._run_response_time_test(client, endpoint_url, selected_endpoint, measurement_count,
+                                             warmup_count, interval_ms)
+        
+        with col2:
+            st.markdown("#### 自動継続測定")
+            
+            auto_test_enabled = st.checkbox("🔄 自動継続測定（10秒間隔）", key="auto_performance_test")
+            
+            if auto_test_enabled:
+                if "auto_performance_data" not in st.session_state:
+                    st.session_state.auto_performance_data = []
+                
+                # 自動測定の実行
+                import time
+                if len(st.session_state.auto_performance_data) < 20:  # 最大20回
+                    try:
+                        start_time = time.time()
+                        result = client.check_health()
+                        end_time = time.time()
+                        response_time = (end_time - start_time) * 1000  # ミリ秒
+                        
+                        st.session_state.auto_performance_data.append({
+                            "timestamp": pd.Timestamp.now(),
+                            "response_time": response_time,
+                            "status": "成功" if result else "失敗"
+                        })
+                        
+                        # グラフ表示
+                        if st.session_state.auto_performance_data:
+                            df_auto = pd.DataFrame(st.session_state.auto_performance_data)
+                            
+                            fig_auto = chart.line(
+                                df_auto,
+                                x="timestamp",
+                                y="response_time",
+                                title="リアルタイム応答時間推移",
+                                labels={
+                                    "timestamp": "時刻",
+                                    "response_time": "応答時間 (ms)"
+                                },
+                                markers=True
+                            )
+                            fig_auto.update_layout(height=300)
+                            st.plotly_chart(fig_auto, use_container_width=True)
+                            
+                            # 統計表示
+                            avg_time = df_auto["response_time"].mean()
+                            max_time = df_auto["response_time"].max()
+                            min_time = df_auto["response_time"].min()
+                            
+                            col_stat1, col_stat2, col_stat3 = st.columns(3)
+                            with col_stat1:
+                                st.metric("平均応答時間", f"{avg_time:.1f}ms")
+                            with col_stat2:
+                                st.metric("最大応答時間", f"{max_time:.1f}ms")
+                            with col_stat3:
+                                st.metric("最小応答時間", f"{min_time:.1f}ms")
+                        
+                        # 自動更新
+                        time.sleep(2)
+                        st.rerun()
+                        
+                    except Exception as e:
+                        st.error(f"自動測定エラー: {str(e)}")
+                else:
+                    st.info("自動測定完了（最大20回）。リセットして再開してください。")
+                    if st.button("🔄 自動測定リセット", key="reset_auto_test"):
+                        st.session_state.auto_performance_data = []
+                        st.rerun()
+
+    def _run_response_time_test(self, client: MCPAPIClient, endpoint: str, endpoint_name: str, count: int,
+                                warmup: int = 3, interval_ms: int = 0):
+        """応答時間測定の実行
+        
+        ウォームアップ分は集計から除外し、成功したリクエストの応答時間だけを
+        ヒストグラムに記録する（エラーは応答時間に混ぜず種別ごとに件数を数える）。
+        """
+        from helper_perf import LatencyHistogram, detect_outliers
+        
+        histogram = LatencyHistogram()
+        results = []
+        error_counts: Dict[str, int] = {}
+        progress_bar = st.progress(0)
+        status_text = st.empty()
+        
+        total = warmup + count
+        for i in range(total):
+            is_warmup = i < warmup
+            if is_warmup:
+                status_text.text(f"ウォームアップ中... {i+1}/{warmup}")
+            else:
+                status_text.text(f"測定中... {i-warmup+1}/{count}")
+            progress_bar.progress((i + 1) / total)
+            
+            start_time = time.perf_counter()
+            try:
+                client._make_request("GET", endpoint)
+                error = None
+            except Exception as e:
+                error = type(e).__name__
+            response_time = (time.perf_counter() - start_time) * 1000  # ミリ秒
+            
+            if not is_warmup:
+                if error is None:
+                    histogram.record(response_time)
+                else:
+                    error_counts[error] = error_counts.get(error, 0) + 1
+                results.append({
+                    "測定回": i - warmup + 1,
+                    "応答時間(ms)": round(response_time, 2) if error is None else None,
+                    "ステータス": "成功" if error is None else f"エラー: {error}",
+                    "タイムスタンプ": pd.Timestamp.now()
+                })
+            
+            if interval_ms:
+                time.sleep(interval_ms / 1000)
+        
+        progress_bar.empty()
+        status_text.empty()
+        
+        # 結果の表示
+        if not results:
+            return
+        
+        st.success(f"✅ 測定完了: {endpoint_name}（ウォームアップ {warmup}回を除外）")
+        
+        df_results = pd.DataFrame(results)
+        success_results = df_results[df_results["ステータス"] == "成功"].copy()
+        error_count = sum(error_counts.values())
+        success_rate = histogram.count / len(df_results) * 100
+        
+        if error_counts:
+            st.warning("エラー内訳（応答時間の集計からは除外）: " +
+                       ", ".join(f"{k}: {v}件" for k, v in error_counts.items()))
+        
+        if success_results.empty:
+            st.error("すべての測定が失敗しました。")
+            return
+        
+        summary = histogram.summary()
+        outliers = detect_outliers(success_results["応答時間(ms)"].tolist())
+        
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("p50", f"{summary['p50']:.1f}ms")
+            st.metric("平均 ± 標準偏差", f"{summary['mean']:.1f} ± {summary['stddev']:.1f}ms")
+        with col2:
+            st.metric("p90", f"{summary['p90']:.1f}ms")
+            st.metric("最小 / 最大", f"{summary['min']:.1f} / {summary['max']:.1f}ms")
+        with col3:
+            st.metric("p99", f"{summary['p99']:.1f}ms")
+            st.metric("成功率", f"{success_rate:.1f}%")
+        with col4:
+            st.metric("外れ値 (IQR)", f"{outliers['iqr']['count']}件")
+            st.metric("外れ値 (MAD)", f"{outliers['mad']['count']}件")
+        
+        # 外れ値をマークした応答時間推移
+        success_results["外れ値"] = "通常"
+        outlier_positions = set(outliers["iqr"]["indices"]) | set(outliers["mad"]["indices"])
+        success_results.iloc[sorted(outlier_positions), success_results.columns.get_loc("外れ値")] = "外れ値"
+        
+        fig_response = chart.scatter(
+            success_results,
+            x="測定回",
+            y="応答時間(ms)",
+            color="外れ値",
+            color_discrete_map={"通常": "#1f77b4", "外れ値": "#d62728"},
+            title=f"{endpoint_name} - 応答時間推移（IQR上限 {outliers['iqr']['upper']:.1f}ms）"
+        )
+        fig_response.add_hline(y=outliers["iqr"]["upper"], line_dash="dot", line_color="gray")
+        fig_response.update_layout(height=350)
+        st.plotly_chart(fig_response, use_container_width=True)
+        
+        # 詳細データ表示
+        st.markdown("#### 📋 詳細測定データ")
+        st.dataframe(df_results, use_container_width=True, hide_index=True)
+        
+        # セッション状態に保存（ヒストグラムは実行をまたいでマージできる形式で保持）
+        if "performance_results" not in st.session_state:
+            st.session_state.performance_results = []
+        
+        st.session_state.performance_results.append({
+            "endpoint": endpoint_name,
+            "timestamp": pd.Timestamp.now(),
+            "avg_time": summary["mean"],
+            "max_time": summary["max"],
+            "min_time": summary["min"],
+            "stddev": summary["stddev"],
+            "p50": summary["p50"],
+            "p90": summary["p90"],
+            "p99": summary["p99"],
+            "success_rate": success_rate,
+            "error_count": error_count,
+            "outliers_iqr": outliers["iqr"]["count"],
+            "outliers_mad": outliers["mad"]["count"],
+            "measurement_count": count,
+            "warmup_count": warmup,
+            "histogram": histogram.to_dict()
+        })
+        
+        self._persist_performance_run("response_time", endpoint_name, {
+            "count": histogram.count,
+            "errors": error_count,
+            "mean_ms": summary["mean"],
+            "p50_ms": summary["p50"],
+            "p95_ms": summary["p95"],
+            "p99_ms": summary["p99"],
+            "max_ms": summary["max"],
+            "success_rate": success_rate,
+        }, histogram, {"path": endpoint, "count": count, "warmup": warmup, "interval_ms": interval_ms})
+
+    def _render_load_testing(self, client: MCPAPIClient):
+        """負荷テスト機能"""
+        st.markdown("### 📊 負荷テスト")
+        st.markdown("バックグラウンドの非同期負荷生成エンジンによるAPI負荷テスト")
+        
+        runner = st.session_state.get("load_test_runner")
+        running = runner is not None and runner.running
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.markdown("#### テスト設定")
+            
+            load_mode = st.radio(
+                "🔁 負荷モデル",
+                ["クローズドループ（同時ユーザー数）", "オープンループ（目標RPS）"],
+                key="load_test_mode",
+                help="オープンループは応答を待たずに一定間隔で送信し、遅延した送信分も待ち時間として計上します（Coordinated Omission 補正）"
+            )
+            is_open_loop = load_mode.startswith("オープン")
+            
+            if is_open_loop:
+                target_rps = st.number_input(
+                    "🎯 目標RPS", 
+                    min_value=1, 
+                    max_value=10000, 
+                    value=200,
+                    key="load_test_target_rps"
+                )
+                concurrent_users = None
+            else:
+                concurrent_users = st.number_input(
+                    "👥 同時ユーザー数", 
+                    min_value=1, 
+                    max_value=1000, 
+                    value=20,
+                    key="concurrent_users"
+                )
+                target_rps = None
+            
+            col_duration, col_ramp = st.columns(2)
+            with col_duration:
+                duration = st.number_input("⏱️ 計測時間（秒）", min_value=5, max_value=600, value=30, key="load_test_duration")
+            with col_ramp:
+                ramp_up = st.number_input("📈 ランプアップ（秒）", min_value=0, max_value=120, value=5, key="load_test_ramp_up")
+            
+            load_test_endpoint = st.selectbox(
+                "📡 負荷テスト対象",
+                ["ヘルスチェック", "顧客一覧", "商品一覧", "注文一覧"],
+                key="load_test_endpoint"
+            )
+            
+            col_start, col_stop = st.columns(2)
+            with col_start:
+                if st.button("🚀 負荷テスト開始", key="start_load_test", disabled=running):
+                    self._run_load_test(load_test_endpoint, concurrent_users, target_rps, duration, ramp_up)
+            with col_stop:
+                if st.button("⏹️ 停止", key="stop_load_test", disabled=not running):
+                    runner.stop()
+                    runner.wait(timeout=5)
+                    st.rerun()
+        
+        with col2:
+            st.markdown("#### 負荷テスト結果")
+            
+            if runner is not None:
+                self._render_load_test_live()
+            
+            if "load_test_results" in st.session_state and st.session_state.load_test_results:
+                latest_result = st.session_state.load_test_results[-1]
+                
+                col_metric1, col_metric2 = st.columns(2)
+                with col_metric1:
+                    st.metric("総リクエスト数", latest_result["total_requests"])
+                    st.metric("成功率", f"{latest_result['success_rate']:.1f}%")
+                    st.metric("p50 / p95", f"{latest_result['p50']:.1f} / {latest_result['p95']:.1f}ms")
+                
+                with col_metric2:
+                    st.metric("平均応答時間", f"{latest_result['avg_response_time']:.1f}ms")
+                    st.metric("スループット", f"{latest_result['throughput']:.1f} req/s")
+                    st.metric("p99 / 最大", f"{latest_result['p99']:.1f} / {latest_result['max_response_time']:.1f}ms")
+                
+                if latest_result.get("error_counts"):
+                    st.warning("エラー内訳: " + ", ".join(f"{k}: {v}件" for k, v in latest_result["error_counts"].items()))
+                
+                # パーセンタイル分布グラフ
+                if latest_result.get("distribution"):
+                    fig_dist = chart.line(
+                        pd.DataFrame(latest_result["distribution"]),
+                        x="percentile",
+                        y="latency_ms",
+                        title="応答時間パーセンタイル分布（定常区間）",
+                        labels={"percentile": "パーセンタイル (%)", "latency_ms": "応答時間 (ms)"}
+                    )
+                    fig_dist.update_layout(height=300)
+                    st.plotly_chart(fig_dist, use_container_width=True)
+
+    def _render_load_test_live(self):
+        """実行中の負荷テストのライブ表示（実行中のみ1秒ごとに部分再描画）"""
+        runner = st.session_state.load_test_runner
+        
+        @st.fragment(run_every=1.0 if runner.running else None)
+        def live_panel():
+            runner = st.session_state.load_test_runner
+            snapshot = runner.snapshot()
+            
+            if runner.done:
+                if not st.session_state.get("load_test_saved"):
+                    self._save_load_test_result(runner)
+                    st.rerun()
+                if snapshot["error"]:
+                    st.error(f"❌ 負荷テスト失敗: {snapshot['error']}")
+                return
+            
+            phase = {"starting": "準備中", "ramp_up": "ランプアップ中", "running": "計測中", "draining": "残りの応答待ち"}
+            st.info(f"🚀 {phase.get(snapshot['state'], snapshot['state'])}: "
+                    f"{snapshot['elapsed']:.0f} / {runner.config.total_duration:.0f}秒")
+            st.progress(snapshot["progress"])
+            
+            col_live1, col_live2, col_live3 = st.columns(3)
+            with col_live1:
+                st.metric("現在のRPS", f"{snapshot['current_rps']:.0f}")
+                st.metric("完了", snapshot["completed"])
+            with col_live2:
+                st.metric("p50", f"{snapshot['window']['p50']:.1f}ms")
+                st.metric("p95", f"{snapshot['window']['p95']:.1f}ms")
+            with col_live3:
+                st.metric("p99", f"{snapshot['window']['p99']:.1f}ms")
+                st.metric("エラー", snapshot["errors"])
+            
+            if snapshot["timeline"]:
+                df_timeline = pd.DataFrame(snapshot["timeline"])
+                fig_live = chart.line(
+                    df_timeline,
+                    x="elapsed",
+                    y=["p50", "p95", "p99"],
+                    title="応答時間の推移（1秒ごと）",
+                    labels={"elapsed": "経過時間 (秒)", "value": "応答時間 (ms)", "variable": "指標"}
+                )
+                fig_live.update_layout(height=280)
+                st.plotly_chart(fig_live, use_container_width=True)
+        
+        live_panel()
+
+    def _run_load_test(self, endpoint_name: str, concurrent_users: Optional[int], target_rps: Optional[float],
+                       duration: float, ramp_up: float):
+        """負荷テストをバックグラウンドで開始（画面の描画とは独立して実行される）"""
+        from helper_loadtest import LoadTestConfig, LoadTestRunner
+        
+        endpoint_map = {
+            "ヘルスチェック": "/health",
+            "顧客一覧": "/api/customers?limit=5",
+            "商品一覧": "/api/products?limit=5",
+            "注文一覧": "/api/orders?limit=5"
+        }
+        
+        config = LoadTestConfig(
+            base_url=self.api_base_url,
+            endpoint=endpoint_map[endpoint_name],
+            mode="open" if target_rps else "closed",
+            users=concurrent_users or 1,
+            target_rps=float(target_rps or 1),
+            duration=float(duration),
+            ramp_up=float(ramp_up),
+        )
+        
+        st.session_state.load_test_runner = LoadTestRunner(config).start()
+        st.session_state.load_test_endpoint_name = endpoint_name
+        st.session_state.load_test_saved = False
+        st.rerun()
+
+    def _save_load_test_result(self, runner):
+        """完了した負荷テストの結果を履歴に保存"""
+        load_result = runner.result()
+        load_result["endpoint"] = st.session_state.get("load_test_endpoint_name", load_result["endpoint"])
+        load_result["timestamp"] = pd.Timestamp.now()
+        
+        if "load_test_results" not in st.session_state:
+            st.session_state.load_test_results = []
+        
+        if load_result["total_requests"]:
+            st.session_state.load_test_results.append(load_result)
+            config = runner.config
+            self._persist_performance_run("load_test", load_result["endpoint"], {
+                "count": load_result["total_requests"],
+                "errors": sum(load_result["error_counts"].values()),
+                "mean_ms": load_result["avg_response_time"],
+                "p50_ms": load_result["p50"],
+                "p95_ms": load_result["p95"],
+                "p99_ms": load_result["p99"],
+                "max_ms": load_result["max_response_time"],
+                "throughput": load_result["throughput"],
+                "success_rate": load_result["success_rate"],
+            }, load_result["histogram"], {
+                "path": config.endpoint,
+                "mode": config.mode,
+                "users": config.users if config.mode == "closed" else None,
+                "target_rps": config.target_rps if config.mode == "open" else None,
+                "duration": config.duration,
+                "ramp_up": config.ramp_up,
+            })
+        st.session_state.load_test_saved = True
+
+    def _get_perf_store(self):
+        """測定履歴ストア（開けない場合は None）"""
+        from helper_perf_store import PerformanceHistoryStore
+        
+        try:
+            return PerformanceHistoryStore()
+        except Exception as e:
+            st.warning(f"⚠️ 測定履歴ストアを開けません: {e}")
+            return None
+
+    def _persist_performance_run(self, kind: str, endpoint: str, metrics: Dict[str, Any], histogram,
+                                 config: Dict[str, Any]):
+        """測定結果を永続化（保存に失敗しても測定結果の表示は継続）"""
+        store = self._get_perf_store()
+        if store is None:
+            return
+        try:
+            store.record_run(kind, endpoint, metrics, histogram, config, base_url=self.api_base_url)
+        except Exception as e:
+            st.warning(f"⚠️ 測定履歴の保存に失敗しました: {e}")
+
+    def _render_performance_analysis(self, client: MCPAPIClient):
+        """パフォーマンス分析"""
+        st.markdown("### 📈 パフォーマンス分析")
+        st.markdown("測定データの統合分析とベンチマーク比較")
+        
+        self._render_client_latency_stats(client)
+        
+        if "performance_results" in st.session_state and st.session_state.performance_results:
+            
+            df_perf = pd.DataFrame(st.session_state.performance_results)
+            
+            # エンドポイント別比較
+            st.markdown("#### 📊 エンドポイント別パフォーマンス比較")
+            
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                # 平均応答時間比較
+                fig_avg = px.bar(
+                    df_perf,
+                    x="endpoint",
+                    y="avg_time",
+                    title="エンドポイント別平均応答時間",
+                    labels={
+                        "endpoint": "エンドポイント",
+                        "avg_time": "平均応答時間 (ms)"
+                    },
+                    color="avg_time",
+                    color_continuous_scale="viridis"
+                )
+                fig_avg.update_layout(height=350)
+                st.plotly_chart(fig_avg, use_container_width=True)
+            
+            with col2:
+                # 成功率比較
+                fig_success = px.bar(
+                    df_perf,
+                    x="endpoint",
+                    y="success_rate",
+                    title="エンドポイント別成功率",
+                    labels={
+                        "endpoint": "エンドポイント",
+                        "success_rate": "成功率 (%)"
+                    },
+                    color="success_rate",
+                    color_continuous_scale="RdYlGn"
+                )
+                fig_success.update_layout(height=350)
+                st.plotly_chart(fig_success, use_container_width=True)
+            
+            # 時系列分析
+            st.markdown("#### 📅 パフォーマンス時系列推移")
+            
+            fig_timeline = chart.line(
+                df_perf,
+                x="timestamp",
+                y="avg_time",
+                color="endpoint",
+                title="平均応答時間の時系列推移",
+                labels={
+                    "timestamp": "測定時刻",
+                    "avg_time": "平均応答時間 (ms)",
+                    "endpoint": "エンドポイント"
+                },
+                markers=True
+            )
+            fig_timeline.update_layout(height=400)
+            st.plotly_chart(fig_timeline, use_container_width=True)
+            
+            # 全実行をマージしたパーセンタイル分布
+            self._render_merged_percentile_plot(st.session_state.performance_results)
+            
+            # 統計サマリー
+            st.markdown("#### 📋 統計サマリー")
+            
+            summary_stats = df_perf.groupby("endpoint").agg({
+                "avg_time": ["mean", "std", "min", "max"],
+                "success_rate": ["mean", "min"],
+                "measurement_count": "sum"
+            }).round(2)
+            
+            summary_stats.columns = ["平均応答時間", "応答時間標準偏差", "最小応答時間", "最大応答時間", "平均成功率", "最小成功率", "総測定回数"]
+            
+            st.dataframe(summary_stats, use_container_width=True)
+            
+            # ベンチマーク評価
+            st.markdown("#### 🏆 パフォーマンス評価")
+            
+            col1, col2, col3 = st.columns(3)
+            
+            overall_avg = df_perf["avg_time"].mean()
+            overall_success = df_perf["success_rate"].mean()
+            
+            with col1:
+                if overall_avg < 100:
+                    st.success(f"🟢 優秀: 平均応答時間 {overall_avg:.1f}ms")
+                elif overall_avg < 500:
+                    st.warning(f"🟡 良好: 平均応答時間 {overall_avg:.1f}ms")
+                else:
+                    st.error(f"🔴 要改善: 平均応答時間 {overall_avg:.1f}ms")
+            
+            with col2:
+                if overall_success >= 99:
+                    st.success(f"🟢 優秀: 成功率 {overall_success:.1f}%")
+                elif overall_success >= 95:
+                    st.warning(f"🟡 良好: 成功率 {overall_success:.1f}%")
+                else:
+                    st.error(f"🔴 要改善: 成功率 {overall_success:.1f}%")
+            
+            with col3:
+                total_measurements = df_perf["measurement_count"].sum()
+                st.info(f"📊 総測定数: {total_measurements}回")
+        
+        else:
+            st.info("📊 パフォーマンス測定データがありません。リアルタイム測定または負荷テストを実行してください。")
+
+    def _render_merged_percentile_plot(self, performance_results: List[Dict[str, Any]]):
+        """エンドポイント別に全実行のヒストグラムをマージしたパーセンタイル分布
+        
+        実行ごとのパーセンタイルを平均するのではなく、バケット単位で加算してから算出する。
+        横軸は 1/(1-p) の対数（90%, 99%, 99.9% が等間隔になる）。
+        """
+        import numpy as np
+        from helper_perf import LatencyHistogram
+        
+        merged: Dict[str, LatencyHistogram] = {}
+        runs: Dict[str, int] = {}
+        for result in performance_results:
+            if "histogram" not in result:
+                continue
+            merged.setdefault(result["endpoint"], LatencyHistogram()).merge(
+                LatencyHistogram.from_dict(result["histogram"]))
+            runs[result["endpoint"]] = runs.get(result["endpoint"], 0) + 1
+        
+        if not merged:
+            return
+        
+        st.markdown("#### 📐 パーセンタイル分布（全実行をマージ）")
+        
+        rows = []
+        for endpoint, histogram in merged.items():
+            for point in histogram.distribution():
+                rows.append({
+                    "endpoint": endpoint,
+                    "nines": -np.log10(max(1 - point["percentile"] / 100, 1e-6)),
+                    "percentile": point["percentile"],
+                    "latency_ms": point["latency_ms"]
+                })
+        df_dist = pd.DataFrame(rows)
+        
+        fig_pct = chart.line(
+            df_dist,
+            x="nines",
+            y="latency_ms",
+            color="endpoint",
+            line_shape="hv",
+            hover_data={"percentile": ":.3f", "nines": False},
+            title="応答時間パーセンタイル分布",
+            labels={"nines": "パーセンタイル", "latency_ms": "応答時間 (ms)", "endpoint": "エンドポイント"}
+        )
+        fig_pct.update_xaxes(tickvals=[0, 1, 2, 3, 4], ticktext=["0%", "90%", "99%", "99.9%", "99.99%"])
+        fig_pct.update_layout(height=400)
+        st.plotly_chart(fig_pct, use_container_width=True)
+        
+        merged_summary = pd.DataFrame([
+            {"エンドポイント": endpoint, "実行数": runs[endpoint], **histogram.summary()}
+            for endpoint, histogram in merged.items()
+        ]).rename(columns={"count": "件数", "mean": "平均", "stddev": "標準偏差", "min": "最小", "max": "最大"})
+        st.dataframe(merged_summary.round(2), use_container_width=True, hide_index=True)
+
+    def _render_client_latency_stats(self, client: MCPAPIClient):
+        """APIクライアントが自動計測した全リクエストのエンドポイント別統計"""
+        st.markdown("#### 📡 クライアント計測（全APIリクエスト）")
+        
+        rows = client.latency.summary_rows()
+        if not rows:
+            st.info("まだAPIリクエストの計測データがありません。")
+            return
+        
+        df_latency = pd.DataFrame(rows)
+        display_latency = df_latency[[
+            "endpoint", "requests", "p50", "p90", "p99", "max", "ttfb_p50", "connect_p50",
+            "errors", "retries", "avg_bytes"
+        ]].rename(columns={
+            "endpoint": "エンドポイント",
+            "requests": "リクエスト数",
+            "p50": "p50(ms)",
+            "p90": "p90(ms)",
+            "p99": "p99(ms)",
+            "max": "最大(ms)",
+            "ttfb_p50": "TTFB p50(ms)",
+            "connect_p50": "接続 p50(ms)",
+            "errors": "エラー数",
+            "retries": "リトライ数",
+            "avg_bytes": "平均サイズ(byte)"
+        }).round(2)
+        st.dataframe(display_latency, use_container_width=True, hide_index=True)
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button(
+                label="📥 計測データをJSONエクスポート",
+                data=client.latency.export_json(indent=2).encode('utf-8'),
+                file_name=f"client_latency_{pd.Timestamp.now().strftime('%Y%m%d_%H%M')}.json",
+                mime="application/json",
+                key="export_client_latency"
+            )
+        with col2:
+            if st.button("🗑️ クライアント計測をリセット", key="reset_client_latency"):
+                client.latency.reset()
+                st.rerun()
+
+    def _render_performance_history(self):
+        """パフォーマンス測定履歴（永続化された全実行）"""
+        st.markdown("### 📋 測定履歴")
+        st.markdown("保存済みの測定結果の確認とリグレッション検出（再読み込み・再デプロイ後も保持）")
+        
+        store = self._get_perf_store()
+        if store is None:
+            return
+        
+        kind_labels = {"response_time": "応答時間測定", "load_test": "負荷テスト", "benchmark": "ベンチマーク"}
+        
+        col1, col2 = st.columns([3, 1])
+        
+        with col2:
+            st.markdown("#### ⚙️ 検出条件")
+            baseline_runs = st.number_input("比較する直前の実行数", min_value=1, max_value=50, value=5,
+                                            key="regression_baseline_runs")
+            alpha = st.select_slider("有意水準", options=[0.001, 0.01, 0.05], value=0.01, key="regression_alpha")
+            min_effect = st.number_input("最小悪化率(%)", min_value=0.0, max_value=100.0, value=10.0,
+                                         key="regression_min_effect")
+        
+        with col1:
+            # リグレッション検出
+            findings = store.detect_regressions(baseline_runs=baseline_runs, alpha=alpha,
+                                                min_effect_pct=min_effect)
+            if findings:
+                st.markdown("#### 🔍 リグレッション検出（最新 vs 直前の実行）")
+                regressions = [f for f in findings if f["regression"]]
+                if regressions:
+                    st.error(f"❌ {len(regressions)}系列でリグレッションを検出しました")
+                else:
+                    st.success("✅ 有意なリグレッションはありません")
+                
+                finding_rows = []
+                for finding in findings:
+                    latency = finding["latency"] or {}
+                    throughput = finding["throughput"] or {}
+                    finding_rows.append({
+                        "判定": "❌" if finding["regression"] else "✅",
+                        "種類": kind_labels.get(finding["kind"], finding["kind"]),
+                        "エンドポイント": finding["endpoint"],
+                        "p50変化(%)": latency.get("p50", {}).get("change_pct"),
+                        "p95変化(%)": latency.get("p95", {}).get("change_pct"),
+                        "応答時間 p値": latency.get("p_value"),
+                        "スループット変化(%)": throughput.get("change_pct"),
+                        "スループット p値": throughput.get("p_value"),
+                        "比較実行数": finding["baseline_runs"],
+                        "コミット": (finding["git_sha"] or "")[:8],
+                    })
+                st.dataframe(pd.DataFrame(finding_rows).round(4), use_container_width=True, hide_index=True)
+            
+            # 実行履歴
+            selected_kind = st.selectbox("📂 種類", ["すべて"] + list(kind_labels.values()), key="history_kind")
+            kind = next((k for k, v in kind_labels.items() if v == selected_kind), None)
+            runs = store.list_runs(kind=kind)
+            
+            if runs:
+                df_history = pd.DataFrame(runs)
+                df_history["種類"] = df_history["kind"].map(lambda k: kind_labels.get(k, k))
+                df_history["コミット"] = df_history["git_sha"].fillna("").str[:8] + \
+                    df_history["git_dirty"].map(lambda d: "+" if d else "")
+                df_history["条件"] = df_history["config"].map(
+                    lambda c: ", ".join(f"{k}={v}" for k, v in c.items() if v is not None and k != "path"))
+                
+                display_history = df_history[[
+                    "created_at", "種類", "endpoint", "コミット", "条件", "count", "p50_ms", "p95_ms",
+                    "p99_ms", "throughput", "success_rate", "errors"
+                ]].rename(columns={
+                    "created_at": "測定時刻",
+                    "endpoint": "エンドポイント",
+                    "count": "件数",
+                    "p50_ms": "p50(ms)",
+                    "p95_ms": "p95(ms)",
+                    "p99_ms": "p99(ms)",
+                    "throughput": "スループット(req/s)",
+                    "success_rate": "成功率(%)",
+                    "errors": "エラー数"
+                }).round(2)
+                
+                st.dataframe(display_history, use_container_width=True, hide_index=True)
+                
+                # エンドポイント別の推移
+                fig_history = chart.line(
+                    df_history.sort_values("id"),
+                    x="created_at",
+                    y="p95_ms",
+                    color="endpoint",
+                    symbol="種類",
+                    markers=True,
+                    title="p95応答時間の推移",
+                    labels={"created_at": "測定時刻", "p95_ms": "p95 (ms)", "endpoint": "エンドポイント"}
+                )
+                fig_history.update_layout(height=350)
+                st.plotly_chart(fig_history, use_container_width=True)
+                
+                # CSVダウンロード
+                csv_history = display_history.to_csv(index=False).encode('utf-8-sig')
+                st.download_button(
+                    label="📥 測定履歴をCSVダウンロード",
+                    data=csv_history,
+                    file_name=f"performance_history_{pd.Timestamp.now().strftime('%Y%m%d_%H%M')}.csv",
+                    mime="text/csv"
+                )
+            else:
+                st.info("📭 測定履歴がありません。パフォーマンステストを実行してください。")
+        
+        with col2:
+            st.markdown("#### 🗂️ 履歴管理")
+            st.caption(f"保存先: {store.path}")
+            
+            if st.button("🗑️ 画面上の集計をクリア", key="clear_performance_history"):
+                if "performance_results" in st.session_state:
+                    del st.session_state.performance_results
+                if "load_test_results" in st.session_state:
+                    del st.session_state.load_test_results
+                st.success("✅ 画面上の集計をクリアしました")
+                st.rerun()
+            
+            confirm_delete = st.checkbox("保存済み履歴も削除する", key="confirm_delete_perf_store")
+            if st.button("🗑️ 保存済み履歴を削除", key="delete_perf_store", disabled=not confirm_delete):
+                deleted = store.delete_runs(kind)
+                st.success(f"✅ {deleted}件の履歴を削除しました")
+                st.rerun()
+            
+            # 履歴サマリー
+            st.metric("📊 保存済み実行数", store.count_runs())
+            if "performance_results" in st.session_state:
+                st.metric("⏱️ このセッションの測定", len(st.session_state.performance_results))
+            if "load_test_results" in st.session_state:
+                st.metric("🚀 このセッションの負荷テスト", len(st.session_state.load_test_results))
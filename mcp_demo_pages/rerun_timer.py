@@ -0,0 +1,103 @@
+# mcp_demo_pages/rerun_timer.py
+# Streamlit 再実行1回あたりの処理時間をフェーズ別に計測する
+
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from typing import Dict, List, Optional
+
+
+PHASES = ("imports", "status", "data_fetch", "render")
+PHASE_LABELS = {
+    "imports"   : "モジュール読み込み",
+    "status"    : "接続状態の確認",
+    "data_fetch": "データ取得待ち",
+    "render"    : "描画",
+    "other"     : "その他",
+}
+
+# Streamlit はセッションごとに別スレッドでスクリプトを実行するため、計測中のタイマーはスレッド単位で持つ
+_local = threading.local()
+
+
+class RerunTimer:
+    """フェーズごとの排他的な経過時間を集計するタイマー
+
+    フェーズは入れ子にでき、内側のフェーズの時間は外側から差し引く
+    （描画中のデータ取得待ちは data_fetch にだけ計上される）。
+    """
+
+    def __init__(self, started_at: Optional[float] = None):
+        self.started_at = started_at if started_at is not None else time.perf_counter()
+        self.durations: Dict[str, float] = defaultdict(float)
+        self.total: Optional[float] = None
+        self._stack: List[str] = []
+        self._thread = threading.get_ident()
+
+    @property
+    def finished(self) -> bool:
+        return self.total is not None
+
+    @contextmanager
+    def phase(self, name: str):
+        if self.finished or threading.get_ident() != self._thread:
+            # 終了後（フラグメントのみの再実行など）や別スレッドからの呼び出しは計測しない
+            yield
+            return
+        parent = self._stack[-1] if self._stack else None
+        self._stack.append(name)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self._stack.pop()
+            self.durations[name] += elapsed
+            if parent is not None:
+                self.durations[parent] -= elapsed
+
+    def record(self, name: str, seconds: float):
+        """計測済みの時間を加算（スクリプト先頭の import など）"""
+        self.durations[name] += seconds
+
+    def finish(self) -> Dict[str, float]:
+        """計測を終了し、フェーズ別の時間（ミリ秒）を返す"""
+        if self.total is None:
+            self.total = time.perf_counter() - self.started_at
+            _local.timer = None
+        return self.summary()
+
+    def summary(self) -> Dict[str, float]:
+        total = self.total if self.total is not None else time.perf_counter() - self.started_at
+        result = {name: self.durations.get(name, 0.0) * 1000 for name in PHASES}
+        result["other"] = max(0.0, total * 1000 - sum(result.values()))
+        result["total"] = total * 1000
+        return result
+
+
+def start_rerun(started_at: Optional[float] = None) -> RerunTimer:
+    """この再実行のタイマーを開始し、現在のスレッドに登録"""
+    timer = RerunTimer(started_at)
+    _local.timer = timer
+    return timer
+
+
+def current_timer() -> Optional[RerunTimer]:
+    return getattr(_local, "timer", None)
+
+
+def timed_phase(name: str):
+    """計測中のタイマーがあればそのフェーズとして計測（なければ何もしない）"""
+    timer = current_timer()
+    return timer.phase(name) if timer is not None else nullcontext()
+
+
+__all__ = [
+    'PHASES',
+    'PHASE_LABELS',
+    'RerunTimer',
+    'start_rerun',
+    'current_timer',
+    'timed_phase',
+]
@@ -0,0 +1,225 @@
+# mcp_demo_pages/sales_analytics.py
+# 売上分析ページ: 売上分析ダッシュボード
+
+import streamlit as st
+
+from mcp_demo_pages.base import DemoPage
+from mcp_demo_pages.data_layer import cached_get
+
+
+class SalesAnalyticsPage(DemoPage):
+    """売上分析ページ"""
+
+    def render(self):
+        """売上分析ページの描画（デモ機能2）"""
+        st.markdown("## 📈 売上分析デモ")
+        st.markdown("売上統計とビジネス指標のダッシュボード")
+        
+        client = self.get_api_client()
+        if not client:
+            st.error("API サーバーに接続できません。")
+            return
+        
+        # 自動更新オプション
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            st.markdown("### 💰 売上統計ダッシュボード")
+        with col2:
+            auto_refresh = st.checkbox("🔄 自動更新", value=False, key="sales_auto_refresh")
+            force_refresh = st.button("🔄 更新", type="primary")
+        
+        try:
+            with st.spinner("売上データ分析中..."):
+                # 売上統計データを取得
+                stats_data = cached_get(client, "/api/stats/sales", max_age=0 if force_refresh else None)
+                
+                if stats_data:
+                    # 基本統計指標
+                    st.markdown("#### 📊 基本統計")
+                    col1, col2, col3, col4 = st.columns(4)
+                    
+                    with col1:
+                        total_sales = stats_data.get("total_sales", 0)
+                        st.metric(
+                            "💰 総売上",
+                            f"¥{total_sales:,.0f}",
+                            delta=f"+¥{total_sales*0.12:,.0f}" if total_sales > 0 else None
+                        )
+                    
+                    with col2:
+                        total_orders = stats_data.get("total_orders", 0)
+                        st.metric(
+                            "📦 総注文数", 
+                            f"{total_orders:,}件",
+                            delta=f"+{int(total_orders*0.08):,}" if total_orders > 0 else None
+                        )
+                    
+                    with col3:
+                        avg_order_value = stats_data.get("average_order_value", 0)
+                        st.metric(
+                            "📈 平均注文額",
+                            f"¥{avg_order_value:,.0f}",
+                            delta=f"+¥{avg_order_value*0.05:,.0f}" if avg_order_value > 0 else None
+                        )
+                    
+                    with col4:
+                        customer_count = len(stats_data.get("sales_by_city", []))
+                        st.metric("👥 都市数", f"{customer_count}都市")
+                    
+                    # 人気商品ランキング
+                    st.markdown("#### 🏆 人気商品ランキング TOP 5")
+                    popular_products = stats_data.get("popular_products", [])
+                    
+                    if popular_products:
+                        # グラフ用データ準備
+                        import pandas as pd
+                        import plotly.express as px
+                        import plotly.graph_objects as go
+                        
+                        df_products = pd.DataFrame(popular_products[:5])
+                        
+                        # 商品売上グラフ
+                        col1, col2 = st.columns([2, 1])
+                        
+                        with col1:
+                            if not df_products.empty:
+                                fig = px.bar(
+                                    df_products,
+                                    x="product_name",
+                                    y="total_sales",
+                                    title="商品別売上 (TOP 5)",
+                                    labels={
+                                        "product_name": "商品名",
+                                        "total_sales": "売上額 (¥)"
+                                    },
+                                    color="total_sales",
+                                    color_continuous_scale="viridis"
+                                )
+                                fig.update_layout(height=400)
+                                st.plotly_chart(fig, use_container_width=True)
+                        
+                        with col2:
+                            # 商品詳細テーブル
+                            st.markdown("**商品詳細**")
+                            for i, product in enumerate(popular_products[:5], 1):
+                                with st.container():
+                                    st.markdown(f"""
+                                    **{i}. {product.get('product_name', 'Unknown')}**
+                                    - 売上: ¥{product.get('total_sales', 0):,.0f}
+                                    - 数量: {product.get('total_quantity', 0):,}個
+                                    - 注文数: {product.get('order_count', 0):,}件
+                                    """)
+                    
+                    # 都市別売上分析
+                    st.markdown("#### 🌍 都市別売上分析")
+                    sales_by_city = stats_data.get("sales_by_city", [])
+                    
+                    if sales_by_city:
+                        import pandas as pd
+                        import plotly.express as px
+                        df_cities = pd.DataFrame(sales_by_city)
+                        
+                        # 都市別売上グラフ
+                        col1, col2 = st.columns(2)
+                        
+                        with col1:
+                            # 棒グラフ
+                            fig_bar = px.bar(
+                                df_cities,
+                                x="city",
+                                y="total_sales",
+                                title="都市別総売上",
+                                labels={
+                                    "city": "都市",
+                                    "total_sales": "売上額 (¥)"
+                                },
+                                color="total_sales"
+                            )
+                            fig_bar.update_layout(height=350)
+                            st.plotly_chart(fig_bar, use_container_width=True)
+                        
+                        with col2:
+                            # 円グラフ
+                            fig_pie = px.pie(
+                                df_cities,
+                                values="total_sales",
+                                names="city",
+                                title="都市別売上比率"
+                            )
+                            fig_pie.update_layout(height=350)
+                            st.plotly_chart(fig_pie, use_container_width=True)
+                        
+                        # 都市別詳細テーブル
+                        st.markdown("#### 📋 都市別詳細データ")
+                        
+                        # データフレーム整形
+                        df_cities_display = df_cities.copy()
+                        df_cities_display["total_sales"] = df_cities_display["total_sales"].apply(
+                            lambda x: f"¥{x:,.0f}"
+                        )
+                        df_cities_display = df_cities_display.rename(columns={
+                            "city": "都市",
+                            "total_sales": "総売上",
+                            "customer_count": "顧客数",
+                            "order_count": "注文数"
+                        })
+                        
+                        # ランキング追加
+                        df_cities_display = df_cities_display.sort_values("総売上", key=lambda x: x.str.replace("¥", "").str.replace(",", "").astype(float), ascending=False)
+                        df_cities_display.insert(0, "順位", range(1, len(df_cities_display) + 1))
+                        
+                        st.dataframe(
+                            df_cities_display,
+                            use_container_width=True,
+                            hide_index=True
+                        )
+                        
+                        # CSVダウンロード
+                        csv = df_cities_display.to_csv(index=False).encode('utf-8-sig')
+                        st.download_button(
+                            label="📥 都市別データをCSVダウンロード",
+                            data=csv,
+                            file_name=f"sales_by_city_{pd.Timestamp.now().strftime('%Y%m%d')}.csv",
+                            mime="text/csv"
+                        )
+                    
+                    # 追加の分析指標
+                    st.markdown("#### 🔍 詳細分析")
+                    
+                    col1, col2 = st.columns(2)
+                    
+                    with col1:
+                        st.markdown("**📈 成長指標**")
+                        if total_sales > 0 and total_orders > 0:
+                            efficiency = total_sales / total_orders
+                            st.metric("効率性指標", f"¥{efficiency:,.0f}/注文")
+                            
+                            if popular_products:
+                                top_product_share = popular_products[0].get("total_sales", 0) / total_sales * 100
+                                st.metric("トップ商品シェア", f"{top_product_share:.1f}%")
+                    
+                    with col2:
+                        st.markdown("**🎯 マーケット情報**")
+                        if sales_by_city:
+                            top_city = max(sales_by_city, key=lambda x: x.get("total_sales", 0))
+                            st.metric("最大マーケット", top_city.get("city", "Unknown"))
+                            
+                            market_concentration = top_city.get("total_sales", 0) / total_sales * 100
+                            st.metric("市場集中度", f"{market_concentration:.1f}%")
+                    
+                else:
+                    st.error("売上データの取得に失敗しました。")
+                    st.markdown("### 🔧 トラブルシューティング")
+                    st.markdown("""
+                    1. **データベースの確認**: PostgreSQLが起動しているか確認
+                    2. **テストデータの投入**: `python setup_test_data.py` を実行
+                    3. **API サーバーの再起動**: `python mcp_api_server.py` を再実行
+                    """)
+                    
+        except Exception as e:
+            st.error(f"❌ エラーが発生しました: {str(e)}")
+            
+            # エラーの詳細情報
+            with st.expander("🔍 エラー詳細"):
+                import traceback
+                st.code(traceback.format_exc())
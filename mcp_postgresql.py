@@ -166,7 +166,7 @@ SQL:"""
             
             if texts:
                 sql_query = self._clean_sql_query(texts[0])
-                explanation = f"質問『{user_query}』に対応するSQLを生成しました。"
+                explanation = f"質問『{user_query}』に対応するSQLを生成しました。{ResponseProcessor.cache_note(response)}"
                 return sql_query, explanation
             
             return "", "SQL生成に失敗しました"
@@ -229,10 +229,13 @@ SQL:"""
         
         return True
     
-    def explain_results(self, query: str, results: List[Dict], model: str = "gpt-4o-mini") -> str:
-        """クエリ結果を自然言語で説明"""
+    def explain_results(self, query: str, results: List[Dict], model: str = "gpt-4o-mini", stream: bool = False):
+        """クエリ結果を自然言語で説明
+
+        stream=True なら説明文の断片を届いた順に返すジェネレータを返す（st.write_stream 用）
+        """
         if not results:
-            return "検索結果がありませんでした。"
+            return iter(["検索結果がありませんでした。"]) if stream else "検索結果がありませんでした。"
         
         try:
             # 結果のサマリーを作成
@@ -258,6 +261,10 @@ SQL:"""
                 }
             ]
             
+            fallback = f"{len(results)}件の結果が見つかりました。"
+            if stream:
+                return self.openai_client.stream_text(input=messages, model=model, fallback=fallback)
+
             response = self.openai_client.create_response(
                 input=messages,
                 model=model
@@ -269,11 +276,12 @@ SQL:"""
             if texts:
                 return texts[0].strip()
             else:
-                return f"{len(results)}件の結果が見つかりました。"
+                return fallback
                 
         except Exception as e:
             logger.error(f"Result explanation error: {e}")
-            return f"{len(results)}件の結果が見つかりました。"
+            fallback = f"{len(results)}件の結果が見つかりました。"
+            return iter([fallback]) if stream else fallback
 
 
 class NaturalLanguageDBInterface:
@@ -306,6 +314,8 @@ class NaturalLanguageDBInterface:
             'query_history': [],
             'current_results': None,
             'current_explanation': "",
+            'current_query': "",
+            'current_summary': None,
             'schema_loaded': False
         }
         
@@ -548,6 +558,8 @@ class NaturalLanguageDBInterface:
             # 結果を保存
             st.session_state.current_results = results
             st.session_state.current_explanation = response_message
+            st.session_state.current_query = user_query
+            st.session_state.current_summary = None
             st.session_state.query_history.append((user_query, "MCP経由"))
     
     def display_results(self):
@@ -563,6 +575,16 @@ class NaturalLanguageDBInterface:
         # AI による説明
         if st.session_state.current_explanation:
             st.info(f"🤖 **AI分析**: {st.session_state.current_explanation}")
+
+        # 結果の説明（初回は届いた順に表示し、再実行時は保存済みの文を表示）
+        if results:
+            st.markdown("**🤖 結果の説明**")
+            if st.session_state.current_summary is None:
+                st.session_state.current_summary = st.write_stream(self.query_processor.explain_results(
+                    st.session_state.current_query, results, st.session_state.selected_model, stream=True
+                ))
+            else:
+                st.markdown(st.session_state.current_summary)
         
         if not results:
             st.warning("検索結果がありませんでした。")
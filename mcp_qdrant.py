@@ -222,7 +222,7 @@ MCPサーバーを使用してベクトルデータベースをクエリし、
                 strategy_text = self._clean_json_response(texts[0])
                 try:
                     strategy = json.loads(strategy_text)
-                    explanation = f"質問『{user_query}』に対応するベクトル検索戦略を生成しました。"
+                    explanation = f"質問『{user_query}』に対応するベクトル検索戦略を生成しました。{ResponseProcessor.cache_note(response)}"
                     return strategy, explanation
                 except json.JSONDecodeError:
                     # JSONパースに失敗した場合のフォールバック
@@ -304,7 +304,7 @@ MCPサーバーを使用してベクトルデータベースをクエリし、
     def _get_embedding(self, text: str) -> Optional[List[float]]:
         """OpenAI APIを使用してテキストの埋め込みベクトルを取得"""
         try:
-            response = self.openai_client.client.embeddings.create(
+            response = self.openai_client.create_embedding(
                 input=text,
                 model="text-embedding-3-small"
             )
@@ -405,10 +405,13 @@ MCPサーバーを使用してベクトルデータベースをクエリし、
         
         return mock_results[:strategy.get('limit', 5)]
     
-    def explain_results(self, query: str, results: List[Dict], model: str = "gpt-4o-mini") -> str:
-        """ベクトル検索結果を自然言語で説明"""
+    def explain_results(self, query: str, results: List[Dict], model: str = "gpt-4o-mini", stream: bool = False):
+        """ベクトル検索結果を自然言語で説明
+
+        stream=True なら説明文の断片を届いた順に返すジェネレータを返す（st.write_stream 用）
+        """
         if not results:
-            return "検索結果がありませんでした。"
+            return iter(["検索結果がありませんでした。"]) if stream else "検索結果がありませんでした。"
         
         try:
             # 結果のサマリーを作成
@@ -434,6 +437,10 @@ MCPサーバーを使用してベクトルデータベースをクエリし、
                 }
             ]
             
+            fallback = f"{len(results)}件の類似結果が見つかりました。"
+            if stream:
+                return self.openai_client.stream_text(input=messages, model=model, fallback=fallback)
+
             response = self.openai_client.create_response(
                 input=messages,
                 model=model
@@ -445,11 +452,12 @@ MCPサーバーを使用してベクトルデータベースをクエリし、
             if texts:
                 return texts[0].strip()
             else:
-                return f"{len(results)}件の類似結果が見つかりました。"
+                return fallback
                 
         except Exception as e:
             logger.error(f"Result explanation error: {e}")
-            return f"{len(results)}件の類似結果が見つかりました。"
+            fallback = f"{len(results)}件の類似結果が見つかりました。"
+            return iter([fallback]) if stream else fallback
 
 
 class NaturalLanguageVectorInterface:
@@ -482,6 +490,8 @@ class NaturalLanguageVectorInterface:
             'query_history': [],
             'current_results': None,
             'current_explanation': "",
+            'current_query': "",
+            'current_summary': None,
             'collections_loaded': False
         }
         
@@ -577,7 +587,7 @@ class NaturalLanguageVectorInterface:
   )
 
   # Line: 埋め込みベクトル生成
-  response = self.openai_client.client.embeddings.create(
+  response = self.openai_client.create_embedding(
       input=text,
       model="text-embedding-3-small"
   )
@@ -737,6 +747,8 @@ class NaturalLanguageVectorInterface:
             # 結果を保存
             st.session_state.current_results = results
             st.session_state.current_explanation = response_message
+            st.session_state.current_query = user_query
+            st.session_state.current_summary = None
             st.session_state.query_history.append((user_query, "MCP経由"))
     
     def display_results(self):
@@ -752,6 +764,16 @@ class NaturalLanguageVectorInterface:
         # AI による説明
         if st.session_state.current_explanation:
             st.info(f"🤖 **AI分析**: {st.session_state.current_explanation}")
+
+        # 結果の説明（初回は届いた順に表示し、再実行時は保存済みの文を表示）
+        if results:
+            st.markdown("**🤖 結果の説明**")
+            if st.session_state.current_summary is None:
+                st.session_state.current_summary = st.write_stream(self.query_processor.explain_results(
+                    st.session_state.current_query, results, st.session_state.selected_model, stream=True
+                ))
+            else:
+                st.markdown(st.session_state.current_summary)
         
         if not results:
             st.warning("検索結果がありませんでした。")
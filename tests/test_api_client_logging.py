@@ -0,0 +1,70 @@
+# tests/test_api_client_logging.py
+# MCPAPIClient の通信エラーが標準出力ではなくロガーに出ることの確認
+
+import logging
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+import requests
+
+from mcp_api_client import MCPAPIClient
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        status = 404 if self.path.startswith("/missing") else 503
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    server = HTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def _closed_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_connection_errors_are_logged_not_printed(capsys, caplog):
+    client = MCPAPIClient(f"http://127.0.0.1:{_closed_port()}", failure_threshold=1)
+
+    with caplog.at_level(logging.DEBUG, logger="mcp_api_client"):
+        with pytest.raises(requests.exceptions.ConnectionError):
+            client._send_request("GET", "/api/customers")
+        assert client.check_health(verbose=False) is False
+
+    assert capsys.readouterr().out == ""
+    messages = [(record.levelno, record.getMessage()) for record in caplog.records]
+    assert any(level == logging.WARNING and "接続エラー" in message for level, message in messages)
+    assert any(level == logging.WARNING and "サーキットブレーカー open" in message for level, message in messages)
+
+
+def test_http_errors_log_4xx_at_debug_and_5xx_at_warning(server_url, capsys, caplog):
+    client = MCPAPIClient(server_url)
+
+    with caplog.at_level(logging.DEBUG, logger="mcp_api_client"):
+        with pytest.raises(requests.exceptions.HTTPError):
+            client._send_request("GET", "/missing")
+        with pytest.raises(requests.exceptions.HTTPError):
+            client._send_request("GET", "/api/customers")
+
+    assert capsys.readouterr().out == ""
+    levels = {record.getMessage().split(" - ")[0]: record.levelno for record in caplog.records}
+    assert levels[f"❌ HTTPエラー: GET {server_url}/missing"] == logging.DEBUG
+    assert levels[f"❌ HTTPエラー: GET {server_url}/api/customers"] == logging.WARNING
@@ -0,0 +1,42 @@
+# tests/test_benchmark_rows.py
+# 失敗レスポンスがレイテンシ・スループットに混ざらず、既定の比較で検出されることの確認
+
+import json
+
+import mcp_benchmark
+from helper_perf import EndpointStats, RequestTiming
+from mcp_benchmark import _result_row, main
+
+
+def _stats(ok_ms, failed_ms):
+    stats = EndpointStats()
+    for ms in ok_ms:
+        stats.add(RequestTiming("GET", "/api/customers", status=200, total_ms=ms))
+    for ms in failed_ms:
+        stats.add(RequestTiming("GET", "/api/customers", status=503, total_ms=ms))
+    return stats
+
+
+def test_failures_are_kept_out_of_latency_and_rps():
+    row = _result_row(8, "/api/customers", _stats([50.0] * 10, [1.0] * 90), elapsed=1.0)
+
+    assert row["count"] == 100
+    assert row["errors"] == 90
+    assert row["error_rate"] == 0.9
+    assert row["rps"] == 10.0
+    assert 49.0 < row["p50_ms"] < 51.0
+
+
+def test_fast_failing_run_fails_default_comparison(tmp_path, monkeypatch):
+    # 成功分のレイテンシ・スループットは同じで、エラーだけが増えた実行
+    baseline = {"results": [_result_row(8, "ALL", _stats([50.0] * 100, []), elapsed=1.0)]}
+    current = [_result_row(8, "ALL", _stats([50.0] * 100, [1.0] * 900), elapsed=1.0)]
+    path = tmp_path / "baseline.json"
+    path.write_text(json.dumps(baseline), encoding="utf-8")
+
+    monkeypatch.setattr(mcp_benchmark.MCPAPIClient, "check_health", lambda self: True)
+    monkeypatch.setattr(mcp_benchmark, "run_benchmark",
+                        lambda *args, **kwargs: {"meta": {}, "results": current})
+    monkeypatch.setattr(mcp_benchmark, "print_rows", lambda rows: None)
+
+    assert main(["--concurrency", "8", "--compare", str(path)]) == 1
@@ -0,0 +1,79 @@
+# tests/test_cache_keys.py
+# cache_result のキーがプロセスをまたいで衝突しないことの確認（共有ストアとして DiskCache を使う）
+
+import json
+import os
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("openai")
+pytest.importorskip("tiktoken")
+
+REPO = Path(__file__).resolve().parent.parent
+
+WORKER = textwrap.dedent("""
+    import json, os, sys
+    sys.path.insert(0, {repo!r})
+    import helper_api as h
+
+    store = h.DiskCache(sys.argv[1])
+
+    class Client:
+        def __init__(self, base_url):
+            self.base_url = base_url
+
+        @h.cache_result(ttl=60, backend=store)
+        def get(self, query):
+            return f"{{self.base_url}}/{{query}}@{{os.getpid()}}"
+
+    class KeyedClient(Client):
+        def __cache_key__(self):
+            return {{"base_url": self.base_url}}
+
+        @h.cache_result(ttl=60, backend=store)
+        def get(self, query):
+            return f"{{self.base_url}}/{{query}}@{{os.getpid()}}"
+
+    cls = Client if sys.argv[2] == "plain" else KeyedClient
+    client = cls(sys.argv[3])
+    print(json.dumps({{"result": client.get("q"), "key": list(cls.get.cache_key(client, "q")),
+                      "entries": store.size()}}))
+""")
+
+
+def run_worker(tmp_path: Path, mode: str, base_url: str) -> dict:
+    script = tmp_path / "worker.py"
+    script.write_text(WORKER.format(repo=str(REPO)), encoding="utf-8")
+    completed = subprocess.run(
+        [sys.executable, str(script), str(tmp_path / "shared.db"), mode, base_url],
+        cwd=REPO, capture_output=True, text=True, timeout=120, env=dict(os.environ),
+    )
+    assert completed.returncode == 0, completed.stderr
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def test_process_local_keys_are_not_shared(tmp_path):
+    """__cache_key__ のない self は別プロセスの別クライアントと同じキーになるので、共有ストアに置かない"""
+    first = run_worker(tmp_path, "plain", "http://a")
+    second = run_worker(tmp_path, "plain", "http://b")
+
+    assert first["key"] == second["key"]          # プロセス内の番号なので一致してしまう
+    assert first["key"][1] == "local"
+    assert second["result"].startswith("http://b/q@")
+    assert second["entries"] == 0
+
+
+def test_cache_key_protocol_shares_across_processes(tmp_path):
+    """__cache_key__ を持つオブジェクトは接続先ごとに別キーになり、同じ接続先なら別プロセスから当たる"""
+    first = run_worker(tmp_path, "keyed", "http://a")
+    other = run_worker(tmp_path, "keyed", "http://b")
+    again = run_worker(tmp_path, "keyed", "http://a")
+
+    assert first["key"] != other["key"]
+    assert other["result"].startswith("http://b/q@")
+    assert again["result"] == first["result"]     # 最初のプロセスが保存した結果
+    assert again["entries"] == 2
@@ -0,0 +1,98 @@
+# tests/test_chart.py
+# helper_chart の間引き（LTTB・最小最大バケット・グリッド・DataFrame）が形状と極値を保つことの確認
+
+from typing import List
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from helper_chart import (
+    downsample_frame,
+    downsample_indices,
+    grid_indices,
+    lttb_indices,
+    minmax_indices,
+    synthetic_series,
+)
+
+
+def _lttb_reference(x: np.ndarray, y: np.ndarray, n_out: int) -> List[int]:
+    """素朴な LTTB（比較用）"""
+    n = len(y)
+    bucket = (n - 2) / (n_out - 2)
+    selected, a = [0], 0
+    for i in range(n_out - 2):
+        lo, hi = int(i * bucket) + 1, int((i + 1) * bucket) + 1
+        nlo, nhi = hi, int((i + 2) * bucket) + 1 if i < n_out - 3 else n
+        if i == n_out - 3:
+            nx, ny = x[n - 1], y[n - 1]
+        else:
+            nx, ny = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        best, best_area = lo, -1.0
+        for j in range(lo, hi):
+            area = abs((x[a] - nx) * (y[j] - y[a]) - (x[a] - x[j]) * (ny - y[a]))
+            if area > best_area:
+                best, best_area = j, area
+        selected.append(best)
+        a = best
+    selected.append(n - 1)
+    return selected
+
+
+@pytest.fixture(scope="module")
+def series():
+    return synthetic_series(5000)
+
+
+def test_lttb_matches_naive_implementation(series):
+    x, y = series["x"], series["y"]
+    assert lttb_indices(x, y, 300).tolist() == _lttb_reference(x, y, 300)
+
+
+def test_minmax_keeps_extremes_within_bounds(series):
+    y = series["y"]
+    minmax = minmax_indices(y, 300)
+
+    assert minmax_indices(y[:4999], 300).max() < 4999
+    assert minmax.size <= 300
+    assert y.argmax() in minmax and y.argmin() in minmax
+
+
+def test_spikes_survive_downsampling(series):
+    x, y = series["x"], series["y"]
+    lttb, minmax = lttb_indices(x, y, 300), minmax_indices(y, 300)
+    for spike in series["spikes"]:
+        assert spike in lttb or spike in minmax
+
+
+def test_gap_keeps_first_nan_to_break_the_line(series):
+    gapped = series["y"].copy()
+    gapped[1000:1200] = np.nan
+    kept = downsample_indices(series["x"], gapped, 300)
+
+    assert 1000 in kept
+    assert np.isnan(gapped[kept]).sum() == 1
+
+
+def test_downsample_frame_per_group_with_datetime_x(series):
+    y = series["y"]
+    df = pd.DataFrame({
+        "timestamp": pd.date_range("2024-01-01", periods=10000, freq="min"),
+        "value": np.concatenate([y, y[::-1]]),
+        "endpoint": ["a"] * 5000 + ["b"] * 5000,
+        "note": "x",
+    })
+    thinned = downsample_frame(df, "timestamp", "value", 400, group="endpoint")
+
+    assert len(thinned) <= 400
+    assert set(thinned["endpoint"]) == {"a", "b"}
+    assert list(thinned.columns) == list(df.columns)
+
+
+def test_grid_thinning_keeps_outer_points():
+    points = np.random.default_rng(1).normal(size=(20000, 2))
+    grid = grid_indices(points[:, 0], points[:, 1], 1000)
+
+    assert grid.size <= 1000
+    assert points[:, 0].argmax() in grid
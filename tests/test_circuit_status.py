@@ -0,0 +1,80 @@
+# tests/test_circuit_status.py
+# 接続状態が実際の通信結果に基づくこと（未通信は未確認、成功後だけ接続済み）の確認
+
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+import requests
+
+from mcp_api_client import CircuitBreaker, MCPAPIClient
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200 if self.path == "/health" else 503)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", "15")
+        self.end_headers()
+        self.wfile.write(b'{"status":"ok"}')
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    server = HTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def _closed_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_fresh_client_is_unknown_not_connected():
+    client = MCPAPIClient(f"http://127.0.0.1:{_closed_port()}")
+    status = client.get_circuit_status()
+    assert status["state"] == CircuitBreaker.CLOSED
+    assert status["connection"] == "unknown"
+    assert status["last_success_at"] is None and status["last_failure_at"] is None
+    assert client.is_connected is None
+    assert client.is_available
+
+
+def test_failures_before_trip_are_not_connected():
+    client = MCPAPIClient(f"http://127.0.0.1:{_closed_port()}", failure_threshold=3)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        client._send_request("GET", "/api/customers")
+    status = client.get_circuit_status()
+    assert status["state"] == CircuitBreaker.CLOSED
+    assert status["connection"] == "failing"
+    assert client.is_connected is False
+
+
+def test_connected_only_after_success_and_follows_latest_result(server_url):
+    client = MCPAPIClient(server_url, failure_threshold=5)
+    assert client.check_health(verbose=False)
+    assert client.get_circuit_status()["connection"] == "connected"
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        client._send_request("GET", "/api/customers")  # 503
+    assert client.get_circuit_status()["connection"] == "failing"
+
+    assert client.check_health(verbose=False)
+    assert client.is_connected is True
+
+
+def test_open_breaker_reports_open():
+    client = MCPAPIClient(f"http://127.0.0.1:{_closed_port()}", failure_threshold=1)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        client._send_request("GET", "/api/customers")
+    assert client.get_circuit_status()["connection"] == "open"
+    assert client.is_connected is False
@@ -0,0 +1,64 @@
+# tests/test_data_layer.py
+# APIDataCache の書き込み時無効化と同時ミスのまとめ取得の確認
+
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("streamlit")
+pytest.importorskip("pandas")
+
+from mcp_demo_pages.data_layer import APIDataCache
+
+
+def test_invalidate_during_load_discards_stale_value():
+    cache = APIDataCache(ttl=60)
+    key = APIDataCache.make_key("http://api", "/api/customers")
+    started, release = threading.Event(), threading.Event()
+
+    def slow_loader():
+        started.set()
+        release.wait(5)
+        return ["書き込み前"]
+
+    reader = threading.Thread(target=cache.fetch, args=(key, slow_loader))
+    reader.start()
+    assert started.wait(5)
+    cache.invalidate("/api/customers")  # 取得中に書き込みが完了した
+    release.set()
+    reader.join(5)
+
+    assert cache.fetch(key, lambda: ["書き込み後"]) == ["書き込み後"]
+    assert cache.fetch(key, lambda: ["再取得"]) == ["書き込み後"]
+
+
+def test_concurrent_misses_share_one_load():
+    cache = APIDataCache(ttl=60)
+    key = APIDataCache.make_key("http://api", "/api/orders", {"limit": 100})
+    calls = []
+
+    def loader():
+        calls.append(1)
+        time.sleep(0.2)
+        return {"orders": [1, 2, 3]}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.fetch(key, loader))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert results == [{"orders": [1, 2, 3]}] * 8
+    assert cache.stats()["coalesced"] == 7
+
+
+def test_loader_error_reaches_waiters_and_is_not_cached():
+    cache = APIDataCache(ttl=60)
+    key = APIDataCache.make_key("http://api", "/api/products")
+
+    with pytest.raises(RuntimeError):
+        cache.fetch(key, lambda: (_ for _ in ()).throw(RuntimeError("down")))
+    assert cache.fetch(key, lambda: ["ok"]) == ["ok"]
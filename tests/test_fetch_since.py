@@ -0,0 +1,66 @@
+# tests/test_fetch_since.py
+# since_id ページングが since_id を無視するサーバーでも止まり、ページ数の上限を守ることの確認
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from mcp_api_client import MCPAPIClient
+
+TOTAL_ROWS = 95
+
+
+class _Handler(BaseHTTPRequestHandler):
+    requests_seen = 0
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        limit = int(query["limit"][0])
+        since_id = int(query.get("since_id", ["0"])[0])
+        if url.path == "/legacy/orders":  # since_id に対応していない旧サーバー
+            since_id = 0
+        type(self).requests_seen += 1
+        ids = range(since_id + 1, min(since_id + limit, TOTAL_ROWS) + 1)
+        body = json.dumps([{"id": i} for i in ids]).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def client():
+    _Handler.requests_seen = 0
+    server = HTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield MCPAPIClient(f"http://127.0.0.1:{server.server_port}")
+    server.shutdown()
+    server.server_close()
+
+
+def test_fetches_all_pages_until_short_page(client):
+    rows = client._fetch_since("/api/orders", 0, page_size=10)
+    assert [row["id"] for row in rows] == list(range(1, TOTAL_ROWS + 1))
+    assert _Handler.requests_seen == 10
+
+
+def test_server_ignoring_since_id_raises_instead_of_looping(client):
+    with pytest.raises(ValueError, match="since_id"):
+        client._fetch_since("/legacy/orders", 0, page_size=10)
+    assert _Handler.requests_seen == 2
+
+
+def test_max_pages_caps_one_call_and_next_call_resumes(client):
+    first = client._fetch_since("/api/orders", 0, page_size=10, max_pages=3)
+    assert [row["id"] for row in first] == list(range(1, 31))
+    rest = client._fetch_since("/api/orders", first[-1]["id"], page_size=10, max_pages=100)
+    assert [row["id"] for row in rest] == list(range(31, TOTAL_ROWS + 1))
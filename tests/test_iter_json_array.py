@@ -0,0 +1,77 @@
+# tests/test_iter_json_array.py
+# iter_json_array がチャンクの切れ目に依存せず、途中で終わったストリームを検出することの確認
+
+import json
+import random
+
+import pytest
+
+from mcp_api_client import iter_json_array
+
+ROWS = [
+    {"id": 1, "name": "田中 太郎", "price": 1234.5, "tags": ["a", "b"], "note": None},
+    {"id": 2, "name": "quote \" and ]", "price": -0.25e3, "tags": [], "note": True},
+    12345,
+    -6.75e-3,
+    "文字列,]",
+    True,
+    False,
+    None,
+    [1, [2, 3]],
+    {"nested": {"id": 99}},
+]
+
+
+def _random_chunks(payload: bytes, rng: random.Random):
+    cuts = sorted(rng.sample(range(1, len(payload)), rng.randint(1, min(40, len(payload) - 1))))
+    return [payload[start:end] for start, end in zip([0] + cuts, cuts + [len(payload)])]
+
+
+@pytest.mark.parametrize("separators", [(",", ":"), (", ", ": ")])
+def test_random_chunk_splits_yield_same_rows(separators):
+    payload = json.dumps(ROWS, ensure_ascii=False, separators=separators).encode("utf-8")
+    rng = random.Random(0)
+    for _ in range(300):
+        assert list(iter_json_array(_random_chunks(payload, rng))) == ROWS
+
+
+def test_one_byte_chunks():
+    payload = json.dumps(ROWS, ensure_ascii=False).encode("utf-8")
+    assert list(iter_json_array(payload[i:i + 1] for i in range(len(payload)))) == ROWS
+
+
+@pytest.mark.parametrize("chunks, expected", [
+    ([b"[1, 2", b"3]"], [1, 23]),
+    ([b"[1", b".5]"], [1.5]),
+    ([b"[tr", b"ue, nu", b"ll]"], [True, None]),
+    ([b"  [ ] "], []),
+])
+def test_scalars_split_across_chunks(chunks, expected):
+    assert list(iter_json_array(chunks)) == expected
+
+
+@pytest.mark.parametrize("chunks", [
+    [b'[{"a":1}'],
+    [b'[{"a":1}', b","],
+    [b'[{"a":1}, {"a"'],
+    [b"[1, 2"],
+    [b"["],
+    [],
+])
+def test_truncated_stream_raises(chunks):
+    with pytest.raises(ValueError, match="途中で終了"):
+        list(iter_json_array(chunks))
+
+
+def test_random_truncation_raises():
+    payload = json.dumps(ROWS, ensure_ascii=False).encode("utf-8")
+    rng = random.Random(1)
+    for cut in range(len(payload)):
+        with pytest.raises(ValueError):
+            list(iter_json_array(_random_chunks(payload[:cut], rng) if cut > 1 else [payload[:cut]]))
+
+
+@pytest.mark.parametrize("chunks", [[b'{"a": 1}'], [b"[1 2]"], [b"[1,]"]])
+def test_malformed_array_raises(chunks):
+    with pytest.raises(ValueError):
+        list(iter_json_array(chunks))
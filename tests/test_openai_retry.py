@@ -0,0 +1,130 @@
+# tests/test_openai_retry.py
+# OpenAIClient の再試行（429 の retry-after に従う待ち・5xx・再試行しないエラー）をローカルの模擬サーバーで確認
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("openai")
+pytest.importorskip("tiktoken")
+
+from helper_api import OpenAIClient
+from helper_ratelimit import RateLimitScheduler
+from helper_usage import UsageLedger
+
+COMPLETION = {
+    "id": "chatcmpl-1",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "gpt-4o-mini",
+    "choices": [{"index": 0, "finish_reason": "stop",
+                 "message": {"role": "assistant", "content": "pong"}}],
+    "usage": {"prompt_tokens": 3, "completion_tokens": 1, "total_tokens": 4},
+}
+
+
+class FakeOpenAIServer:
+    """/v1/chat/completions に、用意した応答（ステータス, ヘッダー）を順に返す模擬サーバー"""
+
+    def __init__(self, script):
+        self.script = list(script)
+        self.arrivals = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                server.arrivals.append(time.monotonic())
+                status, headers = server.script.pop(0) if server.script else (200, {})
+                if status == 200:
+                    body = COMPLETION
+                else:
+                    body = {"error": {"message": f"status {status}", "type": "test", "code": None}}
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_port}/v1"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def make_client(tmp_path):
+    servers = []
+
+    def make(script, max_retries=3):
+        server = FakeOpenAIServer(script)
+        servers.append(server)
+        scheduler = RateLimitScheduler(backoff_base=0.05, backoff_max=2.0)
+        client = OpenAIClient(api_key="test", base_url=server.base_url, scheduler=scheduler,
+                              usage_ledger=UsageLedger(str(tmp_path / "ledger")))
+        client.max_retries = max_retries
+        return client, server
+
+    yield make
+    for server in servers:
+        server.close()
+
+
+def _chat(client):
+    params = {"model": "gpt-4o-mini", "messages": [{"role": "user", "content": "ping"}]}
+    return client._request(client.client.chat.completions, params, "interactive", estimate=10)
+
+
+def test_429_waits_for_retry_after_then_succeeds(make_client):
+    client, server = make_client([(429, {"retry-after-ms": "200"}), (429, {"retry-after-ms": "200"})])
+
+    result = _chat(client)
+
+    assert result.choices[0].message.content == "pong"
+    assert len(server.arrivals) == 3
+    gaps = [later - earlier for earlier, later in zip(server.arrivals, server.arrivals[1:])]
+    assert all(gap >= 0.18 for gap in gaps)
+    stats = client.scheduler.stats()
+    assert stats["throttled"] == 2 and stats["retries"] == 2
+    assert stats["in_flight"] == 0
+
+
+def test_5xx_is_retried_with_backoff(make_client):
+    client, server = make_client([(500, {}), (503, {})])
+
+    assert _chat(client).choices[0].message.content == "pong"
+    assert len(server.arrivals) == 3
+    stats = client.scheduler.stats()
+    assert stats["retries"] == 2 and stats["throttled"] == 0
+
+
+def test_gives_up_after_max_retries(make_client):
+    client, server = make_client([(503, {})] * 5, max_retries=2)
+
+    with pytest.raises(Exception) as excinfo:
+        _chat(client)
+    assert getattr(excinfo.value, "status_code", None) == 503
+    assert len(server.arrivals) == 3
+    assert client.scheduler.stats()["in_flight"] == 0
+
+
+def test_client_errors_are_not_retried(make_client):
+    client, server = make_client([(400, {})])
+
+    with pytest.raises(Exception) as excinfo:
+        _chat(client)
+    assert getattr(excinfo.value, "status_code", None) == 400
+    assert len(server.arrivals) == 1
+    assert client.scheduler.stats()["retries"] == 0
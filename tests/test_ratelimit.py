@@ -0,0 +1,239 @@
+# tests/test_ratelimit.py
+# RateLimitScheduler のレーン優先度・batch_share・429 時の停止・ヘッダー解釈の確認（外部依存なし）
+
+import asyncio
+import threading
+import time
+from email.utils import formatdate
+
+import pytest
+
+from helper_ratelimit import (
+    RateLimitScheduler,
+    RateLimitTimeout,
+    parse_duration,
+    parse_rate_limit_headers,
+    retry_after_seconds,
+)
+
+
+# ==================================================
+# ヘッダーの解釈
+# ==================================================
+@pytest.mark.parametrize("value, expected", [
+    ("20ms", 0.02),
+    ("1s", 1.0),
+    ("6m0s", 360.0),
+    ("1h2m3.5s", 3723.5),
+    ("2.5", 2.5),
+    (3, 3.0),
+    (None, None),
+    ("soon", None),
+])
+def test_parse_duration(value, expected):
+    if expected is None:
+        assert parse_duration(value) is None
+    else:
+        assert parse_duration(value) == pytest.approx(expected)
+
+
+def test_retry_after_prefers_milliseconds_and_ignores_case():
+    assert retry_after_seconds({"Retry-After-Ms": "250", "Retry-After": "9"}) == pytest.approx(0.25)
+    assert retry_after_seconds({"retry-after": "3"}) == 3.0
+    assert retry_after_seconds({"retry-after": "-1"}) == 0.0
+    assert retry_after_seconds({"retry-after": "later"}) is None
+    assert retry_after_seconds({}) is None
+    assert retry_after_seconds(None) is None
+
+
+def test_retry_after_http_date():
+    delay = retry_after_seconds({"retry-after": formatdate(time.time() + 30, usegmt=True)})
+    assert 28 <= delay <= 31
+
+
+def test_parse_rate_limit_headers():
+    parsed = parse_rate_limit_headers({
+        "x-ratelimit-limit-requests": "500",
+        "x-ratelimit-remaining-requests": "499",
+        "x-ratelimit-reset-requests": "120ms",
+        "x-ratelimit-limit-tokens": "200000",
+        "x-ratelimit-remaining-tokens": "bogus",
+        "x-ratelimit-reset-tokens": "6m0s",
+    })
+    assert parsed == {
+        "requests": {"limit": 500.0, "remaining": 499.0, "reset": pytest.approx(0.12)},
+        "tokens"  : {"limit": 200000.0, "reset": 360.0},
+    }
+    assert parse_rate_limit_headers(None) == {}
+
+
+# ==================================================
+# レーン・同時実行数
+# ==================================================
+def _acquire_in_thread(scheduler, lane, order, started):
+    def run():
+        started.set()
+        ticket = scheduler.acquire(10, lane, timeout=5)
+        order.append(lane)
+        scheduler.release(ticket)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def _wait_for_waiters(scheduler, count):
+    deadline = time.monotonic() + 5
+    while sum(scheduler.stats()["waiting"].values()) < count:
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def test_interactive_lane_overtakes_queued_batch():
+    scheduler = RateLimitScheduler(max_concurrency=1)
+    held = scheduler.acquire(10, "interactive")
+    order = []
+    threads = [_acquire_in_thread(scheduler, "batch", order, threading.Event())]
+    _wait_for_waiters(scheduler, 1)
+    threads.append(_acquire_in_thread(scheduler, "interactive", order, threading.Event()))
+    _wait_for_waiters(scheduler, 2)
+
+    scheduler.release(held)
+    for thread in threads:
+        thread.join(5)
+    assert order == ["interactive", "batch"]
+
+
+def test_batch_share_keeps_slots_for_interactive():
+    scheduler = RateLimitScheduler(max_concurrency=4, batch_share=0.5)
+    assert scheduler.batch_slots == 2
+    batch = [scheduler.acquire(10, "batch") for _ in range(2)]
+
+    with pytest.raises(RateLimitTimeout):
+        scheduler.acquire(10, "batch", timeout=0.1)
+    interactive = scheduler.acquire(10, "interactive", timeout=0.1)
+    assert scheduler.stats()["batch_in_flight"] == 2
+    assert scheduler.stats()["in_flight"] == 3
+    assert scheduler.stats()["timeouts"] == 1
+
+    scheduler.release(batch[0])
+    scheduler.release(scheduler.acquire(10, "batch", timeout=0.1))
+    for ticket in batch[1:] + [interactive]:
+        scheduler.release(ticket)
+    assert scheduler.stats()["in_flight"] == 0
+
+
+def test_release_is_idempotent_and_returns_unused_tokens():
+    scheduler = RateLimitScheduler(tokens_per_minute=1000)
+    ticket = scheduler.acquire(600)
+    assert scheduler.stats()["tokens_available"] == pytest.approx(400, abs=5)
+    scheduler.release(ticket, used_tokens=100)
+    scheduler.release(ticket, used_tokens=100)
+    stats = scheduler.stats()
+    assert stats["in_flight"] == 0
+    assert stats["tokens_available"] == pytest.approx(900, abs=5)
+
+
+def test_token_bucket_limits_throughput():
+    scheduler = RateLimitScheduler(requests_per_minute=600, tokens_per_minute=60_000)  # 10 req/s
+    for _ in range(600):
+        scheduler.release(scheduler.acquire(0))
+    started = time.monotonic()
+    scheduler.release(scheduler.acquire(0, timeout=2))
+    assert 0.05 <= time.monotonic() - started <= 0.5
+
+
+# ==================================================
+# 429・バックオフ
+# ==================================================
+def test_429_blocks_every_lane_until_retry_after():
+    scheduler = RateLimitScheduler()
+    delay = scheduler.backoff(0, {"retry-after-ms": "300"}, throttled=True)
+    assert delay == pytest.approx(0.3)
+    assert scheduler.stats()["blocked_for"] > 0.2
+
+    started = time.monotonic()
+    scheduler.release(scheduler.acquire(10, "batch", timeout=2))
+    assert time.monotonic() - started >= 0.25
+    stats = scheduler.stats()
+    assert stats["throttled"] == 1 and stats["retries"] == 1
+
+
+def test_429_drains_only_the_exhausted_bucket():
+    scheduler = RateLimitScheduler(requests_per_minute=600, tokens_per_minute=60_000)
+    scheduler.backoff(0, {
+        "retry-after": "0",
+        "x-ratelimit-remaining-requests": "100",
+        "x-ratelimit-remaining-tokens": "0",
+    }, throttled=True)
+    stats = scheduler.stats()
+    assert stats["tokens_available"] <= 1000  # 空にされ、補充が始まったばかり
+    assert stats["requests_available"] == pytest.approx(100, abs=1)
+
+
+def test_429_without_retry_after_uses_reset_of_exhausted_bucket():
+    scheduler = RateLimitScheduler(backoff_max=30)
+    delay = scheduler.backoff(0, {
+        "x-ratelimit-remaining-requests": "0",
+        "x-ratelimit-reset-requests": "1.5s",
+        "x-ratelimit-remaining-tokens": "5000",
+        "x-ratelimit-reset-tokens": "20s",
+    }, throttled=True)
+    assert delay == pytest.approx(1.5)
+
+
+def test_backoff_without_headers_is_capped_exponential_jitter():
+    scheduler = RateLimitScheduler(backoff_base=0.5, backoff_max=3.0)
+    for attempt in range(8):
+        for _ in range(50):
+            delay = scheduler.backoff(attempt)
+            assert 0 <= delay <= min(3.0, 0.5 * 2 ** attempt)
+    assert scheduler.stats()["throttled"] == 0
+    assert scheduler.stats()["blocked_for"] == 0
+
+
+def test_retry_after_is_capped_by_backoff_max():
+    scheduler = RateLimitScheduler(backoff_max=2.0)
+    assert scheduler.backoff(0, {"retry-after": "120"}, throttled=True) == 2.0
+
+
+def test_success_headers_adapt_limits_and_remaining():
+    scheduler = RateLimitScheduler(requests_per_minute=500, tokens_per_minute=200_000)
+    ticket = scheduler.acquire(100)
+    scheduler.release(ticket, used_tokens=100, headers={
+        "x-ratelimit-limit-requests": "60",
+        "x-ratelimit-remaining-requests": "5",
+    })
+    stats = scheduler.stats()
+    assert stats["requests_limit"] == 60
+    assert stats["requests_available"] == pytest.approx(5, abs=1)
+
+
+# ==================================================
+# asyncio
+# ==================================================
+def test_async_acquire_respects_lane_priority():
+    async def scenario():
+        scheduler = RateLimitScheduler(max_concurrency=1)
+        held = await scheduler.aacquire(10)
+        order = []
+
+        async def worker(lane):
+            ticket = await scheduler.aacquire(10, lane, timeout=5)
+            order.append(lane)
+            scheduler.release(ticket)
+
+        batch = asyncio.create_task(worker("batch"))
+        await asyncio.sleep(0.02)
+        interactive = asyncio.create_task(worker("interactive"))
+        await asyncio.sleep(0.02)
+        scheduler.release(held)
+        await asyncio.gather(batch, interactive)
+        return order
+
+    assert asyncio.run(scenario()) == ["interactive", "batch"]
+
+
+def test_unknown_lane_is_rejected():
+    with pytest.raises(ValueError):
+        RateLimitScheduler().acquire(lane="bulk")
@@ -0,0 +1,58 @@
+# tests/test_trend.py
+# helper_trend の当てはめ・予測区間・補完・移動統計を合成データで確認
+
+import math
+
+import numpy as np
+import pytest
+
+from helper_trend import (
+    densify_daily,
+    fit_trend,
+    forecast,
+    rolling_mean,
+    rolling_std,
+    synthetic_daily_sales,
+    weekday_index,
+)
+
+N_DAYS = 730
+
+
+@pytest.fixture(scope="module")
+def data():
+    return synthetic_daily_sales(N_DAYS)
+
+
+def test_fit_recovers_trend_seasonality_and_noise(data):
+    fit = fit_trend(data["values"], weekday_index(data["days"]))
+
+    assert fit.slope == pytest.approx(data["slope"], rel=0.1)
+    assert np.abs(fit.seasonal - data["pattern"]).max() <= 3 * data["noise"] / math.sqrt(N_DAYS / 7)
+    assert fit.residual_std == pytest.approx(data["noise"], rel=0.1)
+
+
+def test_forecast_interval_covers_future_values(data):
+    # 学習期間の後を実際に生成して被覆率を確認
+    extended = synthetic_daily_sales(N_DAYS + 90)
+    result = forecast(data["days"], data["values"], horizon=90)
+    actual = extended["values"][N_DAYS:]
+
+    coverage = float(np.mean((actual >= result["lower"]) & (actual <= result["upper"])))
+    assert coverage >= 0.85
+
+
+def test_densify_fills_missing_days_and_sums_duplicates():
+    days, values = densify_daily(["2024-01-03", "2024-01-01", "2024-01-03"], [1.0, 2.0, 3.0])
+
+    assert days.size == 3
+    assert values.tolist() == [2.0, 0.0, 4.0]
+
+
+def test_rolling_statistics_match_naive_implementation(data):
+    sample = data["values"][:50]
+    naive_mean = np.array([sample[max(0, i - 6):i + 1].mean() for i in range(sample.size)])
+    naive_std = np.array([sample[max(0, i - 6):i + 1].std(ddof=1) if i else np.nan for i in range(sample.size)])
+
+    np.testing.assert_allclose(rolling_mean(sample, 7), naive_mean)
+    np.testing.assert_allclose(rolling_std(sample, 7), naive_std)